@@ -0,0 +1 @@
+"""Benchmarks do Sistema de Ponto (executar com ``python -m benchmarks.<modulo>``)"""
@@ -0,0 +1,119 @@
+"""Varredura de exceções de ponto: carga inicial, batidas novas e leitura pela tela.
+
+Gera ``--funcionarios`` x ``--dias`` de batidas sintéticas com ruído
+(faltas, duplicadas, extras) e mede:
+
+* ``carga``: uma passada do ``AnomaliasPonto`` pelas colunas do log;
+* ``incremental``: as mesmas batidas entregues uma a uma em ordem de
+  chegada (``registrar``), e em lotes embaralhados (fora de ordem, refazendo
+  os dias tocados);
+* ``tela``: as exceções de um mês lidas da lista pronta contra a varredura
+  completa do log que cada tela faria sem ela.
+
+Confere que carga, incremental e um laço ingênuo dia a dia chegam às mesmas
+exceções.
+
+    python -m benchmarks.bench_anomalias --funcionarios 2000 --dias 365
+"""
+import argparse
+import calendar
+import random
+import time
+from typing import Dict, List, Tuple
+
+from benchmarks.sintetico import INICIO_PADRAO, gerar_batidas, gerar_usuarios
+from ponto.anomalias import AnomaliasPonto, _Dia, CODIGOS_JORNADA, SEGUNDOS_DIA, data_dia
+from ponto.colunar import LogBatidas, para_segundos
+from ponto.indice import IndiceBatidas
+
+
+def ingenuo(batidas: List[Tuple[str, str, int]], janela: int, limite: int) -> List[Tuple[str, str, int]]:
+    """Agrupa por (usuário, dia) e roda um dia novo da máquina para cada grupo"""
+    dias: Dict[Tuple[str, int], List[Tuple[int, int]]] = {}
+    for usuario, tipo, instante in batidas:
+        if tipo in CODIGOS_JORNADA:
+            dias.setdefault((usuario, instante // SEGUNDOS_DIA), []).append((instante, CODIGOS_JORNADA[tipo]))
+    excecoes = []
+    for (usuario, dia), batidas_dia in dias.items():
+        estado = _Dia(dia)
+        for instante, codigo in sorted(batidas_dia, key=lambda b: b[0]):
+            estado.batida(codigo, instante, janela)
+        mascara = estado.resultado(limite)
+        if mascara:
+            excecoes.append((dia, usuario, mascara))
+    excecoes.sort()
+    return [(usuario, data_dia(dia), mascara) for dia, usuario, mascara in excecoes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--funcionarios', type=int, default=2000)
+    parser.add_argument('--dias', type=int, default=365)
+    parser.add_argument('--lote', type=int, default=500, help="batidas por lote fora de ordem")
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    usuarios = list(gerar_usuarios(args.funcionarios, args.semente))
+    brutas = list(gerar_batidas(usuarios, args.dias, faltas=0.02, duplicadas=0.02, extras=0.1,
+                                semente=args.semente))
+    batidas = [(u, t, para_segundos(ts)) for u, t, ts in brutas]
+    log = LogBatidas()
+    log.anexar_lote(range(len(brutas)), brutas)
+    indice = IndiceBatidas(log)
+    n = len(batidas)
+    print(f"{n:,} batidas | {args.funcionarios:,} funcionários | {args.dias} dias")
+
+    def por_minuto(segundos: float) -> str:
+        return f"{segundos:>7.2f} s  {n / segundos * 60 / 1e6:>7.1f} M batidas/min"
+
+    carga = AnomaliasPonto()
+    inicio = time.perf_counter()
+    carga.carregar(log.colunas())
+    print(f"{'carga (uma passada)':<34} {por_minuto(time.perf_counter() - inicio)}")
+
+    def batidas_dia(usuario: str, dia: int) -> List[Tuple[str, int]]:
+        return [(log.linha(linha)['tipo'], log.segundos(linha))
+                for linha in indice.linhas_dia(usuario, data_dia(dia))]
+
+    uma_a_uma = AnomaliasPonto()
+    inicio = time.perf_counter()
+    for batida in batidas:
+        uma_a_uma.registrar((batida,), batidas_dia)
+    print(f"{'incremental (uma a uma)':<34} {por_minuto(time.perf_counter() - inicio)}")
+
+    # Lotes embaralhados: metade da base em ordem, o resto chega fora de ordem
+    lotes = AnomaliasPonto()
+    metade = n // 2
+    lotes.registrar(batidas[:metade], batidas_dia)
+    resto = batidas[metade:]
+    random.Random(args.semente).shuffle(resto)
+    inicio = time.perf_counter()
+    for i in range(0, len(resto), args.lote):
+        lotes.registrar(resto[i:i + args.lote], batidas_dia)
+    decorrido = time.perf_counter() - inicio
+    print(f"{'incremental (lotes fora de ordem)':<34} {decorrido:>7.2f} s  "
+          f"{len(resto) / decorrido * 60 / 1e6:>7.1f} M batidas/min")
+
+    esperado = ingenuo(batidas, carga.janela, carga.limite)
+    assert carga.excecoes() == esperado, "carga difere do laço dia a dia"
+    assert uma_a_uma.excecoes() == esperado, "incremental difere do laço dia a dia"
+    assert lotes.excecoes() == esperado, "lotes fora de ordem diferem do laço dia a dia"
+
+    # Tela: exceções de um mês, da lista pronta x varrendo o log inteiro
+    ultimo = calendar.monthrange(INICIO_PADRAO.year, INICIO_PADRAO.month)[1]
+    mes_inicio, mes_fim = INICIO_PADRAO.isoformat(), INICIO_PADRAO.replace(day=ultimo).isoformat()
+    inicio = time.perf_counter()
+    do_mes = carga.excecoes(mes_inicio, mes_fim)
+    lista = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    reescaneado = AnomaliasPonto()
+    reescaneado.carregar(log.colunas())
+    assert reescaneado.excecoes(mes_inicio, mes_fim) == do_mes
+    varredura = time.perf_counter() - inicio
+    print(f"tela (1 mês, {len(do_mes):,} exceções): lista {lista * 1e3:.2f} ms x "
+          f"varredura completa {varredura * 1e3:.0f} ms")
+    print(f"{len(esperado):,} dias com exceção; carga, incremental e laço dia a dia iguais")
+
+
+if __name__ == '__main__':
+    main()
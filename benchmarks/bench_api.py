@@ -0,0 +1,171 @@
+"""Teste de carga do serviço de ingestão (``ponto.api``): pedidos/s e p99.
+
+Sobe ``python -m ponto.api`` num processo à parte, sobre uma base SQLite
+nova, e abre ``--clientes`` conexões keep-alive simultâneas com um cliente
+HTTP mínimo em ``asyncio`` (no lugar dos relógios). Cada cliente envia
+``--pedidos`` batidas com ``Idempotency-Key`` própria; uma fração
+``--repeticoes`` é reenviada com a mesma chave, como um relógio que não
+recebeu a resposta. Depois repete a rodada com ``/batidas/lote``.
+
+Ao final confere, pelo total de batidas do serviço, que nenhuma repetição
+virou batida nova.
+
+    python -m benchmarks.bench_api --clientes 1000 --pedidos 20
+    python -m benchmarks.bench_api --endereco unix:/tmp/ponto_bench.sock
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USUARIOS = ['maria', 'joao', 'admin']
+TIPOS = ['entrada', 'almoco_saida', 'almoco_retorno', 'saida']
+
+
+def porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def subir_servidor(endereco: str, pasta: str) -> subprocess.Popen:
+    env = dict(os.environ, PONTO_STORE='sqlite', PONTO_DB=os.path.join(pasta, 'ponto.db'),
+               PYTHONPATH=RAIZ, PONTO_METRICAS='0')
+    env.pop('PONTO_API_TOKEN', None)
+    processo = subprocess.Popen([sys.executable, '-m', 'ponto.api', '--endereco', endereco],
+                                env=env, stdout=subprocess.PIPE, text=True)
+    linha = processo.stdout.readline()
+    if not linha.startswith('servindo'):
+        processo.kill()
+        raise RuntimeError("o serviço não subiu")
+    return processo
+
+
+class Cliente:
+    """Conexão HTTP/1.1 keep-alive com um pedido por vez"""
+
+    def __init__(self, endereco: str):
+        self.endereco = endereco
+        self.leitor: Optional[asyncio.StreamReader] = None
+        self.escritor: Optional[asyncio.StreamWriter] = None
+
+    async def conectar(self):
+        if self.endereco.startswith('unix:'):
+            self.leitor, self.escritor = await asyncio.open_unix_connection(self.endereco[len('unix:'):])
+        else:
+            host, _, porta = self.endereco.rpartition(':')
+            self.leitor, self.escritor = await asyncio.open_connection(host, int(porta))
+
+    async def pedido(self, metodo: str, caminho: str, corpo: Optional[Dict] = None,
+                     cabecalhos: Optional[Dict[str, str]] = None) -> Tuple[int, Dict]:
+        conteudo = json.dumps(corpo).encode() if corpo is not None else b''
+        extras = ''.join(f"{k}: {v}\r\n" for k, v in (cabecalhos or {}).items())
+        self.escritor.write(f"{metodo} {caminho} HTTP/1.1\r\nHost: ponto\r\n"
+                            f"Content-Type: application/json\r\nContent-Length: {len(conteudo)}\r\n"
+                            f"{extras}\r\n".encode() + conteudo)
+        await self.escritor.drain()
+        cabecalho = (await self.leitor.readuntil(b'\r\n\r\n')).decode('latin-1')
+        status = int(cabecalho.split(' ', 2)[1])
+        tamanho = next(int(linha.split(':', 1)[1]) for linha in cabecalho.split('\r\n')
+                       if linha.lower().startswith('content-length:'))
+        return status, json.loads(await self.leitor.readexactly(tamanho))
+
+    def fechar(self):
+        self.escritor.close()
+
+
+async def total_batidas(endereco: str) -> int:
+    cliente = Cliente(endereco)
+    await cliente.conectar()
+    _, corpo = await cliente.pedido('GET', '/saude')
+    cliente.fechar()
+    return corpo['batidas']
+
+
+async def rodada(endereco: str, clientes: int, pedidos: int, repeticoes: float, lote: int,
+                 semente: int) -> Tuple[List[float], int, float]:
+    """(latências em s, batidas únicas enviadas, duração) de uma rodada"""
+    aleatorio = random.Random(semente)
+    latencias: List[float] = []
+    unicas = 0
+    conectados = [Cliente(endereco) for _ in range(clientes)]
+    await asyncio.gather(*(c.conectar() for c in conectados))
+
+    # Chaves únicas entre rodadas e execuções, baratas de gerar
+    prefixo = uuid.uuid4().hex[:12]
+    sequencia = iter(range(10 ** 12))
+
+    async def executar(cliente: Cliente):
+        nonlocal unicas
+        for _ in range(pedidos):
+            itens = [{'usuario': aleatorio.choice(USUARIOS), 'tipo': aleatorio.choice(TIPOS),
+                      'chave': f"{prefixo}-{next(sequencia)}"} for _ in range(lote)]
+            unicas += len(itens)
+            envios = 2 if aleatorio.random() < repeticoes else 1
+            for _ in range(envios):
+                inicio = time.perf_counter()
+                if lote == 1:
+                    item = dict(itens[0])
+                    chave = item.pop('chave')
+                    status, _ = await cliente.pedido('POST', '/batidas', item, {'Idempotency-Key': chave})
+                    assert status in (200, 201), status
+                else:
+                    status, corpo = await cliente.pedido('POST', '/batidas/lote', {'batidas': itens})
+                    assert status == 200 and all(r['status'] in (200, 201) for r in corpo['resultados'])
+                latencias.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(executar(c) for c in conectados))
+    duracao = time.perf_counter() - inicio
+    for cliente in conectados:
+        cliente.fechar()
+    return latencias, unicas, duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clientes', type=int, default=1000)
+    parser.add_argument('--pedidos', type=int, default=20, help="pedidos por cliente")
+    parser.add_argument('--repeticoes', type=float, default=0.05, help="fração reenviada com a mesma chave")
+    parser.add_argument('--lote', type=int, default=50, help="batidas por pedido na rodada de lote")
+    parser.add_argument('--endereco', help="host:porta ou unix:/caminho (padrão: porta livre local)")
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix='bench_api_')
+    endereco = args.endereco or f"127.0.0.1:{porta_livre()}"
+    servidor = subir_servidor(endereco, pasta)
+    try:
+        print(f"{args.clientes} clientes simultâneos em {endereco}, {args.pedidos} pedidos cada "
+              f"(cliente e serviço dividem {os.cpu_count()} CPU)")
+        print(f"{'rota':<16} {'pedidos/s':>10} {'batidas/s':>10} {'p50':>9} {'p99':>9}")
+        for rotulo, lote in (('/batidas', 1), ('/batidas/lote', args.lote)):
+            antes = asyncio.run(total_batidas(endereco))
+            latencias, unicas, duracao = asyncio.run(
+                rodada(endereco, args.clientes, args.pedidos, args.repeticoes, lote, args.semente))
+            gravadas = asyncio.run(total_batidas(endereco)) - antes
+            latencias.sort()
+            p99 = latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))]
+            print(f"{rotulo:<16} {len(latencias) / duracao:>10,.0f} {unicas / duracao:>10,.0f} "
+                  f"{statistics.median(latencias) * 1e3:>6.1f} ms {p99 * 1e3:>6.1f} ms")
+            if gravadas != unicas:
+                print(f"ERRO: {gravadas} batidas gravadas para {unicas} chaves únicas")
+                sys.exit(1)
+        print("nenhuma repetição gravou batida nova")
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark de escrita do SQLiteStore sob pico de logins.
+
+Simula o horário das 08:00-09:00: ``--usuarios`` pessoas fazendo login ao
+mesmo tempo, cada login gerando uma batida de entrada a partir de uma thread
+própria (como as sessões do Streamlit). Mede batidas/s sustentadas e a
+latência de escrita p50/p99, com e sem group commit.
+
+    python -m benchmarks.bench_armazenamento --usuarios 500 --rodadas 4
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from ponto.armazenamento import SQLiteStore
+
+
+def percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def rajada_de_logins(store: SQLiteStore, usuarios: int, rodadas: int) -> Dict:
+    latencias: List[float] = []
+    lock = threading.Lock()
+    largada = threading.Barrier(usuarios)
+
+    def sessao(indice: int):
+        usuario = f"func{indice:05d}"
+        largada.wait()
+        for _ in range(rodadas):
+            inicio = time.perf_counter()
+            store.registrar(usuario, 'entrada', datetime.now())
+            decorrido = time.perf_counter() - inicio
+            with lock:
+                latencias.append(decorrido)
+
+    threads = [threading.Thread(target=sessao, args=(i,)) for i in range(usuarios)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = time.perf_counter() - inicio
+
+    return {
+        'batidas': len(latencias),
+        'batidas_por_s': len(latencias) / total,
+        'p50_ms': percentil(latencias, 50) * 1000,
+        'p99_ms': percentil(latencias, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--usuarios', type=int, default=500)
+    parser.add_argument('--rodadas', type=int, default=4)
+    parser.add_argument('--sincrono', default='NORMAL', choices=['OFF', 'NORMAL', 'FULL'])
+    args = parser.parse_args()
+
+    for rotulo, max_lote in [('sem group commit', 1), ('group commit', 256)]:
+        with tempfile.TemporaryDirectory() as pasta:
+            store = SQLiteStore(os.path.join(pasta, 'bench.db'),
+                                max_lote=max_lote, sincrono=args.sincrono)
+            resultado = rajada_de_logins(store, args.usuarios, args.rodadas)
+            store.fechar()
+        print(f"{rotulo:>18}: {resultado['batidas']} batidas | "
+              f"{resultado['batidas_por_s']:,.0f} batidas/s | "
+              f"p50 {resultado['p50_ms']:.2f} ms | p99 {resultado['p99_ms']:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""Consultas sobre o arquivo frio (Arrow/Parquet) contra o log vivo, em 5 anos de batidas.
+
+Carrega ``--anos`` de batidas sintéticas de ``--funcionarios``, mede as
+consultas com tudo vivo no log, fecha e arquiva todos os meses menos os
+``--meses-vivos`` últimos e mede de novo: primeiro com as partições ainda
+fechadas (frio: inclui abrir e mapear os arquivos) e depois já mapeadas.
+Confere que cada consulta devolve o mesmo resultado nos dois casos e mostra
+o tamanho do log vivo, a carga inicial e o tamanho do arquivo no disco.
+
+    python -m benchmarks.bench_arquivo --funcionarios 300 --anos 5
+    python -m benchmarks.bench_arquivo --formato parquet
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+from benchmarks.sintetico import gerar_batidas, gerar_usuarios
+from ponto.armazenamento import MemoriaStore
+from ponto.arquivo import ArquivoBatidas
+from ponto.dados import CamadaDados
+from ponto.fechamento import FechamentosMes, meses_periodo
+
+INICIO = date(2020, 1, 1)
+
+
+def consultas(dados: CamadaDados, usuarios: List[str], todos: List[str]) -> Dict[str, Callable]:
+    """Consultas medidas; cada uma percorre a amostra de usuários"""
+    return {
+        "histórico completo": lambda: [[dict(b) for b in dados.batidas_usuario(u)] for u in usuarios],
+        "1 mês antigo": lambda: [[dict(b) for b in dados.batidas_usuario(u, '2021-03-01', '2021-03-31')]
+                                 for u in usuarios],
+        "1 dia antigo": lambda: [[dict(b) for b in dados.batidas_usuario(u, '2021-03-10', '2021-03-10')]
+                                 for u in usuarios],
+        "página + resumo 5 anos": lambda: [
+            ([dict(b) for b in dados.pagina_batidas(u, None, None, 2000, 100)], dados.resumo_periodo(u))
+            for u in usuarios],
+        "tabela de 1 ano": lambda: [dados.tabela_usuario(u, '2021-01-01', '2021-12-31') for u in usuarios],
+        "exportação 1 mês (todos)": lambda: list(dados.iterar_linhas(todos, '2021-06-01', '2021-06-30')),
+    }
+
+
+def medir(funcao: Callable[[], object], amostras: int) -> float:
+    tempos = []
+    for _ in range(amostras):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def iguais(a, b) -> bool:
+    if isinstance(a, pd.DataFrame):
+        return a.reset_index(drop=True).equals(b.reset_index(drop=True))
+    if isinstance(a, (list, tuple)):
+        return len(a) == len(b) and all(iguais(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def carga(store: MemoriaStore, usuarios: Dict, pasta: str, formato: str) -> float:
+    inicio = time.perf_counter()
+    CamadaDados(store, usuarios, FechamentosMes(os.path.join(pasta, 'fechamentos')),
+                ArquivoBatidas(os.path.join(pasta, 'arquivo'), formato))
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--funcionarios', type=int, default=300)
+    parser.add_argument('--anos', type=int, default=5)
+    parser.add_argument('--meses-vivos', type=int, default=12)
+    parser.add_argument('--formato', choices=['arrow', 'parquet'], default='arrow')
+    parser.add_argument('--amostra', type=int, default=20, help="usuários por consulta")
+    parser.add_argument('--amostras', type=int, default=5)
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    usuarios = gerar_usuarios(args.funcionarios, args.semente)
+    pasta = tempfile.mkdtemp(prefix='bench_arquivo_')
+    store = MemoriaStore()
+    dados = CamadaDados(store, usuarios, FechamentosMes(os.path.join(pasta, 'fechamentos')),
+                        ArquivoBatidas(os.path.join(pasta, 'arquivo'), args.formato))
+    fim = date(INICIO.year + args.anos, 1, 1)
+    dados.registrar_lote(list(gerar_batidas(list(usuarios), (fim - INICIO).days, INICIO,
+                                            faltas=0.02, extras=0.1, semente=args.semente)))
+    todos = dados.usuarios_com_batidas()
+    amostra = random.Random(args.semente).sample(todos, min(args.amostra, len(todos)))
+    vivas = len(dados.log)
+    carga_antes = carga(store, usuarios, pasta, args.formato)
+    print(f"{vivas:,} batidas | {args.funcionarios:,} funcionários | {args.anos} anos | "
+          f"formato {args.formato} | amostra de {len(amostra)} usuários")
+
+    casos = consultas(dados, amostra, todos)
+    esperados = {nome: consulta() for nome, consulta in casos.items()}
+    vivo = {nome: medir(consulta, args.amostras) for nome, consulta in casos.items()}
+
+    meses = [mes for mes, _, _ in meses_periodo(INICIO, date(fim.year - 1, 12, 31))][:-args.meses_vivos]
+    inicio = time.perf_counter()
+    for mes in meses:
+        dados.fechar_mes(int(mes[:4]), int(mes[5:7]))
+    dados.arquivar_meses(meses)
+    arquivamento = time.perf_counter() - inicio
+    tamanho = sum(os.path.getsize(os.path.join(raiz, nome))
+                  for raiz, _, nomes in os.walk(os.path.join(pasta, 'arquivo')) for nome in nomes)
+    print(f"fechamento + arquivamento de {len(meses)} meses: {arquivamento:.1f} s | "
+          f"arquivo: {tamanho / 2 ** 20:.1f} MB ({tamanho / (vivas - len(dados.log)):.1f} bytes/batida)")
+    print(f"log vivo: {vivas:,} -> {len(dados.log):,} batidas | carga inicial: "
+          f"{carga_antes:.2f} s -> {carga(store, usuarios, pasta, args.formato):.2f} s")
+
+    # Frio: arquivo recém-aberto, partições ainda não mapeadas
+    frio = {}
+    for nome in casos:
+        dados.arquivo = ArquivoBatidas(os.path.join(pasta, 'arquivo'), args.formato)
+        inicio = time.perf_counter()
+        resultado = consultas(dados, amostra, todos)[nome]()
+        frio[nome] = time.perf_counter() - inicio
+        assert iguais(esperados[nome], resultado), nome
+    quente = {nome: medir(consulta, args.amostras) for nome, consulta in casos.items()}
+    for nome, consulta in casos.items():
+        assert iguais(esperados[nome], consulta()), nome
+
+    print(f"{'consulta':<26} {'vivo':>9} {'frio':>9} {'arquivo':>9} {'arquivo/vivo':>13}")
+    for nome in casos:
+        print(f"{nome:<26} {vivo[nome] * 1e3:>6.1f} ms {frio[nome] * 1e3:>6.1f} ms "
+              f"{quente[nome] * 1e3:>6.1f} ms {quente[nome] / vivo[nome]:>12.2f}x")
+    print("resultados iguais com e sem arquivo")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Memória por milhão de batidas: dicionários x ``LogBatidas`` colunar.
+
+Mede com ``tracemalloc`` a memória alocada para guardar as mesmas batidas
+no layout antigo (um dicionário com ``data``, ``horario`` e ``timestamp``
+por batida) e no log colunar, além do custo de ler uma linha pela view.
+
+    python -m benchmarks.bench_colunar --milhoes 1
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from ponto.armazenamento import montar_batida
+from ponto.colunar import LogBatidas
+
+TIPOS = ['entrada', 'almoco_saida', 'almoco_retorno', 'saida']
+
+
+def eventos(n: int, funcionarios: int):
+    inicio = datetime(2024, 1, 1, 8)
+    for i in range(n):
+        dia, resto = divmod(i, funcionarios * 4)
+        funcionario, k = divmod(resto, 4)
+        yield i + 1, f"func{funcionario:05d}", TIPOS[k], inicio + timedelta(days=dia, hours=3 * k,
+                                                                          seconds=funcionario % 3600)
+
+
+def memoria_mb(construir) -> float:
+    gc.collect()
+    tracemalloc.start()
+    objeto = construir()
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objeto
+    gc.collect()
+    return atual / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--milhoes', type=float, default=1)
+    parser.add_argument('--funcionarios', type=int, default=10000)
+    args = parser.parse_args()
+    n = int(args.milhoes * 1_000_000)
+
+    def dicionarios():
+        return [montar_batida(*e) for e in eventos(n, args.funcionarios)]
+
+    def colunar():
+        log = LogBatidas()
+        for e in eventos(n, args.funcionarios):
+            log.anexar(*e)
+        return log
+
+    mb_dict = memoria_mb(dicionarios)
+    mb_log = memoria_mb(colunar)
+    escala = 1_000_000 / n
+    print(f"{n:,} batidas")
+    print(f"  dicionários: {mb_dict * escala:8.1f} MB por milhão")
+    print(f"  colunar:     {mb_log * escala:8.1f} MB por milhão ({mb_dict / mb_log:.0f}x menor)")
+
+    log = colunar()
+    inicio = time.perf_counter()
+    for linha in range(0, len(log), max(1, len(log) // 100_000)):
+        log.linha(linha)['horario']
+    leituras = len(range(0, len(log), max(1, len(log) // 100_000)))
+    print(f"  leitura de linha pela view: {(time.perf_counter() - inicio) / leituras * 1e6:.2f} µs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Teste de estresse de ``registrar_batida`` com escritores simultâneos.
+
+Sobe ``--processos`` processos sobre a mesma base SQLite, cada um com sua
+``CamadaDados`` e ``--threads`` threads registrando ``--batidas`` batidas
+ao mesmo tempo (todos partem juntos de uma barreira, depois dos imports).
+Ao final confere que:
+
+* nenhuma batida se perdeu: a base tem exatamente as batidas devolvidas;
+* nenhum id se repetiu, nem entre processos;
+* os ids vistos por cada thread são estritamente crescentes;
+* uma ``CamadaDados`` nova, carregada da base, enxerga todas.
+
+Com ``--store memoria`` roda só as threads de um processo, sobre o
+``MemoriaStore``.
+
+    python -m benchmarks.bench_concorrencia --processos 8 --threads 16 --batidas 200
+    python -m benchmarks.bench_concorrencia --store memoria --threads 64
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from benchmarks.sintetico import INICIO_PADRAO, gerar_usuarios
+from ponto.armazenamento import MemoriaStore, SQLiteStore
+from ponto.dados import CamadaDados
+from ponto.ids import no_id
+
+TIPOS = ['entrada', 'almoco_saida', 'almoco_retorno', 'saida']
+INICIO = datetime.combine(INICIO_PADRAO, datetime.min.time())
+
+
+def escrever(dados: CamadaDados, processo: int, threads: int, batidas: int,
+             barreira) -> Tuple[List[List[int]], List[str], float]:
+    """Ids devolvidos por thread, erros e duração das escritas de um processo"""
+    usuarios = dados.listar_usuarios()
+    ids: List[List[int]] = [[] for _ in range(threads)]
+    erros: List[str] = []
+
+    def thread(k: int):
+        barreira.wait()
+        for i in range(batidas):
+            n = (processo * threads + k) * batidas + i
+            try:
+                batida = dados.registrar_batida(usuarios[n % len(usuarios)], TIPOS[i % len(TIPOS)],
+                                                INICIO + timedelta(seconds=n))
+            except Exception as erro:  # noqa: BLE001 - contado e mostrado no relatório
+                erros.append(repr(erro))
+                continue
+            ids[k].append(batida['id'])
+
+    execucoes = [threading.Thread(target=thread, args=(k,)) for k in range(threads)]
+    for execucao in execucoes:
+        execucao.start()
+    inicio = time.perf_counter()
+    for execucao in execucoes:
+        execucao.join()
+    return ids, erros, time.perf_counter() - inicio
+
+
+def processo_escritor(caminho: str, funcionarios: int, processo: int, threads: int,
+                      batidas: int, barreira, resultados):
+    dados = CamadaDados(SQLiteStore(caminho), gerar_usuarios(funcionarios))
+    # A barreira inclui as threads de todos os processos
+    resultados.put((processo,) + escrever(dados, processo, threads, batidas, barreira))
+    dados.store.fechar()
+
+
+def conferir(dados_base: CamadaDados, ids_threads: List[List[int]], esperadas: int, erros: int) -> bool:
+    ids = [i for da_thread in ids_threads for i in da_thread]
+    na_base = [dados_base.log.linha(linha)['id'] for linha in range(len(dados_base.log))]
+    verificacoes = [
+        ("batidas devolvidas", len(ids) == esperadas, f"{len(ids):,} de {esperadas:,} ({erros} erros)"),
+        ("ids únicos", len(set(ids)) == len(ids), f"{len(set(ids)):,} distintos"),
+        ("crescentes por thread", all(a < b for t in ids_threads for a, b in zip(t, t[1:])), ''),
+        ("base = devolvidas", sorted(na_base) == sorted(ids), f"{len(na_base):,} na base"),
+    ]
+    for nome, ok, detalhe in verificacoes:
+        print(f"  {'ok  ' if ok else 'ERRO'} {nome:<22} {detalhe}")
+    return all(ok for _, ok, _ in verificacoes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--store', choices=['sqlite', 'memoria'], default='sqlite')
+    parser.add_argument('--processos', type=int, default=8)
+    parser.add_argument('--threads', type=int, default=16, help="threads por processo")
+    parser.add_argument('--batidas', type=int, default=200, help="batidas por thread")
+    parser.add_argument('--funcionarios', type=int, default=500)
+    args = parser.parse_args()
+
+    usuarios = gerar_usuarios(args.funcionarios)
+    if args.store == 'memoria':
+        args.processos = 1
+        dados = CamadaDados(MemoriaStore(), usuarios)
+        ids, erros, duracao = escrever(dados, 0, args.threads, args.batidas, threading.Barrier(args.threads))
+        por_processo = [(0, ids, erros, duracao)]
+        base = dados
+    else:
+        caminho = os.path.join(tempfile.mkdtemp(prefix='bench_concorrencia_'), 'ponto.db')
+        SQLiteStore(caminho).fechar()
+        contexto = multiprocessing.get_context('spawn')
+        barreira = contexto.Barrier(args.processos * args.threads)
+        resultados = contexto.Queue()
+        processos = [contexto.Process(target=processo_escritor, args=(
+            caminho, args.funcionarios, p, args.threads, args.batidas, barreira, resultados
+        )) for p in range(args.processos)]
+        for processo in processos:
+            processo.start()
+        por_processo = [resultados.get() for _ in processos]
+        for processo in processos:
+            processo.join()
+        base = CamadaDados(SQLiteStore(caminho), usuarios)
+
+    esperadas = args.processos * args.threads * args.batidas
+    duracao = max(d for _, _, _, d in por_processo)
+    ids_threads = [t for _, ids, _, _ in por_processo for t in ids]
+    nos = {no_id(t[0]) for t in ids_threads if t} if args.store == 'sqlite' else set()
+    print(f"{args.store}: {args.processos} processos x {args.threads} threads x {args.batidas} batidas "
+          f"= {esperadas:,} em {duracao:.2f} s ({esperadas / duracao:,.0f} batidas/s, "
+          f"{os.cpu_count()} CPU)" + (f", {len(nos)} nós de id" if nos else ''))
+    for _, _, erros, _ in por_processo:
+        for erro in erros[:3]:
+            print(f"  {erro}")
+    if not conferir(base, ids_threads, esperadas, sum(len(e) for _, _, e, _ in por_processo)):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
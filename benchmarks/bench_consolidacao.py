@@ -0,0 +1,84 @@
+"""Benchmark dos totais materializados e conferência com recálculo completo.
+
+Carrega uma base sintética numa ``CamadaDados`` em memória, registra novas
+batidas pelo caminho normal (atualização incremental), confere os totais
+com ``verificar_consolidado`` e compara o relatório mensal por contrato
+antigo (varredura + ``horas_dia`` por dia) com a consulta materializada.
+
+    python -m benchmarks.bench_consolidacao --funcionarios 200 --dias 90
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.bench_folha import gerar_batidas
+from ponto.armazenamento import MemoriaStore
+from ponto.consolidacao import verificar_consolidado
+from ponto.dados import CamadaDados
+from ponto.folha import horas_dia
+
+CONTRATOS = [{'Contrato A': 70, 'Contrato B': 30}, {'Contrato A': 50, 'Contrato C': 50}]
+
+
+def relatorio_antigo(batidas, usuario, contratos, ano, mes):
+    # Caminho original de calcular_porcentagem_contratos
+    prefixo = f"{ano:04d}-{mes:02d}"
+    dias = sorted({b['data'] for b in batidas if b['usuario'] == usuario and b['data'].startswith(prefixo)})
+    total = 0
+    for data in dias:
+        do_dia = [b for b in batidas if b['usuario'] == usuario and b['data'] == data]
+        total += horas_dia(do_dia, data)['total_horas']
+    return {c: round(total * p / 100, 2) for c, p in contratos.items()}, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--funcionarios', type=int, default=200)
+    parser.add_argument('--dias', type=int, default=90)
+    args = parser.parse_args()
+
+    store = MemoriaStore()
+    for b in gerar_batidas(args.funcionarios, args.dias):
+        store.registrar(b['usuario'], b['tipo'], b['timestamp'])
+    usuarios = {
+        f"func{f:05d}": {'nome': f"Funcionário {f}", 'contratos': CONTRATOS[f % 2]}
+        for f in range(args.funcionarios)
+    }
+
+    inicio = time.perf_counter()
+    dados = CamadaDados(store, usuarios)
+    print(f"carga inicial de {len(store.listar()):,} batidas: {time.perf_counter() - inicio:.2f} s")
+
+    # Novo dia registrado pelo caminho incremental
+    dia = datetime(2024, 1, 1) + timedelta(days=args.dias)
+    inicio = time.perf_counter()
+    registros = 0
+    for f in range(args.funcionarios):
+        for tipo, hora in [('entrada', 8), ('almoco_saida', 12), ('almoco_retorno', 13), ('saida', 17)]:
+            dados.registrar_batida(f"func{f:05d}", tipo, dia.replace(hour=hora, minute=f % 60))
+            registros += 1
+    decorrido = time.perf_counter() - inicio
+    print(f"registrar_batida com atualização incremental: {decorrido / registros * 1e6:.1f} µs/batida")
+
+    divergencias = verificar_consolidado(dados.consolidado, store.listar(), dados.contratos_usuario)
+    print(f"conferência com recálculo completo: {len(divergencias)} divergência(s)")
+    for linha in divergencias[:10]:
+        print('  ', linha)
+
+    batidas = store.listar()
+    usuario = 'func00001'
+    inicio = time.perf_counter()
+    _, total_antigo = relatorio_antigo(batidas, usuario, usuarios[usuario]['contratos'], 2024, 2)
+    t_antigo = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    for _ in range(1000):
+        total_novo = dados.consolidado.horas_mes(usuario, 2024, 2)
+    t_novo = (time.perf_counter() - inicio) / 1000
+    assert abs(total_antigo - total_novo) < 1e-9
+    print(f"relatório mensal: antigo {t_antigo * 1000:.1f} ms | materializado {t_novo * 1e6:.2f} µs")
+    print('horas por contrato (org, 02/2024):',
+          {c: round(h, 2) for c, h in sorted(dados.consolidado.horas_contratos_mes(2024, 2).items())})
+
+
+if __name__ == '__main__':
+    main()
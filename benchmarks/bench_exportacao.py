@@ -0,0 +1,69 @@
+"""Benchmark da exportação em fluxo: tempo e pico de memória por tamanho.
+
+Cada exportação roda num processo próprio, que gera linhas sintéticas sob
+demanda (sem base em memória) e informa o pico de RSS. O pico deve ficar
+estável enquanto o número de linhas cresce.
+
+    python -m benchmarks.bench_exportacao --linhas 10000000 --formatos csv xlsx
+"""
+import argparse
+import multiprocessing
+import resource
+import time
+from datetime import date, timedelta
+from typing import Iterator, Tuple
+
+from ponto.exportacao import arquivo_temporario, exportar_csv, exportar_xlsx
+
+JORNADA = [('entrada', '08:0{}:00'), ('almoco_saida', '12:0{}:00'),
+           ('almoco_retorno', '13:0{}:00'), ('saida', '17:0{}:00')]
+
+
+def linhas_sinteticas(total: int, funcionarios: int = 10000) -> Iterator[Tuple[str, str, str, str]]:
+    """Linhas em ordem de usuário e dia, como ``CamadaDados.iterar_linhas``"""
+    dias = max(1, total // (funcionarios * len(JORNADA)))
+    inicio = date(2024, 1, 1)
+    gerado = 0
+    for f in range(funcionarios):
+        usuario = f"func{f:05d}"
+        for d in range(dias):
+            data = (inicio + timedelta(days=d)).isoformat()
+            for tipo, horario in JORNADA:
+                if gerado == total:
+                    return
+                yield usuario, data, tipo, horario.format(f % 10)
+                gerado += 1
+
+
+def executar(formato: str, linhas: int, fila):
+    exportar = exportar_csv if formato == 'csv' else exportar_xlsx
+    arquivo = arquivo_temporario()
+    inicio = time.perf_counter()
+    exportar(linhas_sinteticas(linhas), arquivo, com_usuario=True)
+    decorrido = time.perf_counter() - inicio
+    tamanho = arquivo.seek(0, 2)
+    arquivo.close()
+    fila.put((decorrido, tamanho, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=10_000_000)
+    parser.add_argument('--formatos', nargs='+', default=['csv', 'xlsx'], choices=['csv', 'xlsx'])
+    args = parser.parse_args()
+
+    tamanhos = sorted({max(1, args.linhas // 100), max(1, args.linhas // 10), args.linhas})
+    for formato in args.formatos:
+        for linhas in tamanhos:
+            fila = multiprocessing.Queue()
+            processo = multiprocessing.Process(target=executar, args=(formato, linhas, fila))
+            processo.start()
+            decorrido, tamanho, pico_mb = fila.get()
+            processo.join()
+            print(f"{formato:>4} | {linhas:>11,} linhas | {decorrido:7.1f} s | "
+                  f"{linhas / decorrido:>9,.0f} linhas/s | arquivo {tamanho / 2**20:8.1f} MB | "
+                  f"pico RSS {pico_mb:6.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Relatórios de 12 meses servidos dos fechamentos contra o recálculo das batidas.
+
+Carrega ``--funcionarios`` com ``--meses`` de batidas sintéticas, fecha
+todos os meses (``CamadaDados.fechar_mes``) e mede, nos dois caminhos:
+
+* ``organização``: o relatório da organização do período inteiro
+  (``relatorio_organizacao`` sobre o log x ``relatorio_periodo`` lendo os
+  instantâneos), com os instantâneos ainda no disco (frio) e já carregados;
+* ``histórico``: a folha diária e o rateio por contrato de um funcionário
+  em cada um dos meses (``calcular_folhas`` x ``Fechamento.folhas``).
+
+Confere que os dois caminhos dão o mesmo resultado e mostra o tamanho dos
+instantâneos.
+
+    python -m benchmarks.bench_fechamento --funcionarios 2000 --meses 12
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+import pandas as pd
+
+from benchmarks.sintetico import INICIO_PADRAO, gerar_batidas, gerar_usuarios
+from ponto.armazenamento import MemoriaStore
+from ponto.dados import CamadaDados
+from ponto.fechamento import FechamentosMes, chave_mes, limites_mes, meses_periodo, relatorio_periodo
+from ponto.folha import calcular_folhas
+from ponto.relatorio_org import relatorio_organizacao
+
+
+def medir(funcao: Callable[[], object], amostras: int) -> float:
+    """Mediana do tempo (s) de ``amostras`` chamadas"""
+    tempos = []
+    for _ in range(amostras):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def ordenado(tabela: pd.DataFrame) -> pd.DataFrame:
+    return tabela.sort_values(list(tabela.columns[:-1])).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--funcionarios', type=int, default=2000)
+    parser.add_argument('--meses', type=int, default=12)
+    parser.add_argument('--amostras', type=int, default=5)
+    args = parser.parse_args()
+
+    usuarios = gerar_usuarios(args.funcionarios)
+    pasta = tempfile.mkdtemp(prefix='bench_fechamento_')
+    dados = CamadaDados(MemoriaStore(), usuarios, FechamentosMes(pasta))
+    ultimo = INICIO_PADRAO.month - 1 + args.meses - 1
+    data_fim = limites_mes(chave_mes(INICIO_PADRAO.year + ultimo // 12, ultimo % 12 + 1))[1]
+    meses = [mes for mes, _, _ in meses_periodo(INICIO_PADRAO, data_fim)]
+    dias = (data_fim - INICIO_PADRAO).days + 1
+    dados.registrar_lote(list(gerar_batidas(list(usuarios), dias, faltas=0.02, extras=0.1)))
+    print(f"{len(dados.log):,} batidas | {args.funcionarios:,} funcionários | {len(meses)} meses")
+
+    inicio = time.perf_counter()
+    for mes in meses:
+        dados.fechar_mes(int(mes[:4]), int(mes[5:7]))
+    tamanho = sum(os.path.getsize(os.path.join(pasta, nome)) for nome in os.listdir(pasta))
+    print(f"fechamento dos {len(meses)} meses: {time.perf_counter() - inicio:.2f} s, "
+          f"{tamanho / 2 ** 20:.1f} MB em disco ({tamanho / len(dados.log):.1f} bytes/batida)")
+
+    # Relatório da organização do período
+    tabela_usuarios = {u: dados.get_usuario(u) for u in dados.listar_usuarios()}
+    bruto = relatorio_organizacao(dados.log.colunas(), tabela_usuarios, INICIO_PADRAO, data_fim)
+    inicio = time.perf_counter()
+    dados.fechamentos = FechamentosMes(pasta)  # instantâneos ainda no disco
+    pronto = relatorio_periodo(dados, INICIO_PADRAO, data_fim)
+    frio = time.perf_counter() - inicio
+    for nome in bruto:
+        pd.testing.assert_frame_equal(ordenado(bruto[nome]), ordenado(pronto[nome]), check_dtype=False)
+
+    org_bruto = medir(lambda: relatorio_organizacao(
+        dados.log.colunas(), tabela_usuarios, INICIO_PADRAO, data_fim), args.amostras)
+    casos = [
+        ("organização (frio)", org_bruto, frio),
+        ("organização", org_bruto, medir(lambda: relatorio_periodo(dados, INICIO_PADRAO, data_fim), args.amostras)),
+    ]
+
+    # Histórico de um funcionário: folha diária e rateio de cada mês
+    usuario = next(iter(usuarios))
+    fechamentos = [dados.fechamentos.obter(mes) for mes in meses]
+
+    def historico_bruto() -> List:
+        folhas = calcular_folhas(dados.tabela_usuario(usuario, INICIO_PADRAO.isoformat(), data_fim.isoformat()))
+        return [folhas, [dados.consolidado.horas_mes(usuario, int(m[:4]), int(m[5:7])) for m in meses]]
+
+    def historico_fechamento() -> List:
+        folhas = pd.concat([f.folhas(usuario) for f in fechamentos], ignore_index=True)
+        return [folhas, [f.porcentagem_contratos(usuario)[1] for f in fechamentos]]
+
+    esperado, obtido = historico_bruto(), historico_fechamento()
+    pd.testing.assert_frame_equal(esperado[0].reset_index(drop=True), obtido[0], check_dtype=False)
+    assert all(abs(a - b) < 1e-9 for a, b in zip(esperado[1], obtido[1]))
+    casos.append(("histórico de 1 funcionário", medir(historico_bruto, args.amostras),
+                  medir(historico_fechamento, args.amostras)))
+
+    print(f"{'caso':<26} {'batidas':>10} {'fechamento':>11} {'ganho':>7}")
+    for rotulo, bruto_s, fechado_s in casos:
+        print(f"{rotulo:<26} {bruto_s * 1e3:>7.1f} ms {fechado_s * 1e3:>8.1f} ms {bruto_s / fechado_s:>6.1f}x")
+    print("resultados iguais nos dois caminhos")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark e conferência de ``calcular_folhas`` contra ``horas_dia``.
+
+Calcula a folha de todos os (usuário, dia) de uma base sintética pelos dois
+caminhos, confere que os valores são idênticos e compara os tempos.
+
+    python -m benchmarks.bench_folha --funcionarios 200 --dias 90
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from ponto.armazenamento import montar_batida
+from ponto.folha import calcular_folhas, horas_dia, tabela_batidas
+from ponto.colunar import LogBatidas
+from ponto.indice import IndiceBatidas
+
+HORARIOS = [('entrada', 8), ('almoco_saida', 12), ('almoco_retorno', 13), ('saida', 17)]
+
+
+def gerar_batidas(funcionarios: int, dias: int) -> List[Dict]:
+    """Jornadas com ruído: batidas faltando, repetidas e extras"""
+    aleatorio = random.Random(7)
+    inicio = datetime(2024, 1, 1)
+    batidas: List[Dict] = []
+    for d in range(dias):
+        dia = inicio + timedelta(days=d)
+        for f in range(funcionarios):
+            eventos = []
+            for tipo, hora in HORARIOS:
+                if aleatorio.random() < 0.05:
+                    continue
+                repeticoes = 2 if aleatorio.random() < 0.03 else 1
+                for _ in range(repeticoes):
+                    eventos.append((tipo, dia.replace(hour=hora, minute=aleatorio.randrange(60),
+                                                      second=aleatorio.randrange(60))))
+            if aleatorio.random() < 0.1:
+                eventos.append(('extra1', dia.replace(hour=19, minute=aleatorio.randrange(60))))
+            for tipo, ts in sorted(eventos, key=lambda e: e[1]):
+                batidas.append(montar_batida(len(batidas) + 1, f"func{f:05d}", tipo, ts))
+    return batidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--funcionarios', type=int, default=200)
+    parser.add_argument('--dias', type=int, default=90)
+    args = parser.parse_args()
+
+    batidas = gerar_batidas(args.funcionarios, args.dias)
+    log = LogBatidas()
+    for b in batidas:
+        log.anexar(b['id'], b['usuario'], b['tipo'], b['timestamp'])
+    indice = IndiceBatidas(log)
+    dias = sorted({(b['usuario'], b['data']) for b in batidas})
+    print(f"{len(batidas):,} batidas em {len(dias):,} (usuário, dia)")
+
+    inicio = time.perf_counter()
+    por_dia = [horas_dia(indice.dia(usuario, data), data) for usuario, data in dias]
+    t_por_dia = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    folhas = calcular_folhas(tabela_batidas(batidas))
+    t_vetorizado = time.perf_counter() - inicio
+
+    assert len(folhas) == len(por_dia)
+    for (usuario, data), esperado, linha in zip(dias, por_dia, folhas.itertuples(index=False)):
+        assert (linha.usuario, linha.data) == (usuario, data)
+        for campo in ['entrada', 'saida', 'almoco_saida', 'almoco_retorno',
+                      'extras', 'total_horas', 'horas_almoco']:
+            assert getattr(linha, campo) == esperado[campo], (usuario, data, campo)
+
+    print(f"horas_dia por dia: {t_por_dia:.3f} s | calcular_folhas: {t_vetorizado:.3f} s | "
+          f"{t_por_dia / t_vetorizado:.1f}x | resultados idênticos")
+
+
+if __name__ == '__main__':
+    main()
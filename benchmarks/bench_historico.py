@@ -0,0 +1,79 @@
+"""Latência de uma página do histórico conforme o histórico cresce.
+
+Para cada tamanho de histórico (dias de batidas de ``--funcionarios``
+pessoas) mede, com o período igual ao histórico inteiro:
+
+* ``varredura``: o caminho anterior da tela, que lia todas as batidas do
+  período e contava dias e entradas percorrendo-as;
+* ``pagina``: uma página (primeira, do meio e última) lida pelo índice com
+  busca binária nos acumulados, mais o resumo do período.
+
+O tempo da página deve ficar estável enquanto a varredura cresce com o
+histórico.
+
+    python -m benchmarks.bench_historico --dias 90,365,1460,3650 --tamanho 50
+"""
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks.sintetico import criar_camada
+from ponto.dados import CamadaDados
+
+
+def mediana_ms(funcao, repeticoes: int) -> float:
+    funcao()  # aquecimento
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1e3
+
+
+def varredura(dados: CamadaDados, usuario: str):
+    batidas = dados.batidas_usuario(usuario)
+    return (len(batidas), len(set(b['data'] for b in batidas)),
+            len([b for b in batidas if b['tipo'] == 'entrada']))
+
+
+def pagina(dados: CamadaDados, usuario: str, deslocamento: int, tamanho: int):
+    return (dados.pagina_batidas(usuario, None, None, deslocamento, tamanho),
+            dados.resumo_periodo(usuario))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dias', default='90,365,1460,3650', help="tamanhos do histórico, em dias")
+    parser.add_argument('--funcionarios', type=int, default=20)
+    parser.add_argument('--tamanho', type=int, default=50, help="batidas por página")
+    parser.add_argument('--repeticoes', type=int, default=200)
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'dias':>6} {'batidas/usuário':>16} {'varredura':>11} "
+          f"{'1ª página':>11} {'meio':>9} {'última':>9}")
+    for dias in (int(d) for d in args.dias.split(',')):
+        dados = criar_camada(args.funcionarios, dias, args.semente, extras=0.1)
+        usuario = random.Random(args.semente).choice(dados.indice.usuarios())
+        total = dados.resumo_periodo(usuario)[0]
+        # Confere a página e o resumo contra a varredura antes de medir
+        assert dados.resumo_periodo(usuario) == varredura(dados, usuario)
+        deslocamentos = [0, total // 2, max(0, total - args.tamanho)]
+        todas = dados.batidas_usuario(usuario)
+        for deslocamento in deslocamentos:
+            lida = pagina(dados, usuario, deslocamento, args.tamanho)[0]
+            assert [b['timestamp'] for b in lida] == \
+                [b['timestamp'] for b in todas[deslocamento:deslocamento + args.tamanho]]
+
+        repeticoes = max(5, args.repeticoes * 90 // dias)
+        cheia = mediana_ms(lambda: varredura(dados, usuario), repeticoes)
+        paginas = [mediana_ms(lambda: pagina(dados, usuario, d, args.tamanho), args.repeticoes)
+                   for d in deslocamentos]
+        print(f"{dias:>6} {total:>16,} {cheia:>8.3f} ms "
+              + ' '.join(f"{ms:>6.3f} ms" for ms in paginas))
+
+
+if __name__ == '__main__':
+    main()
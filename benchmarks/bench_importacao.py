@@ -0,0 +1,118 @@
+"""Vazão da importação em massa de AFD/CSV (registros por segundo).
+
+Gera um arquivo de marcações com a carga sintética de
+``benchmarks.sintetico`` (AFD da Portaria 1510, da 671 ou CSV), com uma
+fração de linhas inválidas e de PIS desconhecidos, e mede:
+
+* ``importação``: arquivo inteiro numa base vazia;
+* ``reimportação``: o mesmo arquivo de novo, todo descartado como duplicado.
+
+Confere que os tipos atribuídos pela ordem do dia batem com os da carga
+gerada e mostra o pico de memória residente do processo.
+
+    python -m benchmarks.bench_importacao --funcionarios 2000 --dias 30
+    python -m benchmarks.bench_importacao --formato csv --store memoria
+"""
+import argparse
+import os
+import random
+import resource
+import tempfile
+import time
+from datetime import datetime
+from itertools import groupby
+
+from benchmarks.sintetico import gerar_batidas, gerar_usuarios
+from ponto.armazenamento import MemoriaStore, SQLiteStore
+from ponto.dados import CamadaDados
+from ponto.importacao import importar_arquivo
+
+LINHAS_INVALIDAS = 0.001
+PIS_DESCONHECIDOS = 0.001
+
+
+def linha_marcacao(formato: str, nsr: int, pis: str, ts: datetime) -> str:
+    if formato == 'afd1510':
+        return f"{nsr:09d}3{ts:%d%m%Y%H%M}{int(pis):012d}"
+    if formato == 'afd671':
+        return f"{nsr:09d}3{ts:%Y-%m-%dT%H:%M:00}-0300{int(pis):012d}0000"
+    return f"{pis};{ts:%Y-%m-%d};{ts:%H:%M:00}"
+
+
+def gerar_arquivo(caminho: str, formato: str, usuarios: dict, dias: int, semente: int) -> dict:
+    """Grava o arquivo em ordem cronológica; devolve (usuário, minuto) -> tipo gerado"""
+    aleatorio = random.Random(semente)
+    esperados = {}
+    with open(caminho, 'w', encoding='latin-1', newline='\r\n') as arquivo:
+        if formato == 'csv':
+            arquivo.write("pis;data;horario\n")
+        else:
+            arquivo.write(f"{0:09d}1" + ' ' * 222 + "\n")
+        batidas = gerar_batidas(list(usuarios), dias, extras=0.1, semente=semente)
+        nsr = 1
+        for _, do_dia in groupby(batidas, key=lambda b: b[2].date()):
+            for usuario, tipo, ts in sorted(do_dia, key=lambda b: b[2]):
+                ts = ts.replace(second=0)
+                pis = usuarios[usuario]['pis']
+                if aleatorio.random() < PIS_DESCONHECIDOS:
+                    pis = '99999999999'
+                elif (usuario, ts) not in esperados:
+                    esperados[(usuario, ts)] = tipo
+                arquivo.write(linha_marcacao(formato, nsr, pis, ts) + "\n")
+                if aleatorio.random() < LINHAS_INVALIDAS:
+                    arquivo.write("linha corrompida\n")
+                nsr += 1
+    return esperados
+
+
+def criar_dados(store: str, pasta: str, usuarios: dict) -> CamadaDados:
+    if store == 'sqlite':
+        return CamadaDados(SQLiteStore(os.path.join(pasta, f"ponto_{time.time_ns()}.db")), usuarios)
+    return CamadaDados(MemoriaStore(), usuarios)
+
+
+def importar(dados: CamadaDados, caminho: str, lote: int, relatorio: str):
+    inicio = time.perf_counter()
+    with open(caminho, encoding='latin-1', newline='') as arquivo, \
+            open(relatorio, 'w', encoding='utf-8', newline='') as rejeitados:
+        resultado = importar_arquivo(dados, arquivo, relatorio=rejeitados, tamanho_lote=lote)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--funcionarios', type=int, default=2000)
+    parser.add_argument('--dias', type=int, default=30)
+    parser.add_argument('--formato', choices=['afd1510', 'afd671', 'csv'], default='afd1510')
+    parser.add_argument('--store', choices=['memoria', 'sqlite'], default='sqlite')
+    parser.add_argument('--lote', type=int, default=50_000)
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix='bench_importacao_')
+    caminho = os.path.join(pasta, f"marcacoes.{'csv' if args.formato == 'csv' else 'txt'}")
+    usuarios = gerar_usuarios(args.funcionarios, args.semente)
+    esperados = gerar_arquivo(caminho, args.formato, usuarios, args.dias, args.semente)
+    tamanho_mb = os.path.getsize(caminho) / 2 ** 20
+    print(f"arquivo {args.formato}: {tamanho_mb:.1f} MB, {len(esperados):,} marcações válidas")
+
+    dados = criar_dados(args.store, pasta, usuarios)
+    memoria_antes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    for rotulo in ('importação', 'reimportação'):
+        resultado, segundos = importar(dados, caminho, args.lote, os.path.join(pasta, 'rejeitados.csv'))
+        print(f"{rotulo:<13} {resultado.lidas / segundos:>12,.0f} registros/s  ({segundos:.2f} s)  "
+              + ', '.join(f"{k}={v:,}" for k, v in resultado.como_dict().items()))
+    memoria = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"pico de memória residente: {memoria / 1024:.0f} MB (+{(memoria - memoria_antes) / 1024:.0f} MB na importação)")
+
+    # Tipos inferidos pela ordem do dia contra os da carga gerada
+    iguais = 0
+    for linha in range(len(dados.log)):
+        batida = dados.log.linha(linha)
+        iguais += esperados.get((batida['usuario'], batida['timestamp'])) == batida['tipo']
+    print(f"tipos iguais aos gerados: {iguais / max(1, len(dados.log)):.1%} de {len(dados.log):,} batidas")
+    dados.store.fechar()
+
+
+if __name__ == '__main__':
+    main()
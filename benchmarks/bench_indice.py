@@ -0,0 +1,93 @@
+"""Benchmark do IndiceBatidas contra a varredura linear antiga.
+
+Gera ``--funcionarios`` pessoas com quatro batidas por dia útil durante
+``--dias`` dias e compara o ``get_batidas_usuario`` original (duas
+varreduras sobre todas as batidas) com o índice por usuário/dia.
+
+    python -m benchmarks.bench_indice --funcionarios 500 --dias 365
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from ponto.armazenamento import montar_batida
+from ponto.colunar import LogBatidas
+from ponto.indice import IndiceBatidas
+
+HORARIOS = [('entrada', 8), ('almoco_saida', 12), ('almoco_retorno', 13), ('saida', 17)]
+
+
+def gerar_batidas(funcionarios: int, dias: int) -> List[Dict]:
+    aleatorio = random.Random(42)
+    inicio = datetime(2024, 1, 1)
+    batidas: List[Dict] = []
+    for d in range(dias):
+        dia = inicio + timedelta(days=d)
+        if dia.weekday() >= 5:
+            continue
+        for f in range(funcionarios):
+            for tipo, hora in HORARIOS:
+                ts = dia.replace(hour=hora, minute=aleatorio.randrange(60))
+                batidas.append(montar_batida(len(batidas) + 1, f"func{f:05d}", tipo, ts))
+    return batidas
+
+
+def busca_linear(batidas: List[Dict], usuario: str,
+                 data_filtro: Optional[str] = None) -> List[Dict]:
+    # Implementação original de PontoManager.get_batidas_usuario
+    resultado = [b for b in batidas if b['usuario'] == usuario]
+    if data_filtro:
+        resultado = [b for b in resultado if b['data'] == data_filtro]
+    return resultado
+
+
+def cronometrar(funcao: Callable, repeticoes: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--funcionarios', type=int, default=500)
+    parser.add_argument('--dias', type=int, default=365)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    batidas = gerar_batidas(args.funcionarios, args.dias)
+    inicio = time.perf_counter()
+    log = LogBatidas()
+    for b in batidas:
+        log.anexar(b['id'], b['usuario'], b['tipo'], b['timestamp'])
+    indice = IndiceBatidas(log)
+    construcao = time.perf_counter() - inicio
+    print(f"{len(batidas):,} batidas | índice construído em {construcao:.2f} s")
+
+    usuario = f"func{args.funcionarios // 2:05d}"
+    dia = '2024-06-12'
+    datas_mes = sorted({b['data'] for b in busca_linear(batidas, usuario)
+                        if b['data'].startswith('2024-06')})
+    casos = [
+        ('um dia',
+         lambda: busca_linear(batidas, usuario, dia),
+         lambda: indice.dia(usuario, dia)),
+        ('um mês (período)',
+         lambda: [b for b in busca_linear(batidas, usuario) if '2024-06-01' <= b['data'] <= '2024-06-30'],
+         lambda: indice.periodo(usuario, '2024-06-01', '2024-06-30')),
+        ('relatório mensal (1 busca/dia)',
+         lambda: [busca_linear(batidas, usuario, d) for d in datas_mes],
+         lambda: [indice.dia(usuario, d) for d in datas_mes]),
+    ]
+    for nome, antes, depois in casos:
+        assert antes() == depois(), nome
+        t_antes = cronometrar(antes, args.repeticoes)
+        t_depois = cronometrar(depois, args.repeticoes * 100)
+        print(f"{nome:>32}: antes {t_antes:9.3f} ms | depois {t_depois:7.4f} ms | "
+              f"{t_antes / t_depois:,.0f}x")
+
+
+if __name__ == '__main__':
+    main()
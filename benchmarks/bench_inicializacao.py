@@ -0,0 +1,111 @@
+"""Partida a frio: importações e tempo até a tela de login.
+
+Cada medida roda num processo novo, como numa réplica recém-criada:
+
+* ``python -X importtime app.py`` (modo bare, sem servidor): soma das
+  importações feitas pelo script e os módulos mais caros;
+* ``AppTest.from_file(app.py).run()``: tempo até o formulário de login
+  estar desenhado, com o streamlit já importado (custo fixo do servidor).
+
+Falha (código 1) se um módulo pesado entrar no caminho do login ou se o
+tempo passar de ``--limite-ms``.
+
+    python -m benchmarks.bench_inicializacao --repeticoes 5
+    python -m benchmarks.bench_inicializacao --app /tmp/app_antes.py
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Não devem ser importados até o login aparecer (além do que o próprio
+# streamlit já carrega: ele importa plotly.graph_objects, por exemplo)
+PESADOS = ['pandas', 'plotly.express', 'plotly.graph_objects', 'xlsxwriter', 'pyarrow']
+
+PRIMEIRA_TELA = r"""
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+ja_carregados = set(sys.modules)
+inicio = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=60).run()
+decorrido = time.perf_counter() - inicio
+assert not at.exception, at.exception
+assert at.text_input and at.text_input[0].label == 'Usuário', 'login não desenhado'
+print(json.dumps({'ms': decorrido * 1e3, 'modulos': sorted(set(sys.modules) - ja_carregados)}))
+"""
+
+
+def ambiente() -> Dict[str, str]:
+    env = dict(os.environ, PONTO_STORE='memoria', PYTHONPATH=RAIZ)
+    env.pop('PYTHONPROFILEIMPORTTIME', None)
+    return env
+
+
+def importacoes(app: str) -> Tuple[float, List[Tuple[float, str]]]:
+    """(ms somados das importações de topo, [(ms, módulo)] mais caros)"""
+    saida = subprocess.run([sys.executable, '-X', 'importtime', app], env=ambiente(),
+                           capture_output=True, text=True, cwd=RAIZ).stderr
+    total = 0.0
+    modulos = []
+    for linha in saida.splitlines():
+        if not linha.startswith('import time:') or 'self [us]' in linha:
+            continue
+        _, acumulado, nome = linha[len('import time:'):].split('|')
+        ms = int(acumulado) / 1e3
+        if not nome.startswith('  '):
+            # Sem recuo: importação de topo (as demais já estão somadas nela)
+            total += ms
+        modulos.append((ms, nome.strip()))
+    return total, sorted(modulos, reverse=True)
+
+
+def primeira_tela(app: str) -> Dict:
+    saida = subprocess.run([sys.executable, '-c', PRIMEIRA_TELA, app], env=ambiente(),
+                           capture_output=True, text=True, cwd=RAIZ)
+    if saida.returncode:
+        raise RuntimeError(saida.stderr[-2000:])
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--app', default=os.path.join(RAIZ, 'app.py'))
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--limite-ms', type=float, help="tempo máximo até o login (mediana)")
+    args = parser.parse_args()
+    app = os.path.abspath(args.app)
+
+    totais = []
+    for _ in range(args.repeticoes):
+        total, modulos = importacoes(app)
+        totais.append(total)
+    print(f"importações do script (mediana de {args.repeticoes}): {statistics.median(totais):.0f} ms")
+    for ms, nome in modulos[:10]:
+        print(f"  {ms:8.1f} ms  {nome}")
+
+    tempos = []
+    for _ in range(args.repeticoes):
+        medida = primeira_tela(app)
+        tempos.append(medida['ms'])
+    mediana = statistics.median(tempos)
+    print(f"\nprimeira tela de login (mediana de {args.repeticoes}): {mediana:.0f} ms")
+
+    carregados = [m for m in PESADOS if m in medida['modulos']]
+    print(f"módulos pesados carregados no login: {', '.join(carregados) or 'nenhum'}")
+
+    falhas = []
+    if carregados:
+        falhas.append(f"módulos pesados no caminho do login: {', '.join(carregados)}")
+    if args.limite_ms and mediana > args.limite_ms:
+        falhas.append(f"login em {mediana:.0f} ms, acima do limite de {args.limite_ms:.0f} ms")
+    for falha in falhas:
+        print(f"REGRESSÃO: {falha}")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Benchmark de memória (RSS) por número de sessões abertas.
+
+Abre sessões reais do ``app.py`` com ``streamlit.testing.v1.AppTest``
+(cada uma com seu ``st.session_state``, no mesmo processo e portanto no
+mesmo ``st.cache_resource``), faz login e abre o dashboard, e mede quanto
+o RSS cresce por sessão mantida aberta. A base vem de um SQLite com
+``--dias`` de batidas sintéticas dos usuários de teste e de
+``--funcionarios`` sintéticos; com a
+``CamadaDados`` compartilhada por ``get_dados()``, o custo por sessão não
+depende do tamanho da base (rode com ``--dias`` diferentes para comparar).
+
+Para referência, o layout antigo, em que cada sessão guardava cópias de
+usuários e batidas no ``session_state``, é simulado com as mesmas cópias.
+
+    python -m benchmarks.bench_memoria_sessoes --funcionarios 200 --dias 365 --sessoes 10,50,200
+"""
+import argparse
+import copy
+import gc
+import os
+import resource
+import shutil
+import tempfile
+from typing import Dict, List
+
+from ponto.dados import usuarios_padrao
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+# Chaves de sessão que o app.py cria: só o estado de login
+CHAVES_SESSAO = {'logged_user', 'entrada_automatica'}
+
+
+def rss_mb() -> float:
+    """RSS atual do processo (Linux); fora dele, o pico informado pelo SO"""
+    try:
+        with open('/proc/self/statm') as statm:
+            paginas = int(statm.read().split()[1])
+        return paginas * resource.getpagesize() / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def preparar_base(pasta: str, funcionarios: int, dias: int) -> List[Dict]:
+    """Grava a base sintética no SQLite que o app vai abrir; devolve as batidas"""
+    from benchmarks.sintetico import gerar_batidas, nome_usuario
+    from ponto.armazenamento import SQLiteStore
+
+    os.environ.update(PONTO_STORE='sqlite', PONTO_DB=os.path.join(pasta, 'ponto.db'),
+                      PONTO_CACHE=os.path.join(pasta, 'cache'),
+                      PONTO_FECHAMENTOS=os.path.join(pasta, 'fechamentos'),
+                      PONTO_ARQUIVO=os.path.join(pasta, 'arquivo'))
+    store = SQLiteStore(os.environ['PONTO_DB'], sincrono='OFF')
+    usuarios = list(usuarios_padrao()) + [nome_usuario(f) for f in range(funcionarios)]
+    batidas = list(gerar_batidas(usuarios, dias, faltas=0.02, extras=0.1))
+    for i in range(0, len(batidas), 10_000):
+        store.registrar_lote(batidas[i:i + 10_000])
+    pontos = store.listar()
+    store.fechar()
+    return pontos
+
+
+def abrir_sessao():
+    """Uma sessão do app: login da maria e dashboard aberto"""
+    from streamlit.testing.v1 import AppTest
+
+    sessao = AppTest.from_file(APP, default_timeout=120).run()
+    sessao.text_input[0].input('maria')
+    sessao.text_input[1].input('123')
+    sessao.button[0].click().run()
+    # Uma segunda CamadaDados no processo esbarraria na trava do banco (StoreEmUso)
+    assert not sessao.exception, sessao.exception
+    assert sessao.session_state.logged_user == 'maria'
+    chaves = set(sessao.session_state)
+    assert chaves <= CHAVES_SESSAO | {chave for chave in chaves if chave.startswith('$$')}, chaves
+    return sessao
+
+
+def sessoes_legado(usuarios: Dict[str, Dict], pontos: List[Dict], n: int) -> List[Dict]:
+    return [
+        {
+            'usuarios': copy.deepcopy(usuarios),
+            'pontos': copy.deepcopy(pontos),
+            'logged_user': None,
+            'entrada_automatica': {}
+        }
+        for _ in range(n)
+    ]
+
+
+def medir(criar_sessoes, n: int) -> float:
+    """Crescimento do RSS (MB) com ``n`` sessões abertas ao mesmo tempo"""
+    gc.collect()
+    antes = rss_mb()
+    sessoes = criar_sessoes(n)
+    gc.collect()
+    delta = rss_mb() - antes
+    del sessoes
+    gc.collect()
+    return delta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--funcionarios', type=int, default=200)
+    parser.add_argument('--dias', type=int, default=365)
+    parser.add_argument('--sessoes', default='10,50,200')
+    parser.add_argument('--max-sessoes-legado', type=int, default=50,
+                        help='o layout antigo cresce linearmente; limite para não esgotar a RAM')
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix='bench_sessoes_')
+    try:
+        pontos = preparar_base(pasta, args.funcionarios, args.dias)
+        usuarios = usuarios_padrao()
+        base = rss_mb()
+        # Primeira sessão: carrega a camada compartilhada (st.cache_resource) e os módulos das telas
+        primeira = abrir_sessao()
+        print(f"base: {len(pontos):,} batidas | RSS {base:.1f} MB antes do app, "
+              f"{rss_mb():.1f} MB com a camada carregada")
+
+        for n in (int(n) for n in args.sessoes.split(',')):
+            compartilhado = medir(lambda k: [abrir_sessao() for _ in range(k)], n)
+            if n <= args.max_sessoes_legado:
+                legado = f"{medir(lambda k: sessoes_legado(usuarios, pontos, k), n) / n:8.2f} MB"
+            else:
+                legado = '  (pulado)'
+            print(f"{n:5d} sessões | por sessão: app {compartilhado / n:6.2f} MB | "
+                  f"layout antigo (simulado): {legado}")
+        del primeira
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
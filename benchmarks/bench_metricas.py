@@ -0,0 +1,53 @@
+"""Custo da instrumentação por chamada, ligada e desligada.
+
+Mede uma função vazia sem decorador, com ``instrumentar`` desligado e
+ligado, e o ``contar_linhas`` dentro de uma medição aberta.
+
+    python -m benchmarks.bench_metricas --chamadas 1000000
+"""
+import argparse
+import time
+
+from ponto.metricas import Metricas, contar_linhas, instrumentar, medir
+
+
+def tempo_por_chamada(funcao, chamadas: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(chamadas):
+        funcao()
+    return (time.perf_counter() - inicio) / chamadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chamadas', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    metricas = Metricas()
+
+    def vazia():
+        pass
+
+    instrumentada = instrumentar('vazia', metricas)(vazia)
+
+    def com_linhas():
+        contar_linhas(1)
+
+    base = tempo_por_chamada(vazia, args.chamadas)
+    metricas.ativo = False
+    desligada = tempo_por_chamada(instrumentada, args.chamadas)
+    metricas.ativo = True
+    ligada = tempo_por_chamada(instrumentada, args.chamadas)
+    with medir('externa', metricas):
+        linhas = tempo_por_chamada(com_linhas, args.chamadas)
+
+    print(f"sem decorador:              {base * 1e9:8.0f} ns/chamada")
+    print(f"instrumentar (desligado):   {desligada * 1e9:8.0f} ns/chamada (+{(desligada - base) * 1e9:.0f} ns)")
+    print(f"instrumentar (ligado):      {ligada * 1e9:8.0f} ns/chamada (+{(ligada - base) * 1e9:.0f} ns)")
+    print(f"contar_linhas (1 medição):  {linhas * 1e9:8.0f} ns/chamada")
+    serie = metricas.resumo()[0]
+    print(f"p50 {serie['p50_ms'] * 1e3:.2f} µs, p99 {serie['p99_ms'] * 1e3:.2f} µs em {serie['chamadas']:,} chamadas")
+
+
+if __name__ == '__main__':
+    main()
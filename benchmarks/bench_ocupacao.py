@@ -0,0 +1,129 @@
+"""Mapa de ocupação (hora x dia da semana x contrato) pré-calculado contra o recálculo.
+
+Gera ``--funcionarios`` x ``--dias`` de batidas sintéticas e mede:
+
+* ``carga``: a carga do ``OcupacaoPonto`` a partir das colunas do log;
+* ``incremental``: a metade final das batidas chegando em lotes pela
+  ``CamadaDados`` já com a ocupação carregada (custo extra por batida);
+* ``mapa``: o mapa de um ano da organização e de cada contrato lido dos
+  contadores, contra recalculá-lo das batidas a cada tela.
+
+Confere que carga e incremental dão os mesmos contadores e que o primeiro
+mês bate com um laço ingênuo por usuário, dia e hora.
+
+    python -m benchmarks.bench_ocupacao --funcionarios 2000 --dias 365
+"""
+import argparse
+import calendar
+import statistics
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from benchmarks.sintetico import INICIO_PADRAO, gerar_batidas, gerar_usuarios
+from ponto.armazenamento import MemoriaStore
+from ponto.colunar import para_segundos
+from ponto.dados import CamadaDados
+from ponto.folha import TIPOS_JORNADA
+from ponto.ocupacao import OcupacaoPonto
+
+SEGUNDOS_DIA = 86400
+
+
+def medir(funcao: Callable[[], object], amostras: int) -> float:
+    tempos = []
+    for _ in range(amostras):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def ingenuo(batidas: List[Tuple[str, str, object]], data_inicio: date, data_fim: date) -> np.ndarray:
+    """Ocupação média por dia da semana e hora: última batida de cada tipo, hora a hora"""
+    dias: Dict[Tuple[str, date], Dict[str, int]] = {}
+    for usuario, tipo, timestamp in batidas:
+        if data_inicio <= timestamp.date() <= data_fim and tipo in TIPOS_JORNADA:
+            dias.setdefault((usuario, timestamp.date()), {})[tipo] = para_segundos(timestamp) % SEGUNDOS_DIA
+    soma = np.zeros((7, 24))
+    for (_, dia), ultimas in dias.items():
+        entrada, saida, almoco_saida, almoco_retorno = (ultimas.get(t, -1) for t in TIPOS_JORNADA)
+        if entrada < 0 or saida <= entrada:
+            continue
+        if entrada <= almoco_saida <= almoco_retorno <= saida:
+            intervalos = [(entrada, almoco_saida), (almoco_retorno, saida)]
+        else:
+            intervalos = [(entrada, saida)]
+        for de, ate in intervalos:
+            for hora in range(24):
+                soma[dia.weekday(), hora] += max(0, min(ate, (hora + 1) * 3600) - max(de, hora * 3600))
+    quantos = np.zeros(7)
+    for n in range((data_fim - data_inicio).days + 1):
+        quantos[(data_inicio + timedelta(days=n)).weekday()] += 1
+    return soma / 3600 / np.maximum(quantos, 1)[:, None]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--funcionarios', type=int, default=2000)
+    parser.add_argument('--dias', type=int, default=365)
+    parser.add_argument('--lote', type=int, default=1000)
+    parser.add_argument('--amostras', type=int, default=5)
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    usuarios = gerar_usuarios(args.funcionarios, args.semente)
+    batidas = list(gerar_batidas(list(usuarios), args.dias, faltas=0.02, duplicadas=0.02, extras=0.1,
+                                 semente=args.semente))
+    dados = CamadaDados(MemoriaStore(), usuarios)
+    metade = len(batidas) // 2
+    dados.registrar_lote(batidas[:metade])
+    print(f"{len(batidas):,} batidas | {args.funcionarios:,} funcionários | {args.dias} dias")
+
+    inicio = time.perf_counter()
+    dados.ocupacao
+    carga_metade = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    for i in range(metade, len(batidas), args.lote):
+        dados.registrar_lote(batidas[i:i + args.lote])
+    incremental = time.perf_counter() - inicio
+    sem_ocupacao = CamadaDados(MemoriaStore(), usuarios)
+    sem_ocupacao.registrar_lote(batidas[:metade])
+    inicio = time.perf_counter()
+    for i in range(metade, len(batidas), args.lote):
+        sem_ocupacao.registrar_lote(batidas[i:i + args.lote])
+    base = time.perf_counter() - inicio
+
+    carga = OcupacaoPonto(dados.rateio)
+    inicio = time.perf_counter()
+    carga.carregar([dados.log.colunas()])
+    print(f"carga: {carga_metade:.2f} s (metade) / {time.perf_counter() - inicio:.2f} s (tudo) | "
+          f"lotes de {args.lote}: {(incremental - base) / (len(batidas) - metade) * 1e6:.1f} µs a mais "
+          f"por batida ({incremental:.2f} s x {base:.2f} s sem ocupação)")
+
+    fim = INICIO_PADRAO + timedelta(days=args.dias - 1)
+    periodo = (INICIO_PADRAO.isoformat(), fim.isoformat())
+    contratos = [None] + carga.contratos()
+    for contrato in contratos:
+        assert np.array_equal(dados.ocupacao.semana(*periodo, contrato), carga.semana(*periodo, contrato)), contrato
+    ultimo = INICIO_PADRAO.replace(day=calendar.monthrange(INICIO_PADRAO.year, INICIO_PADRAO.month)[1])
+    esperado = ingenuo(batidas, INICIO_PADRAO, ultimo)
+    assert np.allclose(carga.semana(INICIO_PADRAO.isoformat(), ultimo.isoformat()), esperado)
+
+    def recalculado():
+        ocupacao = OcupacaoPonto(dados.rateio)
+        ocupacao.carregar([dados.log.colunas()])
+        return [ocupacao.semana(*periodo, contrato) for contrato in contratos]
+
+    pronto = medir(lambda: [dados.ocupacao.semana(*periodo, contrato) for contrato in contratos], args.amostras)
+    refeito = medir(recalculado, max(1, args.amostras // 2))
+    print(f"mapa de {args.dias} dias, organização + {len(contratos) - 1} contratos: "
+          f"{pronto * 1e3:.2f} ms pré-calculado x {refeito * 1e3:.0f} ms recalculando "
+          f"({refeito / pronto:.0f}x)")
+    print("carga e incremental iguais; primeiro mês igual ao laço ingênuo")
+
+
+if __name__ == '__main__':
+    main()
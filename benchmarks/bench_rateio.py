@@ -0,0 +1,124 @@
+"""Horas por contrato com rateio por vigência: ``ratear`` vetorizado contra o laço por dia.
+
+Gera ``--funcionarios`` x ``--dias`` (só dias úteis) de horas trabalhadas
+por dia direto em arrays, e de 1 a 4 vigências de rateio por usuário
+sobre ``--contratos`` contratos (a primeira desde sempre, as outras em
+dias aleatórios do período, cada uma dividida entre 1 e 3 contratos).
+Mede:
+
+* ``tabela``: compactar as vigências de todos os usuários;
+* ``ratear``: horas por (mês, contrato) do período inteiro, por (usuário,
+  contrato) de um intervalo qualquer e do mês de um só usuário;
+* ``laço``: o mesmo mês de todos os usuários procurando o rateio vigente
+  dia a dia com ``RateioContratos.vigente``;
+
+e confere que o ``ratear`` bate com o laço.
+
+    python -m benchmarks.bench_rateio --funcionarios 50000 --dias 365
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from benchmarks.sintetico import INICIO_PADRAO, nome_usuario
+from ponto.anomalias import data_dia
+from ponto.rateio import DESDE_SEMPRE, RateioContratos, dia_epoca, ratear
+
+
+def medir(funcao: Callable[[], object], amostras: int) -> float:
+    tempos = []
+    for _ in range(amostras):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def gerar_vigencias(usuarios: List[str], contratos: int, dia_inicio: int, dias: int,
+                    semente: int) -> Dict[str, List[Tuple[int, Dict[str, float]]]]:
+    aleatorio = random.Random(semente)
+    nomes = [f"Contrato {c:02d}" for c in range(contratos)]
+    vigencias = {}
+    for usuario in usuarios:
+        inicios = [DESDE_SEMPRE] + sorted(aleatorio.sample(range(dia_inicio + 1, dia_inicio + dias),
+                                                           aleatorio.randrange(4)))
+        lista = []
+        for inicio in inicios:
+            partes = aleatorio.sample(nomes, aleatorio.randint(1, 3))
+            cortes = sorted(aleatorio.sample(range(5, 100, 5), len(partes) - 1))
+            lista.append((inicio, {contrato: float(ate - de)
+                                   for contrato, de, ate in zip(partes, [0] + cortes, cortes + [100])}))
+        vigencias[usuario] = lista
+    return vigencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--funcionarios', type=int, default=50000)
+    parser.add_argument('--dias', type=int, default=365)
+    parser.add_argument('--contratos', type=int, default=20)
+    parser.add_argument('--amostras', type=int, default=3)
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    usuarios = [nome_usuario(f) for f in range(args.funcionarios)]
+    dia_inicio = dia_epoca(INICIO_PADRAO.isoformat())
+    inicio = time.perf_counter()
+    rateio = RateioContratos.de_vigencias(gerar_vigencias(usuarios, args.contratos, dia_inicio, args.dias,
+                                                          args.semente))
+    cadastro = time.perf_counter() - inicio
+
+    # Uma linha por (usuário, dia útil) com os segundos trabalhados no dia
+    calendario = np.arange(dia_inicio, dia_inicio + args.dias)
+    uteis = calendario[(calendario + 3) % 7 < 5]  # 1970-01-01 foi quinta-feira
+    dias = np.tile(uteis, args.funcionarios)
+    codigos = np.repeat(np.arange(args.funcionarios), len(uteis))
+    segundos = np.random.default_rng(args.semente).normal(8 * 3600, 1800, len(dias)).clip(0)
+    datas = dias.astype('datetime64[D]')
+    meses = datas.astype('datetime64[M]').astype(np.int64)
+    meses -= meses.min()
+    quantidade_meses = int(meses.max()) + 1
+    print(f"{len(dias):,} dias trabalhados | {args.funcionarios:,} funcionários | {args.dias} dias | "
+          f"{sum(len(rateio.vigencias(u)) for u in usuarios):,} vigências em {cadastro:.2f} s")
+
+    inicio = time.perf_counter()
+    tabela = rateio.tabela(usuarios)
+    print(f"tabela: {time.perf_counter() - inicio:.2f} s ({len(tabela.chaves):,} vigências, "
+          f"{len(tabela.contratos):,} partes, {len(tabela.nomes_contrato)} contratos)")
+
+    por_mes = medir(lambda: ratear(tabela, codigos, dias, segundos, meses, quantidade_meses), args.amostras)
+    de, ate = dia_inicio + args.dias // 3, dia_inicio + 2 * args.dias // 3
+    faixa = (dias >= de) & (dias < ate)
+    por_usuario = medir(lambda: ratear(tabela, codigos[faixa], dias[faixa], segundos[faixa],
+                                       codigos[faixa], args.funcionarios), args.amostras)
+    do_mes = (codigos == args.funcionarios // 2) & (meses == 0)
+    um_usuario = medir(lambda: ratear(tabela, codigos[do_mes], dias[do_mes], segundos[do_mes]), args.amostras)
+    print(f"ratear: {args.dias} dias por mês {por_mes:.2f} s | {data_dia(de)} a {data_dia(ate - 1)} por "
+          f"usuário {por_usuario:.2f} s ({faixa.sum():,} dias) | um usuário no mês {um_usuario * 1e3:.2f} ms")
+
+    # Primeiro mês de todos os usuários, dia a dia
+    primeiro = meses == 0
+    total, _ = ratear(tabela, codigos[primeiro], dias[primeiro], segundos[primeiro])
+    inicio = time.perf_counter()
+    esperado: Dict[str, float] = {}
+    nomes_data = {int(d): data_dia(int(d)) for d in np.unique(dias[primeiro])}
+    for codigo, dia, trabalhado in zip(codigos[primeiro].tolist(), dias[primeiro].tolist(),
+                                       segundos[primeiro].tolist()):
+        for contrato, porcentagem in rateio.vigente(usuarios[codigo], nomes_data[dia]).items():
+            esperado[contrato] = esperado.get(contrato, 0.0) + trabalhado * porcentagem
+    laco = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    ratear(tabela, codigos[primeiro], dias[primeiro], segundos[primeiro])
+    vetorizado = time.perf_counter() - inicio
+    for posicao, contrato in enumerate(tabela.nomes_contrato):
+        assert np.isclose(total[0, posicao], esperado.get(contrato, 0.0)), contrato
+    print(f"mês de {INICIO_PADRAO:%m/%Y} ({primeiro.sum():,} dias): laço por dia {laco:.2f} s x "
+          f"ratear {vetorizado * 1e3:.0f} ms ({laco / vetorizado:.0f}x); resultados iguais")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""Reinício do processo com o ``DiarioStore``: instantâneo + diário contra reaplicar tudo.
+
+Grava ``--funcionarios`` x ``--dias`` de batidas sintéticas (10 milhões no
+padrão) em lotes, em dois motores ao mesmo tempo: um com instantâneos a
+cada ``--intervalo`` registros e outro só com o diário. Fechados sem o
+instantâneo final (como numa queda), mede a reabertura de cada um:
+
+* ``motor``: ``DiarioStore(pasta)`` (mapear o instantâneo e reaplicar a
+  cauda, ou reaplicar o diário inteiro);
+* ``camada``: a ``CamadaDados`` pronta (log e índice) sobre o motor aberto;
+
+e, para referência, a partida da ``CamadaDados`` sobre o ``SQLiteStore``
+com ``--sqlite`` batidas (lidas como dicionários, linha a linha).
+
+Com ``--quedas``, um processo filho grava sem parar e é morto com SIGKILL
+em momentos aleatórios, várias vezes sobre a mesma pasta (com instantâneos
+pequenos, para matá-lo também no meio deles). A cada reabertura confere
+que toda batida confirmada ao filho está lá, sem ids repetidos, e que um
+final de diário cortado ou com lixo é descartado.
+
+    python -m benchmarks.bench_reinicio --funcionarios 10000 --dias 365
+    python -m benchmarks.bench_reinicio --quedas 20
+"""
+import argparse
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Set
+
+from benchmarks.sintetico import gerar_batidas, gerar_usuarios
+from ponto.armazenamento import SQLiteStore
+from ponto.dados import CamadaDados
+from ponto.diario import DiarioStore
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def reinicio(funcionarios: int, dias: int, intervalo: int, lote: int, quantidade_sqlite: int, semente: int):
+    usuarios = list(gerar_usuarios(funcionarios, semente))
+    pasta = tempfile.mkdtemp(prefix='bench_reinicio_')
+    com_instantaneo = DiarioStore(os.path.join(pasta, 'instantaneo'), intervalo=intervalo, sincrono=False)
+    so_diario = DiarioStore(os.path.join(pasta, 'diario'), intervalo=float('inf'), sincrono=False)
+    total = 0
+    amostra = []
+    bloco = []
+    inicio = time.perf_counter()
+    for batida in gerar_batidas(usuarios, dias, faltas=0.02, duplicadas=0.02, extras=0.1, semente=semente):
+        bloco.append(batida)
+        if len(bloco) == lote:
+            com_instantaneo.registrar_lote(bloco)
+            so_diario.registrar_lote(bloco)
+            if len(amostra) < quantidade_sqlite:
+                amostra.extend(bloco)
+            total += len(bloco)
+            bloco = []
+    if bloco:
+        com_instantaneo.registrar_lote(bloco)
+        so_diario.registrar_lote(bloco)
+        total += len(bloco)
+    gravacao = time.perf_counter() - inicio
+    cauda = com_instantaneo._registros
+    com_instantaneo.fechar(instantaneo=False)
+    so_diario.fechar(instantaneo=False)
+    del com_instantaneo, so_diario
+    print(f"{total:,} batidas | {funcionarios:,} funcionários | {dias} dias | gravadas em {gravacao:.1f} s "
+          f"(dois motores) | cauda de {cauda:,} registros")
+
+    for nome, subpasta in [('instantâneo + cauda', 'instantaneo'), ('diário inteiro', 'diario')]:
+        inicio = time.perf_counter()
+        store = DiarioStore(os.path.join(pasta, subpasta), intervalo=float('inf'))
+        motor = time.perf_counter() - inicio
+        dados = CamadaDados(store)
+        pronto = time.perf_counter() - inicio
+        assert len(dados.log) == total
+        print(f"{nome:<20} motor {motor:>6.2f} s | camada pronta {pronto:>6.2f} s")
+        store.fechar(instantaneo=False)
+        del dados, store
+
+    if quantidade_sqlite:
+        caminho = os.path.join(pasta, 'ponto.db')
+        sqlite = SQLiteStore(caminho, sincrono='OFF')
+        for i in range(0, len(amostra), lote):
+            sqlite.registrar_lote(amostra[i:i + lote])
+        sqlite.fechar()
+        inicio = time.perf_counter()
+        dados = CamadaDados(SQLiteStore(caminho))
+        pronto = time.perf_counter() - inicio
+        print(f"{'SQLite (referência)':<20} camada pronta {pronto:>6.2f} s com {len(dados.log):,} batidas "
+              f"(~{pronto * total / len(dados.log):.0f} s para {total:,})")
+    shutil.rmtree(pasta, ignore_errors=True)
+
+
+def filho(pasta: str, semente: int):
+    """Grava sem parar (uma thread por sessão e lotes) e escreve cada id confirmado"""
+    store = DiarioStore(pasta, intervalo=2000)
+    aleatorio = random.Random(semente)
+    saida = threading.Lock()
+    inicio = datetime(2024, 1, 1) + timedelta(days=aleatorio.randrange(300))
+
+    def confirmar(ids):
+        with saida:
+            sys.stdout.write(''.join(f"{i}\n" for i in ids))
+            sys.stdout.flush()
+
+    def sessao(numero: int):
+        momento = inicio
+        while True:
+            momento += timedelta(minutes=1)
+            confirmar([store.registrar(f"func{numero:05d}", 'entrada', momento)['id']])
+
+    for numero in range(4):
+        threading.Thread(target=sessao, args=(numero,), daemon=True).start()
+    while True:
+        lote = [(f"func{aleatorio.randrange(100):05d}", 'saida',
+                 inicio + timedelta(seconds=aleatorio.randrange(86400)))
+                for _ in range(aleatorio.randrange(1, 500))]
+        confirmar(store.registrar_lote(lote))
+
+
+def conferir(pasta: str, confirmados: Set[int]) -> int:
+    store = DiarioStore(pasta, intervalo=2000)
+    try:
+        ids, _ = store.colunas()
+        gravados = set(ids.tolist())
+        assert len(gravados) == len(ids), "id repetido após reabertura"
+        perdidos = confirmados - gravados
+        assert not perdidos, f"{len(perdidos)} batidas confirmadas perdidas"
+        return len(ids)
+    finally:
+        store.fechar(instantaneo=False)
+
+
+def quedas(vezes: int, semente: int):
+    pasta = tempfile.mkdtemp(prefix='bench_quedas_')
+    aleatorio = random.Random(semente)
+    confirmados: Set[int] = set()
+    env = dict(os.environ, PYTHONPATH=RAIZ)
+    for vez in range(vezes):
+        processo = subprocess.Popen([sys.executable, '-m', 'benchmarks.bench_reinicio', '--filho', pasta,
+                                     '--semente', str(semente + vez)],
+                                    stdout=subprocess.PIPE, cwd=RAIZ, env=env)
+        time.sleep(aleatorio.uniform(0.3, 1.5))
+        processo.send_signal(signal.SIGKILL)
+        saida, _ = processo.communicate()
+        linhas = saida.split(b'\n')
+        # A última linha pode ter sido cortada pelo SIGKILL
+        confirmados.update(int(linha) for linha in linhas[:-1] if linha)
+        gravados = conferir(pasta, confirmados)
+        arquivos = sorted(os.listdir(pasta))
+        print(f"queda {vez + 1:>2}: {len(confirmados):,} confirmadas, {gravados:,} gravadas | {' '.join(arquivos)}")
+
+    # Última batida cortada ao meio e seguida de lixo: descartada, o resto intacto
+    store = DiarioStore(pasta, intervalo=float('inf'))
+    caminho = store._caminho_diario(store._numero)
+    antes, valido = store.listar(), os.path.getsize(caminho)
+    store.registrar('func00000', 'entrada', datetime(2025, 1, 1, 8))
+    store.fechar(instantaneo=False)
+    with open(caminho, 'r+b') as arquivo:
+        arquivo.truncate(os.path.getsize(caminho) - 5)
+    with open(caminho, 'ab') as arquivo:
+        arquivo.write(os.urandom(37))
+    store = DiarioStore(pasta, intervalo=float('inf'))
+    assert store.listar() == antes, "final cortado mudou as batidas anteriores"
+    assert os.path.getsize(caminho) == valido, "final cortado não foi truncado"
+    store.registrar('func00000', 'entrada', datetime(2025, 1, 1, 9))
+    store.fechar(instantaneo=False)
+    store = DiarioStore(pasta, intervalo=float('inf'))
+    assert len(store.listar()) == len(antes) + 1
+    store.fechar()
+    print(f"{vezes} quedas sem perda de batida confirmada; final cortado descartado")
+    shutil.rmtree(pasta, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--funcionarios', type=int, default=10000)
+    parser.add_argument('--dias', type=int, default=365)
+    parser.add_argument('--intervalo', type=int, default=500_000, help="registros entre instantâneos")
+    parser.add_argument('--lote', type=int, default=10_000)
+    parser.add_argument('--sqlite', type=int, default=500_000, help="batidas da referência SQLite (0 pula)")
+    parser.add_argument('--quedas', type=int, default=0, help="só o teste de quedas, com tantos SIGKILLs")
+    parser.add_argument('--filho', help=argparse.SUPPRESS)
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.filho:
+        filho(args.filho, args.semente)
+    elif args.quedas:
+        quedas(args.quedas, args.semente)
+    else:
+        reinicio(args.funcionarios, args.dias, args.intervalo, args.lote, args.sqlite, args.semente)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Escalabilidade do relatório da organização com 1, 2, 4 e 8 processos.
+
+Gera as colunas compactas do log direto em NumPy (``--funcionarios`` ×
+``--meses`` de dias úteis, quatro batidas por dia), aquece o pool e mede o
+tempo de ``relatorio_organizacao`` para cada número de processos,
+conferindo que todos produzem o mesmo resultado.
+
+    python -m benchmarks.bench_relatorio_org --funcionarios 50000 --meses 12
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+
+from ponto.colunar import TIPOS_BATIDA, ColunasBatidas
+from ponto.relatorio_org import relatorio_organizacao
+
+CONTRATOS = [{'Contrato A': 70, 'Contrato B': 30}, {'Contrato A': 50, 'Contrato C': 50},
+             {'Gestão': 100}]
+CARGOS = ['Analista', 'Coordenador', 'Gerente']
+
+
+def gerar_colunas(funcionarios: int, meses: int, semente: int = 42) -> ColunasBatidas:
+    aleatorio = np.random.default_rng(semente)
+    inicio = date(2024, 1, 1)
+    dias = [inicio + timedelta(days=d) for d in range(meses * 30)]
+    dias = np.array([(d - date(1970, 1, 1)).days for d in dias if d.weekday() < 5], dtype=np.int64)
+
+    base = np.array([8, 12, 13, 17], dtype=np.int64) * 3600
+    usuarios = np.repeat(np.arange(funcionarios, dtype=np.int32), len(dias) * 4)
+    dia = np.tile(np.repeat(dias, 4), funcionarios)
+    tipos = np.tile(np.arange(4, dtype=np.int8), funcionarios * len(dias))
+    segundos = dia * 86400 + base[tipos] + aleatorio.integers(0, 3600, len(tipos))
+    # Log em ordem de chegada (por instante), como no sistema real
+    ordem = np.argsort(segundos, kind='stable')
+    nomes_tipo = list(TIPOS_BATIDA)
+    sequencia = ['entrada', 'almoco_saida', 'almoco_retorno', 'saida']
+    codigos = np.array([nomes_tipo.index(t) for t in sequencia], dtype=np.int8)
+    return ColunasBatidas(usuarios[ordem], codigos[tipos[ordem]], segundos[ordem],
+                          [f"func{i:05d}" for i in range(funcionarios)], nomes_tipo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--funcionarios', type=int, default=50_000)
+    parser.add_argument('--meses', type=int, default=12)
+    parser.add_argument('--trabalhadores', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    colunas = gerar_colunas(args.funcionarios, args.meses)
+    usuarios = {
+        nome: {'cargo': CARGOS[i % 3], 'contratos': CONTRATOS[i % 3]}
+        for i, nome in enumerate(colunas.nomes_usuario)
+    }
+    inicio, fim = date(2024, 1, 1), date(2024, 1, 1) + timedelta(days=args.meses * 30)
+    print(f"{len(colunas.segundos):,} batidas | {args.funcionarios:,} funcionários | "
+          f"{os.cpu_count()} CPUs disponíveis")
+
+    referencia = None
+    tempo_base = None
+    for trabalhadores in args.trabalhadores:
+        if trabalhadores == 1:
+            inicio_t = time.perf_counter()
+            resultado = relatorio_organizacao(colunas, usuarios, inicio, fim, fatias=4)
+            decorrido = time.perf_counter() - inicio_t
+        else:
+            contexto = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=trabalhadores, mp_context=contexto) as pool:
+                # Aquecimento: sobe os processos antes de medir
+                list(pool.map(abs, range(trabalhadores)))
+                inicio_t = time.perf_counter()
+                resultado = relatorio_organizacao(colunas, usuarios, inicio, fim,
+                                                  fatias=trabalhadores * 4, executor=pool)
+                decorrido = time.perf_counter() - inicio_t
+
+        if referencia is None:
+            referencia, tempo_base = resultado, decorrido
+        for nome, tabela in referencia.items():
+            assert np.allclose(tabela.select_dtypes('number'), resultado[nome].select_dtypes('number')), nome
+        print(f"{trabalhadores:2d} processo(s): {decorrido:7.2f} s | speedup {tempo_base / decorrido:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
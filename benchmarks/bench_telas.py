@@ -0,0 +1,108 @@
+"""Tempo de CPU do servidor por interação nas telas (AppTest do Streamlit).
+
+Gera uma base SQLite com um ano de batidas para os usuários de teste (e
+``--funcionarios`` pessoas a mais no log), faz login como ``maria`` e mede
+``time.process_time`` de cada interação: rerun das telas sem mudança, clique
+num botão de batida e troca de tela.
+
+Além da CPU do processo (que inclui o próprio AppTest, que monta e lê a
+árvore de elementos), mostra o tempo do script do app em cada interação,
+somado das métricas das funções de topo (``ponto.metricas``). O AppTest
+sempre reexecuta o script inteiro, mesmo para widgets dentro de um
+``st.fragment``; por isso o custo do clique no navegador com fragmento é
+informado à parte, pelo tempo de ``painel_batidas``.
+
+    python -m benchmarks.bench_telas --repeticoes 10
+    python -m benchmarks.bench_telas --app /tmp/app_antes.py   # versão anterior
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.sintetico import gerar_batidas, nome_usuario
+from ponto.armazenamento import SQLiteStore
+
+USUARIOS_TESTE = ['maria', 'joao', 'admin']
+
+
+def gerar_base(caminho: str, funcionarios: int, dias: int):
+    store = SQLiteStore(caminho)
+    usuarios = USUARIOS_TESTE + [nome_usuario(f) for f in range(funcionarios)]
+    for usuario, tipo, ts in gerar_batidas(usuarios, dias, extras=0.1):
+        store.registrar(usuario, tipo, ts)
+    store.fechar()
+
+
+# Funções instrumentadas que não rodam dentro de outras: o script inteiro
+TOPO = ('dashboard_principal', 'tela_login', 'registrar_batida_botao')
+
+
+def tempo_script(metricas) -> float:
+    return sum(r['total_s'] for r in metricas.resumo() if r['operacao'] in TOPO)
+
+
+def medir(executar, metricas):
+    """(CPU do processo, tempo do script do app) de uma interação"""
+    cpu, script = time.process_time(), tempo_script(metricas)
+    executar()
+    return time.process_time() - cpu, tempo_script(metricas) - script
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--app', default='app.py')
+    parser.add_argument('--funcionarios', type=int, default=200)
+    parser.add_argument('--dias', type=int, default=365)
+    parser.add_argument('--repeticoes', type=int, default=10)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix='bench_telas_')
+    os.environ['PONTO_STORE'] = 'sqlite'
+    os.environ['PONTO_DB'] = os.path.join(pasta, 'ponto.db')
+    os.environ['PONTO_CACHE'] = os.path.join(pasta, 'cache')
+    gerar_base(os.environ['PONTO_DB'], args.funcionarios, args.dias)
+
+    from streamlit.testing.v1 import AppTest
+    from ponto.metricas import METRICAS
+
+    at = AppTest.from_file(os.path.abspath(args.app), default_timeout=120).run()
+    at.text_input[0].input('maria')
+    at.text_input[1].input('123')
+    at.button[0].click().run()
+
+    def menu(opcao):
+        return lambda: at.selectbox[0].select(opcao).run()
+
+    def clicar(rotulo):
+        return lambda: next(b for b in at.button if b.label == rotulo).click().run()
+
+    interacoes = [
+        ('batidas: rerun', menu("Batidas de Ponto"), at.run),
+        ('batidas: clique "Saída Almoço"', menu("Batidas de Ponto"), clicar("Saída Almoço")),
+        ('dashboard: abrir', menu("Batidas de Ponto"), menu("Dashboard")),
+        ('dashboard: rerun', menu("Dashboard"), at.run),
+        ('relatórios: abrir', menu("Batidas de Ponto"), menu("Relatórios")),
+        ('relatórios: rerun', menu("Relatórios"), at.run),
+        ('histórico: abrir', menu("Batidas de Ponto"), menu("Histórico")),
+        ('histórico: rerun', menu("Histórico"), at.run),
+    ]
+    print(f"{'interação':<32} {'CPU processo':>13} {'script app':>11}  (medianas)")
+    for nome, preparar, executar in interacoes:
+        cpu, script = [], []
+        for _ in range(args.repeticoes):
+            preparar()
+            medida = medir(executar, METRICAS)
+            cpu.append(medida[0])
+            script.append(medida[1])
+            assert not at.exception, at.exception
+        print(f"{nome:<32} {statistics.median(cpu) * 1e3:>10.1f} ms {statistics.median(script) * 1e3:>8.1f} ms")
+
+    fragmento = {r['operacao']: r for r in METRICAS.resumo()}.get('painel_batidas')
+    if fragmento:
+        print(f"\nrerun só do fragmento painel_batidas: {fragmento['p50_ms']:.1f} ms (p50)")
+
+
+if __name__ == '__main__':
+    main()
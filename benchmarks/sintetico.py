@@ -0,0 +1,102 @@
+"""Gerador determinístico de carga sintética para os benchmarks.
+
+Usuários com as mesmas divisões de contrato de ``usuarios_padrao`` e
+jornadas realistas em dias úteis: entrada, saída e retorno do almoço e saída,
+com ruído opcional (batidas faltando, repetidas e horas extras). A mesma
+``semente`` gera sempre a mesma base.
+"""
+import random
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+from ponto.armazenamento import MemoriaStore
+from ponto.dados import CamadaDados, hash_senha
+
+# Perfis de usuarios_padrao: (cargo, contratos)
+PERFIS = [
+    ('Analista', {'Contrato A': 70, 'Contrato B': 30}),
+    ('Coordenador', {'Contrato A': 50, 'Contrato C': 50}),
+    ('Admin', {'Gestão': 100}),
+]
+# Mesma proporção de perfis para qualquer número de usuários
+PESOS_PERFIS = [6, 3, 1]
+
+INICIO_PADRAO = date(2024, 1, 1)
+
+Batida = Tuple[str, str, datetime]
+
+
+def nome_usuario(indice: int) -> str:
+    return f"func{indice:05d}"
+
+
+def pis_usuario(indice: int) -> str:
+    """PIS (11 dígitos) fictício e único do funcionário ``indice``"""
+    return f"{10_000_000_000 + indice:011d}"
+
+
+def gerar_usuarios(funcionarios: int, semente: int = 0) -> Dict[str, Dict]:
+    """Tabela de usuários no formato de ``CamadaDados`` (senha ``123``)"""
+    aleatorio = random.Random(semente)
+    senha = hash_senha('123')
+    usuarios = {}
+    for f in range(funcionarios):
+        cargo, contratos = aleatorio.choices(PERFIS, PESOS_PERFIS)[0]
+        usuarios[nome_usuario(f)] = {
+            'senha': senha,
+            'nome': f"Funcionário {f}",
+            'cargo': cargo,
+            'pis': pis_usuario(f),
+            'contratos': dict(contratos),
+        }
+    return usuarios
+
+
+def _jornada(aleatorio: random.Random, dia: datetime, faltas: float, duplicadas: float,
+             extras: float) -> List[Tuple[str, datetime]]:
+    """Batidas de um dia de trabalho, em ordem cronológica"""
+    entrada = dia + timedelta(hours=7, minutes=aleatorio.randrange(120), seconds=aleatorio.randrange(60))
+    almoco = entrada + timedelta(hours=4, minutes=aleatorio.randrange(-20, 40))
+    retorno = almoco + timedelta(minutes=45 + aleatorio.randrange(30))
+    saida = retorno + timedelta(hours=4, minutes=aleatorio.randrange(-30, 60))
+    eventos = [('entrada', entrada), ('almoco_saida', almoco), ('almoco_retorno', retorno), ('saida', saida)]
+    if aleatorio.random() < extras:
+        inicio_extra = saida + timedelta(minutes=30 + aleatorio.randrange(60))
+        eventos.append(('extra1', inicio_extra))
+        eventos.append(('extra2', inicio_extra + timedelta(minutes=30 + aleatorio.randrange(90))))
+
+    batidas = []
+    for tipo, ts in eventos:
+        if aleatorio.random() < faltas:
+            continue
+        batidas.append((tipo, ts))
+        if aleatorio.random() < duplicadas:
+            batidas.append((tipo, ts + timedelta(seconds=1 + aleatorio.randrange(90))))
+    return batidas
+
+
+def gerar_batidas(usuarios: List[str], dias: int, inicio: date = INICIO_PADRAO,
+                  faltas: float = 0.0, duplicadas: float = 0.0, extras: float = 0.0,
+                  semente: int = 0) -> Iterator[Batida]:
+    """Batidas ``(usuario, tipo, timestamp)`` dos dias úteis, dia a dia.
+
+    ``faltas`` e ``duplicadas`` são as probabilidades de cada batida faltar
+    ou ser repetida; ``extras`` é a chance de um par extra1/extra2 no dia.
+    """
+    aleatorio = random.Random(semente)
+    for d in range(dias):
+        dia = datetime.combine(inicio + timedelta(days=d), datetime.min.time())
+        if dia.weekday() >= 5:
+            continue
+        for usuario in usuarios:
+            for tipo, ts in _jornada(aleatorio, dia, faltas, duplicadas, extras):
+                yield usuario, tipo, ts
+
+
+def criar_camada(funcionarios: int, dias: int, semente: int = 0, **ruido) -> CamadaDados:
+    """``CamadaDados`` em memória já carregada com a base sintética"""
+    usuarios = gerar_usuarios(funcionarios, semente)
+    store = MemoriaStore()
+    for usuario, tipo, ts in gerar_batidas(list(usuarios), dias, semente=semente, **ruido):
+        store.registrar(usuario, tipo, ts)
+    return CamadaDados(store, usuarios)
@@ -0,0 +1,213 @@
+"""Suíte de benchmarks dos caminhos quentes, com saída em JSON.
+
+Para cada tamanho de base (``funcionarios x dias``) gera a carga sintética
+de ``benchmarks.sintetico`` e mede as mesmas operações que o ``app.py``
+executa através dos managers: registrar batida, batidas do usuário num dia,
+horas do dia, porcentagem por contrato, agregação semanal do dashboard e as
+exportações CSV e XLSX (um usuário e a organização inteira num mês).
+
+    python -m benchmarks.suite --tamanhos 50x30,200x90 --saida atual.json
+    python -m benchmarks.suite --saida novo.json --comparar atual.json
+
+Com ``--comparar``, cada caso cuja mediana piorou mais que ``--tolerancia``
+é marcado como regressão e o processo termina com código 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.sintetico import INICIO_PADRAO, criar_camada
+from ponto.dados import CamadaDados
+from ponto.exportacao import arquivo_temporario, exportar_csv, exportar_xlsx
+from ponto.folha import calcular_folhas, horas_dia
+
+TAMANHOS_PADRAO = '50x30,200x90,1000x180'
+RUIDO = {'faltas': 0.03, 'duplicadas': 0.02, 'extras': 0.1}
+
+
+def medir(funcao: Callable[[], object], amostras: int, chamadas: int = 1) -> Dict:
+    """Tempo por chamada (s): mediana, p95 e mínimo de ``amostras`` rodadas"""
+    funcao()  # aquecimento
+    tempos = []
+    for _ in range(amostras):
+        inicio = time.perf_counter()
+        for _ in range(chamadas):
+            funcao()
+        tempos.append((time.perf_counter() - inicio) / chamadas)
+    tempos.sort()
+    return {
+        'mediana_s': statistics.median(tempos),
+        'p95_s': tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))],
+        'minimo_s': tempos[0],
+        'amostras': amostras,
+        'chamadas': chamadas,
+    }
+
+
+def casos(dados: CamadaDados, dias: int, aleatorio: random.Random) -> Dict[str, Callable[[], object]]:
+    """Operações medidas, com os mesmos passos dos managers do ``app.py``"""
+    usuarios = dados.indice.usuarios()
+    fim = INICIO_PADRAO + timedelta(days=dias - 1)
+    datas = dados.indice.datas(usuarios[0])
+    inicio_mes = fim.replace(day=1).isoformat()
+    inicio_semana = (fim - timedelta(days=fim.weekday())).isoformat()
+    # Registros novos vão para depois do fim da base, sempre no fim do log
+    proximo = [datetime.combine(fim + timedelta(days=1), datetime.min.time())]
+
+    def registrar_batida():
+        proximo[0] += timedelta(seconds=1)
+        dados.registrar_batida(aleatorio.choice(usuarios), 'entrada', proximo[0])
+
+    def get_batidas_usuario():
+        data = aleatorio.choice(datas)
+        dados.batidas_usuario(aleatorio.choice(usuarios), data, data)
+
+    def calcular_horas_dia():
+        data = aleatorio.choice(datas)
+        horas_dia(dados.batidas_usuario(aleatorio.choice(usuarios), data, data), data)
+
+    def calcular_porcentagem_contratos():
+        dados.porcentagem_contratos(aleatorio.choice(usuarios), fim.year, fim.month)
+
+    def dashboard_semanal():
+        folhas = calcular_folhas(dados.tabela_usuario(aleatorio.choice(usuarios), inicio_semana))
+        sum(folhas['total_horas'].tolist())
+
+    def exportacao(exportar, todos: bool):
+        def executar():
+            if todos:
+                alvo, inicio, ate = usuarios, inicio_mes, fim.isoformat()
+            else:
+                alvo, inicio, ate = [aleatorio.choice(usuarios)], None, None
+            with arquivo_temporario() as destino:
+                exportar(dados.iterar_linhas(alvo, inicio, ate), destino, com_usuario=todos)
+        return executar
+
+    return {
+        'registrar_batida': registrar_batida,
+        'get_batidas_usuario': get_batidas_usuario,
+        'calcular_horas_dia': calcular_horas_dia,
+        'calcular_porcentagem_contratos': calcular_porcentagem_contratos,
+        'dashboard_semanal': dashboard_semanal,
+        'exportar_csv_usuario': exportacao(exportar_csv, False),
+        'exportar_xlsx_usuario': exportacao(exportar_xlsx, False),
+        'exportar_csv_organizacao_mes': exportacao(exportar_csv, True),
+        'exportar_xlsx_organizacao_mes': exportacao(exportar_xlsx, True),
+    }
+
+
+# Operações rápidas repetem várias chamadas por amostra
+CHAMADAS = {
+    'registrar_batida': 200,
+    'get_batidas_usuario': 1000,
+    'calcular_horas_dia': 1000,
+    'calcular_porcentagem_contratos': 1000,
+    'dashboard_semanal': 20,
+}
+
+
+def executar_tamanho(funcionarios: int, dias: int, amostras: int, semente: int,
+                     filtro: Optional[List[str]]) -> List[Dict]:
+    inicio = time.perf_counter()
+    dados = criar_camada(funcionarios, dias, semente, **RUIDO)
+    carga = time.perf_counter() - inicio
+    tamanho = f"{funcionarios}x{dias}"
+    print(f"\n{tamanho}: {len(dados.log):,} batidas, carga em {carga:.2f} s")
+
+    resultados = [{'tamanho': tamanho, 'caso': 'carga_inicial', 'batidas': len(dados.log),
+                   'mediana_s': carga, 'p95_s': carga, 'minimo_s': carga, 'amostras': 1, 'chamadas': 1}]
+    aleatorio = random.Random(semente)
+    for nome, funcao in casos(dados, dias, aleatorio).items():
+        if filtro and not any(f in nome for f in filtro):
+            continue
+        # Exportações da organização crescem com a base: menos amostras
+        n = amostras if 'organizacao' not in nome else max(1, amostras // 3)
+        medida = medir(funcao, n, CHAMADAS.get(nome, 1))
+        resultados.append({'tamanho': tamanho, 'caso': nome, 'batidas': len(dados.log), **medida})
+        print(f"  {nome:<32} {medida['mediana_s'] * 1e3:>12.3f} ms  (p95 {medida['p95_s'] * 1e3:.3f} ms)")
+    return resultados
+
+
+def ambiente() -> Dict:
+    return {
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'processador': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+
+
+def comparar(atual: List[Dict], base: List[Dict], tolerancia: float) -> List[Dict]:
+    """Casos em comum cuja mediana piorou mais que ``tolerancia`` (fração)"""
+    anteriores = {(r['tamanho'], r['caso']): r for r in base}
+    regressoes = []
+    print(f"\n{'tamanho':<12} {'caso':<32} {'base ms':>12} {'atual ms':>12} {'razão':>7}")
+    for r in atual:
+        anterior = anteriores.get((r['tamanho'], r['caso']))
+        if anterior is None:
+            continue
+        razao = r['mediana_s'] / anterior['mediana_s'] if anterior['mediana_s'] else float('inf')
+        marca = ''
+        if razao > 1 + tolerancia:
+            marca = '  REGRESSÃO'
+            regressoes.append({'tamanho': r['tamanho'], 'caso': r['caso'], 'razao': razao})
+        print(f"{r['tamanho']:<12} {r['caso']:<32} {anterior['mediana_s'] * 1e3:>12.3f} "
+              f"{r['mediana_s'] * 1e3:>12.3f} {razao:>6.2f}x{marca}")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tamanhos', default=TAMANHOS_PADRAO,
+                        help="lista de funcionarios x dias, ex.: 50x30,200x90")
+    parser.add_argument('--amostras', type=int, default=7)
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--casos', help="executa só os casos que contêm estes textos (separados por vírgula)")
+    parser.add_argument('--saida', help="arquivo JSON com os resultados")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior para detectar regressões")
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help="piora relativa da mediana aceita antes de marcar regressão")
+    args = parser.parse_args()
+
+    filtro = args.casos.split(',') if args.casos else None
+    resultados = []
+    for tamanho in args.tamanhos.split(','):
+        funcionarios, dias = (int(x) for x in tamanho.lower().split('x'))
+        resultados.extend(executar_tamanho(funcionarios, dias, args.amostras, args.semente, filtro))
+
+    relatorio = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'ambiente': ambiente(),
+        'parametros': {'tamanhos': args.tamanhos, 'amostras': args.amostras,
+                       'semente': args.semente, 'ruido': RUIDO},
+        'resultados': resultados,
+    }
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+        print(f"\nresultados gravados em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            base = json.load(arquivo)['resultados']
+        regressoes = comparar(resultados, base, args.tolerancia)
+        if regressoes:
+            print(f"\n{len(regressoes)} regressão(ões) acima de {args.tolerancia:.0%}")
+            sys.exit(1)
+        print("\nsem regressões")
+
+
+if __name__ == '__main__':
+    main()
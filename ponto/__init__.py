@@ -0,0 +1 @@
+"""Núcleo do Sistema de Ponto FGV (armazenamento e regras de negócio)"""
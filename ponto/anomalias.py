@@ -0,0 +1,264 @@
+"""Exceções de ponto: sequências de batidas que a folha calcularia errado.
+
+``horas_dia`` fica com a última batida de cada tipo do dia, então cliques
+repetidos, uma saída esquecida ou o retorno do almoço antes da saída para o
+almoço viram horas erradas sem aviso. ``AnomaliasPonto`` passa uma vez pelas
+batidas em ordem de (usuário, instante) com uma pequena máquina de estados
+por dia (fora -> trabalhando -> almoço -> trabalhando -> encerrado) e guarda,
+para cada (usuário, dia) com problema, uma máscara de bits das anomalias.
+
+Depois da carga, cada batida nova só avança o estado do último dia do
+usuário (O(1)); uma batida anterior ao último instante visto (importação,
+correção) refaz apenas o dia dela. As telas leem a lista pronta em vez de
+reprocessar o log.
+"""
+import threading
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ponto.colunar import ColunasBatidas
+from ponto.folha import TIPOS_JORNADA
+
+SEGUNDOS_DIA = 86400
+EPOCA_DIA = date(1970, 1, 1)
+
+# Anomalias (bits da máscara) e rótulos das telas
+DUPLICADA = 1
+FORA_DE_SEQUENCIA = 2
+ALMOCO_INVERTIDO = 4
+SEM_ENTRADA = 8
+SEM_SAIDA = 16
+ALMOCO_SEM_RETORNO = 32
+JORNADA_LONGA = 64
+ANOMALIAS = {
+    DUPLICADA: 'Batida duplicada',
+    FORA_DE_SEQUENCIA: 'Batida fora de sequência',
+    ALMOCO_INVERTIDO: 'Retorno do almoço antes da saída',
+    SEM_ENTRADA: 'Saída sem entrada',
+    SEM_SAIDA: 'Sem saída',
+    ALMOCO_SEM_RETORNO: 'Almoço sem retorno',
+    JORNADA_LONGA: 'Jornada acima do limite',
+}
+
+JANELA_DUPLICADA = 120
+LIMITE_JORNADA = 10 * 3600
+
+# Códigos dos tipos da jornada (posição em TIPOS_JORNADA); extras ficam de fora
+ENTRADA, SAIDA, ALMOCO_SAIDA, ALMOCO_RETORNO = range(4)
+CODIGOS_JORNADA = {tipo: codigo for codigo, tipo in enumerate(TIPOS_JORNADA)}
+# Estados do dia
+FORA, TRABALHANDO, ALMOCO, ENCERRADO = range(4)
+AUSENTE = -(1 << 62)
+
+# (tipo, segundos desde a época) das batidas de um dia, em ordem cronológica
+BatidasDia = Callable[[str, int], List[Tuple[str, int]]]
+
+
+def descrever(mascara: int) -> List[str]:
+    """Rótulos das anomalias presentes na máscara"""
+    return [rotulo for bit, rotulo in ANOMALIAS.items() if mascara & bit]
+
+
+class _Dia:
+    """Estado de um (usuário, dia) na máquina de estados"""
+    __slots__ = ('dia', 'estado', 'almocou', 'mascara', 'ultimo', 'instante')
+
+    def __init__(self, dia: int):
+        self.dia = dia
+        self.estado = FORA
+        self.almocou = False
+        self.mascara = 0
+        # Último instante de cada tipo da jornada (a regra de horas_dia)
+        self.ultimo = [AUSENTE] * 4
+        self.instante = AUSENTE
+
+    def batida(self, tipo: int, instante: int, janela: int):
+        self.instante = instante
+        ultimo = self.ultimo
+        if instante - ultimo[tipo] <= janela:
+            # Clique repetido: marca e não muda o estado
+            self.mascara |= DUPLICADA
+            ultimo[tipo] = instante
+            return
+        ultimo[tipo] = instante
+
+        estado = self.estado
+        if tipo == ENTRADA:
+            if estado == FORA:
+                self.estado = TRABALHANDO
+            else:
+                self.mascara |= FORA_DE_SEQUENCIA
+        elif tipo == SAIDA:
+            if estado == TRABALHANDO:
+                self.estado = ENCERRADO
+            elif estado == ALMOCO:
+                self.mascara |= ALMOCO_SEM_RETORNO
+                self.estado = ENCERRADO
+            elif estado == FORA:
+                self.mascara |= SEM_ENTRADA
+                self.estado = ENCERRADO
+            else:
+                self.mascara |= FORA_DE_SEQUENCIA
+        elif tipo == ALMOCO_SAIDA:
+            if estado == TRABALHANDO and not self.almocou:
+                self.estado = ALMOCO
+            else:
+                self.mascara |= FORA_DE_SEQUENCIA
+            self.almocou = True
+        elif estado == ALMOCO:
+            self.estado = TRABALHANDO
+        elif not self.almocou:
+            self.mascara |= ALMOCO_INVERTIDO
+        else:
+            self.mascara |= FORA_DE_SEQUENCIA
+
+    def resultado(self, limite: int) -> int:
+        """Máscara do dia como está agora (o fim do dia não altera o estado)"""
+        mascara = self.mascara
+        if self.estado == TRABALHANDO:
+            mascara |= SEM_SAIDA
+        elif self.estado == ALMOCO:
+            mascara |= SEM_SAIDA | ALMOCO_SEM_RETORNO
+
+        # Jornada como a folha vai calculá-la
+        entrada, saida, almoco_saida, almoco_retorno = self.ultimo
+        if entrada != AUSENTE and saida != AUSENTE:
+            trabalhado = saida - entrada
+            if almoco_saida != AUSENTE and almoco_retorno != AUSENTE:
+                trabalhado -= almoco_retorno - almoco_saida
+            if trabalhado > limite:
+                mascara |= JORNADA_LONGA
+        return mascara
+
+
+class AnomaliasPonto:
+    """Máscara de anomalias por (usuário, dia), mantida a cada batida.
+
+    ``janela`` é o intervalo (s) em que uma batida do mesmo tipo conta como
+    duplicada; ``limite`` é a jornada máxima (s) antes de ``JORNADA_LONGA``.
+    Os dias são contados em dias desde 1970-01-01, como no ``LogBatidas``.
+    """
+
+    def __init__(self, janela: int = JANELA_DUPLICADA, limite: int = LIMITE_JORNADA):
+        self.janela = janela
+        self.limite = limite
+        self._dias: Dict[str, Dict[int, int]] = {}
+        # Último dia de cada usuário, ainda aberto a batidas novas
+        self._abertos: Dict[str, _Dia] = {}
+        self._lock = threading.Lock()
+
+    def _guardar(self, usuario: str, dia: _Dia):
+        mascara = dia.resultado(self.limite)
+        if mascara:
+            self._dias.setdefault(usuario, {})[dia.dia] = mascara
+        elif dia.dia in self._dias.get(usuario, ()):
+            del self._dias[usuario][dia.dia]
+
+    def carregar(self, colunas: ColunasBatidas):
+        """Carga inicial: uma passada pelas colunas do log"""
+        codigos = np.array([CODIGOS_JORNADA.get(nome, -1) for nome in colunas.nomes_tipo] or [-1], dtype=np.int8)
+        jornada = codigos[colunas.tipos] >= 0
+        usuarios = colunas.usuarios[jornada]
+        segundos = colunas.segundos[jornada]
+        tipos = codigos[colunas.tipos[jornada]]
+        ordem = np.lexsort((segundos, usuarios))
+
+        nomes = colunas.nomes_usuario
+        janela = self.janela
+        with self._lock:
+            self._dias = {}
+            self._abertos = {}
+            atual: Optional[_Dia] = None
+            usuario_atual = -1
+            for usuario, tipo, instante in zip(usuarios[ordem].tolist(), tipos[ordem].tolist(),
+                                               segundos[ordem].tolist()):
+                dia = instante // SEGUNDOS_DIA
+                if usuario != usuario_atual or dia != atual.dia:
+                    if atual is not None:
+                        self._guardar(nomes[usuario_atual], atual)
+                    if usuario != usuario_atual and usuario_atual >= 0:
+                        self._abertos[nomes[usuario_atual]] = atual
+                    atual, usuario_atual = _Dia(dia), usuario
+                atual.batida(tipo, instante, janela)
+            if atual is not None:
+                self._guardar(nomes[usuario_atual], atual)
+                self._abertos[nomes[usuario_atual]] = atual
+
+    def registrar(self, batidas: Iterable[Tuple[str, str, int]], batidas_dia: BatidasDia):
+        """Atualiza os dias tocados por ``(usuario, tipo, segundos)`` já gravados.
+
+        ``batidas_dia(usuario, dia)`` devolve todas as batidas do dia (já com
+        as novas) e só é chamada quando uma batida não é posterior a todas as
+        já vistas: fora de ordem, no mesmo segundo ou já lida pela carga
+        inicial (refazer o dia nunca conta a mesma batida duas vezes).
+        """
+        por_dia: Dict[Tuple[str, int], List[Tuple[int, int]]] = {}
+        for usuario, tipo, instante in batidas:
+            codigo = CODIGOS_JORNADA.get(tipo)
+            if codigo is not None:
+                por_dia.setdefault((usuario, instante // SEGUNDOS_DIA), []).append((instante, codigo))
+
+        janela = self.janela
+        with self._lock:
+            for (usuario, dia), novas in sorted(por_dia.items()):
+                novas.sort(key=lambda batida: batida[0])
+                aberto = self._abertos.get(usuario)
+                if aberto is None or dia > aberto.dia:
+                    aberto = self._abertos[usuario] = _Dia(dia)
+                if dia == aberto.dia and novas[0][0] > aberto.instante:
+                    for instante, codigo in novas:
+                        aberto.batida(codigo, instante, janela)
+                    self._guardar(usuario, aberto)
+                    continue
+
+                # Fora de ordem: refaz o dia inteiro
+                refeito = _Dia(dia)
+                for tipo, instante in batidas_dia(usuario, dia):
+                    codigo = CODIGOS_JORNADA.get(tipo)
+                    if codigo is not None:
+                        refeito.batida(codigo, instante, janela)
+                self._guardar(usuario, refeito)
+                if dia == aberto.dia:
+                    self._abertos[usuario] = refeito
+
+    def descartar_meses(self, meses: Iterable[str]):
+        """Esquece os dias dos meses ``AAAA-MM`` (arquivados)"""
+        meses = set(meses)
+        with self._lock:
+            for usuario, dias in self._dias.items():
+                for dia in [d for d in dias if data_dia(d)[:7] in meses]:
+                    del dias[dia]
+            for usuario in [u for u, aberto in self._abertos.items() if data_dia(aberto.dia)[:7] in meses]:
+                del self._abertos[usuario]
+
+    # -------------------- consultas --------------------
+
+    def excecoes(self, data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                 usuarios: Optional[Sequence[str]] = None) -> List[Tuple[str, str, int]]:
+        """``(usuario, data, mascara)`` dos dias com anomalias, por data e usuário"""
+        inicio = dia_data(data_inicio) if data_inicio else None
+        fim = dia_data(data_fim) if data_fim else None
+        with self._lock:
+            selecao = self._dias if usuarios is None else {u: self._dias[u] for u in usuarios if u in self._dias}
+            encontradas = [
+                (dia, usuario, mascara)
+                for usuario, dias in selecao.items()
+                for dia, mascara in dias.items()
+                if (inicio is None or dia >= inicio) and (fim is None or dia <= fim)
+            ]
+        encontradas.sort()
+        return [(usuario, data_dia(dia), mascara) for dia, usuario, mascara in encontradas]
+
+    def mascara(self, usuario: str, data: str) -> int:
+        return self._dias.get(usuario, {}).get(dia_data(data), 0)
+
+
+def dia_data(data: str) -> int:
+    """Dias desde 1970-01-01 de uma data ``YYYY-MM-DD``"""
+    return (date(int(data[0:4]), int(data[5:7]), int(data[8:10])) - EPOCA_DIA).days
+
+
+def data_dia(dia: int) -> str:
+    return (EPOCA_DIA + timedelta(days=dia)).isoformat()
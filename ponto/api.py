@@ -0,0 +1,390 @@
+"""Serviço HTTP/JSON de registro de batidas para relógios e integrações.
+
+Um servidor ``asyncio`` enxuto (HTTP/1.1 com keep-alive, em TCP ou socket
+Unix) que registra batidas numa ``CamadaDados``. Para alimentar as telas,
+ele sobe embutido no processo do Streamlit (``PONTO_API``, ver
+``ponto.servicos.get_dados``), sobre a mesma camada: as batidas aparecem
+nas telas na hora. Sozinho (``python -m ponto.api``) é uma implantação
+separada, dona do próprio banco: cada processo guarda as batidas em
+memória e não vê o que o outro grava, então ele se recusa a subir sobre um
+banco já aberto pelas telas (e elas, sobre o dele). As gravações rodam no
+pool de threads do laço de eventos; com o ``SQLiteStore``, pedidos
+simultâneos dividem o mesmo commit.
+
+Rotas:
+
+* ``POST /batidas`` ``{"usuario", "tipo", "timestamp"?}``: uma batida,
+  como ``PontoManager.registrar_batida`` (sem ``timestamp``, vale a hora
+  do servidor). O cabeçalho ``Idempotency-Key`` torna a chamada repetível;
+* ``POST /batidas/lote`` ``{"batidas": [{..., "chave"?}]}``: várias
+  batidas numa única escrita, com chave de idempotência por item;
+* ``GET /saude``: estado do serviço.
+
+Batidas com ``timestamp`` num mês fechado (``ponto.fechamento``) são
+recusadas com 409.
+
+Uma chave já vista devolve a mesma resposta (``Idempotent-Replayed:
+true``) sem gravar de novo; um pedido com a chave ainda em andamento
+espera o primeiro. As chaves ficam em memória (as ``MAX_CHAVES`` mais
+recentes), o suficiente para as novas tentativas de um relógio. Com
+``PONTO_API_TOKEN`` definido, os pedidos precisam de ``Authorization:
+Bearer <token>``.
+
+    python -m ponto.api --endereco 127.0.0.1:8502
+    python -m ponto.api --endereco unix:/tmp/ponto.sock
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from ponto.armazenamento import StoreEmUso
+from ponto.colunar import TIPOS_BATIDA
+from ponto.dados import CamadaDados, criar_camada_dados
+from ponto.fechamento import MesFechado
+from ponto.metricas import medir
+
+MAX_CORPO = 8 * 2 ** 20
+MAX_LOTE = 10_000
+MAX_CHAVES = 100_000
+ENDERECO_PADRAO = '127.0.0.1:8502'
+FRASES = {
+    200: 'OK', 201: 'Created', 400: 'Bad Request', 401: 'Unauthorized', 404: 'Not Found',
+    405: 'Method Not Allowed', 409: 'Conflict', 413: 'Payload Too Large', 422: 'Unprocessable Entity',
+    500: 'Internal Server Error',
+}
+
+Resposta = Tuple[int, Dict]
+
+
+class ErroRequisicao(Exception):
+    """Pedido recusado com o status HTTP ``status``"""
+
+    def __init__(self, status: int, mensagem: str):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def batida_json(batida) -> Dict:
+    return {campo: batida[campo] for campo in ('id', 'usuario', 'tipo', 'data', 'horario')}
+
+
+class ChavesIdempotencia:
+    """Respostas por chave de idempotência, das mais recentes (LRU).
+
+    Usada só de dentro do laço de eventos, então dispensa lock. Enquanto
+    o primeiro pedido de uma chave não termina, ela guarda um ``Future``
+    que os repetidos aguardam; falhas internas não ficam guardadas, para a
+    nova tentativa poder gravar.
+    """
+
+    def __init__(self, maximo: int = MAX_CHAVES):
+        self.maximo = maximo
+        self._respostas: 'OrderedDict[str, asyncio.Future]' = OrderedDict()
+
+    def obter(self, chave: str) -> Optional[asyncio.Future]:
+        futuro = self._respostas.get(chave)
+        if futuro is not None:
+            self._respostas.move_to_end(chave)
+        return futuro
+
+    def reservar(self, chave: str) -> asyncio.Future:
+        futuro = self._respostas[chave] = asyncio.get_running_loop().create_future()
+        while len(self._respostas) > self.maximo:
+            self._respostas.popitem(last=False)
+        return futuro
+
+    def concluir(self, chave: str, futuro: asyncio.Future, resposta: Optional[Resposta]):
+        """Publica a resposta; ``None`` (falha interna) libera a chave"""
+        if resposta is None:
+            if self._respostas.get(chave) is futuro:
+                del self._respostas[chave]
+            futuro.set_result(None)
+        else:
+            futuro.set_result(resposta)
+
+
+class ServidorBatidas:
+    """Rotas de registro de batidas sobre uma ``CamadaDados``"""
+
+    def __init__(self, dados: CamadaDados, token: Optional[str] = None):
+        self.dados = dados
+        self.token = token
+        self.chaves = ChavesIdempotencia()
+
+    # -------------------- validação --------------------
+
+    def _validar(self, item) -> Tuple[str, str, datetime]:
+        if not isinstance(item, dict):
+            raise ErroRequisicao(400, "batida deve ser um objeto JSON")
+        chave = item.get('chave')
+        if chave is not None and not isinstance(chave, str):
+            raise ErroRequisicao(400, f"chave de idempotência deve ser texto: {chave!r}")
+        usuario, tipo = item.get('usuario'), item.get('tipo')
+        if not isinstance(usuario, str) or not self.dados.get_usuario(usuario):
+            raise ErroRequisicao(422, f"usuário desconhecido: {usuario}")
+        if tipo not in TIPOS_BATIDA:
+            raise ErroRequisicao(422, f"tipo de batida inválido: {tipo}")
+        timestamp = datetime.now()
+        if item.get('timestamp') is not None:
+            try:
+                timestamp = datetime.fromisoformat(item['timestamp'])
+            except (TypeError, ValueError):
+                raise ErroRequisicao(422, f"timestamp inválido: {item['timestamp']}") from None
+            if timestamp.tzinfo is not None:
+                # O log guarda horário local sem fuso, como datetime.now()
+                timestamp = timestamp.astimezone().replace(tzinfo=None)
+        if self.dados.mes_fechado(timestamp.strftime('%Y-%m')):
+            raise ErroRequisicao(409, str(MesFechado(timestamp.strftime('%Y-%m'))))
+        return usuario, tipo, timestamp
+
+    # -------------------- rotas --------------------
+
+    async def registrar(self, item, chave: Optional[str]) -> Tuple[Resposta, bool]:
+        """(resposta, repetida) de uma batida"""
+        while chave:
+            anterior = self.chaves.obter(chave)
+            if anterior is None:
+                futuro = self.chaves.reservar(chave)
+                break
+            resposta = await asyncio.shield(anterior)
+            if resposta is not None:
+                return resposta, True
+            # A tentativa anterior falhou e liberou a chave: tenta de novo
+        resposta = None
+        try:
+            try:
+                usuario, tipo, timestamp = self._validar(item)
+                batida = await asyncio.get_running_loop().run_in_executor(
+                    None, self.dados.registrar_batida, usuario, tipo, timestamp)
+                resposta = (201, {'batida': batida_json(batida)})
+            except ErroRequisicao as erro:
+                resposta = (erro.status, {'erro': str(erro)})
+            except MesFechado as erro:
+                # Fechado entre a validação e a escrita
+                resposta = (409, {'erro': str(erro)})
+            return resposta, False
+        finally:
+            if chave:
+                self.chaves.concluir(chave, futuro, resposta)
+
+    async def registrar_lote(self, itens: List) -> List[Dict]:
+        """Um resultado ``{"status", "batida" | "erro", "repetida"?}`` por item"""
+        if len(itens) > MAX_LOTE:
+            raise ErroRequisicao(413, f"lote acima de {MAX_LOTE} batidas")
+        resultados: List[Optional[Dict]] = [None] * len(itens)
+        novos: List[Tuple[int, Tuple[str, str, datetime]]] = []
+        reservas: Dict[int, Tuple[str, asyncio.Future]] = {}
+        espera: List[Tuple[int, asyncio.Future]] = []
+
+        gravados = False
+        try:
+            # Reservas dentro do try: qualquer falha daqui em diante libera as chaves
+            for i, item in enumerate(itens):
+                chave = item.get('chave') if isinstance(item, dict) else None
+                if chave and isinstance(chave, str):
+                    anterior = self.chaves.obter(chave)
+                    if anterior is not None:
+                        espera.append((i, anterior))
+                        continue
+                    reservas[i] = (chave, self.chaves.reservar(chave))
+                try:
+                    novos.append((i, self._validar(item)))
+                except ErroRequisicao as erro:
+                    resultados[i] = {'status': erro.status, 'erro': str(erro)}
+
+            while novos:
+                try:
+                    ids = await asyncio.get_running_loop().run_in_executor(
+                        None, self.dados.registrar_lote, [batida for _, batida in novos])
+                except MesFechado as erro:
+                    # Fechado entre a validação e a escrita: 409 só nos itens
+                    # desse mês, e o resto do lote tenta de novo
+                    restantes = []
+                    for i, batida in novos:
+                        if batida[2].strftime('%Y-%m') == erro.mes:
+                            resultados[i] = {'status': 409, 'erro': str(erro)}
+                        else:
+                            restantes.append((i, batida))
+                    novos = restantes
+                    continue
+                for id_batida, (i, (usuario, tipo, timestamp)) in zip(ids, novos):
+                    iso = timestamp.isoformat()
+                    resultados[i] = {'status': 201, 'batida': {
+                        'id': id_batida, 'usuario': usuario, 'tipo': tipo, 'data': iso[:10], 'horario': iso[11:19],
+                    }}
+                break
+            gravados = True
+        finally:
+            for i, (chave, futuro) in reservas.items():
+                resultado = resultados[i] if gravados else None
+                self.chaves.concluir(chave, futuro, None if resultado is None else (resultado['status'], resultado))
+
+        for i, futuro in espera:
+            resposta = await asyncio.shield(futuro)
+            if resposta is None:
+                resultados[i] = {'status': 500, 'erro': "tentativa anterior falhou; envie de novo"}
+            else:
+                resultados[i] = dict(resposta[1], status=resposta[0], repetida=True)
+        return resultados
+
+    async def despachar(self, metodo: str, caminho: str, cabecalhos: Dict[str, str],
+                        corpo: bytes) -> Tuple[int, Dict, Dict[str, str]]:
+        """(status, corpo JSON, cabeçalhos extras) de um pedido"""
+        if self.token and not hmac.compare_digest(cabecalhos.get('authorization', '').encode(),
+                                                  f"Bearer {self.token}".encode()):
+            raise ErroRequisicao(401, "token ausente ou inválido")
+        rota = caminho.split('?', 1)[0]
+        if rota == '/saude':
+            if metodo != 'GET':
+                raise ErroRequisicao(405, "use GET")
+            return 200, {'status': 'ok', 'batidas': len(self.dados.log)}, {}
+        if rota not in ('/batidas', '/batidas/lote'):
+            raise ErroRequisicao(404, f"rota desconhecida: {rota}")
+        if metodo != 'POST':
+            raise ErroRequisicao(405, "use POST")
+        try:
+            pedido = json.loads(corpo)
+        except ValueError:
+            raise ErroRequisicao(400, "corpo não é JSON válido") from None
+
+        if rota == '/batidas':
+            with medir('api.registrar_batida'):
+                (status, resposta), repetida = await self.registrar(pedido, cabecalhos.get('idempotency-key'))
+            return status, resposta, {'Idempotent-Replayed': 'true'} if repetida else {}
+        if not isinstance(pedido, dict) or not isinstance(pedido.get('batidas'), list):
+            raise ErroRequisicao(400, 'esperado {"batidas": [...]}')
+        with medir('api.registrar_lote'):
+            resultados = await self.registrar_lote(pedido['batidas'])
+        return 200, {'resultados': resultados}, {}
+
+    # -------------------- HTTP --------------------
+
+    async def atender(self, leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+        """Uma conexão HTTP/1.1; atende pedidos em sequência enquanto houver keep-alive"""
+        try:
+            while True:
+                try:
+                    cabecalho = await leitor.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                linhas = cabecalho.decode('latin-1').split('\r\n')
+                partes = linhas[0].split(' ')
+                if len(partes) != 3:
+                    break
+                metodo, caminho, versao = partes
+                cabecalhos = {}
+                for linha in linhas[1:]:
+                    nome, _, valor = linha.partition(':')
+                    if nome:
+                        cabecalhos[nome.strip().lower()] = valor.strip()
+                manter = versao == 'HTTP/1.1' and cabecalhos.get('connection', '').lower() != 'close'
+
+                extras: Dict[str, str] = {}
+                try:
+                    try:
+                        tamanho = int(cabecalhos.get('content-length') or 0)
+                        if tamanho < 0:
+                            raise ValueError(tamanho)
+                    except ValueError:
+                        manter = False
+                        raise ErroRequisicao(400, "Content-Length inválido") from None
+                    if tamanho > MAX_CORPO:
+                        manter = False
+                        raise ErroRequisicao(413, f"corpo acima de {MAX_CORPO} bytes")
+                    corpo = await leitor.readexactly(tamanho) if tamanho else b''
+                    status, resposta, extras = await self.despachar(metodo, caminho, cabecalhos, corpo)
+                except ErroRequisicao as erro:
+                    status, resposta = erro.status, {'erro': str(erro)}
+                except asyncio.IncompleteReadError:
+                    break
+                except Exception as erro:
+                    status, resposta = 500, {'erro': f"falha interna: {erro}"}
+
+                conteudo = json.dumps(resposta, ensure_ascii=False).encode()
+                cabecalhos_resposta = ''.join(f"{nome}: {valor}\r\n" for nome, valor in extras.items())
+                escritor.write(
+                    f"HTTP/1.1 {status} {FRASES.get(status, '')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(conteudo)}\r\n"
+                    f"Connection: {'keep-alive' if manter else 'close'}\r\n"
+                    f"{cabecalhos_resposta}\r\n".encode('latin-1') + conteudo
+                )
+                await escritor.drain()
+                if not manter:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    async def iniciar(self, endereco: str = ENDERECO_PADRAO) -> asyncio.AbstractServer:
+        """Abre o servidor em ``host:porta`` ou ``unix:/caminho``"""
+        if endereco.startswith('unix:'):
+            caminho = endereco[len('unix:'):]
+            if os.path.exists(caminho):
+                os.remove(caminho)
+            return await asyncio.start_unix_server(self.atender, caminho, backlog=4096)
+        host, _, porta = endereco.rpartition(':')
+        return await asyncio.start_server(self.atender, host or '127.0.0.1', int(porta), backlog=4096)
+
+
+def iniciar_em_thread(dados: CamadaDados, endereco: str, token: Optional[str] = None) -> threading.Thread:
+    """Serve em segundo plano (laço de eventos próprio) no processo atual"""
+    pronto = threading.Event()
+    falha: List[BaseException] = []
+
+    def executar():
+        async def principal():
+            try:
+                servidor = await ServidorBatidas(dados, token).iniciar(endereco)
+            except BaseException as erro:
+                falha.append(erro)
+                raise
+            finally:
+                pronto.set()
+            async with servidor:
+                await servidor.serve_forever()
+        try:
+            asyncio.run(principal())
+        except BaseException:
+            pass
+
+    thread = threading.Thread(target=executar, name='ponto-api', daemon=True)
+    thread.start()
+    pronto.wait()
+    if falha:
+        raise falha[0]
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--endereco', default=os.environ.get('PONTO_API', ENDERECO_PADRAO),
+                        help="host:porta ou unix:/caminho/do/socket")
+    args = parser.parse_args()
+
+    try:
+        dados = criar_camada_dados()
+    except StoreEmUso as erro:
+        parser.exit(1, f"{erro}\nPara registrar nas telas, use PONTO_API no processo do Streamlit.\n")
+
+    async def principal():
+        servidor = await ServidorBatidas(dados, os.environ.get('PONTO_API_TOKEN')).iniciar(args.endereco)
+        print(f"servindo em {args.endereco}", flush=True)
+        async with servidor:
+            await servidor.serve_forever()
+
+    try:
+        asyncio.run(principal())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
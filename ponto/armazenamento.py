@@ -0,0 +1,379 @@
+"""Motores de armazenamento das batidas de ponto.
+
+O ``PontoManager`` conversa apenas com a interface ``PontoStore``; o motor
+concreto é escolhido por ``criar_store`` a partir das variáveis de ambiente
+``PONTO_STORE`` (``sqlite``, ``memoria`` ou ``diario``), ``PONTO_DB`` e
+``PONTO_DIARIO``.
+"""
+import itertools
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from typing import IO, TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from ponto.ids import MAX_NOS, GeradorIds
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from ponto.colunar import ColunasBatidas
+
+FORMATO_DATA = '%Y-%m-%d'
+FORMATO_HORARIO = '%H:%M:%S'
+
+
+def montar_batida(id_batida: int, usuario: str, tipo: str, timestamp: datetime) -> Dict:
+    """Monta o dicionário de batida usado pelas telas"""
+    return {
+        'id': id_batida,
+        'usuario': usuario,
+        'tipo': tipo,
+        'data': timestamp.strftime(FORMATO_DATA),
+        'horario': timestamp.strftime(FORMATO_HORARIO),
+        'timestamp': timestamp
+    }
+
+
+class StoreEmUso(RuntimeError):
+    """O motor já está aberto por outro processo dono das batidas"""
+
+
+def travar_dono(caminho: str) -> Optional[IO]:
+    """Trava exclusiva (``flock``) no arquivo ``caminho``, criado se preciso.
+
+    Levanta ``StoreEmUso`` se outro processo (ou outra abertura neste) já a
+    tem; o arquivo devolvido segura a trava até ser fechado.
+    """
+    if fcntl is None:
+        return None
+    arquivo = open(caminho, 'a+b')
+    try:
+        fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        arquivo.close()
+        raise StoreEmUso(f"{caminho}: as batidas já estão abertas por outro processo") from None
+    return arquivo
+
+
+class PontoStore:
+    """Interface comum dos motores de armazenamento"""
+
+    def registrar(self, usuario: str, tipo: str, timestamp: datetime) -> Dict:
+        raise NotImplementedError
+
+    def registrar_lote(self, batidas: List[Tuple[str, str, datetime]]) -> List[int]:
+        """Grava ``(usuario, tipo, timestamp)`` de uma vez e devolve os ids"""
+        return [self.registrar(usuario, tipo, timestamp)['id'] for usuario, tipo, timestamp in batidas]
+
+    def listar(self, usuario: Optional[str] = None,
+               data_inicio: Optional[str] = None,
+               data_fim: Optional[str] = None) -> List[Dict]:
+        """Batidas em ordem cronológica; ``data_inicio``/``data_fim`` são inclusivas"""
+        raise NotImplementedError
+
+    def remover_periodo(self, data_inicio: str, data_fim: str) -> int:
+        """Apaga as batidas entre as datas (inclusivas), já arquivadas; devolve quantas"""
+        raise NotImplementedError
+
+    def colunas(self) -> Optional[Tuple['np.ndarray', 'ColunasBatidas']]:
+        """(ids, colunas) de todas as batidas na ordem de ``listar``, para a
+        carga sem montar dicionários; ``None`` se o motor não guarda colunas"""
+        return None
+
+    def fechar(self):
+        pass
+
+
+class MemoriaStore(PontoStore):
+    """Armazenamento volátil em lista (testes e demonstrações).
+
+    Sem lock: ``next`` de ``itertools.count`` e ``list.append``/``extend``
+    são atômicos no CPython, então threads simultâneas nunca repetem id nem
+    perdem batida. Ids de um lote podem se intercalar com os de outras
+    threads; a lista fica na ordem de gravação. ``remover_periodo`` troca a
+    lista e não é seguro junto com escritas simultâneas.
+    """
+
+    def __init__(self):
+        self._batidas: List[Dict] = []
+        self._ids = itertools.count(1)
+
+    def registrar(self, usuario: str, tipo: str, timestamp: datetime) -> Dict:
+        batida = montar_batida(next(self._ids), usuario, tipo, timestamp)
+        self._batidas.append(batida)
+        return batida
+
+    def registrar_lote(self, batidas: List[Tuple[str, str, datetime]]) -> List[int]:
+        novas = [montar_batida(next(self._ids), usuario, tipo, timestamp)
+                 for usuario, tipo, timestamp in batidas]
+        self._batidas.extend(novas)
+        return [batida['id'] for batida in novas]
+
+    def listar(self, usuario: Optional[str] = None,
+               data_inicio: Optional[str] = None,
+               data_fim: Optional[str] = None) -> List[Dict]:
+        batidas = list(self._batidas)
+        return [
+            b for b in batidas
+            if (usuario is None or b['usuario'] == usuario)
+            and (data_inicio is None or b['data'] >= data_inicio)
+            and (data_fim is None or b['data'] <= data_fim)
+        ]
+
+    def remover_periodo(self, data_inicio: str, data_fim: str) -> int:
+        batidas = list(self._batidas)
+        self._batidas = [b for b in batidas if not data_inicio <= b['data'] <= data_fim]
+        return len(batidas) - len(self._batidas)
+
+
+# Consultas fixas: o sqlite3 mantém o statement preparado em cache pelo texto SQL
+SQL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pontos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    usuario TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    data TEXT NOT NULL,
+    horario TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pontos_usuario_data ON pontos (usuario, data, horario);
+CREATE INDEX IF NOT EXISTS idx_pontos_data ON pontos (data);
+CREATE TABLE IF NOT EXISTS nos_escrita (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pid INTEGER NOT NULL,
+    inicio TEXT NOT NULL
+);
+"""
+SQL_INSERIR = ("INSERT INTO pontos (id, usuario, tipo, data, horario, timestamp) "
+               "VALUES (?, ?, ?, ?, ?, ?)")
+SQL_REIVINDICAR_NO = "INSERT INTO nos_escrita (pid, inicio) VALUES (?, ?)"
+SQL_REMOVER_PERIODO = "DELETE FROM pontos WHERE data BETWEEN ? AND ?"
+_SQL_SELECT = "SELECT id, usuario, tipo, timestamp FROM pontos"
+_SQL_ORDEM = " ORDER BY data, horario, id"
+SQL_LISTAR = {
+    # (filtra usuário, filtra período)
+    (False, False): _SQL_SELECT + _SQL_ORDEM,
+    (True, False): _SQL_SELECT + " WHERE usuario = ?" + _SQL_ORDEM,
+    (False, True): _SQL_SELECT + " WHERE data BETWEEN ? AND ?" + _SQL_ORDEM,
+    (True, True): _SQL_SELECT + " WHERE usuario = ? AND data BETWEEN ? AND ?" + _SQL_ORDEM,
+}
+
+_FIM_FILA = object()
+
+
+class _PedidoLote:
+    """Várias batidas gravadas juntas pela thread escritora"""
+    __slots__ = ('linhas', 'futuro')
+
+    def __init__(self, linhas: List[Tuple], futuro: Future):
+        self.linhas = linhas
+        self.futuro = futuro
+
+
+class SQLiteStore(PontoStore):
+    """SQLite em modo WAL com fila de escrita e group commit.
+
+    Todas as escritas passam por uma única thread escritora, que drena a fila
+    e grava até ``max_lote`` batidas na mesma transação. Em picos (login das
+    08:00) várias batidas dividem um único commit/fsync. ``registrar`` só
+    retorna depois do commit do lote, então a batida devolvida já é durável.
+    Cargas em massa (``registrar_lote``) entram na mesma fila como um único
+    pedido e são gravadas com ``executemany``.
+
+    Os ids vêm de um ``GeradorIds`` da própria escritora, cujo nó é
+    reivindicado na tabela ``nos_escrita``: processos que dividem o arquivo
+    geram ids distintos sem consultar a base. Se um nó reaproveitado colidir
+    com um id existente, a chave primária recusa o lote e a escritora
+    reivindica outro nó antes de regravá-lo.
+
+    Com ``exclusivo`` (o que ``criar_store`` usa), uma trava em
+    ``<caminho>.lock`` reserva o arquivo para um único processo dono de
+    uma ``CamadaDados``: ela guarda as batidas em memória e não veria o que
+    outro processo gravasse no mesmo arquivo.
+    """
+
+    def __init__(self, caminho: str = 'ponto.db', max_lote: int = 256,
+                 sincrono: str = 'NORMAL', exclusivo: bool = False):
+        self.caminho = caminho
+        self.max_lote = max_lote
+        self.sincrono = sincrono
+        self._dono = travar_dono(f"{caminho}.lock") if exclusivo else None
+        self._local = threading.local()
+        self._fila: "queue.Queue" = queue.Queue()
+
+        conn = self._conectar()
+        conn.executescript(SQL_SCHEMA)
+        conn.commit()
+        self._gerador = GeradorIds(self._reivindicar_no(conn))
+        conn.close()
+
+        self._escritora = threading.Thread(
+            target=self._loop_escrita, name='ponto-sqlite-escritora', daemon=True
+        )
+        self._escritora.start()
+
+    def _conectar(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.caminho, check_same_thread=False, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA synchronous={self.sincrono}')
+        return conn
+
+    @staticmethod
+    def _reivindicar_no(conn: sqlite3.Connection) -> int:
+        with conn:
+            sequencia = conn.execute(SQL_REIVINDICAR_NO, (os.getpid(), datetime.now().isoformat())).lastrowid
+        return sequencia % MAX_NOS
+
+    def _conexao_leitura(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._conectar()
+            self._local.conn = conn
+        return conn
+
+    # -------------------- escrita --------------------
+
+    def registrar(self, usuario: str, tipo: str, timestamp: datetime) -> Dict:
+        futuro: Future = Future()
+        self._fila.put((usuario, tipo, timestamp, futuro))
+        return futuro.result()
+
+    def registrar_lote(self, batidas: List[Tuple[str, str, datetime]]) -> List[int]:
+        linhas = []
+        for usuario, tipo, timestamp in batidas:
+            iso = timestamp.isoformat()
+            linhas.append((usuario, tipo, iso[:10], iso[11:19], iso))
+        futuro: Future = Future()
+        self._fila.put(_PedidoLote(linhas, futuro))
+        return futuro.result()
+
+    def _loop_escrita(self):
+        conn = self._conectar()
+        ativo = True
+        while ativo:
+            pedido = self._fila.get()
+            if pedido is _FIM_FILA:
+                break
+            lote = [pedido]
+            while len(lote) < self.max_lote:
+                try:
+                    pedido = self._fila.get_nowait()
+                except queue.Empty:
+                    break
+                if pedido is _FIM_FILA:
+                    ativo = False
+                    break
+                lote.append(pedido)
+            try:
+                try:
+                    self._gravar_lote(conn, lote)
+                except sqlite3.IntegrityError:
+                    self._gerador = GeradorIds(self._reivindicar_no(conn))
+                    self._gravar_lote(conn, lote, falhar=True)
+            except Exception as erro:
+                # Qualquer falha fica com os pedidos deste lote; a escritora
+                # segue viva para os próximos em vez de deixar todos esperando
+                conn.rollback()
+                self._falhar_lote(lote, erro)
+        conn.close()
+
+    @staticmethod
+    def _falhar_lote(lote: List, erro: BaseException):
+        for pedido in lote:
+            futuro = pedido.futuro if isinstance(pedido, _PedidoLote) else pedido[-1]
+            if not futuro.done():
+                futuro.set_exception(erro)
+
+    def _gravar_lote(self, conn: sqlite3.Connection, lote: List, falhar: bool = False):
+        """Grava o lote numa transação; ``IntegrityError`` sobe se ``falhar`` for falso,
+        qualquer outro erro desfaz a transação e vai para os futuros do lote"""
+        try:
+            with conn:
+                ids = []
+                for pedido in lote:
+                    if isinstance(pedido, _PedidoLote):
+                        ids_lote = self._gerador.lote(len(pedido.linhas))
+                        conn.executemany(SQL_INSERIR, [
+                            (id_batida,) + linha for id_batida, linha in zip(ids_lote, pedido.linhas)
+                        ])
+                        ids.append(ids_lote)
+                        continue
+                    usuario, tipo, timestamp, _ = pedido
+                    id_batida = self._gerador.proximo()
+                    conn.execute(SQL_INSERIR, (
+                        id_batida, usuario, tipo,
+                        timestamp.strftime(FORMATO_DATA),
+                        timestamp.strftime(FORMATO_HORARIO),
+                        timestamp.isoformat()
+                    ))
+                    ids.append(id_batida)
+        except Exception as erro:
+            if isinstance(erro, sqlite3.IntegrityError) and not falhar:
+                raise
+            self._falhar_lote(lote, erro)
+            return
+
+        for id_batida, pedido in zip(ids, lote):
+            if isinstance(pedido, _PedidoLote):
+                pedido.futuro.set_result(id_batida)
+            else:
+                usuario, tipo, timestamp, futuro = pedido
+                futuro.set_result(montar_batida(id_batida, usuario, tipo, timestamp))
+
+    # -------------------- leitura --------------------
+
+    def listar(self, usuario: Optional[str] = None,
+               data_inicio: Optional[str] = None,
+               data_fim: Optional[str] = None) -> List[Dict]:
+        filtra_periodo = data_inicio is not None or data_fim is not None
+        params: List[str] = []
+        if usuario is not None:
+            params.append(usuario)
+        if filtra_periodo:
+            params.extend([data_inicio or '0000-00-00', data_fim or '9999-99-99'])
+
+        sql = SQL_LISTAR[(usuario is not None, filtra_periodo)]
+        cursor = self._conexao_leitura().execute(sql, params)
+        return [
+            montar_batida(id_batida, usuario_b, tipo, datetime.fromisoformat(ts))
+            for id_batida, usuario_b, tipo, ts in cursor
+        ]
+
+    def remover_periodo(self, data_inicio: str, data_fim: str) -> int:
+        """Apaga o período numa conexão própria; as páginas liberadas são
+        reaproveitadas pelas próximas batidas, então o arquivo para de crescer"""
+        conn = self._conectar()
+        try:
+            with conn:
+                removidas = conn.execute(SQL_REMOVER_PERIODO, (data_inicio, data_fim)).rowcount
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        finally:
+            conn.close()
+        return removidas
+
+    def fechar(self):
+        self._fila.put(_FIM_FILA)
+        self._escritora.join()
+        if self._dono is not None:
+            self._dono.close()
+
+
+def criar_store() -> PontoStore:
+    """Cria o motor configurado por ``PONTO_STORE``/``PONTO_DB``/``PONTO_DIARIO``"""
+    motor = os.environ.get('PONTO_STORE', 'sqlite')
+    if motor == 'memoria':
+        return MemoriaStore()
+    if motor == 'sqlite':
+        return SQLiteStore(os.environ.get('PONTO_DB', 'ponto.db'), exclusivo=True)
+    if motor == 'diario':
+        from ponto.diario import DiarioStore  # importa ponto.colunar, que importa este módulo
+        return DiarioStore(os.environ.get('PONTO_DIARIO', 'diario_ponto'))
+    raise ValueError(f"Motor de armazenamento desconhecido: {motor}")
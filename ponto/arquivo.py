@@ -0,0 +1,439 @@
+"""Arquivo frio das batidas: meses antigos em Arrow IPC (ou Parquet) particionados.
+
+``CamadaDados.arquivar_mes`` move as batidas de um mês fechado do motor
+para ``<pasta>/ano=AAAA/mes=MM/batidas.arrow`` e as tira do log em memória:
+o motor e a carga inicial ficam do tamanho dos meses vivos. As pastas seguem
+o particionamento *hive*, legível direto por ``pyarrow.dataset``.
+
+Cada partição é ordenada por usuário e instante, com o usuário num
+dicionário ordenado, então os códigos de usuário são crescentes. O arquivo
+Arrow é aberto com ``pa.memory_map`` e lido sem cópia: filtrar por usuário
+e período é uma busca binária nos códigos e depois nos instantes, e só as
+páginas tocadas saem do disco. O período também poda as partições pelo
+mês. Com ``formato='parquet'`` os arquivos ficam menores (zstd) e o filtro
+vai para ``pq.read_table``, que pula os *row groups* pelas estatísticas.
+
+Ao lado de cada partição, ``contagens.json`` guarda batidas, dias com
+batida e entradas por usuário: versões dos dados, contagens, resumos e o
+salto até a página pedida do histórico saem dele sem abrir a partição. Ele
+é publicado por último e é o que marca a partição como completa. O ``pyarrow`` só é
+importado ao ler ou gravar uma partição.
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import Counter
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from ponto.armazenamento import montar_batida
+from ponto.colunar import EPOCA, ColunasBatidas, montar_tabela
+from ponto.fechamento import limites_mes
+from ponto.indice import ORDINAL_EPOCA, SEGUNDOS_DIA, ordinal_dia
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+FORMATOS = {'arrow': 'batidas.arrow', 'parquet': 'batidas.parquet'}
+CONTAGENS = 'contagens.json'
+LINHAS_GRUPO_PARQUET = 16_384
+_PASTA_ANO = re.compile(r'^ano=(\d{4})$')
+_PASTA_MES = re.compile(r'^mes=(\d{2})$')
+
+
+class Selecao(NamedTuple):
+    """Batidas arquivadas de um usuário, em ordem cronológica"""
+    ids: np.ndarray
+    tipos: np.ndarray
+    segundos: np.ndarray
+
+
+_VAZIA = Selecao(np.empty(0, np.int64), np.empty(0, object), np.empty(0, np.int64))
+
+
+class _Particao(NamedTuple):
+    """Colunas de uma partição Arrow vistas sem cópia sobre o arquivo mapeado"""
+    tabela: object  # pa.Table: mantém o mapeamento vivo
+    codigos: Dict[str, int]
+    usuarios: np.ndarray
+    ids: np.ndarray
+    tipos: np.ndarray
+    nomes_tipo: np.ndarray
+    segundos: np.ndarray
+
+
+def _segundos_dia(data: str) -> int:
+    return (ordinal_dia(data) - ORDINAL_EPOCA) * SEGUNDOS_DIA
+
+
+def _mes_seguinte(mes: str) -> str:
+    ano, numero = int(mes[:4]), int(mes[5:7])
+    return f"{ano + numero // 12:04d}-{numero % 12 + 1:02d}"
+
+
+def _unico(coluna):
+    """Array único de uma coluna (sem cópia se ela já tem um só pedaço)"""
+    return coluna.chunk(0) if coluna.num_chunks == 1 else coluna.combine_chunks()
+
+
+def _dicionario(coluna):
+    """(códigos, nomes) de uma coluna de texto, codificada em dicionário se preciso"""
+    import pyarrow as pa
+
+    array = _unico(coluna)
+    if not pa.types.is_dictionary(array.type):
+        array = array.dictionary_encode()
+    return array.indices.to_numpy(), array.dictionary.to_pylist()
+
+
+def _publicar(caminho: str, escrever: Callable[[str], None]):
+    """Grava num temporário da mesma pasta, faz fsync e renomeia para ``caminho``"""
+    pasta = os.path.dirname(caminho)
+    descritor, temporario = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+    os.close(descritor)
+    try:
+        escrever(temporario)
+        with open(temporario, 'rb') as arquivo:
+            os.fsync(arquivo.fileno())
+        os.chmod(temporario, 0o444)
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+
+
+class ArquivoBatidas:
+    """Partições mensais de batidas arquivadas numa pasta"""
+
+    def __init__(self, pasta: str, formato: str = 'arrow'):
+        if formato not in FORMATOS:
+            raise ValueError(f"formato de arquivo desconhecido: {formato}")
+        self.pasta = pasta
+        self.formato = formato
+        # mês -> usuário -> [batidas, dias com batida, entradas]
+        self._contagens: Dict[str, Dict[str, List[int]]] = {}
+        self._formatos: Dict[str, str] = {}
+        self._particoes: Dict[str, _Particao] = {}
+        self._lock = threading.Lock()
+        anos = os.listdir(pasta) if os.path.isdir(pasta) else []
+        for ano in anos:
+            if _PASTA_ANO.match(ano) is None:
+                continue
+            for mes in os.listdir(os.path.join(pasta, ano)):
+                caminho = os.path.join(pasta, ano, mes, CONTAGENS)
+                if _PASTA_MES.match(mes) is None or not os.path.exists(caminho):
+                    continue
+                with open(caminho, encoding='utf-8') as arquivo:
+                    manifesto = json.load(arquivo)
+                self._contagens[manifesto['mes']] = manifesto['usuarios']
+                self._formatos[manifesto['mes']] = manifesto['formato']
+        self._indexar_meses()
+
+    def _indexar_meses(self):
+        self._meses = sorted(self._contagens)
+        # Limites ISO de cada mês, consultados a cada leitura
+        self._limites = {mes: tuple(d.isoformat() for d in limites_mes(mes)) for mes in self._meses}
+
+    def _pasta_mes(self, mes: str) -> str:
+        return os.path.join(self.pasta, f"ano={mes[:4]}", f"mes={mes[5:7]}")
+
+    def arquivado(self, mes: str) -> bool:
+        return mes in self._contagens
+
+    def meses(self) -> List[str]:
+        """Meses arquivados, em ordem"""
+        return list(self._meses)
+
+    def usuarios(self) -> List[str]:
+        return sorted({usuario for contagens in self._contagens.values() for usuario in contagens})
+
+    def contagens(self) -> Counter:
+        """Batidas arquivadas por usuário"""
+        total: Counter = Counter()
+        for contagens in self._contagens.values():
+            for usuario, (batidas, _, _) in contagens.items():
+                total[usuario] += batidas
+        return total
+
+    # -------------------- gravação --------------------
+
+    def gravar(self, mes: str, ids: np.ndarray, usuarios: np.ndarray, tipos: np.ndarray,
+               segundos: np.ndarray):
+        """Publica a partição do mês; as linhas de cada usuário vêm em ordem cronológica"""
+        import pyarrow as pa
+
+        if self.arquivado(mes):
+            raise ValueError(f"o mês {mes} já está arquivado")
+        nomes, codigos = np.unique(usuarios.astype(str), return_inverse=True)
+        codigos = codigos.ravel().astype(np.int32)
+        ordem = np.argsort(codigos, kind='stable')
+        nomes_tipo, codigos_tipo = np.unique(tipos.astype(str), return_inverse=True)
+        dias = np.unique(codigos.astype(np.int64) << 32 | (segundos // SEGUNDOS_DIA)) >> 32
+        tabela = pa.table({
+            'id': pa.array(ids[ordem], pa.int64()),
+            'usuario': pa.DictionaryArray.from_arrays(pa.array(codigos[ordem]), pa.array(nomes.tolist())),
+            'tipo': pa.DictionaryArray.from_arrays(pa.array(codigos_tipo.ravel()[ordem].astype(np.int8)),
+                                                   pa.array(nomes_tipo.tolist())),
+            'instante': pa.array(segundos[ordem].astype('datetime64[s]')),
+        })
+
+        pasta = self._pasta_mes(mes)
+        os.makedirs(pasta, exist_ok=True)
+        _publicar(os.path.join(pasta, FORMATOS[self.formato]), lambda caminho: self._escrever(tabela, caminho))
+        manifesto = {
+            'mes': mes,
+            'formato': self.formato,
+            'usuarios': dict(zip(nomes.tolist(), zip(
+                np.bincount(codigos, minlength=len(nomes)).tolist(),
+                np.bincount(dias, minlength=len(nomes)).tolist(),
+                np.bincount(codigos[tipos == 'entrada'], minlength=len(nomes)).tolist(),
+            ))),
+        }
+
+        def escrever_manifesto(caminho: str):
+            with open(caminho, 'w', encoding='utf-8') as arquivo:
+                json.dump(manifesto, arquivo, ensure_ascii=False)
+
+        with self._lock:
+            _publicar(os.path.join(pasta, CONTAGENS), escrever_manifesto)
+            self._contagens[mes] = manifesto['usuarios']
+            self._formatos[mes] = self.formato
+            self._indexar_meses()
+
+    def _escrever(self, tabela, caminho: str):
+        import pyarrow as pa
+
+        if self.formato == 'parquet':
+            import pyarrow.parquet as pq
+            pq.write_table(tabela, caminho, row_group_size=LINHAS_GRUPO_PARQUET, compression='zstd')
+            return
+        with pa.OSFile(caminho, 'wb') as destino, pa.ipc.new_file(destino, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+
+    # -------------------- leitura --------------------
+
+    def _particao(self, mes: str) -> _Particao:
+        particao = self._particoes.get(mes)
+        if particao is None:
+            with self._lock:
+                particao = self._particoes.get(mes)
+                if particao is None:
+                    particao = self._particoes[mes] = self._mapear(mes)
+        return particao
+
+    def _mapear(self, mes: str) -> _Particao:
+        import pyarrow as pa
+
+        caminho = os.path.join(self._pasta_mes(mes), FORMATOS['arrow'])
+        tabela = pa.ipc.open_file(pa.memory_map(caminho)).read_all()
+        usuario, tipo = _unico(tabela.column('usuario')), _unico(tabela.column('tipo'))
+        nomes = usuario.dictionary.to_pylist()
+        return _Particao(
+            tabela=tabela,
+            codigos={nome: i for i, nome in enumerate(nomes)},
+            usuarios=usuario.indices.to_numpy(),
+            ids=_unico(tabela.column('id')).to_numpy(),
+            tipos=tipo.indices.to_numpy(),
+            nomes_tipo=np.array(tipo.dictionary.to_pylist(), dtype=object),
+            segundos=_unico(tabela.column('instante')).to_numpy().view(np.int64),
+        )
+
+    def _fatia(self, mes: str, usuario: str, inicio: Optional[int], fim: Optional[int]) -> Selecao:
+        """Batidas do usuário na partição com instante em [inicio, fim)"""
+        if self._formatos[mes] == 'parquet':
+            return self._fatia_parquet(mes, usuario, inicio, fim)
+        particao = self._particao(mes)
+        codigo = particao.codigos.get(usuario)
+        if codigo is None:
+            return _VAZIA
+        primeira, ultima = np.searchsorted(particao.usuarios, [codigo, codigo + 1]).tolist()
+        segundos = particao.segundos[primeira:ultima]
+        de = primeira + (int(np.searchsorted(segundos, inicio)) if inicio is not None else 0)
+        ate = primeira + (int(np.searchsorted(segundos, fim)) if fim is not None else len(segundos))
+        return Selecao(particao.ids[de:ate], particao.nomes_tipo[particao.tipos[de:ate]],
+                       particao.segundos[de:ate])
+
+    def _fatia_parquet(self, mes: str, usuario: str, inicio: Optional[int], fim: Optional[int]) -> Selecao:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        filtros = [('usuario', '==', usuario)]
+        if inicio is not None:
+            filtros.append(('instante', '>=', pa.scalar(inicio, pa.timestamp('s'))))
+        if fim is not None:
+            filtros.append(('instante', '<', pa.scalar(fim, pa.timestamp('s'))))
+        tabela = pq.read_table(os.path.join(self._pasta_mes(mes), FORMATOS['parquet']),
+                               columns=['id', 'tipo', 'instante'], filters=filtros, memory_map=True)
+        # O Parquet não tem segundos como unidade: o instante volta em ms
+        segundos = _unico(tabela.column('instante')).cast(pa.timestamp('s')).to_numpy().view(np.int64)
+        ordem = np.argsort(segundos, kind='stable')
+        tipos = np.array(tabela.column('tipo').to_pylist(), dtype=object)
+        return Selecao(_unico(tabela.column('id')).to_numpy()[ordem], tipos[ordem], segundos[ordem])
+
+    def colunas(self, mes: str) -> ColunasBatidas:
+        """Todas as batidas do mês nas colunas do ``LogBatidas`` (agregações da organização)"""
+        if self._formatos[mes] == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            tabela = pq.read_table(os.path.join(self._pasta_mes(mes), FORMATOS['parquet']),
+                                   columns=['usuario', 'tipo', 'instante'], memory_map=True)
+            usuarios, nomes_usuario = _dicionario(tabela.column('usuario'))
+            tipos, nomes_tipo = _dicionario(tabela.column('tipo'))
+            segundos = _unico(tabela.column('instante')).cast(pa.timestamp('s')).to_numpy().view(np.int64)
+            return ColunasBatidas(usuarios, tipos, segundos, nomes_usuario, nomes_tipo)
+        particao = self._particao(mes)
+        return ColunasBatidas(particao.usuarios, particao.tipos, particao.segundos,
+                              sorted(particao.codigos, key=particao.codigos.get), list(particao.nomes_tipo))
+
+    def _meses_periodo(self, data_inicio: Optional[str],
+                       data_fim: Optional[str]) -> List[Tuple[str, Optional[str], Optional[str]]]:
+        """(mês, inicio, fim) dos meses arquivados do período; ``None`` se o mês é inteiro"""
+        meses = []
+        limites = self._limites
+        for mes in self._meses:
+            if (data_inicio is not None and mes < data_inicio[:7]) or (data_fim is not None and mes > data_fim[:7]):
+                continue
+            primeiro, ultimo = limites[mes]
+            inicio = data_inicio if data_inicio is not None and data_inicio > primeiro else None
+            fim = data_fim if data_fim is not None and data_fim < ultimo else None
+            meses.append((mes, inicio, fim))
+        return meses
+
+    def _selecionar_mes(self, mes: str, usuario: str, data_inicio: Optional[str],
+                        data_fim: Optional[str]) -> Selecao:
+        if usuario not in self._contagens[mes]:
+            return _VAZIA
+        return self._fatia(mes, usuario, _segundos_dia(data_inicio) if data_inicio else None,
+                           _segundos_dia(data_fim) + SEGUNDOS_DIA if data_fim else None)
+
+    def _contagem_mes(self, mes: str, usuario: str, data_inicio: Optional[str],
+                      data_fim: Optional[str]) -> Tuple[int, int, int]:
+        """(batidas, dias, entradas) do usuário no mês; do manifesto se o mês é inteiro"""
+        if data_inicio is None and data_fim is None:
+            return tuple(self._contagens[mes].get(usuario, (0, 0, 0)))
+        selecao = self._selecionar_mes(mes, usuario, data_inicio, data_fim)
+        return (len(selecao.ids), len(np.unique(selecao.segundos // SEGUNDOS_DIA)),
+                int(np.count_nonzero(selecao.tipos == 'entrada')))
+
+    def selecionar(self, usuario: str, data_inicio: Optional[str] = None,
+                   data_fim: Optional[str] = None) -> Selecao:
+        """Batidas arquivadas do usuário entre as datas (inclusivas)"""
+        partes = [self._selecionar_mes(mes, usuario, inicio, fim)
+                  for mes, inicio, fim in self._meses_periodo(data_inicio, data_fim)]
+        if not partes:
+            return _VAZIA
+        if len(partes) == 1:
+            return partes[0]
+        return Selecao(*(np.concatenate(coluna) for coluna in zip(*partes)))
+
+    def contar(self, usuarios: Iterable[str], data_inicio: Optional[str] = None,
+               data_fim: Optional[str] = None) -> int:
+        """Batidas arquivadas dos usuários no período"""
+        usuarios = list(usuarios)
+        return sum(self._contagem_mes(mes, usuario, inicio, fim)[0]
+                   for mes, inicio, fim in self._meses_periodo(data_inicio, data_fim) for usuario in usuarios)
+
+    def resumo(self, usuario: str, data_inicio: Optional[str] = None,
+               data_fim: Optional[str] = None) -> Tuple[int, int, int]:
+        """(batidas, dias com batida, entradas) arquivados do período"""
+        batidas = dias = entradas = 0
+        for mes, inicio, fim in self._meses_periodo(data_inicio, data_fim):
+            do_mes = self._contagem_mes(mes, usuario, inicio, fim)
+            batidas, dias, entradas = batidas + do_mes[0], dias + do_mes[1], entradas + do_mes[2]
+        return batidas, dias, entradas
+
+    def batidas(self, usuario: str, data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                deslocamento: int = 0, limite: Optional[int] = None) -> List[Dict]:
+        """Batidas arquivadas como dicionários, de ``deslocamento`` até ``limite``.
+
+        Meses inteiros antes do deslocamento são pulados pelas contagens, sem
+        abrir a partição.
+        """
+        batidas: List[Dict] = []
+        for mes, inicio, fim in self._meses_periodo(data_inicio, data_fim):
+            if limite is not None and len(batidas) >= limite:
+                break
+            if inicio is None and fim is None and deslocamento:
+                quantidade = self._contagens[mes].get(usuario, (0, 0, 0))[0]
+                if deslocamento >= quantidade:
+                    deslocamento -= quantidade
+                    continue
+            selecao = self._selecionar_mes(mes, usuario, inicio, fim)
+            ate = None if limite is None else deslocamento + limite - len(batidas)
+            batidas.extend(
+                montar_batida(id_batida, usuario, tipo, EPOCA + timedelta(seconds=segundos))
+                for id_batida, tipo, segundos in zip(selecao.ids[deslocamento:ate].tolist(),
+                                                     selecao.tipos[deslocamento:ate].tolist(),
+                                                     selecao.segundos[deslocamento:ate].tolist())
+            )
+            deslocamento = max(0, deslocamento - len(selecao.ids))
+        return batidas
+
+    def tabela(self, usuario: str, data_inicio: Optional[str] = None,
+               data_fim: Optional[str] = None) -> 'pd.DataFrame':
+        """Batidas arquivadas no formato de ``LogBatidas.tabela``"""
+        selecao = self.selecionar(usuario, data_inicio, data_fim)
+        return montar_tabela(selecao.ids, np.full(len(selecao.ids), usuario, dtype=object),
+                             selecao.tipos, selecao.segundos)
+
+    def linhas(self, usuarios: Iterable[str], data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+               bloco: int = 50_000) -> Iterator[Tuple[str, str, str, str]]:
+        """Linhas ``(usuario, data, tipo, horario)`` como ``CamadaDados.iterar_linhas``.
+
+        As seleções de vários usuários são formatadas juntas, em blocos.
+        """
+        pendentes: List[Tuple[str, Selecao]] = []
+        quantidade = 0
+        for usuario in usuarios:
+            selecao = self.selecionar(usuario, data_inicio, data_fim)
+            if len(selecao.ids):
+                pendentes.append((usuario, selecao))
+                quantidade += len(selecao.ids)
+            if quantidade >= bloco:
+                yield from self._linhas_bloco(pendentes)
+                pendentes, quantidade = [], 0
+        if pendentes:
+            yield from self._linhas_bloco(pendentes)
+
+    @staticmethod
+    def _linhas_bloco(pendentes: List[Tuple[str, Selecao]]) -> Iterator[Tuple[str, str, str, str]]:
+        tabela = montar_tabela(
+            np.concatenate([selecao.ids for _, selecao in pendentes]),
+            np.repeat(np.array([usuario for usuario, _ in pendentes], dtype=object),
+                      [len(selecao.ids) for _, selecao in pendentes]),
+            np.concatenate([selecao.tipos for _, selecao in pendentes]),
+            np.concatenate([selecao.segundos for _, selecao in pendentes]),
+        )
+        return zip(tabela['usuario'], tabela['data'], tabela['tipo'], tabela['horario'])
+
+    def trechos(self, data_inicio: Optional[str],
+                data_fim: Optional[str]) -> List[Tuple[bool, Optional[str], Optional[str]]]:
+        """O período cortado em trechos ``(arquivado, inicio, fim)`` em ordem cronológica.
+
+        Cada sequência de meses arquivados vira um trecho; entre elas ficam os
+        trechos vivos (``None`` nas pontas abertas). Como meses arquivados não
+        recebem batidas, concatenar os trechos já dá a ordem cronológica.
+        """
+        blocos: List[List[str]] = []
+        for mes, _, _ in self._meses_periodo(data_inicio, data_fim):
+            if blocos and _mes_seguinte(blocos[-1][1]) == mes:
+                blocos[-1][1] = mes
+            else:
+                blocos.append([mes, mes])
+        trechos: List[Tuple[bool, Optional[str], Optional[str]]] = []
+        cursor = data_inicio
+        for primeiro, ultimo in blocos:
+            inicio, fim = self._limites[primeiro][0], self._limites[ultimo][1]
+            vespera = (date.fromisoformat(inicio) - timedelta(days=1)).isoformat()
+            if cursor is None or cursor <= vespera:
+                trechos.append((False, cursor, vespera))
+            trechos.append((True, max(cursor or '', inicio), min(data_fim or '9999', fim)))
+            cursor = (date.fromisoformat(fim) + timedelta(days=1)).isoformat()
+        if cursor is None or data_fim is None or cursor <= data_fim:
+            trechos.append((False, cursor, data_fim))
+        return trechos
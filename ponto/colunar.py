@@ -0,0 +1,235 @@
+"""Log de batidas em colunas (NumPy) no lugar de um dicionário por batida.
+
+Cada batida ocupa 21 bytes: id (int64), usuário internado (int32), tipo
+(código int8) e instante em segundos desde a época (int64). As colunas
+crescem por realocação geométrica. Quem precisa de uma linha por vez usa
+``BatidaView``, um objeto com ``__slots__`` que se comporta como o
+dicionário de batida antigo (``b['data']``, ``dict(b)``).
+"""
+import threading
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+from ponto.armazenamento import FORMATO_DATA, FORMATO_HORARIO
+
+EPOCA = datetime(1970, 1, 1)
+CAPACIDADE_INICIAL = 1024
+TIPOS_BATIDA = ['entrada', 'saida', 'almoco_saida', 'almoco_retorno', 'extra1', 'extra2']
+CAMPOS_BATIDA = ('id', 'usuario', 'tipo', 'data', 'horario', 'timestamp')
+
+
+def para_segundos(timestamp: datetime) -> int:
+    """Segundos (inteiros) desde a época de um datetime sem fuso"""
+    return (timestamp - EPOCA) // timedelta(seconds=1)
+
+
+class ColunasBatidas(NamedTuple):
+    """Cópia das colunas do log (serializável para outros processos)"""
+    usuarios: np.ndarray
+    tipos: np.ndarray
+    segundos: np.ndarray
+    nomes_usuario: List[str]
+    nomes_tipo: List[str]
+
+
+class BatidaView(Mapping):
+    """Uma linha do ``LogBatidas`` lida sob demanda"""
+    __slots__ = ('_log', '_linha')
+
+    def __init__(self, log: 'LogBatidas', linha: int):
+        self._log = log
+        self._linha = linha
+
+    @property
+    def linha(self) -> int:
+        return self._linha
+
+    @property
+    def timestamp(self) -> datetime:
+        return EPOCA + timedelta(seconds=int(self._log._segundos[self._linha]))
+
+    def __getitem__(self, campo: str):
+        log, linha = self._log, self._linha
+        if campo == 'id':
+            return int(log._ids[linha])
+        if campo == 'usuario':
+            return log._nomes_usuario[log._usuarios[linha]]
+        if campo == 'tipo':
+            return log._nomes_tipo[log._tipos[linha]]
+        if campo == 'data':
+            return self.timestamp.strftime(FORMATO_DATA)
+        if campo == 'horario':
+            return self.timestamp.strftime(FORMATO_HORARIO)
+        if campo == 'timestamp':
+            return self.timestamp
+        raise KeyError(campo)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(CAMPOS_BATIDA)
+
+    def __len__(self) -> int:
+        return len(CAMPOS_BATIDA)
+
+    def __repr__(self) -> str:
+        return f"BatidaView({dict(self)!r})"
+
+
+class LogBatidas:
+    """Log de batidas só de inserção, em colunas tipadas"""
+
+    def __init__(self, capacidade: int = CAPACIDADE_INICIAL):
+        self._tamanho = 0
+        self._ids = np.empty(capacidade, dtype=np.int64)
+        self._usuarios = np.empty(capacidade, dtype=np.int32)
+        self._tipos = np.empty(capacidade, dtype=np.int8)
+        self._segundos = np.empty(capacidade, dtype=np.int64)
+        self._nomes_usuario: List[str] = []
+        self._codigos_usuario: Dict[str, int] = {}
+        self._nomes_tipo: List[str] = list(TIPOS_BATIDA)
+        self._codigos_tipo: Dict[str, int] = {t: i for i, t in enumerate(TIPOS_BATIDA)}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._tamanho
+
+    def linha(self, linha: int) -> BatidaView:
+        return BatidaView(self, linha)
+
+    def segundos(self, linha: int) -> int:
+        return int(self._segundos[linha])
+
+    def codigo_usuario(self, usuario: str) -> Optional[int]:
+        return self._codigos_usuario.get(usuario)
+
+    def _crescer(self):
+        capacidade = max(CAPACIDADE_INICIAL, len(self._ids) * 2)
+        for nome in ('_ids', '_usuarios', '_tipos', '_segundos'):
+            antiga = getattr(self, nome)
+            nova = np.empty(capacidade, dtype=antiga.dtype)
+            nova[:self._tamanho] = antiga[:self._tamanho]
+            setattr(self, nome, nova)
+
+    def _codigo(self, nome: str, codigos: Dict[str, int], nomes: List[str]) -> int:
+        codigo = codigos.get(nome)
+        if codigo is None:
+            codigo = codigos[nome] = len(nomes)
+            nomes.append(nome)
+        return codigo
+
+    def anexar(self, id_batida: int, usuario: str, tipo: str, timestamp: datetime) -> int:
+        """Acrescenta uma batida e devolve o número da linha"""
+        with self._lock:
+            if self._tamanho == len(self._ids):
+                self._crescer()
+            linha = self._tamanho
+            self._ids[linha] = id_batida
+            self._usuarios[linha] = self._codigo(usuario, self._codigos_usuario, self._nomes_usuario)
+            self._tipos[linha] = self._codigo(tipo, self._codigos_tipo, self._nomes_tipo)
+            self._segundos[linha] = para_segundos(timestamp)
+            self._tamanho = linha + 1
+        return linha
+
+    def anexar_lote(self, ids: Sequence[int], batidas: Sequence[Tuple[str, str, datetime]]) -> range:
+        """Acrescenta ``(usuario, tipo, timestamp)`` de uma vez; devolve as linhas"""
+        segundos = [para_segundos(ts) for _, _, ts in batidas]
+        with self._lock:
+            usuarios = [self._codigo(u, self._codigos_usuario, self._nomes_usuario) for u, _, _ in batidas]
+            tipos = [self._codigo(t, self._codigos_tipo, self._nomes_tipo) for _, t, _ in batidas]
+            inicio = self._tamanho
+            fim = inicio + len(batidas)
+            while fim > len(self._ids):
+                self._crescer()
+            self._ids[inicio:fim] = ids
+            self._usuarios[inicio:fim] = usuarios
+            self._tipos[inicio:fim] = tipos
+            self._segundos[inicio:fim] = segundos
+            self._tamanho = fim
+        return range(inicio, fim)
+
+    def trecho(self, inicio: int, fim: int) -> Tuple[List[str], List[str], List[int]]:
+        """(usuários, tipos, segundos) das linhas ``inicio:fim`` como listas"""
+        nomes_usuario, nomes_tipo = self._nomes_usuario, self._nomes_tipo
+        return ([nomes_usuario[c] for c in self._usuarios[inicio:fim].tolist()],
+                [nomes_tipo[c] for c in self._tipos[inicio:fim].tolist()],
+                self._segundos[inicio:fim].tolist())
+
+    def colunas(self, linhas: Optional[Sequence[int]] = None) -> ColunasBatidas:
+        """Instantâneo das colunas preenchidas (ou só das ``linhas`` indicadas)"""
+        with self._lock:
+            if linhas is None:
+                n = self._tamanho
+                colunas = (self._usuarios[:n].copy(), self._tipos[:n].copy(), self._segundos[:n].copy())
+            else:
+                # Indexação por lista já devolve cópias
+                selecao = np.asarray(linhas, dtype=np.int64)
+                colunas = (self._usuarios[selecao], self._tipos[selecao], self._segundos[selecao])
+            return ColunasBatidas(*colunas, list(self._nomes_usuario), list(self._nomes_tipo))
+
+    def ids(self, linhas: Sequence[int]) -> np.ndarray:
+        return self._ids[np.asarray(linhas, dtype=np.int64)]
+
+    def anexar_de(self, origem: 'LogBatidas', linhas: np.ndarray) -> range:
+        """Copia ``linhas`` de outro log, na mesma ordem; devolve as linhas novas"""
+        with self._lock:
+            mapa_usuario = np.array([self._codigo(nome, self._codigos_usuario, self._nomes_usuario)
+                                     for nome in origem._nomes_usuario], dtype=np.int32)
+            mapa_tipo = np.array([self._codigo(nome, self._codigos_tipo, self._nomes_tipo)
+                                  for nome in origem._nomes_tipo], dtype=np.int8)
+            inicio = self._tamanho
+            fim = inicio + len(linhas)
+            while fim > len(self._ids):
+                self._crescer()
+            self._ids[inicio:fim] = origem._ids[linhas]
+            self._usuarios[inicio:fim] = mapa_usuario[origem._usuarios[linhas]]
+            self._tipos[inicio:fim] = mapa_tipo[origem._tipos[linhas]]
+            self._segundos[inicio:fim] = origem._segundos[linhas]
+            self._tamanho = fim
+        return range(inicio, fim)
+
+    def anexar_colunas(self, ids: np.ndarray, colunas: ColunasBatidas) -> range:
+        """Acrescenta colunas já codificadas (com as tabelas de nomes delas); devolve as linhas"""
+        with self._lock:
+            mapa_usuario = np.array([self._codigo(nome, self._codigos_usuario, self._nomes_usuario)
+                                     for nome in colunas.nomes_usuario] or [0], dtype=np.int32)
+            mapa_tipo = np.array([self._codigo(nome, self._codigos_tipo, self._nomes_tipo)
+                                  for nome in colunas.nomes_tipo] or [0], dtype=np.int8)
+            inicio = self._tamanho
+            fim = inicio + len(ids)
+            while fim > len(self._ids):
+                self._crescer()
+            self._ids[inicio:fim] = ids
+            self._usuarios[inicio:fim] = mapa_usuario[colunas.usuarios]
+            self._tipos[inicio:fim] = mapa_tipo[colunas.tipos]
+            self._segundos[inicio:fim] = colunas.segundos
+            self._tamanho = fim
+        return range(inicio, fim)
+
+    def tabela(self, linhas: Optional[Sequence[int]] = None) -> 'pd.DataFrame':
+        """Linhas do log como tabela no formato de ``ponto.folha.calcular_folhas``"""
+        n = self._tamanho
+        selecao = np.arange(n) if linhas is None else np.asarray(linhas, dtype=np.int64)
+        nomes_usuario = np.array(self._nomes_usuario, dtype=object)
+        nomes_tipo = np.array(self._nomes_tipo, dtype=object)
+        return montar_tabela(self._ids[selecao], nomes_usuario[self._usuarios[selecao]],
+                             nomes_tipo[self._tipos[selecao]], self._segundos[selecao])
+
+
+def montar_tabela(ids: np.ndarray, usuarios: np.ndarray, tipos: np.ndarray,
+                  segundos: np.ndarray) -> 'pd.DataFrame':
+    """Tabela ``id, usuario, tipo, data, horario`` de colunas já decodificadas"""
+    import pandas as pd  # sob demanda: fora do caminho do login
+
+    instantes = pd.Series(np.datetime_as_string(segundos.astype('datetime64[s]')), dtype=object)
+    return pd.DataFrame({
+        'id': ids,
+        'usuario': usuarios,
+        'tipo': tipos,
+        'data': instantes.str.slice(0, 10),
+        'horario': instantes.str.slice(11, 19),
+    })
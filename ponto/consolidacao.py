@@ -0,0 +1,125 @@
+"""Totais materializados de horas por dia, por mês e por contrato.
+
+Os totais são guardados em segundos inteiros, então somas incrementais não
+acumulam erro de ponto flutuante. Cada batida recalcula somente o dia
+afetado e propaga a diferença para o mês do usuário e para os contratos.
+"""
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from ponto.folha import calcular_folhas, horas_dia, tabela_batidas
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def segundos_trabalhados(horas: float) -> int:
+    """Converte ``total_horas`` (diferença de segundos inteiros / 3600) em segundos"""
+    return int(round(horas * 3600))
+
+
+class ConsolidadoHoras:
+    """Totais de horas por usuário/dia, usuário/mês e mês/contrato.
+
+    ``contratos_usuario(usuario, data)`` devolve o rateio vigente de um
+    usuário no dia (``{'Contrato A': 70, ...}``); os totais por contrato
+    guardam segundos × porcentagem para continuarem exatos. Os dias ficam
+    agrupados por usuário e mês, para as consultas de um mês não varrerem
+    o histórico inteiro do usuário.
+    """
+
+    def __init__(self, contratos_usuario: Callable[[str, str], Dict[str, float]]):
+        self._contratos_usuario = contratos_usuario
+        self._dias: Dict[str, Dict[str, Dict[str, int]]] = {}
+        self._meses: Dict[Tuple[str, str], int] = {}
+        self._contratos: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def carregar(self, folhas: 'pd.DataFrame'):
+        """Carga inicial a partir de ``calcular_folhas``"""
+        with self._lock:
+            for usuario, data, horas in folhas[['usuario', 'data', 'total_horas']].itertuples(index=False):
+                self._aplicar(usuario, data, segundos_trabalhados(horas))
+
+    def atualizar_dia(self, usuario: str, data: str, batidas_dia: Callable[[], List[Dict]]):
+        """Recalcula o dia com as batidas atuais (lidas dentro do lock)"""
+        with self._lock:
+            horas = horas_dia(batidas_dia(), data)['total_horas']
+            self._aplicar(usuario, data, segundos_trabalhados(horas))
+
+    def _aplicar(self, usuario: str, data: str, segundos: int):
+        mes = data[:7]
+        dias = self._dias.setdefault(usuario, {}).setdefault(mes, {})
+        delta = segundos - dias.get(data, 0)
+        dias[data] = segundos
+        if delta == 0:
+            return
+
+        self._meses[(usuario, mes)] = self._meses.get((usuario, mes), 0) + delta
+        for contrato, porcentagem in self._contratos_usuario(usuario, data).items():
+            chave = (mes, contrato)
+            self._contratos[chave] = self._contratos.get(chave, 0) + delta * porcentagem
+
+    def reatribuir_contratos(self, usuario: str, antigos: Dict[str, float], novos: Dict[str, float],
+                             data_inicio: str = '0000-00-00', data_fim: Optional[str] = None):
+        """Move as horas do usuário do rateio antigo para o novo nos dias de
+        ``[data_inicio, data_fim)`` (sem ``data_fim``, até o último dia)"""
+        with self._lock:
+            for mes, dias in self._dias.get(usuario, {}).items():
+                if mes < data_inicio[:7] or (data_fim is not None and mes > data_fim[:7]):
+                    continue
+                for data, segundos in dias.items():
+                    if not segundos or data < data_inicio or (data_fim is not None and data >= data_fim):
+                        continue
+                    for contrato, porcentagem in antigos.items():
+                        self._contratos[(mes, contrato)] -= segundos * porcentagem
+                    for contrato, porcentagem in novos.items():
+                        chave = (mes, contrato)
+                        self._contratos[chave] = self._contratos.get(chave, 0) + segundos * porcentagem
+
+    # -------------------- consultas --------------------
+
+    def horas_dia(self, usuario: str, data: str) -> float:
+        return self._dias.get(usuario, {}).get(data[:7], {}).get(data, 0) / 3600
+
+    def horas_mes(self, usuario: str, ano: int, mes: int) -> float:
+        return self._meses.get((usuario, f"{ano:04d}-{mes:02d}"), 0) / 3600
+
+    def segundos_dias_mes(self, usuario: str, ano: int, mes: int) -> Dict[str, int]:
+        """Segundos trabalhados em cada dia do mês"""
+        return dict(self._dias.get(usuario, {}).get(f"{ano:04d}-{mes:02d}", {}))
+
+    def horas_contratos_mes(self, ano: int, mes: int) -> Dict[str, float]:
+        """Horas de toda a organização por contrato no mês"""
+        chave_mes = f"{ano:04d}-{mes:02d}"
+        return {
+            contrato: total / 100 / 3600
+            for (mes_total, contrato), total in self._contratos.items()
+            if mes_total == chave_mes
+        }
+
+
+def verificar_consolidado(consolidado: ConsolidadoHoras, batidas: List[Dict],
+                          contratos_usuario: Callable[[str, str], Dict[str, float]]) -> List[str]:
+    """Compara os totais materializados com um recálculo completo.
+
+    Devolve a lista de divergências encontradas (vazia quando tudo bate).
+    """
+    referencia = ConsolidadoHoras(contratos_usuario)
+    referencia.carregar(calcular_folhas(tabela_batidas(batidas)))
+
+    divergencias: List[str] = []
+    for nome in ['_dias', '_meses', '_contratos']:
+        atual = getattr(consolidado, nome)
+        esperado = getattr(referencia, nome)
+        if nome == '_dias':
+            atual = {(u, d): s for u, meses in atual.items() for dias in meses.values() for d, s in dias.items()}
+            esperado = {(u, d): s for u, meses in esperado.items() for dias in meses.values()
+                        for d, s in dias.items()}
+        for chave in sorted(set(atual) | set(esperado)):
+            if abs(atual.get(chave, 0) - esperado.get(chave, 0)) > 1e-6:
+                divergencias.append(
+                    f"{nome.strip('_')} {chave}: materializado {atual.get(chave, 0)} "
+                    f"!= recalculado {esperado.get(chave, 0)}"
+                )
+    return divergencias
@@ -0,0 +1,594 @@
+"""Camada de dados compartilhada por todas as sessões do processo.
+
+Usuários e batidas vivem uma única vez por processo (o ``app.py`` guarda a
+instância com ``st.cache_resource``); cada sessão do navegador mantém apenas
+o estado de login em ``st.session_state``.
+"""
+import hashlib
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+import numpy as np
+
+from ponto.anomalias import AnomaliasPonto, data_dia
+from ponto.armazenamento import PontoStore, criar_store
+from ponto.arquivo import ArquivoBatidas
+from ponto.colunar import LogBatidas, para_segundos
+from ponto.consolidacao import ConsolidadoHoras
+from ponto.fechamento import Fechamento, FechamentosMes, MesFechado, chave_mes, limites_mes, montar_fechamento
+from ponto.folha import calcular_folhas
+from ponto.indice import ORDINAL_EPOCA, SEGUNDOS_DIA, IndiceBatidas
+from ponto.metricas import contar_linhas
+from ponto.ocupacao import OcupacaoPonto
+from ponto.rateio import RateioContratos, dia_epoca, ratear
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def _mes_arquivado(segundos: np.ndarray, meses: List[str]) -> np.ndarray:
+    """Posição em ``meses`` (ordenados) do mês de cada instante, ou -1"""
+    if not meses:
+        return np.full(len(segundos), -1)
+    limites = [limites_mes(mes) for mes in meses]
+    inicios = np.array([(primeiro.toordinal() - ORDINAL_EPOCA) * SEGUNDOS_DIA for primeiro, _ in limites])
+    fins = np.array([(ultimo.toordinal() + 1 - ORDINAL_EPOCA) * SEGUNDOS_DIA for _, ultimo in limites])
+    posicao = np.searchsorted(inicios, segundos, side='right') - 1
+    return np.where((posicao >= 0) & (segundos < fins[np.maximum(posicao, 0)]), posicao, -1)
+
+
+def hash_senha(senha: str) -> str:
+    return hashlib.md5(senha.encode()).hexdigest()
+
+
+def usuarios_padrao() -> Dict[str, Dict]:
+    """Usuários de teste"""
+    return {
+        'maria': {
+            'senha': hash_senha('123'),
+            'nome': 'Maria Silva',
+            'cargo': 'Analista',
+            'pis': '120.45678.90-1',
+            'contratos': {'Contrato A': 70, 'Contrato B': 30}
+        },
+        'joao': {
+            'senha': hash_senha('456'),
+            'nome': 'João Santos',
+            'cargo': 'Coordenador',
+            'pis': '120.45678.91-0',
+            'contratos': {'Contrato A': 50, 'Contrato C': 50}
+        },
+        'admin': {
+            'senha': hash_senha('admin'),
+            'nome': 'Administrador',
+            'cargo': 'Admin',
+            'contratos': {'Gestão': 100}
+        }
+    }
+
+
+class CamadaDados:
+    """Usuários e batidas do processo, seguros para acesso concorrente.
+
+    O motor de batidas já é thread-safe; a tabela de usuários é protegida
+    por um lock e substituída por cópia a cada alteração, então leituras
+    nunca veem um dicionário pela metade. As batidas do motor são espelhadas
+    no ``LogBatidas`` colunar; consultas por usuário são respondidas pelo
+    ``IndiceBatidas``, os totais de horas pelo ``ConsolidadoHoras``, as
+    exceções (sequências de batidas inconsistentes) pelo ``AnomaliasPonto``
+    e a ocupação por hora pelo ``OcupacaoPonto``. Log e índice são
+    carregados do motor na criação (direto das colunas, quando o motor as
+    tem); os demais só no primeiro acesso, para a
+    partida e o login não pagarem por eles.
+    Todos são mantidos em dia por ``registrar_batida``.
+
+    O rateio de contratos tem vigência (``RateioContratos``): um rateio
+    novo em ``salvar_usuario`` vale dali em diante e os dias anteriores
+    continuam no antigo. A ocupação agrupa pelo rateio mais recente.
+
+    Com ``fechamentos``, batidas em meses fechados são recusadas com
+    ``MesFechado``. ``fechar_mes`` primeiro barra escritas novas no mês e
+    espera as que já passaram pela verificação, então o instantâneo nunca
+    perde uma batida aceita.
+
+    Com ``arquivo``, meses fechados podem ser movidos para o
+    ``ArquivoBatidas`` (``arquivar_mes``): saem do motor e do log, e as
+    consultas por usuário, o histórico e as exportações juntam as duas
+    partes. O índice é trocado inteiro nesse momento, então quem lê guarda
+    ``indice = self.indice`` e usa ``indice.log``, nunca os dois atributos
+    separados.
+    """
+
+    def __init__(self, store: PontoStore, usuarios: Optional[Dict[str, Dict]] = None,
+                 fechamentos: Optional[FechamentosMes] = None,
+                 arquivo: Optional[ArquivoBatidas] = None):
+        self.store = store
+        self.fechamentos = fechamentos
+        self.arquivo = arquivo
+        self._usuarios: Dict[str, Dict] = dict(usuarios or {})
+        # Rateios com vigência; os ``contratos`` de cada usuário são o último
+        self.rateio = RateioContratos.de_usuarios(self._usuarios)
+        self._lock = threading.Lock()
+
+        log = LogBatidas()
+        arquivados = set(arquivo.meses()) if arquivo is not None else set()
+        sobras: Set[str] = set()
+        colunas = store.colunas()
+        if colunas is not None:
+            # Motor colunar: carga sem montar um dicionário por batida
+            ids, colunas = colunas
+            meses = sorted(arquivados)
+            mes = _mes_arquivado(colunas.segundos, meses)
+            sobras.update(meses[i] for i in np.unique(mes[mes >= 0]).tolist())
+            if sobras:
+                vivas = mes < 0
+                ids = ids[vivas]
+                colunas = colunas._replace(usuarios=colunas.usuarios[vivas], tipos=colunas.tipos[vivas],
+                                           segundos=colunas.segundos[vivas])
+            log.anexar_colunas(ids, colunas)
+        else:
+            for batida in store.listar():
+                if batida['data'][:7] in arquivados:
+                    # Arquivamento interrompido antes de limpar o motor
+                    sobras.add(batida['data'][:7])
+                    continue
+                log.anexar(batida['id'], batida['usuario'], batida['tipo'], batida['timestamp'])
+        for mes in sorted(sobras):
+            store.remover_periodo(*(d.isoformat() for d in limites_mes(mes)))
+        self.indice = IndiceBatidas(log)
+        # Versão por usuário = nº de batidas (+ mudanças de rateio); só cresce
+        self._versoes = {u: len(self.indice.linhas_periodo(u)) for u in self.indice.usuarios()}
+        if arquivo is not None:
+            for usuario, quantidade in arquivo.contagens().items():
+                self._versoes[usuario] = self._versoes.get(usuario, 0) + quantidade
+        # Segura log e índice durante a troca feita pelo arquivamento
+        self._lock_escrita = threading.Lock()
+        self._lock_arquivo = threading.Lock()
+        self._lock_versoes = threading.Lock()
+        self._consolidado: Optional[ConsolidadoHoras] = None
+        self._lock_consolidado = threading.Lock()
+        self._anomalias: Optional[AnomaliasPonto] = None
+        self._lock_anomalias = threading.Lock()
+        self._ocupacao: Optional[OcupacaoPonto] = None
+        self._lock_ocupacao = threading.Lock()
+        # Escritas em andamento por mês e meses sendo fechados
+        self._escritas_mes: Counter = Counter()
+        self._fechando: Set[str] = set()
+        self._condicao_fechamento = threading.Condition()
+
+    @property
+    def log(self) -> LogBatidas:
+        return self.indice.log
+
+    @property
+    def consolidado(self) -> ConsolidadoHoras:
+        if self._consolidado is None:
+            with self._lock_consolidado:
+                if self._consolidado is None:
+                    consolidado = ConsolidadoHoras(self.contratos_usuario)
+                    consolidado.carregar(calcular_folhas(self.log.tabela()))
+                    self._consolidado = consolidado
+        return self._consolidado
+
+    @property
+    def anomalias(self) -> AnomaliasPonto:
+        if self._anomalias is None:
+            with self._lock_anomalias:
+                if self._anomalias is None:
+                    anomalias = AnomaliasPonto()
+                    anomalias.carregar(self.log.colunas())
+                    self._anomalias = anomalias
+        return self._anomalias
+
+    @property
+    def ocupacao(self) -> OcupacaoPonto:
+        if self._ocupacao is None:
+            # Sem arquivamento no meio: cada mês entra uma vez, do log ou do arquivo
+            with self._lock_arquivo, self._lock_ocupacao:
+                if self._ocupacao is None:
+                    ocupacao = OcupacaoPonto(self.rateio)
+                    arquivados = self.arquivo.meses() if self.arquivo is not None else []
+                    ocupacao.carregar([self.arquivo.colunas(mes) for mes in arquivados] + [self.log.colunas()])
+                    self._ocupacao = ocupacao
+        return self._ocupacao
+
+    def _batidas_dia(self, usuario: str, dia: int) -> List[Tuple[str, int]]:
+        """(tipo, segundos) das batidas vivas do usuário no dia, em ordem"""
+        indice = self.indice
+        return [(indice.log.linha(linha)['tipo'], indice.log.segundos(linha))
+                for linha in indice.linhas_dia(usuario, data_dia(dia))]
+
+    def get_usuario(self, usuario: str) -> Dict:
+        return self._usuarios.get(usuario, {})
+
+    def contratos_usuario(self, usuario: str, data: Optional[str] = None) -> Dict[str, float]:
+        """Rateio vigente no dia ``data``; sem data, o último cadastrado"""
+        if data is not None:
+            return self.rateio.vigente(usuario, data)
+        return self.get_usuario(usuario).get('contratos', {})
+
+    def listar_usuarios(self) -> List[str]:
+        return list(self._usuarios)
+
+    def salvar_usuario(self, usuario: str, info: Dict, vigencia: Optional[str] = None):
+        """Grava o usuário; um rateio novo vale a partir de ``vigencia`` (padrão: hoje).
+
+        Com ``vigencia`` no passado, anterior a outras já cadastradas, o
+        rateio vale só até a seguinte: os ``contratos`` gravados continuam
+        sendo os da vigência mais recente.
+        """
+        novos = info.get('contratos', {})
+        with self._lock:
+            anteriores = self.contratos_usuario(usuario)
+            data = vigencia or date.today().isoformat()
+            mudou = (self.rateio.vigente(usuario, data) if vigencia else anteriores) != novos
+            # Sob os locks do consolidado e da ocupação, como registrar_batida:
+            # uma batida concorrente soma com o rateio de antes ou de depois
+            # da troca, nunca com o novo antes de a troca mover o dia
+            with self._lock_consolidado, self._lock_ocupacao:
+                if mudou:
+                    antigos, inicio, fim = self.rateio.definir(usuario, novos, data)
+                    # Ainda não carregados: a carga já usará as vigências novas
+                    if self._consolidado is not None:
+                        self._consolidado.reatribuir_contratos(
+                            usuario, antigos, novos, data_dia(inicio), None if fim is None else data_dia(fim))
+                    if self._ocupacao is not None:
+                        self._ocupacao.reatribuir_contratos(usuario, antigos, novos, inicio, fim)
+                atuais = self.rateio.atual(usuario) if mudou else anteriores
+            usuarios = dict(self._usuarios)
+            usuarios[usuario] = dict(info, contratos=dict(atuais))
+            self._usuarios = usuarios
+            if mudou:
+                with self._lock_versoes:
+                    self._versoes[usuario] = self._versoes.get(usuario, 0) + 1
+
+    def horas_contratos_mes(self, usuario: str, ano: int, mes: int) -> Dict[str, float]:
+        """Horas do usuário por contrato no mês, cada dia pelo rateio vigente nele"""
+        dias = self.consolidado.segundos_dias_mes(usuario, ano, mes)
+        tabela = self.rateio.tabela([usuario])
+        total, _ = ratear(tabela, np.zeros(len(dias), dtype=np.int32),
+                          np.array([dia_epoca(data) for data in dias], dtype=np.int64),
+                          np.array(list(dias.values()), dtype=np.int64))
+        return {contrato: float(total[0, i]) / 100 / 3600
+                for i, contrato in enumerate(tabela.nomes_contrato) if total[0, i]}
+
+    def porcentagem_contratos(self, usuario: str, ano: int, mes: int) -> Tuple[Dict, float]:
+        """``({contrato: {'porcentagem', 'horas'}}, total de horas)`` do usuário no mês.
+
+        Mês fechado: do instantâneo. Aberto: total do consolidado e cada dia
+        pelo rateio vigente nele; com troca de rateio no mês, a porcentagem
+        é a parte efetiva nas horas. Sem horas, o rateio do último dia.
+        """
+        fechamento = self.fechamento(ano, mes)
+        if fechamento is not None:
+            return fechamento.porcentagem_contratos(usuario)
+
+        total = self.consolidado.horas_mes(usuario, ano, mes)
+        if not total:
+            vigente = self.contratos_usuario(usuario, limites_mes(chave_mes(ano, mes))[1].isoformat())
+            return {contrato: {'porcentagem': int(porcentagem) if float(porcentagem).is_integer() else porcentagem,
+                               'horas': 0.0}
+                    for contrato, porcentagem in vigente.items()}, total
+        resultado = {}
+        for contrato, horas in self.horas_contratos_mes(usuario, ano, mes).items():
+            porcentagem = round(horas / total * 100, 2)
+            resultado[contrato] = {
+                'porcentagem': int(porcentagem) if porcentagem.is_integer() else porcentagem,
+                'horas': round(horas, 2)
+            }
+        return resultado, total
+
+    # -------------------- fechamento mensal --------------------
+
+    def mes_fechado(self, mes: str) -> bool:
+        """Se o mês ``AAAA-MM`` está fechado (ou sendo fechado)"""
+        return self.fechamentos is not None and (mes in self._fechando or self.fechamentos.fechado(mes))
+
+    @contextmanager
+    def _escrevendo(self, meses: Set[str]):
+        """Recusa escritas em meses fechados e segura o fechamento durante as demais"""
+        if self.fechamentos is None:
+            yield
+            return
+        with self._condicao_fechamento:
+            for mes in sorted(meses):
+                if self.mes_fechado(mes):
+                    raise MesFechado(mes)
+            self._escritas_mes.update(meses)
+        try:
+            yield
+        finally:
+            with self._condicao_fechamento:
+                self._escritas_mes.subtract(meses)
+                self._condicao_fechamento.notify_all()
+
+    def fechar_mes(self, ano: int, mes: int) -> Fechamento:
+        """Congela um mês já encerrado num instantâneo imutável"""
+        if self.fechamentos is None:
+            raise RuntimeError("camada de dados sem pasta de fechamentos")
+        chave = chave_mes(ano, mes)
+        if chave >= datetime.now().strftime('%Y-%m'):
+            raise ValueError(f"o mês {chave} ainda não terminou")
+        with self._condicao_fechamento:
+            if self.mes_fechado(chave):
+                raise MesFechado(chave)
+            self._fechando.add(chave)
+            self._condicao_fechamento.wait_for(lambda: self._escritas_mes[chave] <= 0)
+        try:
+            return self.fechamentos.gravar(chave, montar_fechamento(self, chave))
+        finally:
+            with self._condicao_fechamento:
+                self._fechando.discard(chave)
+
+    def reabrir_mes(self, ano: int, mes: int):
+        """Aceita batidas no mês de novo; o próximo fechamento gera outra versão"""
+        chave = chave_mes(ano, mes)
+        if self.mes_arquivado(chave):
+            raise ValueError(f"o mês {chave} está arquivado e não pode ser reaberto")
+        if self.fechamentos is not None:
+            self.fechamentos.reabrir(chave)
+
+    def fechamento(self, ano: int, mes: int) -> Optional[Fechamento]:
+        return None if self.fechamentos is None else self.fechamentos.obter(chave_mes(ano, mes))
+
+    # -------------------- arquivo --------------------
+
+    def mes_arquivado(self, mes: str) -> bool:
+        return self.arquivo is not None and self.arquivo.arquivado(mes)
+
+    def arquivar_mes(self, ano: int, mes: int) -> int:
+        """Move as batidas de um mês fechado para o arquivo; devolve quantas"""
+        return self.arquivar_meses([chave_mes(ano, mes)])
+
+    def arquivar_meses(self, meses: Iterable[str]) -> int:
+        """Arquiva vários meses ``AAAA-MM`` fechados, compactando o log uma vez só.
+
+        Ordem pensada para falhas: cada partição é publicada antes de o motor
+        ser limpo, e uma limpeza interrompida é refeita na próxima carga.
+        """
+        if self.arquivo is None or self.fechamentos is None:
+            raise RuntimeError("camada de dados sem arquivo ou sem fechamentos")
+        meses = sorted(set(meses))
+        removidas: List[int] = []
+        with self._lock_arquivo:
+            for chave in meses:
+                if not self.fechamentos.fechado(chave):
+                    raise ValueError(f"feche o mês {chave} antes de arquivá-lo")
+                if self.arquivo.arquivado(chave):
+                    raise ValueError(f"o mês {chave} já está arquivado")
+            # Meses fechados: nenhuma batida nova entra neles enquanto isso
+            indice = self.indice
+            try:
+                for chave in meses:
+                    inicio, fim = (d.isoformat() for d in limites_mes(chave))
+                    linhas = [linha for usuario in indice.usuarios()
+                              for linha in indice.linhas_periodo(usuario, inicio, fim)]
+                    colunas = indice.log.colunas(linhas)
+                    self.arquivo.gravar(
+                        chave, indice.log.ids(linhas),
+                        np.array(colunas.nomes_usuario, dtype=object)[colunas.usuarios],
+                        np.array(colunas.nomes_tipo, dtype=object)[colunas.tipos],
+                        colunas.segundos,
+                    )
+                    self.store.remover_periodo(inicio, fim)
+                    removidas.extend(linhas)
+            finally:
+                # Meses já publicados saem do log mesmo se um seguinte falhar
+                if removidas:
+                    self._compactar(removidas)
+                    with self._lock_anomalias:
+                        if self._anomalias is not None:
+                            self._anomalias.descartar_meses(m for m in meses if self.arquivo.arquivado(m))
+        return len(removidas)
+
+    def _compactar(self, removidas: List[int]):
+        """Troca log e índice por cópias sem as linhas ``removidas``.
+
+        A cópia é montada sem bloquear as escritas; só as linhas anexadas
+        nesse meio-tempo são copiadas com o lock de escrita, antes da troca.
+        """
+        antigo = self.indice.log
+        tamanho = len(antigo)
+        manter = np.ones(tamanho, dtype=bool)
+        manter[removidas] = False
+        log = LogBatidas()
+        log.anexar_de(antigo, np.flatnonzero(manter))
+        indice = IndiceBatidas(log)
+        with self._lock_escrita:
+            novas = np.arange(tamanho, len(antigo))
+            if len(novas):
+                indice.adicionar_lote(log.anexar_de(antigo, novas))
+            self.indice = indice
+
+    def usuarios_com_batidas(self) -> List[str]:
+        """Usuários com batidas vivas ou arquivadas, em ordem alfabética"""
+        usuarios = set(self.indice.usuarios())
+        if self.arquivo is not None:
+            usuarios.update(self.arquivo.usuarios())
+        return sorted(usuarios)
+
+    def _trechos(self, data_inicio: Optional[str],
+                 data_fim: Optional[str]) -> List[Tuple[bool, Optional[str], Optional[str]]]:
+        if self.arquivo is None or not self.arquivo.meses():
+            return [(False, data_inicio, data_fim)]
+        return self.arquivo.trechos(data_inicio, data_fim)
+
+    # -------------------- batidas --------------------
+
+    def registrar_batida(self, usuario: str, tipo: str, timestamp: datetime) -> Dict:
+        with self._escrevendo({timestamp.strftime('%Y-%m')}):
+            batida = self.store.registrar(usuario, tipo, timestamp)
+            with self._lock_escrita:
+                self.indice.adicionar(self.log.anexar(batida['id'], usuario, tipo, timestamp))
+        # Uma carga em andamento segura o lock; se ela já leu o log com esta
+        # batida, recalcular o dia de novo não muda nada
+        with self._lock_consolidado:
+            if self._consolidado is not None:
+                self._consolidado.atualizar_dia(
+                    usuario, batida['data'], lambda: self.indice.dia(usuario, batida['data'])
+                )
+        with self._lock_anomalias:
+            if self._anomalias is not None:
+                self._anomalias.registrar([(usuario, tipo, para_segundos(timestamp))], self._batidas_dia)
+        with self._lock_ocupacao:
+            if self._ocupacao is not None:
+                self._ocupacao.atualizar_dia(usuario, para_segundos(timestamp) // SEGUNDOS_DIA, self._batidas_dia)
+        with self._lock_versoes:
+            self._versoes[usuario] = self._versoes.get(usuario, 0) + 1
+        return batida
+
+    def registrar_lote(self, batidas: List[Tuple[str, str, datetime]]) -> List[int]:
+        """Grava ``(usuario, tipo, timestamp)`` em massa e devolve os ids.
+
+        Uma única escrita no motor; log, índice, consolidado, exceções,
+        ocupação e versões são atualizados como em ``registrar_batida``, mas
+        uma vez por dia tocado.
+        """
+        meses = {f"{t.year:04d}-{t.month:02d}" for _, _, t in batidas} if self.fechamentos is not None else set()
+        with self._escrevendo(meses):
+            ids = self.store.registrar_lote(batidas)
+            with self._lock_escrita:
+                self.indice.adicionar_lote(self.log.anexar_lote(ids, batidas))
+        with self._lock_consolidado:
+            if self._consolidado is not None:
+                dias = {(usuario, timestamp.strftime('%Y-%m-%d')) for usuario, _, timestamp in batidas}
+                for usuario, data in sorted(dias):
+                    self._consolidado.atualizar_dia(usuario, data, lambda: self.indice.dia(usuario, data))
+        with self._lock_anomalias:
+            if self._anomalias is not None:
+                self._anomalias.registrar(((usuario, tipo, para_segundos(timestamp))
+                                           for usuario, tipo, timestamp in batidas), self._batidas_dia)
+        with self._lock_ocupacao:
+            if self._ocupacao is not None:
+                for usuario, dia in sorted({(usuario, para_segundos(timestamp) // SEGUNDOS_DIA)
+                                            for usuario, _, timestamp in batidas}):
+                    self._ocupacao.atualizar_dia(usuario, dia, self._batidas_dia)
+        quantidades = Counter(usuario for usuario, _, _ in batidas)
+        with self._lock_versoes:
+            for usuario, quantidade in quantidades.items():
+                self._versoes[usuario] = self._versoes.get(usuario, 0) + quantidade
+        return ids
+
+    def versao_dados(self, usuarios: Iterable[str]) -> int:
+        """Versão dos dados de um conjunto de usuários (muda a cada nova batida)"""
+        return sum(self._versoes.get(u, 0) for u in usuarios)
+
+    def contar_batidas(self, usuarios: Iterable[str], data_inicio: Optional[str] = None,
+                       data_fim: Optional[str] = None) -> int:
+        usuarios = list(usuarios)
+        indice = self.indice
+        total = sum(len(indice.linhas_periodo(u, data_inicio, data_fim)) for u in usuarios)
+        if self.arquivo is not None:
+            total += self.arquivo.contar(usuarios, data_inicio, data_fim)
+        return total
+
+    def batidas_usuario(self, usuario: str, data_inicio: Optional[str] = None,
+                        data_fim: Optional[str] = None) -> List[Mapping]:
+        indice = self.indice
+        batidas: List[Mapping] = []
+        for arquivado, inicio, fim in self._trechos(data_inicio, data_fim):
+            if arquivado:
+                batidas.extend(self.arquivo.batidas(usuario, inicio, fim))
+            elif inicio is not None and inicio == fim:
+                batidas.extend(indice.dia(usuario, inicio))
+            else:
+                batidas.extend(indice.periodo(usuario, inicio, fim))
+        contar_linhas(len(batidas))
+        return batidas
+
+    def resumo_periodo(self, usuario: str, data_inicio: Optional[str] = None,
+                       data_fim: Optional[str] = None) -> Tuple[int, int, int]:
+        """(batidas, dias com batida, entradas) do período, sem ler as batidas vivas"""
+        indice = self.indice
+        resumos = [self.arquivo.resumo(usuario, inicio, fim) if arquivado
+                   else indice.resumo_periodo(usuario, inicio, fim)
+                   for arquivado, inicio, fim in self._trechos(data_inicio, data_fim)]
+        return tuple(sum(valores) for valores in zip(*resumos))
+
+    def pagina_batidas(self, usuario: str, data_inicio: Optional[str], data_fim: Optional[str],
+                       deslocamento: int, limite: int) -> List[Mapping]:
+        """Até ``limite`` batidas do período a partir de ``deslocamento``"""
+        indice = self.indice
+        batidas: List[Mapping] = []
+        for arquivado, inicio, fim in self._trechos(data_inicio, data_fim):
+            if len(batidas) >= limite:
+                break
+            if arquivado:
+                do_trecho = self.arquivo.batidas(usuario, inicio, fim, deslocamento, limite - len(batidas))
+                total = self.arquivo.resumo(usuario, inicio, fim)[0] if not do_trecho else None
+            else:
+                linhas = indice.linhas_pagina(usuario, inicio, fim, deslocamento, limite - len(batidas))
+                do_trecho = [indice.log.linha(i) for i in linhas]
+                total = indice.resumo_periodo(usuario, inicio, fim)[0] if not do_trecho else None
+            batidas.extend(do_trecho)
+            # Página começa neste trecho: o deslocamento já foi consumido
+            deslocamento = 0 if do_trecho else max(0, deslocamento - total)
+        contar_linhas(len(batidas))
+        return batidas
+
+    def iterar_linhas(self, usuarios: Iterable[str], data_inicio: Optional[str] = None,
+                      data_fim: Optional[str] = None,
+                      bloco: int = 50_000) -> Iterator[Tuple[str, str, str, str]]:
+        """Linhas ``(usuario, data, tipo, horario)`` dos usuários, em blocos do log.
+
+        Usada pela exportação em fluxo: a memória fica limitada ao bloco
+        corrente, qualquer que seja o total exportado. Trechos arquivados
+        entram na ordem, lidos da partição de cada mês.
+        """
+        indice = self.indice
+        trechos = self._trechos(data_inicio, data_fim)
+        if len(trechos) == 1 and trechos[0][0]:
+            # Período todo arquivado: o arquivo formata vários usuários por bloco
+            yield from self._linhas_arquivo(usuarios, data_inicio, data_fim, bloco)
+            return
+        pendentes: List[int] = []
+        for usuario in usuarios:
+            for arquivado, inicio, fim in trechos:
+                if arquivado:
+                    if pendentes:
+                        yield from self._linhas_tabela(indice.log, pendentes)
+                        pendentes = []
+                    yield from self._linhas_arquivo([usuario], inicio, fim, bloco)
+                    continue
+                pendentes.extend(indice.linhas_periodo(usuario, inicio, fim))
+                while len(pendentes) >= bloco:
+                    yield from self._linhas_tabela(indice.log, pendentes[:bloco])
+                    del pendentes[:bloco]
+        if pendentes:
+            yield from self._linhas_tabela(indice.log, pendentes)
+
+    def _linhas_arquivo(self, usuarios: Iterable[str], data_inicio: Optional[str], data_fim: Optional[str],
+                        bloco: int) -> Iterator[Tuple[str, str, str, str]]:
+        for linha in self.arquivo.linhas(usuarios, data_inicio, data_fim, bloco):
+            contar_linhas(1)
+            yield linha
+
+    @staticmethod
+    def _linhas_tabela(log: LogBatidas, linhas: List[int]) -> Iterator[Tuple[str, str, str, str]]:
+        tabela = log.tabela(linhas)
+        contar_linhas(len(linhas))
+        return zip(tabela['usuario'], tabela['data'], tabela['tipo'], tabela['horario'])
+
+    def tabela_usuario(self, usuario: str, data_inicio: Optional[str] = None,
+                       data_fim: Optional[str] = None) -> 'pd.DataFrame':
+        """Batidas do usuário no período direto das colunas do log (e do arquivo)"""
+        indice = self.indice
+        partes = [self.arquivo.tabela(usuario, inicio, fim) if arquivado
+                  else indice.log.tabela(indice.linhas_periodo(usuario, inicio, fim))
+                  for arquivado, inicio, fim in self._trechos(data_inicio, data_fim)]
+        contar_linhas(sum(len(parte) for parte in partes))
+        if len(partes) == 1:
+            return partes[0]
+        import pandas as pd
+        return pd.concat(partes, ignore_index=True)
+
+
+def criar_camada_dados() -> CamadaDados:
+    fechamentos = FechamentosMes(os.environ.get('PONTO_FECHAMENTOS', 'fechamentos_ponto'))
+    arquivo = ArquivoBatidas(os.environ.get('PONTO_ARQUIVO', 'arquivo_ponto'),
+                             os.environ.get('PONTO_ARQUIVO_FORMATO', 'arrow'))
+    return CamadaDados(criar_store(), usuarios_padrao(), fechamentos, arquivo)
@@ -0,0 +1,508 @@
+"""Motor de batidas em memória, durável por instantâneo binário e diário de escrita.
+
+Pasta do motor::
+
+    instantaneo.<k>/   ids.npy, usuarios.npy, tipos.npy, segundos.npy e
+                       manifesto.json (linhas, tabelas de nomes, crc32)
+    diario.<k>.log     tudo o que foi gravado depois do instantâneo k
+    trava              ``flock`` exclusivo do processo dono da pasta
+
+Cada registro do diário é ``crc32 | tamanho | conteúdo``: uma batida
+(``B``: id, segundos, tipo e usuário) ou uma remoção de período (``R``:
+segundos inicial e final). Uma única thread escritora drena a fila de
+pedidos, grava todos num ``write`` e faz um só ``fsync`` (group commit, como
+no ``SQLiteStore``); ``registrar`` só retorna depois dele.
+
+A cada ``intervalo`` registros o diário passa para o arquivo seguinte e o
+instantâneo de tudo até ali é gravado em segundo plano, numa pasta
+temporária renomeada no fim (manifesto por último); só então os arquivos
+anteriores são apagados. A partida mapeia (``mmap``) o instantâneo válido
+mais recente, conferindo o crc32, e reaplica apenas o diário posterior. Um
+registro final cortado pela queda do processo nunca foi confirmado a
+ninguém e é descartado.
+
+Em memória ficam a base (as colunas do instantâneo, ordenadas por
+instante) e a cauda, um ``LogBatidas`` com as batidas desde então. Os
+horários têm resolução de segundo, como no ``LogBatidas``. A pasta
+pertence a um único processo: abri-la com outro já dono dela levanta
+``StoreEmUso``, em vez de intercalar escritas e renomeações no diário.
+"""
+import json
+import os
+import queue
+import re
+import shutil
+import struct
+import threading
+import zlib
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ponto.armazenamento import FORMATO_DATA, PontoStore, montar_batida, travar_dono
+from ponto.colunar import EPOCA, ColunasBatidas, LogBatidas, para_segundos
+from ponto.ids import GeradorIds
+
+PREFIXO_INSTANTANEO = 'instantaneo.'
+MANIFESTO = 'manifesto.json'
+TRAVA = 'trava'
+COLUNAS = ('ids', 'usuarios', 'tipos', 'segundos')
+_RE_INSTANTANEO = re.compile(r'^instantaneo\.(\d+)$')
+_RE_DIARIO = re.compile(r'^diario\.(\d+)\.log$')
+
+# crc32 e tamanho do conteúdo; conteúdo: espécie, dois inteiros e (batidas) o texto
+_CABECALHO = struct.Struct('<II')
+_CONTEUDO = struct.Struct('<cqq')
+BATIDA = b'B'
+REMOCAO = b'R'
+# Batidas reaplicadas por vez na partida
+_BLOCO_REAPLICACAO = 1 << 16
+
+_FIM_FILA = object()
+
+
+def _registro(especie: bytes, primeiro: int, segundo: int, texto: bytes = b'') -> bytes:
+    conteudo = _CONTEUDO.pack(especie, primeiro, segundo) + texto
+    return _CABECALHO.pack(zlib.crc32(conteudo), len(conteudo)) + conteudo
+
+
+def _sincronizar_pasta(pasta: str):
+    """Torna duráveis as entradas criadas ou renomeadas na pasta"""
+    if os.name != 'posix':
+        return
+    fd = os.open(pasta, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _periodo_segundos(data_inicio: str, data_fim: str) -> Tuple[int, int]:
+    """Datas inclusivas em ``[início, fim)`` de segundos"""
+    inicio = datetime.strptime(data_inicio, FORMATO_DATA)
+    fim = datetime.strptime(data_fim, FORMATO_DATA) + timedelta(days=1)
+    return para_segundos(inicio), para_segundos(fim)
+
+
+def _vazias() -> Tuple[np.ndarray, ColunasBatidas]:
+    vazio = np.empty(0, dtype=np.int64)
+    return vazio, ColunasBatidas(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int8), vazio, [], [])
+
+
+class _Lote:
+    """Várias batidas gravadas juntas pela thread escritora"""
+    __slots__ = ('batidas', 'futuro')
+
+    def __init__(self, batidas: List[Tuple[str, str, datetime]], futuro: Future):
+        self.batidas = batidas
+        self.futuro = futuro
+
+
+class _Remocao:
+    """Remoção de ``[inicio, fim)`` (segundos), na ordem das escritas"""
+    __slots__ = ('inicio', 'fim', 'futuro')
+
+    def __init__(self, inicio: int, fim: int, futuro: Future):
+        self.inicio = inicio
+        self.fim = fim
+        self.futuro = futuro
+
+
+class DiarioStore(PontoStore):
+    """Batidas em colunas na memória, com instantâneo + diário em ``pasta``.
+
+    ``sincrono`` falso troca o ``fsync`` de cada lote pela escrita no cache
+    do sistema: sobrevive à queda do processo, não à da máquina.
+    """
+
+    def __init__(self, pasta: str = 'diario_ponto', intervalo: int = 500_000,
+                 max_lote: int = 256, sincrono: bool = True):
+        self.pasta = pasta
+        self.intervalo = intervalo
+        self.max_lote = max_lote
+        self.sincrono = sincrono
+        self._lock = threading.Lock()
+        self._fila: "queue.Queue" = queue.Queue()
+        self._gravacao: Optional[threading.Thread] = None
+        self._instantaneo_final = True
+        os.makedirs(pasta, exist_ok=True)
+        self._dono = travar_dono(os.path.join(pasta, TRAVA))
+
+        self._numero = self._carregar()
+        self._fd = self._abrir_diario(self._numero)
+        self._tamanho = os.fstat(self._fd).st_size
+        ids = self._ids_cauda()
+        ultimo = max(int(self._base_ids.max(initial=0)), int(ids.max(initial=0)))
+        self._gerador = GeradorIds(0, depois_de=ultimo)
+
+        self._escritora = threading.Thread(
+            target=self._loop_escrita, name='ponto-diario-escritora', daemon=True
+        )
+        self._escritora.start()
+
+    # -------------------- partida --------------------
+
+    def _carregar(self) -> int:
+        """Abre o instantâneo mais recente, reaplica o diário e devolve o número do atual"""
+        instantaneos, diarios = [], []
+        for nome in os.listdir(self.pasta):
+            caminho = os.path.join(self.pasta, nome)
+            if nome.startswith(PREFIXO_INSTANTANEO) and nome.endswith('.tmp'):
+                # Gravação interrompida: nunca chegou a valer
+                shutil.rmtree(caminho, ignore_errors=True)
+            elif _RE_INSTANTANEO.match(nome):
+                instantaneos.append(int(_RE_INSTANTANEO.match(nome).group(1)))
+            elif _RE_DIARIO.match(nome):
+                diarios.append(int(_RE_DIARIO.match(nome).group(1)))
+
+        numero, base = 0, None
+        for numero in sorted(instantaneos, reverse=True):
+            base = self._abrir_instantaneo(self._caminho_instantaneo(numero))
+            if base is not None:
+                break
+        if base is None:
+            numero = 0
+            if diarios and min(diarios) > 0:
+                raise ValueError(f"Nenhum instantâneo válido em {self.pasta} e o diário começa no "
+                                 f"{min(diarios)}: batidas anteriores perdidas")
+        self._base_ids, self._base = base or _vazias()
+        self._cauda = self._nova_cauda(self._base.nomes_usuario, self._base.nomes_tipo)
+        self._registros = 0
+
+        for diario in diarios:
+            if diario < numero:
+                # Já contido no instantâneo; a limpeza foi interrompida
+                os.remove(self._caminho_diario(diario))
+        posteriores = sorted(d for d in diarios if d >= numero)
+        for diario in posteriores:
+            self._registros = self._reaplicar(self._caminho_diario(diario), diario == posteriores[-1])
+        return posteriores[-1] if posteriores else numero
+
+    def _abrir_instantaneo(self, caminho: str) -> Optional[Tuple[np.ndarray, ColunasBatidas]]:
+        """Colunas mapeadas do instantâneo, ou ``None`` se incompleto ou corrompido"""
+        try:
+            with open(os.path.join(caminho, MANIFESTO), encoding='utf-8') as arquivo:
+                manifesto = json.load(arquivo)
+            colunas = []
+            for nome in COLUNAS:
+                # Arquivo sem dados após o cabeçalho não pode ser mapeado
+                coluna = np.load(os.path.join(caminho, f'{nome}.npy'),
+                                 mmap_mode='r' if manifesto['linhas'] else None)
+                if len(coluna) != manifesto['linhas'] or zlib.crc32(coluna) != manifesto['crc32'][nome]:
+                    return None
+                colunas.append(coluna)
+        except (OSError, ValueError, KeyError):
+            return None
+        ids, usuarios, tipos, segundos = colunas
+        return ids, ColunasBatidas(usuarios, tipos, segundos, manifesto['nomes_usuario'], manifesto['nomes_tipo'])
+
+    def _reaplicar(self, caminho: str, ultimo: bool) -> int:
+        """Aplica os registros íntegros do arquivo e devolve quantos eram.
+
+        Um final inválido no último arquivo é a escrita cortada pela queda e
+        é truncado; em qualquer outro arquivo, o diário está corrompido.
+        """
+        with open(caminho, 'rb') as arquivo:
+            dados = arquivo.read()
+        ids: List[int] = []
+        segundos: List[int] = []
+        textos: List[bytes] = []
+        registros = posicao = 0
+        while posicao + _CABECALHO.size <= len(dados):
+            crc, tamanho = _CABECALHO.unpack_from(dados, posicao)
+            inicio = posicao + _CABECALHO.size
+            fim = inicio + tamanho
+            if tamanho < _CONTEUDO.size or fim > len(dados) or zlib.crc32(dados[inicio:fim]) != crc:
+                break
+            especie, primeiro, segundo = _CONTEUDO.unpack_from(dados, inicio)
+            if especie == BATIDA:
+                ids.append(primeiro)
+                segundos.append(segundo)
+                textos.append(dados[inicio + _CONTEUDO.size:fim])
+                if len(ids) == _BLOCO_REAPLICACAO:
+                    self._anexar_registros(ids, segundos, textos)
+                    ids, segundos, textos = [], [], []
+            else:
+                self._anexar_registros(ids, segundos, textos)
+                ids, segundos, textos = [], [], []
+                self._remover(primeiro, segundo)
+            registros += 1
+            posicao = fim
+        self._anexar_registros(ids, segundos, textos)
+
+        if posicao < len(dados):
+            if not ultimo:
+                raise ValueError(f"Diário corrompido em {caminho} (byte {posicao})")
+            with open(caminho, 'r+b') as arquivo:
+                arquivo.truncate(posicao)
+                os.fsync(arquivo.fileno())
+        return registros
+
+    def _anexar_registros(self, ids: List[int], segundos: List[int], textos: List[bytes]):
+        """Passa registros de batida do diário para a cauda"""
+        if not ids:
+            return
+        nomes_usuario: List[str] = []
+        nomes_tipo: List[str] = []
+        codigos_usuario: Dict[str, int] = {}
+        codigos_tipo: Dict[str, int] = {}
+        usuarios = np.empty(len(ids), dtype=np.int32)
+        tipos = np.empty(len(ids), dtype=np.int8)
+        for i, texto in enumerate(textos):
+            tipo, usuario = texto.decode('utf-8').split('\0', 1)
+            codigo = codigos_usuario.get(usuario)
+            if codigo is None:
+                codigo = codigos_usuario[usuario] = len(nomes_usuario)
+                nomes_usuario.append(usuario)
+            usuarios[i] = codigo
+            codigo = codigos_tipo.get(tipo)
+            if codigo is None:
+                codigo = codigos_tipo[tipo] = len(nomes_tipo)
+                nomes_tipo.append(tipo)
+            tipos[i] = codigo
+        self._cauda.anexar_colunas(np.array(ids, dtype=np.int64), ColunasBatidas(
+            usuarios, tipos, np.array(segundos, dtype=np.int64), nomes_usuario, nomes_tipo
+        ))
+
+    # -------------------- estado em memória --------------------
+
+    @staticmethod
+    def _nova_cauda(nomes_usuario: List[str], nomes_tipo: List[str]) -> LogBatidas:
+        """Cauda vazia com os mesmos códigos da base; nomes novos entram depois"""
+        vazio, colunas = _vazias()
+        cauda = LogBatidas()
+        cauda.anexar_colunas(vazio, colunas._replace(nomes_usuario=nomes_usuario, nomes_tipo=nomes_tipo))
+        return cauda
+
+    def _ids_cauda(self) -> np.ndarray:
+        return self._cauda.ids(range(len(self._cauda)))
+
+    def _juntar(self) -> Tuple[np.ndarray, ColunasBatidas]:
+        """Base + cauda numa cópia só (chamar com ``_lock``)"""
+        ids = self._ids_cauda()
+        cauda = self._cauda.colunas()
+        return np.concatenate([self._base_ids, ids]), ColunasBatidas(
+            np.concatenate([self._base.usuarios, cauda.usuarios]),
+            np.concatenate([self._base.tipos, cauda.tipos]),
+            np.concatenate([self._base.segundos, cauda.segundos]),
+            cauda.nomes_usuario, cauda.nomes_tipo,
+        )
+
+    def _remover(self, inicio: int, fim: int) -> int:
+        with self._lock:
+            ids, colunas = self._juntar()
+            manter = (colunas.segundos < inicio) | (colunas.segundos >= fim)
+            removidas = len(ids) - int(np.count_nonzero(manter))
+            if removidas:
+                self._base_ids = ids[manter]
+                self._base = ColunasBatidas(colunas.usuarios[manter], colunas.tipos[manter],
+                                            colunas.segundos[manter], colunas.nomes_usuario, colunas.nomes_tipo)
+                self._cauda = self._nova_cauda(colunas.nomes_usuario, colunas.nomes_tipo)
+        return removidas
+
+    # -------------------- arquivos --------------------
+
+    def _caminho_instantaneo(self, numero: int) -> str:
+        return os.path.join(self.pasta, f'{PREFIXO_INSTANTANEO}{numero}')
+
+    def _caminho_diario(self, numero: int) -> str:
+        return os.path.join(self.pasta, f'diario.{numero}.log')
+
+    def _abrir_diario(self, numero: int) -> int:
+        fd = os.open(self._caminho_diario(numero), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        _sincronizar_pasta(self.pasta)
+        return fd
+
+    def _trocar_diario(self):
+        """Passa ao diário seguinte e grava em segundo plano o instantâneo de tudo até aqui"""
+        if self._gravacao is not None and self._gravacao.is_alive():
+            return
+        with self._lock:
+            ids, colunas = self._juntar()
+            if len(ids) and (np.diff(colunas.segundos) < 0).any():
+                # Ordem de ``listar``: estável, empates seguem a ordem dos ids
+                ordem = np.argsort(colunas.segundos, kind='stable')
+                ids = ids[ordem]
+                colunas = ColunasBatidas(colunas.usuarios[ordem], colunas.tipos[ordem], colunas.segundos[ordem],
+                                         colunas.nomes_usuario, colunas.nomes_tipo)
+            self._base_ids, self._base = ids, colunas
+            self._cauda = self._nova_cauda(colunas.nomes_usuario, colunas.nomes_tipo)
+        os.close(self._fd)
+        self._numero += 1
+        self._fd = self._abrir_diario(self._numero)
+        self._tamanho = self._registros = 0
+        self._gravacao = threading.Thread(target=self._gravar_instantaneo, args=(self._numero, ids, colunas),
+                                          name='ponto-diario-instantaneo', daemon=True)
+        self._gravacao.start()
+
+    def _gravar_instantaneo(self, numero: int, ids: np.ndarray, colunas: ColunasBatidas):
+        destino = self._caminho_instantaneo(numero)
+        temporaria = destino + '.tmp'
+        shutil.rmtree(temporaria, ignore_errors=True)
+        os.makedirs(temporaria)
+        crcs = {}
+        for nome, coluna in zip(COLUNAS, (ids, colunas.usuarios, colunas.tipos, colunas.segundos)):
+            coluna = np.ascontiguousarray(coluna)
+            with open(os.path.join(temporaria, f'{nome}.npy'), 'wb') as arquivo:
+                np.save(arquivo, coluna)
+                arquivo.flush()
+                os.fsync(arquivo.fileno())
+            crcs[nome] = zlib.crc32(coluna)
+        manifesto = {'linhas': len(ids), 'nomes_usuario': colunas.nomes_usuario,
+                     'nomes_tipo': colunas.nomes_tipo, 'crc32': crcs}
+        with open(os.path.join(temporaria, MANIFESTO), 'w', encoding='utf-8') as arquivo:
+            json.dump(manifesto, arquivo, ensure_ascii=False)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        _sincronizar_pasta(temporaria)
+        os.rename(temporaria, destino)
+        _sincronizar_pasta(self.pasta)
+
+        # Mesmo conteúdo, agora no cache de páginas em vez da memória do processo
+        mapeado = self._abrir_instantaneo(destino)
+        with self._lock:
+            if mapeado is not None and self._base_ids is ids:
+                self._base_ids, self._base = mapeado
+        for nome in os.listdir(self.pasta):
+            anterior = _RE_INSTANTANEO.match(nome) or _RE_DIARIO.match(nome)
+            if anterior and int(anterior.group(1)) < numero:
+                caminho = os.path.join(self.pasta, nome)
+                if os.path.isdir(caminho):
+                    shutil.rmtree(caminho, ignore_errors=True)
+                else:
+                    os.remove(caminho)
+
+    # -------------------- escrita --------------------
+
+    def registrar(self, usuario: str, tipo: str, timestamp: datetime) -> Dict:
+        futuro: Future = Future()
+        self._fila.put((usuario, tipo, timestamp, futuro))
+        return futuro.result()
+
+    def registrar_lote(self, batidas: List[Tuple[str, str, datetime]]) -> List[int]:
+        futuro: Future = Future()
+        self._fila.put(_Lote(list(batidas), futuro))
+        return futuro.result()
+
+    def remover_periodo(self, data_inicio: str, data_fim: str) -> int:
+        futuro: Future = Future()
+        self._fila.put(_Remocao(*_periodo_segundos(data_inicio, data_fim), futuro))
+        return futuro.result()
+
+    def _loop_escrita(self):
+        ativo = True
+        while ativo:
+            pedido = self._fila.get()
+            if pedido is _FIM_FILA:
+                break
+            lote = [pedido]
+            while len(lote) < self.max_lote:
+                try:
+                    pedido = self._fila.get_nowait()
+                except queue.Empty:
+                    break
+                if pedido is _FIM_FILA:
+                    ativo = False
+                    break
+                lote.append(pedido)
+            self._gravar_lote(lote)
+            if self._registros >= self.intervalo:
+                self._trocar_diario()
+
+        # Fechamento: a próxima partida começa do instantâneo, sem diário
+        if self._gravacao is not None:
+            self._gravacao.join()
+        if self._registros and self._instantaneo_final:
+            self._trocar_diario()
+            self._gravacao.join()
+        os.close(self._fd)
+
+    def _gravar_lote(self, lote: List):
+        """Grava o lote no diário com um só fsync e só então aplica e responde"""
+        partes: List[bytes] = []
+        ids: List = []
+        for pedido in lote:
+            if isinstance(pedido, _Remocao):
+                partes.append(_registro(REMOCAO, pedido.inicio, pedido.fim))
+                ids.append(None)
+                continue
+            batidas = pedido.batidas if isinstance(pedido, _Lote) else [pedido[:3]]
+            ids_pedido = self._gerador.lote(len(batidas))
+            for id_batida, (usuario, tipo, timestamp) in zip(ids_pedido, batidas):
+                partes.append(_registro(BATIDA, id_batida, para_segundos(timestamp),
+                                        f'{tipo}\0{usuario}'.encode('utf-8')))
+            ids.append(ids_pedido)
+
+        dados = memoryview(b''.join(partes))
+        try:
+            escritos = 0
+            while escritos < len(dados):
+                escritos += os.write(self._fd, dados[escritos:])
+            if self.sincrono:
+                os.fsync(self._fd)
+        except OSError as erro:
+            # Nada do lote vale: o diário volta ao fim do último lote confirmado
+            os.ftruncate(self._fd, self._tamanho)
+            for pedido in lote:
+                (pedido[-1] if isinstance(pedido, tuple) else pedido.futuro).set_exception(erro)
+            return
+        self._tamanho += len(dados)
+        self._registros += len(partes)
+
+        for pedido, ids_pedido in zip(lote, ids):
+            if isinstance(pedido, _Remocao):
+                pedido.futuro.set_result(self._remover(pedido.inicio, pedido.fim))
+                continue
+            with self._lock:
+                if isinstance(pedido, _Lote):
+                    self._cauda.anexar_lote(ids_pedido, pedido.batidas)
+                else:
+                    self._cauda.anexar(ids_pedido[0], *pedido[:3])
+            if isinstance(pedido, _Lote):
+                pedido.futuro.set_result(ids_pedido)
+            else:
+                usuario, tipo, timestamp, futuro = pedido
+                futuro.set_result(montar_batida(ids_pedido[0], usuario, tipo, timestamp))
+
+    # -------------------- leitura --------------------
+
+    def colunas(self) -> Tuple[np.ndarray, ColunasBatidas]:
+        with self._lock:
+            ids, colunas = self._juntar()
+        if len(ids) and (np.diff(colunas.segundos) < 0).any():
+            # Base ordenada + cauda quase em ordem: o timsort do "stable" é quase linear
+            ordem = np.argsort(colunas.segundos, kind='stable')
+            return ids[ordem], ColunasBatidas(colunas.usuarios[ordem], colunas.tipos[ordem],
+                                              colunas.segundos[ordem], colunas.nomes_usuario, colunas.nomes_tipo)
+        return ids, colunas
+
+    def listar(self, usuario: Optional[str] = None,
+               data_inicio: Optional[str] = None,
+               data_fim: Optional[str] = None) -> List[Dict]:
+        ids, colunas = self.colunas()
+        selecao = np.ones(len(ids), dtype=bool)
+        if usuario is not None:
+            if usuario not in colunas.nomes_usuario:
+                return []
+            selecao &= colunas.usuarios == colunas.nomes_usuario.index(usuario)
+        if data_inicio is not None or data_fim is not None:
+            inicio, fim = _periodo_segundos(data_inicio or '0001-01-01', data_fim or '9998-12-31')
+            selecao &= (colunas.segundos >= inicio) & (colunas.segundos < fim)
+        linhas = np.flatnonzero(selecao)
+        nomes_usuario, nomes_tipo = colunas.nomes_usuario, colunas.nomes_tipo
+        return [
+            montar_batida(id_batida, nomes_usuario[u], nomes_tipo[t], EPOCA + timedelta(seconds=s))
+            for id_batida, u, t, s in zip(ids[linhas].tolist(), colunas.usuarios[linhas].tolist(),
+                                         colunas.tipos[linhas].tolist(), colunas.segundos[linhas].tolist())
+        ]
+
+    def fechar(self, instantaneo: bool = True):
+        """Espera as escritas na fila; sem ``instantaneo``, a próxima partida
+        reaplica o diário como depois de uma queda"""
+        self._instantaneo_final = instantaneo
+        self._fila.put(_FIM_FILA)
+        self._escritora.join()
+        if self._dono is not None:
+            self._dono.close()
@@ -0,0 +1,137 @@
+"""Exportação em fluxo (CSV e XLSX) com memória limitada.
+
+As funções recebem um iterável de linhas ``(usuario, data, tipo, horario)``
+em ordem de usuário e horário (ver ``CamadaDados.iterar_linhas``) e nunca
+montam o arquivo inteiro em memória: o CSV sai em blocos de bytes e o XLSX
+é escrito linha a linha no modo ``constant_memory`` do xlsxwriter, com o
+resumo diário calculado na mesma passada. Na tela de exportação o destino
+é o arquivo do artefato aberto pelo ``GerenciadorTarefas``, que fica em
+cache; ``arquivo_temporario()`` serve a quem descarta o resultado (os
+benchmarks).
+"""
+import csv
+import io
+import tempfile
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+
+import xlsxwriter
+
+from ponto.folha import horas_dia
+
+Linha = Tuple[str, str, str, str]
+
+LIMITE_LINHAS_XLSX = 1_048_576
+LINHAS_POR_BLOCO = 10_000
+
+CABECALHO_BATIDAS = ['data', 'tipo', 'horario']
+CABECALHO_RESUMO = ['Data', 'Entrada', 'Saída', 'Horas Trabalhadas']
+
+
+def arquivo_temporario() -> BinaryIO:
+    """Arquivo temporário em disco, apagado ao ser fechado.
+
+    Sem buffer (``io.FileIO``), formato aceito pelo ``st.download_button``.
+    """
+    return tempfile.TemporaryFile(mode='w+b', buffering=0)
+
+
+def gerar_csv(linhas: Iterable[Linha], com_usuario: bool = False,
+              linhas_por_bloco: int = LINHAS_POR_BLOCO) -> Iterator[bytes]:
+    """CSV das batidas em blocos de bytes UTF-8"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator='\n')
+    escritor.writerow((['usuario'] if com_usuario else []) + CABECALHO_BATIDAS)
+
+    pendentes = 0
+    for usuario, data, tipo, horario in linhas:
+        if com_usuario:
+            escritor.writerow((usuario, data, tipo, horario))
+        else:
+            escritor.writerow((data, tipo, horario))
+        pendentes += 1
+        if pendentes == linhas_por_bloco:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            pendentes = 0
+    yield buffer.getvalue().encode('utf-8')
+
+
+def exportar_csv(linhas: Iterable[Linha], destino: BinaryIO, com_usuario: bool = False) -> int:
+    """Escreve o CSV em ``destino`` e devolve o número de bytes"""
+    total = 0
+    for bloco in gerar_csv(linhas, com_usuario):
+        destino.write(bloco)
+        total += len(bloco)
+    destino.seek(0)
+    return total
+
+
+class _PlanilhaFluxo:
+    """Planilha escrita linha a linha, continuada em outra aba ao atingir o limite"""
+
+    def __init__(self, workbook: xlsxwriter.Workbook, nome: str, cabecalho: List[str],
+                 formato_cabecalho):
+        self.workbook = workbook
+        self.nome = nome
+        self.cabecalho = cabecalho
+        self.formato_cabecalho = formato_cabecalho
+        self.partes = 0
+        self._nova_aba()
+
+    def _nova_aba(self):
+        self.partes += 1
+        nome = self.nome if self.partes == 1 else f"{self.nome} ({self.partes})"
+        self.aba = self.workbook.add_worksheet(nome)
+        self.aba.write_row(0, 0, self.cabecalho, self.formato_cabecalho)
+        self.linha = 1
+
+    def escrever(self, valores):
+        if self.linha == LIMITE_LINHAS_XLSX:
+            self._nova_aba()
+        # Tipos explícitos: write_row inspeciona cada texto com regex
+        for coluna, valor in enumerate(valores):
+            if isinstance(valor, str):
+                self.aba.write_string(self.linha, coluna, valor)
+            elif valor is not None:
+                self.aba.write_number(self.linha, coluna, valor)
+        self.linha += 1
+
+
+def exportar_xlsx(linhas: Iterable[Linha], destino: BinaryIO, com_usuario: bool = False) -> int:
+    """Escreve as abas "Batidas" e "Resumo Diário" em uma única passada.
+
+    Devolve o número de batidas exportadas.
+    """
+    workbook = xlsxwriter.Workbook(destino, {'constant_memory': True})
+    negrito = workbook.add_format({'bold': True, 'border': 1})
+    prefixo = ['usuario'] if com_usuario else []
+    batidas = _PlanilhaFluxo(workbook, 'Batidas', prefixo + CABECALHO_BATIDAS, negrito)
+    resumo = _PlanilhaFluxo(workbook, 'Resumo Diário',
+                            (['Usuário'] if com_usuario else []) + CABECALHO_RESUMO, negrito)
+
+    dia_atual: Optional[Tuple[str, str]] = None
+    batidas_dia: List[dict] = []
+
+    def fechar_dia():
+        usuario, data = dia_atual
+        horas = horas_dia(batidas_dia, data)
+        valores = [data, horas['entrada'], horas['saida'], horas['total_horas']]
+        resumo.escrever(([usuario] if com_usuario else []) + valores)
+
+    total = 0
+    for usuario, data, tipo, horario in linhas:
+        batidas.escrever(([usuario] if com_usuario else []) + [data, tipo, horario])
+        if (usuario, data) != dia_atual:
+            if dia_atual is not None:
+                fechar_dia()
+            dia_atual = (usuario, data)
+            batidas_dia = []
+        batidas_dia.append({'tipo': tipo, 'horario': horario})
+        total += 1
+    if dia_atual is not None:
+        fechar_dia()
+
+    workbook.close()
+    destino.seek(0)
+    return total
@@ -0,0 +1,411 @@
+"""Fechamento mensal: o mês encerrado pelo RH congelado num arquivo imutável.
+
+``CamadaDados.fechar_mes`` grava um instantâneo compacto do mês
+(``AAAA-MM.vN.npz``, colunas NumPy) com as batidas em colunas, a jornada de
+cada (usuário, dia), o cargo e o rateio de contratos vigentes no fechamento
+e os totais por usuário, contrato e cargo já somados. Relatórios e
+exportações de meses fechados são servidos do instantâneo, sem recalcular a
+partir das batidas; batidas novas num mês fechado são recusadas com
+``MesFechado``.
+
+O arquivo nunca é reescrito: é publicado com ``os.link`` (que falha se o
+nome já existe) e fica somente leitura. Reabrir o mês grava só um marcador
+ao lado; o fechamento seguinte vira a versão ``N + 1`` e as anteriores
+continuam no disco para auditoria.
+"""
+import calendar
+import json
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import Executor
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ponto.folha import COLUNAS_FOLHA, TIPOS_JORNADA
+from ponto.rateio import DIAS_CHAVE, ratear
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from ponto.dados import CamadaDados
+
+SEGUNDOS_DIA = 86400
+_ARQUIVO = re.compile(r'^(\d{4}-\d{2})\.v(\d+)\.(npz|reaberto)$')
+
+
+class MesFechado(ValueError):
+    """Escrita num mês já fechado"""
+
+    def __init__(self, mes: str):
+        super().__init__(f"mês {mes} fechado: batidas novas são recusadas")
+        self.mes = mes
+
+
+def chave_mes(ano: int, mes: int) -> str:
+    return f"{ano:04d}-{mes:02d}"
+
+
+def limites_mes(mes: str) -> Tuple[date, date]:
+    """Primeiro e último dia de um mês ``AAAA-MM``"""
+    ano, numero = int(mes[:4]), int(mes[5:7])
+    return date(ano, numero, 1), date(ano, numero, calendar.monthrange(ano, numero)[1])
+
+
+def _texto_horario(segundos: int) -> Optional[str]:
+    if segundos < 0:
+        return None
+    return f"{segundos // 3600:02d}:{segundos // 60 % 60:02d}:{segundos % 60:02d}"
+
+
+def _numero(valor: float):
+    """Porcentagem como foi cadastrada (70, não 70.0)"""
+    return int(valor) if float(valor).is_integer() else float(valor)
+
+
+def montar_fechamento(dados: 'CamadaDados', mes: str) -> Dict[str, np.ndarray]:
+    """Colunas do instantâneo de um mês a partir do log e da tabela de usuários"""
+    from ponto.relatorio_org import jornadas_dias  # pandas sob demanda
+
+    inicio, fim = (d.isoformat() for d in limites_mes(mes))
+    indice = dados.indice
+    linhas = [linha for usuario in indice.usuarios() for linha in indice.linhas_periodo(usuario, inicio, fim)]
+    colunas = indice.log.colunas(linhas)
+
+    # Códigos de usuário próprios do instantâneo, em ordem de usuário e instante
+    codigos_log, usuarios = np.unique(colunas.usuarios, return_inverse=True)
+    usuarios = usuarios.ravel().astype(np.int32)
+    nomes = [colunas.nomes_usuario[codigo] for codigo in codigos_log.tolist()]
+    ordem = np.lexsort((colunas.segundos, usuarios))
+    usuarios, tipos, segundos = usuarios[ordem], colunas.tipos[ordem], colunas.segundos[ordem]
+
+    codigos_jornada = {t: colunas.nomes_tipo.index(t) for t in TIPOS_JORNADA if t in colunas.nomes_tipo}
+    chaves, _, horarios, trabalhado = jornadas_dias(usuarios, tipos, segundos, codigos_jornada)
+    folha_usuario = (chaves // DIAS_CHAVE).astype(np.int32)
+    usuario_segundos = np.bincount(folha_usuario, weights=trabalhado, minlength=len(nomes)).astype(np.int64)
+
+    # Cargo e rateio congelados como estavam no fechamento. Cada dia vai
+    # para o rateio vigente nele; o rateio do usuário no mês é a parte de
+    # cada contrato nas horas (sem horas, o vigente no último dia)
+    infos = [dados.get_usuario(usuario) for usuario in nomes]
+    tabela = dados.rateio.tabela(nomes)
+    segundos_pct, dias_contrato = ratear(tabela, folha_usuario, chaves % DIAS_CHAVE, trabalhado,
+                                         folha_usuario, len(nomes))
+    ultimo_dia = limites_mes(mes)[1].isoformat()
+    vigentes = [dados.contratos_usuario(usuario, ultimo_dia) for usuario in nomes]
+    usados = {c for c, dias in zip(tabela.nomes_contrato, dias_contrato.sum(axis=0).tolist()) if dias}
+    contratos = sorted(usados | {contrato for vigente in vigentes for contrato in vigente})
+    segundos_pct = segundos_pct[:, [tabela.nomes_contrato.index(c) for c in contratos]]
+    vigente = np.array([[v.get(c, 0) for c in contratos] for v in vigentes],
+                       dtype=np.float64).reshape(len(nomes), len(contratos))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rateio = np.where(usuario_segundos[:, None] != 0,
+                          np.round(segundos_pct / usuario_segundos[:, None], 2), vigente)
+    nomes_cargo, cargo_usuario = np.unique(
+        np.array([info.get('cargo', 'N/A') for info in infos], dtype=str), return_inverse=True)
+    cargo_usuario = cargo_usuario.ravel().astype(np.int32)
+    presenca_dia, presenca_pessoas = np.unique(chaves % DIAS_CHAVE, return_counts=True)
+
+    return {
+        'usuarios': np.array(nomes, dtype=str),
+        'nomes_tipo': np.array(colunas.nomes_tipo, dtype=str),
+        'batida_usuario': usuarios,
+        'batida_tipo': tipos,
+        'batida_segundos': segundos,
+        'folha_usuario': folha_usuario,
+        'folha_dia': chaves % DIAS_CHAVE,
+        'folha_horarios': np.column_stack([horarios[t] for t in TIPOS_JORNADA]).astype(np.int32),
+        'folha_segundos': trabalhado.astype(np.int64),
+        'usuario_segundos': usuario_segundos,
+        'contratos': np.array(contratos, dtype=str),
+        'rateio': rateio,
+        'usuario_segundos_pct': segundos_pct,
+        'contrato_segundos_pct': segundos_pct.sum(axis=0),
+        'nomes_cargo': nomes_cargo,
+        'cargo_usuario': cargo_usuario,
+        'cargo_segundos': np.bincount(cargo_usuario, weights=usuario_segundos,
+                                      minlength=len(nomes_cargo)).astype(np.int64),
+        'presenca_dia': presenca_dia,
+        'presenca_pessoas': presenca_pessoas.astype(np.int64),
+    }
+
+
+class Fechamento:
+    """Instantâneo somente leitura de um mês fechado"""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        with np.load(caminho) as arquivo:
+            self._c = {nome: arquivo[nome] for nome in arquivo.files}
+        meta = json.loads(str(self._c.pop('meta')))
+        self.mes: str = meta['mes']
+        self.versao: int = meta['versao']
+        self.fechado_em: str = meta['fechado_em']
+        self.usuarios: List[str] = self._c['usuarios'].tolist()
+        self._codigos = {usuario: i for i, usuario in enumerate(self.usuarios)}
+        self.total_batidas = len(self._c['batida_usuario'])
+
+    def horas_mes(self, usuario: str) -> float:
+        codigo = self._codigos.get(usuario)
+        return 0.0 if codigo is None else int(self._c['usuario_segundos'][codigo]) / 3600
+
+    def horas_total(self) -> float:
+        return int(self._c['usuario_segundos'].sum()) / 3600
+
+    def contratos_usuario(self, usuario: str) -> Dict[str, float]:
+        """Rateio do usuário vigente no fechamento"""
+        codigo = self._codigos.get(usuario)
+        if codigo is None:
+            return {}
+        return {contrato: _numero(porcentagem)
+                for contrato, porcentagem in zip(self._c['contratos'].tolist(), self._c['rateio'][codigo].tolist())
+                if porcentagem}
+
+    def porcentagem_contratos(self, usuario: str) -> Tuple[Dict, float]:
+        """Mesmo formato e mesmas contas de ``RelatorioManager.calcular_porcentagem_contratos``"""
+        total = self.horas_mes(usuario)
+        codigo = self._codigos.get(usuario)
+        if not total or 'usuario_segundos_pct' not in self._c:
+            # Sem horas (ou instantâneo anterior às horas por contrato): o rateio guardado
+            return {
+                contrato: {'porcentagem': porcentagem, 'horas': round(total * porcentagem / 100, 2)}
+                for contrato, porcentagem in self.contratos_usuario(usuario).items()
+            }, total
+        horas = self._c['usuario_segundos_pct'][codigo] / 100 / 3600
+        return {
+            contrato: {'porcentagem': _numero(round(horas_contrato / total * 100, 2)),
+                       'horas': round(horas_contrato, 2)}
+            for contrato, horas_contrato in zip(self._c['contratos'].tolist(), horas.tolist()) if horas_contrato
+        }, total
+
+    def folhas(self, usuario: Optional[str] = None) -> 'pd.DataFrame':
+        """Folha de cada (usuário, dia) no formato de ``ponto.folha.calcular_folhas``"""
+        import pandas as pd
+
+        c = self._c
+        if usuario is None:
+            selecao = np.arange(len(c['folha_usuario']))
+        else:
+            codigo = self._codigos.get(usuario, -1)
+            selecao = np.flatnonzero(c['folha_usuario'] == codigo)
+        chaves = c['folha_usuario'][selecao].astype(np.int64) * DIAS_CHAVE + c['folha_dia'][selecao]
+        horarios = c['folha_horarios'][selecao]
+
+        # Mesma aritmética de calcular_folhas, para os totais baterem bit a bit
+        seg = {tipo: np.where(horarios[:, i] >= 0, horarios[:, i], np.nan)
+               for i, tipo in enumerate(TIPOS_JORNADA)}
+        tem_jornada = ~np.isnan(seg['entrada']) & ~np.isnan(seg['saida'])
+        tem_almoco = tem_jornada & ~np.isnan(seg['almoco_saida']) & ~np.isnan(seg['almoco_retorno'])
+        horas_almoco = np.where(tem_almoco, (seg['almoco_retorno'] - seg['almoco_saida']) / 3600, 0.0)
+        total_horas = np.where(tem_jornada, (seg['saida'] - seg['entrada']) / 3600, 0.0) - horas_almoco
+
+        # Extras na ordem do dia, associados à linha da folha pela chave
+        extras: List[List[Dict]] = [[] for _ in range(len(selecao))]
+        nomes_tipo = c['nomes_tipo'].tolist()
+        codigos_extra = [i for i, tipo in enumerate(nomes_tipo) if tipo.startswith('extra')]
+        mascara = np.isin(c['batida_tipo'], codigos_extra)
+        if usuario is not None:
+            mascara &= c['batida_usuario'] == self._codigos.get(usuario, -1)
+        segundos_extra = c['batida_segundos'][mascara]
+        chaves_extra = (c['batida_usuario'][mascara].astype(np.int64) * DIAS_CHAVE
+                        + segundos_extra // SEGUNDOS_DIA)
+        posicoes = np.searchsorted(chaves, chaves_extra)
+        for posicao, tipo, segundos in zip(posicoes.tolist(), c['batida_tipo'][mascara].tolist(),
+                                           segundos_extra.tolist()):
+            extras[posicao].append({'tipo': nomes_tipo[tipo], 'horario': _texto_horario(segundos % SEGUNDOS_DIA)})
+
+        folhas = pd.DataFrame({
+            'usuario': np.array(self.usuarios, dtype=object)[c['folha_usuario'][selecao]],
+            'data': c['folha_dia'][selecao].astype('datetime64[D]').astype(str).astype(object),
+            **{tipo: pd.Series([_texto_horario(s) for s in horarios[:, i].tolist()], dtype=object)
+               for i, tipo in enumerate(TIPOS_JORNADA)},
+            'extras': extras,
+            'total_horas': total_horas,
+            'horas_almoco': horas_almoco,
+        })
+        if usuario is None:
+            # As chaves seguem o código do usuário; a folha ordena pelo nome
+            folhas = folhas.sort_values(['usuario', 'data'], kind='stable').reset_index(drop=True)
+        return folhas[COLUNAS_FOLHA]
+
+    def linhas(self, usuarios: Iterable[str], data_inicio: Optional[str] = None,
+               data_fim: Optional[str] = None) -> Iterator[Tuple[str, str, str, str]]:
+        """Linhas ``(usuario, data, tipo, horario)`` como ``CamadaDados.iterar_linhas``"""
+        c = self._c
+        nomes_tipo = np.array(c['nomes_tipo'].tolist(), dtype=object)
+        for usuario in usuarios:
+            codigo = self._codigos.get(usuario)
+            if codigo is None:
+                continue
+            inicio, fim = np.searchsorted(c['batida_usuario'], [codigo, codigo + 1])
+            segundos = c['batida_segundos'][inicio:fim]
+            tipos = c['batida_tipo'][inicio:fim]
+            instantes = np.datetime_as_string(segundos.astype('datetime64[s]'))
+            if data_inicio is not None or data_fim is not None:
+                datas = instantes.astype('U10')
+                mascara = (datas >= (data_inicio or '0000-00-00')) & (datas <= (data_fim or '9999-99-99'))
+                instantes, tipos = instantes[mascara], tipos[mascara]
+            for instante, tipo in zip(instantes.tolist(), nomes_tipo[tipos].tolist()):
+                yield usuario, instante[:10], tipo, instante[11:19]
+
+    def relatorio(self) -> Dict[str, 'pd.DataFrame']:
+        """Parte deste mês no formato de ``ponto.relatorio_org.relatorio_organizacao``"""
+        import pandas as pd
+
+        c = self._c
+        return {
+            'contratos': pd.DataFrame({'mes': self.mes, 'contrato': c['contratos'].astype(object),
+                                       'horas': c['contrato_segundos_pct'] / 100 / 3600}),
+            'cargos': pd.DataFrame({'mes': self.mes, 'cargo': c['nomes_cargo'].astype(object),
+                                    'horas': c['cargo_segundos'] / 3600}),
+            'presenca': pd.DataFrame({'data': c['presenca_dia'].astype('datetime64[D]').astype(str),
+                                      'pessoas': c['presenca_pessoas']}),
+        }
+
+
+class FechamentosMes:
+    """Meses fechados guardados numa pasta, um arquivo por versão"""
+
+    def __init__(self, pasta: str):
+        self.pasta = pasta
+        self._versoes: Dict[str, int] = {}
+        self._reabertos: set = set()
+        self._carregados: Dict[Tuple[str, int], Fechamento] = {}
+        self._lock = threading.Lock()
+        nomes = os.listdir(pasta) if os.path.isdir(pasta) else []
+        for nome in nomes:
+            encontrado = _ARQUIVO.match(nome)
+            if encontrado is None:
+                continue
+            mes, versao, extensao = encontrado.group(1), int(encontrado.group(2)), encontrado.group(3)
+            if extensao == 'npz':
+                self._versoes[mes] = max(versao, self._versoes.get(mes, 0))
+            else:
+                self._reabertos.add((mes, versao))
+
+    def _caminho(self, mes: str, versao: int, extensao: str) -> str:
+        return os.path.join(self.pasta, f"{mes}.v{versao}.{extensao}")
+
+    def fechado(self, mes: str) -> bool:
+        versao = self._versoes.get(mes)
+        return versao is not None and (mes, versao) not in self._reabertos
+
+    def meses(self) -> List[str]:
+        """Meses fechados, em ordem"""
+        return sorted(mes for mes in self._versoes if self.fechado(mes))
+
+    def obter(self, mes: str) -> Optional[Fechamento]:
+        """Versão vigente do fechamento do mês (``None`` se aberto)"""
+        if not self.fechado(mes):
+            return None
+        chave = (mes, self._versoes[mes])
+        fechamento = self._carregados.get(chave)
+        if fechamento is None:
+            with self._lock:
+                fechamento = self._carregados.get(chave)
+                if fechamento is None:
+                    fechamento = self._carregados[chave] = Fechamento(self._caminho(*chave, 'npz'))
+        return fechamento
+
+    def gravar(self, mes: str, colunas: Dict[str, np.ndarray]) -> Fechamento:
+        """Publica a próxima versão do mês; nunca sobrescreve uma existente"""
+        with self._lock:
+            versao = self._versoes.get(mes, 0) + 1
+            meta = {'mes': mes, 'versao': versao, 'fechado_em': datetime.now().isoformat(timespec='seconds')}
+            os.makedirs(self.pasta, exist_ok=True)
+            descritor, temporario = tempfile.mkstemp(dir=self.pasta, suffix='.tmp')
+            try:
+                with os.fdopen(descritor, 'wb') as arquivo:
+                    np.savez_compressed(arquivo, meta=np.array(json.dumps(meta)), **colunas)
+                    arquivo.flush()
+                    os.fsync(arquivo.fileno())
+                os.chmod(temporario, 0o444)
+                os.link(temporario, self._caminho(mes, versao, 'npz'))
+            finally:
+                os.unlink(temporario)
+            self._versoes[mes] = versao
+        return self.obter(mes)
+
+    def reabrir(self, mes: str):
+        """Libera o mês para correções; a versão fechada continua no disco"""
+        with self._lock:
+            if not self.fechado(mes):
+                return
+            versao = self._versoes[mes]
+            open(self._caminho(mes, versao, 'reaberto'), 'x').close()
+            self._reabertos.add((mes, versao))
+
+
+def meses_periodo(data_inicio: date, data_fim: date) -> List[Tuple[str, date, date]]:
+    """(mês, início, fim) de cada mês do período, recortados aos limites"""
+    meses = []
+    dia = data_inicio
+    while dia <= data_fim:
+        inicio_mes, fim_mes = limites_mes(chave_mes(dia.year, dia.month))
+        meses.append((chave_mes(dia.year, dia.month), max(inicio_mes, data_inicio), min(fim_mes, data_fim)))
+        dia = fim_mes + timedelta(days=1)
+    return meses
+
+
+def fechamentos_periodo(dados: 'CamadaDados', data_inicio: date,
+                        data_fim: date) -> Optional[List[Fechamento]]:
+    """Fechamentos de todos os meses tocados pelo período, ou ``None`` se algum está aberto"""
+    if dados.fechamentos is None:
+        return None
+    fechamentos = [dados.fechamentos.obter(mes) for mes, _, _ in meses_periodo(data_inicio, data_fim)]
+    return None if None in fechamentos else fechamentos
+
+
+def versao_fechamentos(fechamentos: List[Fechamento]) -> str:
+    """Versão para chaves de cache: só muda se um dos meses for refechado"""
+    return 'f' + '.'.join(str(f.versao) for f in fechamentos)
+
+
+def relatorio_periodo(dados: 'CamadaDados', data_inicio: date, data_fim: date,
+                      trabalhadores: int = 1, executor: Optional[Executor] = None) -> Dict[str, 'pd.DataFrame']:
+    """``relatorio_organizacao`` do período com os meses fechados lidos dos instantâneos.
+
+    Meses inteiros e fechados vêm prontos do fechamento; os demais trechos
+    contíguos são agregados das batidas (com ``trabalhadores`` e
+    ``executor`` como em ``relatorio_organizacao``), e as partes são
+    concatenadas. O pedaço de um mês arquivado nas pontas do período é
+    agregado da partição do arquivo, já que as batidas dele saíram do log.
+    """
+    import pandas as pd
+
+    from ponto.relatorio_org import relatorio_organizacao
+
+    partes: List[Dict[str, pd.DataFrame]] = []
+    abertos: List[Tuple[date, date]] = []
+    arquivados: List[Tuple[str, date, date]] = []
+    for mes, inicio, fim in meses_periodo(data_inicio, data_fim):
+        inteiro = (inicio, fim) == limites_mes(mes)
+        fechamento = dados.fechamentos.obter(mes) if inteiro and dados.fechamentos is not None else None
+        if fechamento is not None:
+            partes.append(fechamento.relatorio())
+        elif dados.mes_arquivado(mes):
+            arquivados.append((mes, inicio, fim))
+        elif abertos and abertos[-1][1] + timedelta(days=1) == inicio:
+            abertos[-1] = (abertos[-1][0], fim)
+        else:
+            abertos.append((inicio, fim))
+
+    if abertos or arquivados:
+        tabela_usuarios = {u: dados.get_usuario(u) for u in dados.listar_usuarios()}
+        trechos = [(dados.arquivo.colunas(mes), inicio, fim) for mes, inicio, fim in arquivados]
+        if abertos:
+            colunas = dados.log.colunas()
+            trechos.extend((colunas, inicio, fim) for inicio, fim in abertos)
+        for colunas, inicio, fim in trechos:
+            partes.append(relatorio_organizacao(colunas, tabela_usuarios, inicio, fim, trabalhadores=trabalhadores,
+                                                executor=executor, rateio=dados.rateio))
+
+    chaves = {'contratos': ['mes', 'contrato'], 'cargos': ['mes', 'cargo'], 'presenca': ['data']}
+    return {
+        nome: (pd.concat([parte[nome] for parte in partes], ignore_index=True)
+               .sort_values(colunas_chave, kind='stable').reset_index(drop=True))
+        for nome, colunas_chave in chaves.items()
+    }
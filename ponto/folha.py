@@ -0,0 +1,141 @@
+"""Cálculo da folha de ponto (horas por usuário e dia).
+
+``horas_dia`` é a regra original, dia a dia; como as batidas são do mesmo
+dia, basta a diferença de segundos desde a meia-noite (sem ``strptime``).
+``calcular_folhas`` aplica a mesma regra a uma tabela de batidas com vários
+usuários e dias em uma única passada vetorizada: a última batida de cada
+tipo vira coluna (pivot por ``tipo``) e as horas saem da subtração de
+colunas int64 em segundos.
+"""
+from typing import TYPE_CHECKING, Dict, Iterable, List, Mapping
+
+import numpy as np
+
+# pandas só é importado por quem monta tabelas: horas_dia (tela de login,
+# registro de batida) não paga o custo da importação
+if TYPE_CHECKING:
+    import pandas as pd
+
+TIPOS_JORNADA = ['entrada', 'saida', 'almoco_saida', 'almoco_retorno']
+COLUNAS_BATIDAS = ['usuario', 'tipo', 'data', 'horario']
+COLUNAS_FOLHA = ['usuario', 'data'] + TIPOS_JORNADA + ['extras', 'total_horas', 'horas_almoco']
+
+
+def segundos_horario(horario: str) -> int:
+    """Segundos desde a meia-noite de um horário ``HH:MM:SS``"""
+    return int(horario[0:2]) * 3600 + int(horario[3:5]) * 60 + int(horario[6:8])
+
+
+def horas_dia(batidas: List[Dict], data: str) -> Dict:
+    """Horas de um dia a partir das batidas do usuário naquele dia"""
+    horas_info = {
+        'entrada': None,
+        'saida': None,
+        'almoco_saida': None,
+        'almoco_retorno': None,
+        'extras': [],
+        'total_horas': 0,
+        'horas_almoco': 0
+    }
+
+    for batida in batidas:
+        if batida['tipo'] == 'entrada':
+            horas_info['entrada'] = batida['horario']
+        elif batida['tipo'] == 'saida':
+            horas_info['saida'] = batida['horario']
+        elif batida['tipo'] == 'almoco_saida':
+            horas_info['almoco_saida'] = batida['horario']
+        elif batida['tipo'] == 'almoco_retorno':
+            horas_info['almoco_retorno'] = batida['horario']
+        elif batida['tipo'].startswith('extra'):
+            horas_info['extras'].append({
+                'tipo': batida['tipo'],
+                'horario': batida['horario']
+            })
+
+    # Calcular total de horas (todas as batidas são do mesmo dia)
+    if horas_info['entrada'] and horas_info['saida']:
+        entrada_seg = segundos_horario(horas_info['entrada'])
+        saida_seg = segundos_horario(horas_info['saida'])
+        horas_info['total_horas'] = (saida_seg - entrada_seg) / 3600
+
+        # Descontar almoço se houver
+        if horas_info['almoco_saida'] and horas_info['almoco_retorno']:
+            almoco_saida_seg = segundos_horario(horas_info['almoco_saida'])
+            almoco_retorno_seg = segundos_horario(horas_info['almoco_retorno'])
+            horas_info['horas_almoco'] = (almoco_retorno_seg - almoco_saida_seg) / 3600
+            horas_info['total_horas'] -= horas_info['horas_almoco']
+
+    return horas_info
+
+
+def tabela_batidas(batidas: Iterable[Mapping]) -> 'pd.DataFrame':
+    """Tabela de batidas (em ordem cronológica) no formato de ``calcular_folhas``"""
+    import pandas as pd
+
+    return pd.DataFrame(
+        [(b['usuario'], b['tipo'], b['data'], b['horario']) for b in batidas],
+        columns=COLUNAS_BATIDAS
+    )
+
+
+def _segundos(df: 'pd.DataFrame') -> np.ndarray:
+    """Instante de cada batida em segundos desde a época (int64)"""
+    import pandas as pd
+
+    instantes = pd.to_datetime(df['data'] + ' ' + df['horario'], format='%Y-%m-%d %H:%M:%S')
+    return instantes.to_numpy(dtype='datetime64[s]').astype(np.int64)
+
+
+def calcular_folhas(batidas: 'pd.DataFrame') -> 'pd.DataFrame':
+    """Folha de ponto de todos os (usuário, dia) presentes em ``batidas``.
+
+    ``batidas`` precisa das colunas ``usuario``, ``tipo``, ``data`` e
+    ``horario``, em ordem cronológica dentro de cada dia. O resultado tem uma
+    linha por (usuário, dia), ordenada, com os mesmos valores de
+    ``horas_dia``: horários de entrada/saída/almoço (ou ``None``), lista de
+    extras, ``total_horas`` e ``horas_almoco``.
+    """
+    import pandas as pd
+
+    if batidas.empty:
+        return pd.DataFrame(columns=COLUNAS_FOLHA)
+
+    df = batidas[COLUNAS_BATIDAS].reset_index(drop=True)
+    dias = df[['usuario', 'data']].drop_duplicates().set_index(['usuario', 'data']).sort_index()
+
+    # Última batida de cada tipo no dia, como em horas_dia
+    jornada = df[df['tipo'].isin(TIPOS_JORNADA)]
+    jornada = jornada.drop_duplicates(['usuario', 'data', 'tipo'], keep='last').copy()
+    jornada['segundos'] = _segundos(jornada)
+    horarios = jornada.pivot(index=['usuario', 'data'], columns='tipo', values='horario')
+    segundos = jornada.pivot(index=['usuario', 'data'], columns='tipo', values='segundos')
+    horarios = horarios.reindex(index=dias.index, columns=TIPOS_JORNADA)
+    segundos = segundos.reindex(index=dias.index, columns=TIPOS_JORNADA)
+
+    # NaN marca batida ausente; as diferenças são exatas em float64
+    seg = {tipo: segundos[tipo].to_numpy(dtype=np.float64) for tipo in TIPOS_JORNADA}
+    tem_jornada = ~np.isnan(seg['entrada']) & ~np.isnan(seg['saida'])
+    tem_almoco = tem_jornada & ~np.isnan(seg['almoco_saida']) & ~np.isnan(seg['almoco_retorno'])
+    horas_almoco = np.where(tem_almoco, (seg['almoco_retorno'] - seg['almoco_saida']) / 3600, 0.0)
+    total_horas = np.where(tem_jornada, (seg['saida'] - seg['entrada']) / 3600, 0.0) - horas_almoco
+
+    folhas = horarios.astype(object).where(horarios.notna(), None)
+    folhas['total_horas'] = total_horas
+    folhas['horas_almoco'] = horas_almoco
+
+    # Extras são raros: agrupados fora da passada vetorizada
+    extras: Dict[tuple, List[Dict]] = {}
+    mascara_extras = df['tipo'].str.startswith('extra')
+    for usuario, tipo, data, horario in df[mascara_extras].itertuples(index=False):
+        extras.setdefault((usuario, data), []).append({'tipo': tipo, 'horario': horario})
+    lista_extras: List[List[Dict]] = [[] for _ in range(len(folhas))]
+    if extras:
+        posicoes = folhas.index.get_indexer(list(extras))
+        for posicao, itens in zip(posicoes, extras.values()):
+            lista_extras[posicao] = itens
+    folhas['extras'] = lista_extras
+
+    folhas = folhas.reset_index()
+    folhas.columns.name = None
+    return folhas[COLUNAS_FOLHA]
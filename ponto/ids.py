@@ -0,0 +1,67 @@
+"""Ids de batida ordenados pelo tempo e sem colisão entre processos.
+
+Cada id é um inteiro de 63 bits no formato do *snowflake*::
+
+    milissegundos desde EPOCA_IDS (41) | nó (10) | sequência (12)
+
+O nó identifica quem gera (um processo escritor); dentro do nó a sequência
+conta as batidas do mesmo milissegundo. Dois nós distintos nunca geram o
+mesmo id, e os ids de um nó são estritamente crescentes, mesmo se o relógio
+do sistema voltar: nesse caso o gerador segue no último milissegundo usado
+e, esgotada a sequência, avança para o seguinte por conta própria.
+
+O gerador não tem lock: cada nó pertence a uma única thread (no
+``SQLiteStore``, a thread escritora), então a sequência é estado local.
+"""
+import time
+from datetime import datetime
+from typing import List
+
+EPOCA_IDS = datetime(2024, 1, 1)
+BITS_NO = 10
+BITS_SEQUENCIA = 12
+MAX_NOS = 1 << BITS_NO
+_MAX_SEQUENCIA = (1 << BITS_SEQUENCIA) - 1
+_EPOCA_MS = int(EPOCA_IDS.timestamp() * 1000)
+
+
+def no_id(id_batida: int) -> int:
+    """Nó que gerou um id"""
+    return (id_batida >> BITS_SEQUENCIA) & (MAX_NOS - 1)
+
+
+class GeradorIds:
+    """Gerador de ids de um nó; não deve ser compartilhado entre threads"""
+
+    def __init__(self, no: int, depois_de: int = 0):
+        """``depois_de``: último id já gravado pelo nó; os próximos serão maiores"""
+        if not 0 <= no < MAX_NOS:
+            raise ValueError(f"nó fora do intervalo 0..{MAX_NOS - 1}: {no}")
+        self.no = no
+        self._ms = depois_de >> (BITS_NO + BITS_SEQUENCIA)
+        # Milissegundo do último id tratado como esgotado
+        self._sequencia = _MAX_SEQUENCIA + 1
+
+    def _avancar(self, quantidade: int) -> int:
+        """Reserva ``quantidade`` sequências seguidas e devolve o primeiro id"""
+        agora = time.time_ns() // 1_000_000 - _EPOCA_MS
+        if agora > self._ms:
+            self._ms, self._sequencia = agora, 0
+        elif self._sequencia + quantidade > _MAX_SEQUENCIA + 1:
+            # Sequência do milissegundo esgotada (ou relógio atrasado)
+            self._ms, self._sequencia = self._ms + 1, 0
+        primeiro = (self._ms << (BITS_NO + BITS_SEQUENCIA)) | (self.no << BITS_SEQUENCIA) | self._sequencia
+        self._sequencia += quantidade
+        return primeiro
+
+    def proximo(self) -> int:
+        return self._avancar(1)
+
+    def lote(self, quantidade: int) -> List[int]:
+        """``quantidade`` ids crescentes, em blocos de até 4096 por milissegundo"""
+        ids: List[int] = []
+        while len(ids) < quantidade:
+            bloco = min(quantidade - len(ids), _MAX_SEQUENCIA + 1)
+            primeiro = self._avancar(bloco)
+            ids.extend(range(primeiro, primeiro + bloco))
+        return ids
@@ -0,0 +1,433 @@
+"""Importação em massa de batidas de relógios de ponto (AFD) e de CSV.
+
+O arquivo é lido em fluxo, linha a linha. Cada marcação é associada ao
+usuário pelo PIS ou CPF cadastrado (campos ``pis``/``cpf`` do usuário) e
+fica pendente até o dia dela se fechar: como o AFD é cronológico, um dia
+está completo quando aparece uma marcação de data posterior. Só então as
+marcações do dia são comparadas com as já gravadas (duplicadas são
+descartadas) e recebem os tipos da jornada pela ordem do dia. Num dia que
+já tem batidas (AFD cumulativo exportado de novo), os tipos vêm da jornada
+do dia inteiro e as marcações novas só entram se ela mantiver os tipos já
+gravados; senão vão para o relatório. As batidas
+aceitas são gravadas em lotes de ``tamanho_lote`` por
+``CamadaDados.registrar_lote``; a memória fica limitada às marcações
+pendentes (no máximo ``limite_pendentes``) mais um lote, qualquer que seja
+o tamanho do arquivo.
+
+Formatos aceitos:
+
+* AFD da Portaria 1510/2009: registro tipo 3 com data ``ddmmaaaa``, hora
+  ``hhmm`` e PIS (34 posições);
+* AFD da Portaria 671/2021: registros tipo 3 e 7 com data e hora ISO
+  (``aaaa-mm-ddThh:mm:00-0300``) e CPF;
+* CSV com cabeçalho, separado por ``;`` ou ``,``, com as colunas ``pis``,
+  ``cpf`` ou ``identificador``, ``data`` (``aaaa-mm-dd`` ou ``dd/mm/aaaa``),
+  ``horario`` ou ``hora`` e, opcionalmente, ``tipo``.
+
+Registros que não viram batida vão para o relatório de rejeitados
+(``Rejeicao``) com o número da linha, o motivo e o conteúdo original;
+marcações novas em meses fechados (``ponto.fechamento``) também.
+"""
+import codecs
+import csv
+import io
+import re
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from ponto.colunar import TIPOS_BATIDA, para_segundos
+from ponto.indice import ORDINAL_EPOCA, SEGUNDOS_DIA
+
+if TYPE_CHECKING:
+    from ponto.dados import CamadaDados
+
+TAMANHO_LOTE = 50_000
+PASSO_PROGRESSO = 10_000
+# Instantes do AFD convertidos guardados para reúso (um dia tem 1440 minutos)
+LIMITE_INSTANTES = 10_000
+# Ordem dos tipos ao longo do dia; os extras só depois da jornada completa
+SEQUENCIA_TIPOS = ['entrada', 'almoco_saida', 'almoco_retorno', 'saida', 'extra1', 'extra2']
+# Tipos de uma jornada com n marcações, na ordem cronológica
+TIPOS_POR_QUANTIDADE = {
+    1: ['entrada'],
+    2: ['entrada', 'saida'],
+    3: ['entrada', 'almoco_saida', 'almoco_retorno'],
+}
+# Registros do AFD que não são marcação (cabeçalho, empresa, ajustes de
+# relógio, cadastro de empregados, eventos, trailer): ignorados
+TIPOS_REGISTRO_IGNORADOS = set('124569')
+
+MOTIVO_INVALIDO = 'registro inválido'
+MOTIVO_DATA = 'data ou hora inválida'
+MOTIVO_IDENTIFICADOR = 'PIS/CPF não cadastrado'
+MOTIVO_TIPO = 'tipo de batida desconhecido'
+MOTIVO_DUPLICADA = 'batida já registrada'
+MOTIVO_EXCESSO = 'mais marcações no dia do que tipos de batida'
+MOTIVO_MES_FECHADO = 'mês fechado'
+MOTIVO_JORNADA = 'dia já gravado com outros tipos de batida'
+
+_NAO_DIGITOS = re.compile(r'\D')
+
+
+class RegistroInvalido(ValueError):
+    """Linha que não pode ser convertida em marcação"""
+
+
+class Marcacao(NamedTuple):
+    linha: int
+    conteudo: str
+    identificador: int
+    timestamp: datetime
+    tipo: Optional[str]
+
+
+class Rejeicao(NamedTuple):
+    linha: int
+    motivo: str
+    conteudo: str
+
+
+class ResultadoImportacao:
+    """Contadores de uma importação"""
+
+    def __init__(self):
+        self.lidas = 0
+        self.importadas = 0
+        self.duplicadas = 0
+        self.rejeitadas = 0
+        self.ignoradas = 0
+
+    def como_dict(self) -> Dict[str, int]:
+        return {'lidas': self.lidas, 'importadas': self.importadas, 'duplicadas': self.duplicadas,
+                'rejeitadas': self.rejeitadas, 'ignoradas': self.ignoradas}
+
+
+def normalizar_identificador(valor: str) -> Optional[int]:
+    """PIS ou CPF como inteiro (sem pontuação nem zeros à esquerda)"""
+    digitos = _NAO_DIGITOS.sub('', valor or '')
+    return int(digitos) if digitos and int(digitos) else None
+
+
+def mapa_identificadores(usuarios: Dict[str, Dict]) -> Dict[int, str]:
+    """PIS/CPF normalizado -> usuário, a partir da tabela de usuários"""
+    mapa = {}
+    for usuario, info in usuarios.items():
+        for campo in ('pis', 'cpf'):
+            identificador = normalizar_identificador(info.get(campo, ''))
+            if identificador is not None:
+                mapa[identificador] = usuario
+    return mapa
+
+
+# -------------------- leitura dos formatos --------------------
+
+def _instante_afd(texto: str, portaria_671: bool) -> datetime:
+    try:
+        if portaria_671:
+            # aaaa-mm-ddThh:mm:ss (o fuso que segue é o do próprio relógio)
+            return datetime(int(texto[0:4]), int(texto[5:7]), int(texto[8:10]),
+                            int(texto[11:13]), int(texto[14:16]), int(texto[17:19]))
+        # Portaria 1510: ddmmaaaahhmm
+        return datetime(int(texto[4:8]), int(texto[2:4]), int(texto[0:2]),
+                        int(texto[8:10]), int(texto[10:12]))
+    except ValueError as erro:
+        raise RegistroInvalido(MOTIVO_DATA) from erro
+
+
+def _afd(linha: str, instantes: Dict[str, datetime]) -> Optional[Tuple[int, datetime]]:
+    """(identificador, instante) de um registro de marcação do AFD.
+
+    ``instantes`` guarda os instantes já convertidos: num relógio, muitas
+    marcações caem no mesmo minuto.
+    """
+    if len(linha) < 10 or not linha[:9].isdigit():
+        raise RegistroInvalido(MOTIVO_INVALIDO)
+    tipo = linha[9]
+    if tipo in TIPOS_REGISTRO_IGNORADOS:
+        return None
+    portaria_671 = len(linha) >= 46 and linha[14] == '-' and linha[20] == 'T'
+    if tipo not in '37' or not (portaria_671 or (tipo == '3' and len(linha) >= 34)):
+        raise RegistroInvalido(MOTIVO_INVALIDO)
+    if portaria_671:
+        texto, identificador = linha[10:29], linha[34:46]
+    else:
+        texto, identificador = linha[10:22], linha[22:34]
+    instante = instantes.get(texto)
+    if instante is None:
+        if len(instantes) >= LIMITE_INSTANTES:
+            instantes.clear()
+        instante = instantes[texto] = _instante_afd(texto, portaria_671)
+    if not identificador.isdigit():
+        raise RegistroInvalido(MOTIVO_INVALIDO)
+    return int(identificador), instante
+
+
+def ler_afd(linhas: Iterable[str]) -> Iterator:
+    """Marcações (``Marcacao``) e rejeições (``Rejeicao``) de um AFD; ``None`` nas ignoradas"""
+    instantes: Dict[str, datetime] = {}
+    for numero, linha in enumerate(linhas, 1):
+        linha = linha.rstrip('\r\n')
+        if not linha.strip():
+            continue
+        try:
+            registro = _afd(linha, instantes)
+        except RegistroInvalido as erro:
+            yield Rejeicao(numero, str(erro), linha)
+            continue
+        yield None if registro is None else Marcacao(numero, linha, registro[0], registro[1], None)
+
+
+def _data_csv(data: str, horario: str) -> datetime:
+    if '/' in data:
+        dia, mes, ano = data.split('/')
+    else:
+        ano, mes, dia = data.split('-')
+    partes = [int(p) for p in horario.split(':')]
+    return datetime(int(ano), int(mes), int(dia), *partes)
+
+
+def ler_csv(linhas: Iterable[str]) -> Iterator:
+    """Marcações e rejeições de um CSV com cabeçalho (ver o docstring do módulo)"""
+    linhas = iter(linhas)
+    cabecalho = next(linhas, '')
+    separador = ';' if ';' in cabecalho else ','
+    colunas = [c.strip().lower() for c in next(csv.reader([cabecalho], delimiter=separador), [])]
+    coluna_id = next((colunas.index(c) for c in ('pis', 'cpf', 'identificador') if c in colunas), None)
+    coluna_hora = next((colunas.index(c) for c in ('horario', 'hora') if c in colunas), None)
+    if coluna_id is None or coluna_hora is None or 'data' not in colunas:
+        raise ValueError("O CSV precisa das colunas pis/cpf, data e horario")
+    coluna_data = colunas.index('data')
+    coluna_tipo = colunas.index('tipo') if 'tipo' in colunas else None
+
+    for numero, campos in enumerate(csv.reader(linhas, delimiter=separador), 2):
+        if not any(campos):
+            continue
+        conteudo = separador.join(campos)
+        try:
+            identificador = normalizar_identificador(campos[coluna_id])
+            if identificador is None:
+                raise RegistroInvalido(MOTIVO_IDENTIFICADOR)
+            try:
+                instante = _data_csv(campos[coluna_data].strip(), campos[coluna_hora].strip())
+            except (ValueError, TypeError) as erro:
+                raise RegistroInvalido(MOTIVO_DATA) from erro
+            tipo = (campos[coluna_tipo].strip() or None) if coluna_tipo is not None else None
+            if tipo is not None and tipo not in TIPOS_BATIDA:
+                raise RegistroInvalido(MOTIVO_TIPO)
+        except IndexError:
+            yield Rejeicao(numero, MOTIVO_INVALIDO, conteudo)
+            continue
+        except RegistroInvalido as erro:
+            yield Rejeicao(numero, str(erro), conteudo)
+            continue
+        yield Marcacao(numero, conteudo, identificador, instante, tipo)
+
+
+LEITORES: Dict[str, Callable[[Iterable[str]], Iterator]] = {'afd': ler_afd, 'csv': ler_csv}
+
+
+def detectar_formato(primeira_linha: str) -> str:
+    """AFD começa pelo NSR numérico; qualquer outra coisa é tratada como CSV"""
+    return 'afd' if primeira_linha[:10].isdigit() else 'csv'
+
+
+# -------------------- importação --------------------
+
+def tipos_dia(quantidade: int) -> List[str]:
+    """Tipos de ``quantidade`` marcações de um dia, em ordem cronológica"""
+    return TIPOS_POR_QUANTIDADE.get(quantidade, SEQUENCIA_TIPOS[:quantidade])
+
+
+class ImportadorBatidas:
+    """Importa marcações em fluxo para uma ``CamadaDados``.
+
+    ``rejeitar`` recebe cada ``Rejeicao`` (inclusive as duplicadas) assim
+    que ela é decidida, para o relatório ser gravado em fluxo também.
+    """
+
+    def __init__(self, dados: 'CamadaDados', tamanho_lote: int = TAMANHO_LOTE,
+                 rejeitar: Optional[Callable[[Rejeicao], None]] = None,
+                 limite_pendentes: Optional[int] = None):
+        self.dados = dados
+        self.tamanho_lote = tamanho_lote
+        self.limite_pendentes = limite_pendentes or 4 * tamanho_lote
+        self.rejeitar = rejeitar or (lambda rejeicao: None)
+        self.resultado = ResultadoImportacao()
+        self._usuarios = mapa_identificadores({u: dados.get_usuario(u) for u in dados.listar_usuarios()})
+        # ordinal do dia -> usuário -> [(segundos, marcação)] ainda não gravados
+        self._pendentes: Dict[int, Dict[str, List[Tuple[int, Marcacao]]]] = {}
+        self._quantidade_pendente = 0
+        self._ultimo_dia = 0
+        self._lote: List[Tuple[str, str, datetime]] = []
+        self._dias_no_lote: set = set()
+
+    def _rejeitar(self, rejeicao: Rejeicao):
+        if rejeicao.motivo == MOTIVO_DUPLICADA:
+            self.resultado.duplicadas += 1
+        else:
+            self.resultado.rejeitadas += 1
+        self.rejeitar(rejeicao)
+
+    def adicionar(self, marcacao: Marcacao):
+        usuario = self._usuarios.get(marcacao.identificador)
+        if usuario is None:
+            self._rejeitar(Rejeicao(marcacao.linha, MOTIVO_IDENTIFICADOR, marcacao.conteudo))
+            return
+        segundos = para_segundos(marcacao.timestamp)
+        ordinal = ORDINAL_EPOCA + segundos // SEGUNDOS_DIA
+        if ordinal > self._ultimo_dia:
+            # Marcação de um dia posterior: os anteriores estão completos
+            self._fechar_dias(ordinal)
+            self._ultimo_dia = ordinal
+        self._pendentes.setdefault(ordinal, {}).setdefault(usuario, []).append((segundos, marcacao))
+        self._quantidade_pendente += 1
+        if self._quantidade_pendente >= self.limite_pendentes:
+            # Entrada fora de ordem acumulando dias antigos: fecha os
+            # anteriores e, se ainda não bastar, também o dia corrente
+            self._fechar_dias(self._ultimo_dia)
+            if self._quantidade_pendente >= self.limite_pendentes:
+                self._fechar_dias(None)
+
+    def _fechar_dias(self, ate: Optional[int]):
+        """Classifica os dias pendentes anteriores a ``ate`` (todos com ``None``)"""
+        for ordinal in sorted(self._pendentes):
+            if ate is not None and ordinal >= ate:
+                break
+            for usuario, marcacoes in self._pendentes.pop(ordinal).items():
+                self._quantidade_pendente -= len(marcacoes)
+                self._fechar_dia(usuario, ordinal, marcacoes)
+        if len(self._lote) >= self.tamanho_lote:
+            self._gravar()
+
+    def _fechar_dia(self, usuario: str, ordinal: int, marcacoes: List[Tuple[int, Marcacao]]):
+        if (usuario, ordinal) in self._dias_no_lote:
+            # Dia que voltou a aparecer com batidas ainda no lote: grava antes de comparar
+            self._gravar()
+        indice = self.dados.indice
+        log = indice.log
+        data = datetime.fromordinal(ordinal).strftime('%Y-%m-%d')
+        existentes = indice.linhas_dia(usuario, data)
+        gravados = {log.segundos(linha): log.linha(linha)['tipo'] for linha in existentes}
+        vistos = set(gravados)
+
+        novas: List[Tuple[int, Marcacao]] = []
+        for segundos, marcacao in sorted(marcacoes, key=lambda item: item[0]):
+            if segundos in vistos:
+                self._rejeitar(Rejeicao(marcacao.linha, MOTIVO_DUPLICADA, marcacao.conteudo))
+                continue
+            vistos.add(segundos)
+            novas.append((segundos, marcacao))
+        if not novas:
+            return
+        if self.dados.mes_fechado(data[:7]):
+            for _, marcacao in novas:
+                self._rejeitar(Rejeicao(marcacao.linha, MOTIVO_MES_FECHADO, marcacao.conteudo))
+            return
+
+        if gravados and any(marcacao.tipo is None for _, marcacao in novas):
+            self._completar_dia(usuario, gravados, novas)
+        else:
+            # Tipos livres da jornada com o total de marcações do dia
+            usados = set(gravados.values())
+            livres = [t for t in tipos_dia(len(gravados) + len(novas)) if t not in usados]
+            livres += [t for t in SEQUENCIA_TIPOS if t not in usados and t not in livres]
+            for _, marcacao in novas:
+                tipo = marcacao.tipo
+                if tipo is None:
+                    if not livres:
+                        self._rejeitar(Rejeicao(marcacao.linha, MOTIVO_EXCESSO, marcacao.conteudo))
+                        continue
+                    tipo = livres.pop(0)
+                elif tipo in livres:
+                    livres.remove(tipo)
+                self._lote.append((usuario, tipo, marcacao.timestamp))
+        self._dias_no_lote.add((usuario, ordinal))
+
+    def _completar_dia(self, usuario: str, gravados: Dict[int, str], novas: List[Tuple[int, Marcacao]]):
+        """Marcações sem tipo num dia que já tem batidas (AFD exportado de novo
+        com o dia mais completo): os tipos saem da jornada do dia inteiro.
+
+        O log só cresce, então os tipos já gravados não mudam; se a jornada
+        inteira pede outros tipos para eles (ex.: a ``saida`` das 12:00 que
+        agora é ``almoco_saida``), as marcações novas do dia vão para o
+        relatório em vez de gravar um dia com horas erradas.
+        """
+        instantes = sorted(list(gravados) + [segundos for segundos, _ in novas])
+        esperados = dict(zip(instantes, tipos_dia(len(instantes))))
+        fixos = dict(gravados)
+        fixos.update((segundos, marcacao.tipo) for segundos, marcacao in novas if marcacao.tipo is not None)
+        if any(esperados.get(segundos, tipo) != tipo for segundos, tipo in fixos.items()):
+            for _, marcacao in novas:
+                self._rejeitar(Rejeicao(marcacao.linha, MOTIVO_JORNADA, marcacao.conteudo))
+            return
+        for segundos, marcacao in novas:
+            tipo = marcacao.tipo or esperados.get(segundos)
+            if tipo is None:
+                self._rejeitar(Rejeicao(marcacao.linha, MOTIVO_EXCESSO, marcacao.conteudo))
+                continue
+            self._lote.append((usuario, tipo, marcacao.timestamp))
+
+    def _gravar(self):
+        if self._lote:
+            self.dados.registrar_lote(self._lote)
+            self.resultado.importadas += len(self._lote)
+        self._lote = []
+        self._dias_no_lote = set()
+
+    def importar(self, registros: Iterable) -> ResultadoImportacao:
+        """Consome a saída de ``ler_afd``/``ler_csv`` e grava tudo ao final"""
+        for registro in registros:
+            self.resultado.lidas += 1
+            if registro is None:
+                self.resultado.ignoradas += 1
+            elif isinstance(registro, Rejeicao):
+                self._rejeitar(registro)
+            else:
+                self.adicionar(registro)
+        self._fechar_dias(None)
+        self._gravar()
+        return self.resultado
+
+
+def importar_arquivo(dados: 'CamadaDados', arquivo: TextIO, formato: Optional[str] = None,
+                     relatorio: Optional[TextIO] = None, tamanho_lote: int = TAMANHO_LOTE,
+                     progresso: Optional[Callable[[], None]] = None) -> ResultadoImportacao:
+    """Importa um arquivo texto aberto; rejeitados vão para ``relatorio`` (CSV).
+
+    ``formato`` é ``'afd'`` ou ``'csv'``; sem ele, é detectado pela primeira
+    linha. ``progresso`` é chamado a cada ``PASSO_PROGRESSO`` linhas lidas.
+    """
+    primeira = arquivo.readline()
+    formato = formato or detectar_formato(primeira)
+    if formato not in LEITORES:
+        raise ValueError(f"Formato de importação desconhecido: {formato}")
+
+    rejeitar = None
+    if relatorio is not None:
+        escritor = csv.writer(relatorio, delimiter=';')
+        escritor.writerow(['linha', 'motivo', 'conteudo'])
+        rejeitar = escritor.writerow
+
+    def linhas() -> Iterator[str]:
+        if primeira:
+            yield primeira
+        for numero, linha in enumerate(arquivo, 1):
+            if progresso is not None and numero % PASSO_PROGRESSO == 0:
+                progresso()
+            yield linha
+
+    importador = ImportadorBatidas(dados, tamanho_lote, rejeitar)
+    return importador.importar(LEITORES[formato](linhas()))
+
+
+def abrir_texto(binario) -> TextIO:
+    """Envolve um arquivo binário (ex.: upload) em texto; AFD usa ASCII/Latin-1.
+
+    Arquivo que começa com BOM UTF-8 (CSV salvo pelo Excel) é lido como
+    UTF-8 sem o BOM, senão ele grudaria no primeiro nome do cabeçalho.
+    """
+    inicio = binario.read(len(codecs.BOM_UTF8))
+    if inicio == codecs.BOM_UTF8:
+        return io.TextIOWrapper(binario, encoding='utf-8', newline='')
+    binario.seek(-len(inicio), io.SEEK_CUR)
+    return io.TextIOWrapper(binario, encoding='latin-1', newline='')
@@ -0,0 +1,229 @@
+"""Índice em memória usuário -> dia -> batidas ordenadas.
+
+O índice guarda apenas números de linha do ``LogBatidas``. Os dias de cada
+usuário ficam numa lista ordenada de ordinais (``date.toordinal``), então
+um dia custa uma busca em dicionário e um período custa O(log n + k) com
+``bisect``. Ao lado dos ordinais ficam contadores acumulados de batidas e de
+entradas por dia: totais de um período e a posição de uma página saem de
+buscas binárias, sem percorrer as batidas.
+"""
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ponto.colunar import BatidaView, LogBatidas
+
+SEGUNDOS_DIA = 86400
+# Ordinal de 1970-01-01: converte segundos desde a época em ordinal do dia
+ORDINAL_EPOCA = date(1970, 1, 1).toordinal()
+
+
+def ordinal_dia(data: str) -> int:
+    """Ordinal de uma data ``YYYY-MM-DD``"""
+    return date(int(data[0:4]), int(data[5:7]), int(data[8:10])).toordinal()
+
+
+class _DiasUsuario:
+    __slots__ = ('ordinais', 'linhas', 'batidas_ate', 'entradas_ate')
+
+    def __init__(self):
+        self.ordinais: List[int] = []
+        self.linhas: Dict[int, List[int]] = {}
+        # Acumulados até o i-ésimo dia de ``ordinais``, inclusive
+        self.batidas_ate: List[int] = []
+        self.entradas_ate: List[int] = []
+
+    def contar(self, ordinal: int, entrada: bool):
+        """Soma uma batida do dia ``ordinal`` (já presente em ``ordinais``)"""
+        posicao = bisect_left(self.ordinais, ordinal)
+        if posicao == len(self.batidas_ate):
+            # Dia novo no fim: o caso comum
+            self.batidas_ate.append(self.batidas_ate[-1] if posicao else 0)
+            self.entradas_ate.append(self.entradas_ate[-1] if posicao else 0)
+        elif len(self.batidas_ate) < len(self.ordinais):
+            # Dia novo no meio (carga fora de ordem): abre a posição
+            self.batidas_ate.insert(posicao, self.batidas_ate[posicao - 1] if posicao else 0)
+            self.entradas_ate.insert(posicao, self.entradas_ate[posicao - 1] if posicao else 0)
+        for i in range(posicao, len(self.batidas_ate)):
+            self.batidas_ate[i] += 1
+            self.entradas_ate[i] += entrada
+
+
+class IndiceBatidas:
+    """Índice das linhas do log por usuário e por dia, atualizado a cada registro"""
+
+    def __init__(self, log: LogBatidas):
+        self.log = log
+        self._usuarios: Dict[str, _DiasUsuario] = {}
+        self._lock = threading.Lock()
+        self._carregar()
+
+    def _carregar(self):
+        """Indexa o log inteiro de uma vez, com o mesmo resultado de ``adicionar_lote``.
+
+        A ordenação estável por (usuário, instante) deixa empates na ordem do
+        log, como o ``insort`` de ``_adicionar``; os dias e os acumulados
+        saem das fronteiras entre grupos, sem passar linha a linha.
+        """
+        colunas = self.log.colunas()
+        n = len(colunas.segundos)
+        if not n:
+            return
+        ordem = np.lexsort((colunas.segundos, colunas.usuarios))
+        usuarios = colunas.usuarios[ordem]
+        ordinais = ORDINAL_EPOCA + colunas.segundos[ordem] // SEGUNDOS_DIA
+        if 'entrada' in colunas.nomes_tipo:
+            entradas = (colunas.tipos[ordem] == colunas.nomes_tipo.index('entrada')).astype(np.int64)
+        else:
+            entradas = np.zeros(n, dtype=np.int64)
+
+        # Um grupo por (usuário, dia), e os grupos de cada usuário
+        inicios = np.flatnonzero(np.r_[True, (usuarios[1:] != usuarios[:-1]) | (ordinais[1:] != ordinais[:-1])])
+        fins = np.r_[inicios[1:], n]
+        usuario_dia = usuarios[inicios]
+        batidas_dia = fins - inicios
+        entradas_dia = np.add.reduceat(entradas, inicios)
+        primeiro_dia = np.flatnonzero(np.r_[True, usuario_dia[1:] != usuario_dia[:-1]])
+        ultimo_dia = np.r_[primeiro_dia[1:], len(inicios)]
+
+        linhas = ordem.tolist()
+        ordinais_dia = ordinais[inicios].tolist()
+        inicios_l, fins_l = inicios.tolist(), fins.tolist()
+        with self._lock:
+            for de, ate in zip(primeiro_dia.tolist(), ultimo_dia.tolist()):
+                dias = _DiasUsuario()
+                dias.ordinais = ordinais_dia[de:ate]
+                dias.linhas = {ordinal: linhas[inicio:fim] for ordinal, inicio, fim
+                               in zip(dias.ordinais, inicios_l[de:ate], fins_l[de:ate])}
+                dias.batidas_ate = np.cumsum(batidas_dia[de:ate]).tolist()
+                dias.entradas_ate = np.cumsum(entradas_dia[de:ate]).tolist()
+                self._usuarios[colunas.nomes_usuario[int(usuario_dia[de])]] = dias
+
+    def adicionar(self, linha: int):
+        batida = self.log.linha(linha)
+        with self._lock:
+            self._adicionar(linha, batida['usuario'], self.log.segundos(linha), batida['tipo'] == 'entrada')
+
+    def adicionar_lote(self, linhas: range):
+        """Indexa linhas consecutivas do log (carga inicial e importação)"""
+        usuarios, tipos, segundos = self.log.trecho(linhas.start, linhas.stop)
+        with self._lock:
+            for linha, usuario, segundos_linha, tipo in zip(linhas, usuarios, segundos, tipos):
+                self._adicionar(linha, usuario, segundos_linha, tipo == 'entrada')
+
+    def _adicionar(self, linha: int, usuario: str, segundos: int, entrada: bool):
+        ordinal = ORDINAL_EPOCA + segundos // SEGUNDOS_DIA
+        dias = self._usuarios.get(usuario)
+        if dias is None:
+            dias = self._usuarios[usuario] = _DiasUsuario()
+
+        do_dia = dias.linhas.get(ordinal)
+        if do_dia is None:
+            do_dia = dias.linhas[ordinal] = []
+            # O caso comum (dia novo no fim) é um append
+            if not dias.ordinais or dias.ordinais[-1] < ordinal:
+                dias.ordinais.append(ordinal)
+            else:
+                insort(dias.ordinais, ordinal)
+
+        if not do_dia or self.log.segundos(do_dia[-1]) <= segundos:
+            do_dia.append(linha)
+        else:
+            insort(do_dia, linha, key=self.log.segundos)
+        dias.contar(ordinal, entrada)
+
+    def _posicoes(self, dias: _DiasUsuario, data_inicio: Optional[str],
+                  data_fim: Optional[str]) -> Tuple[int, int]:
+        """Posições [inicio, fim) em ``dias.ordinais`` dos dias do período"""
+        ordinais = dias.ordinais
+        inicio = bisect_left(ordinais, ordinal_dia(data_inicio)) if data_inicio else 0
+        fim = bisect_right(ordinais, ordinal_dia(data_fim)) if data_fim else len(ordinais)
+        return inicio, max(inicio, fim)
+
+    def _intervalo(self, dias: _DiasUsuario, data_inicio: Optional[str],
+                   data_fim: Optional[str]) -> List[int]:
+        inicio, fim = self._posicoes(dias, data_inicio, data_fim)
+        return dias.ordinais[inicio:fim]
+
+    def usuarios(self) -> List[str]:
+        """Usuários com batidas, em ordem alfabética"""
+        with self._lock:
+            return sorted(self._usuarios)
+
+    def linhas_dia(self, usuario: str, data: str) -> List[int]:
+        dias = self._usuarios.get(usuario)
+        if dias is None:
+            return []
+        with self._lock:
+            return list(dias.linhas.get(ordinal_dia(data), ()))
+
+    def linhas_periodo(self, usuario: str, data_inicio: Optional[str] = None,
+                       data_fim: Optional[str] = None) -> List[int]:
+        """Linhas do usuário entre as datas (inclusivas), em ordem cronológica"""
+        dias = self._usuarios.get(usuario)
+        if dias is None:
+            return []
+        with self._lock:
+            resultado: List[int] = []
+            for ordinal in self._intervalo(dias, data_inicio, data_fim):
+                resultado.extend(dias.linhas[ordinal])
+        return resultado
+
+    def resumo_periodo(self, usuario: str, data_inicio: Optional[str] = None,
+                       data_fim: Optional[str] = None) -> Tuple[int, int, int]:
+        """(batidas, dias com batida, entradas) do período em O(log n)"""
+        dias = self._usuarios.get(usuario)
+        if dias is None:
+            return 0, 0, 0
+        with self._lock:
+            inicio, fim = self._posicoes(dias, data_inicio, data_fim)
+            if inicio == fim:
+                return 0, 0, 0
+            antes = (dias.batidas_ate[inicio - 1], dias.entradas_ate[inicio - 1]) if inicio else (0, 0)
+            return (dias.batidas_ate[fim - 1] - antes[0], fim - inicio,
+                    dias.entradas_ate[fim - 1] - antes[1])
+
+    def linhas_pagina(self, usuario: str, data_inicio: Optional[str], data_fim: Optional[str],
+                      deslocamento: int, limite: int) -> List[int]:
+        """Linhas de ``deslocamento`` a ``deslocamento + limite`` do período.
+
+        O primeiro dia da página sai de uma busca binária nos acumulados;
+        depois só são lidos os dias necessários para completar a página.
+        """
+        dias = self._usuarios.get(usuario)
+        if dias is None or limite <= 0:
+            return []
+        with self._lock:
+            inicio, fim = self._posicoes(dias, data_inicio, data_fim)
+            if inicio == fim:
+                return []
+            # Posição absoluta (desde o primeiro dia do usuário) da 1ª linha
+            alvo = (dias.batidas_ate[inicio - 1] if inicio else 0) + deslocamento
+            posicao = bisect_right(dias.batidas_ate, alvo, inicio, fim)
+            resultado: List[int] = []
+            while posicao < fim and len(resultado) < limite:
+                do_dia = dias.linhas[dias.ordinais[posicao]]
+                antes = dias.batidas_ate[posicao - 1] if posicao else 0
+                resultado.extend(do_dia[max(0, alvo - antes):])
+                posicao += 1
+        return resultado[:limite]
+
+    def dia(self, usuario: str, data: str) -> List[BatidaView]:
+        return [self.log.linha(i) for i in self.linhas_dia(usuario, data)]
+
+    def periodo(self, usuario: str, data_inicio: Optional[str] = None,
+                data_fim: Optional[str] = None) -> List[BatidaView]:
+        return [self.log.linha(i) for i in self.linhas_periodo(usuario, data_inicio, data_fim)]
+
+    def datas(self, usuario: str, data_inicio: Optional[str] = None,
+              data_fim: Optional[str] = None) -> List[str]:
+        """Datas (``YYYY-MM-DD``) com batidas do usuário no período"""
+        dias = self._usuarios.get(usuario)
+        if dias is None:
+            return []
+        with self._lock:
+            ordinais = self._intervalo(dias, data_inicio, data_fim)
+        return [date.fromordinal(o).isoformat() for o in ordinais]
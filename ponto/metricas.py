@@ -0,0 +1,203 @@
+"""Instrumentação leve dos caminhos quentes.
+
+``instrumentar`` (decorador) e ``medir`` (gerenciador de contexto) contam
+chamadas, erros e latência de cada operação num histograma de baldes fixos,
+de onde saem p50/p95/p99 e o texto no formato de exposição do Prometheus.
+``contar_linhas`` soma as linhas lidas a todas as medições abertas na
+thread, então uma tela acumula as linhas das consultas que fez. Desligada
+(``PONTO_METRICAS=0`` ou ``METRICAS.ativo = False``), cada chamada custa
+apenas a verificação de um atributo.
+"""
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Limites superiores dos baldes (s): de 10 µs a ~84 s, fator 2
+LIMITES = tuple(1e-5 * 2 ** i for i in range(24))
+
+_abertas: ContextVar[Tuple['_Medicao', ...]] = ContextVar('ponto_medicoes', default=())
+
+
+class _Serie:
+    __slots__ = ('chamadas', 'erros', 'soma', 'linhas', 'baldes')
+
+    def __init__(self):
+        self.chamadas = 0
+        self.erros = 0
+        self.soma = 0.0
+        self.linhas = 0
+        self.baldes = [0] * (len(LIMITES) + 1)
+
+    def percentil(self, fracao: float) -> float:
+        """Estimativa (s) por interpolação linear dentro do balde"""
+        if not self.chamadas:
+            return 0.0
+        alvo = fracao * self.chamadas
+        acumulado = 0
+        for i, quantidade in enumerate(self.baldes):
+            if quantidade and acumulado + quantidade >= alvo:
+                inferior = LIMITES[i - 1] if i > 0 else 0.0
+                superior = LIMITES[i] if i < len(LIMITES) else LIMITES[-1]
+                return inferior + (superior - inferior) * (alvo - acumulado) / quantidade
+            acumulado += quantidade
+        return LIMITES[-1]
+
+
+class _Medicao:
+    __slots__ = ('linhas',)
+
+    def __init__(self):
+        self.linhas = 0
+
+
+class Metricas:
+    """Séries por operação, seguras para as threads das sessões"""
+
+    def __init__(self, ativo: bool = True):
+        self.ativo = ativo
+        self._series: Dict[str, _Serie] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, operacao: str, segundos: float, linhas: int = 0, erro: bool = False):
+        balde = bisect_left(LIMITES, segundos)
+        with self._lock:
+            serie = self._series.get(operacao)
+            if serie is None:
+                serie = self._series[operacao] = _Serie()
+            serie.chamadas += 1
+            serie.erros += erro
+            serie.soma += segundos
+            serie.linhas += linhas
+            serie.baldes[balde] += 1
+
+    def zerar(self):
+        with self._lock:
+            self._series = {}
+
+    def _copia(self) -> Dict[str, _Serie]:
+        with self._lock:
+            copia = {}
+            for operacao, serie in self._series.items():
+                nova = copia[operacao] = _Serie()
+                nova.chamadas, nova.erros, nova.soma, nova.linhas = (
+                    serie.chamadas, serie.erros, serie.soma, serie.linhas)
+                nova.baldes = list(serie.baldes)
+            return copia
+
+    def resumo(self) -> List[Dict]:
+        """Uma linha por operação, da maior latência total para a menor"""
+        linhas = []
+        for operacao, serie in self._copia().items():
+            linhas.append({
+                'operacao': operacao,
+                'chamadas': serie.chamadas,
+                'erros': serie.erros,
+                'media_ms': serie.soma / serie.chamadas * 1e3,
+                'p50_ms': serie.percentil(0.50) * 1e3,
+                'p95_ms': serie.percentil(0.95) * 1e3,
+                'p99_ms': serie.percentil(0.99) * 1e3,
+                'total_s': serie.soma,
+                'linhas_lidas': serie.linhas,
+                'linhas_por_chamada': serie.linhas / serie.chamadas,
+            })
+        return sorted(linhas, key=lambda linha: linha['total_s'], reverse=True)
+
+    def prometheus(self, prefixo: str = 'ponto') -> str:
+        """Séries no formato de texto de exposição do Prometheus"""
+        series = sorted(self._copia().items())
+        saida = [
+            f"# HELP {prefixo}_chamadas_total Chamadas por operação.",
+            f"# TYPE {prefixo}_chamadas_total counter",
+        ]
+        for operacao, serie in series:
+            saida.append(f'{prefixo}_chamadas_total{{operacao="{operacao}"}} {serie.chamadas}')
+        saida += [
+            f"# HELP {prefixo}_erros_total Chamadas que terminaram em exceção.",
+            f"# TYPE {prefixo}_erros_total counter",
+        ]
+        for operacao, serie in series:
+            saida.append(f'{prefixo}_erros_total{{operacao="{operacao}"}} {serie.erros}')
+        saida += [
+            f"# HELP {prefixo}_linhas_lidas_total Batidas lidas por operação.",
+            f"# TYPE {prefixo}_linhas_lidas_total counter",
+        ]
+        for operacao, serie in series:
+            saida.append(f'{prefixo}_linhas_lidas_total{{operacao="{operacao}"}} {serie.linhas}')
+        saida += [
+            f"# HELP {prefixo}_latencia_segundos Latência por operação.",
+            f"# TYPE {prefixo}_latencia_segundos histogram",
+        ]
+        for operacao, serie in series:
+            acumulado = 0
+            for limite, quantidade in zip(LIMITES, serie.baldes):
+                acumulado += quantidade
+                saida.append(f'{prefixo}_latencia_segundos_bucket{{operacao="{operacao}",le="{limite:.6g}"}} '
+                             f'{acumulado}')
+            saida.append(f'{prefixo}_latencia_segundos_bucket{{operacao="{operacao}",le="+Inf"}} '
+                         f'{serie.chamadas}')
+            saida.append(f'{prefixo}_latencia_segundos_sum{{operacao="{operacao}"}} {serie.soma:.9f}')
+            saida.append(f'{prefixo}_latencia_segundos_count{{operacao="{operacao}"}} {serie.chamadas}')
+        return '\n'.join(saida) + '\n'
+
+
+METRICAS = Metricas(ativo=os.environ.get('PONTO_METRICAS', '1') != '0')
+
+
+@contextmanager
+def medir(operacao: str, metricas: Optional[Metricas] = None) -> Iterator[None]:
+    """Mede o bloco como uma chamada de ``operacao``"""
+    metricas = metricas or METRICAS
+    if not metricas.ativo:
+        yield
+        return
+    medicao = _Medicao()
+    token = _abertas.set(_abertas.get() + (medicao,))
+    inicio = time.perf_counter()
+    erro = False
+    try:
+        yield
+    except Exception:
+        # Exceções de controle (ex.: st.rerun) não são Exception nem erro
+        erro = True
+        raise
+    finally:
+        _abertas.reset(token)
+        metricas.registrar(operacao, time.perf_counter() - inicio, medicao.linhas, erro)
+
+
+def instrumentar(operacao: Optional[str] = None, metricas: Optional[Metricas] = None) -> Callable:
+    """Decorador: cada chamada vira uma medição (nome padrão: ``__qualname__``)"""
+    def decorar(funcao: Callable) -> Callable:
+        nome = operacao or funcao.__qualname__
+
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            destino = metricas or METRICAS
+            if not destino.ativo:
+                return funcao(*args, **kwargs)
+            # Mesmo que medir(), sem o custo do gerador do contextmanager
+            medicao = _Medicao()
+            token = _abertas.set(_abertas.get() + (medicao,))
+            inicio = time.perf_counter()
+            erro = False
+            try:
+                return funcao(*args, **kwargs)
+            except Exception:
+                erro = True
+                raise
+            finally:
+                _abertas.reset(token)
+                destino.registrar(nome, time.perf_counter() - inicio, medicao.linhas, erro)
+        return envolvida
+    return decorar
+
+
+def contar_linhas(quantidade: int):
+    """Soma ``quantidade`` linhas lidas a todas as medições abertas"""
+    for medicao in _abertas.get():
+        medicao.linhas += quantidade
@@ -0,0 +1,272 @@
+"""Ocupação do escritório: pessoas presentes por dia, hora e contrato.
+
+Cada (usuário, dia) vira até dois intervalos de presença pela regra da
+folha (última batida de cada tipo): da entrada à saída, menos o almoço
+quando ele cai inteiro dentro da jornada. Os segundos de presença em cada
+hora são somados num array NumPy de tamanho fixo ``[dia, contrato, hora]``
+(a linha 0 é a organização inteira): um período qualquer é a soma das
+fatias dos seus dias, e segundos / 3600 é a ocupação média da hora. Uma
+pessoa conta inteira em cada contrato do rateio vigente no dia
+(``ponto.rateio``).
+
+A carga usa as colunas do log e das partições arquivadas. Depois dela, cada
+batida recalcula só o seu dia e soma a diferença, como no
+``ConsolidadoHoras``; os horários de cada (usuário, dia) ficam em arrays
+ordenados da carga mais um dicionário dos dias alterados desde então.
+"""
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ponto.anomalias import BatidasDia, data_dia, dia_data
+from ponto.colunar import ColunasBatidas
+from ponto.folha import TIPOS_JORNADA
+from ponto.rateio import RateioContratos
+
+SEGUNDOS_HORA = 3600
+SEGUNDOS_DIA = 86400
+HORAS = np.arange(24, dtype=np.int64) * SEGUNDOS_HORA
+# Espaço de dias por usuário na chave composta, como em ponto.relatorio_org
+DIAS_CHAVE = 1 << 22
+# 1970-01-01 foi uma quinta-feira (0 = segunda)
+DIA_SEMANA_EPOCA = 3
+# Folga ao crescer o array de dias
+FOLGA_DIAS = 366
+SEM_JORNADA = (-1, -1, -1, -1)
+
+Horarios = Tuple[int, int, int, int]
+
+
+def _sobreposicao(inicio: np.ndarray, fim: np.ndarray) -> np.ndarray:
+    """Segundos de [inicio, fim) dentro de cada hora do dia"""
+    return np.clip(np.minimum(fim[:, None], HORAS + SEGUNDOS_HORA) - np.maximum(inicio[:, None], HORAS), 0, None)
+
+
+def presenca_horas(entrada: np.ndarray, saida: np.ndarray, almoco_saida: np.ndarray,
+                   almoco_retorno: np.ndarray) -> np.ndarray:
+    """Segundos de presença em cada hora, uma linha (24 colunas) por jornada.
+
+    Recebe os horários (segundos desde a meia-noite, -1 se ausente) da
+    última batida de cada tipo, como ``jornadas_dias``. Sem entrada ou saída,
+    ou com a saída antes da entrada, não há presença.
+    """
+    valida = (entrada >= 0) & (saida > entrada)
+    almoco = (valida & (almoco_saida >= entrada) & (almoco_retorno >= almoco_saida)
+              & (saida >= almoco_retorno))
+    inicio = np.where(valida, entrada, 0)
+    fim = np.where(valida, saida, 0)
+    # Sem almoço, o segundo intervalo é vazio: [saída, saída)
+    fim_manha = np.where(almoco, almoco_saida, fim)
+    inicio_tarde = np.where(almoco, almoco_retorno, fim)
+    return _sobreposicao(inicio, fim_manha) + _sobreposicao(inicio_tarde, fim)
+
+
+def _presenca(horarios: Horarios) -> np.ndarray:
+    """``presenca_horas`` de um só dia, sem montar arrays para cada horário"""
+    entrada, saida, almoco_saida, almoco_retorno = horarios
+    presenca = np.zeros(24, dtype=np.int64)
+    if entrada < 0 or saida <= entrada:
+        return presenca
+    if entrada <= almoco_saida <= almoco_retorno <= saida:
+        intervalos = ((entrada, almoco_saida), (almoco_retorno, saida))
+    else:
+        intervalos = ((entrada, saida),)
+    for inicio, fim in intervalos:
+        for hora in range(inicio // SEGUNDOS_HORA, (fim - 1) // SEGUNDOS_HORA + 1):
+            presenca[hora] += min(fim, (hora + 1) * SEGUNDOS_HORA) - max(inicio, hora * SEGUNDOS_HORA)
+    return presenca
+
+
+class OcupacaoPonto:
+    """Segundos de presença por dia, contrato e hora, mantidos a cada batida.
+
+    ``rateio`` dá os contratos vigentes de cada usuário em cada dia; só os
+    nomes dos contratos importam aqui.
+    """
+
+    def __init__(self, rateio: RateioContratos):
+        self._rateio = rateio
+        # Linha de cada contrato no array (0 = organização)
+        self._linhas: Dict[str, int] = {}
+        self._segundos = np.zeros((0, 1, 24), dtype=np.int64)
+        self._primeiro_dia = 0
+        # Horários por (usuário, dia): arrays da carga + dias alterados depois
+        self._codigos: Dict[str, int] = {}
+        self._chaves = np.empty(0, dtype=np.int64)
+        self._horarios = np.empty((0, 4), dtype=np.int32)
+        self._alterados: Dict[Tuple[str, int], Horarios] = {}
+        self._lock = threading.Lock()
+
+    # -------------------- array de contagens --------------------
+
+    def _linhas_usuario(self, contratos: Iterable[str]) -> List[int]:
+        """Linhas do array somadas por um usuário com esses contratos (cria as que faltam)"""
+        linhas = [0]
+        for contrato in contratos:
+            linha = self._linhas.get(contrato)
+            if linha is None:
+                linha = self._linhas[contrato] = len(self._linhas) + 1
+                self._segundos = np.concatenate(
+                    [self._segundos, np.zeros((len(self._segundos), 1, 24), dtype=np.int64)], axis=1)
+            linhas.append(linha)
+        return linhas
+
+    def _garantir(self, primeiro: int, ultimo: int):
+        """Cresce o array (com folga) até cobrir os dias [primeiro, ultimo]"""
+        atual_inicio, atual_fim = self._primeiro_dia, self._primeiro_dia + len(self._segundos)
+        if len(self._segundos) == 0:
+            atual_inicio, atual_fim = primeiro, primeiro
+        if atual_inicio <= primeiro and ultimo < atual_fim:
+            return
+        inicio = min(primeiro, atual_inicio)
+        inicio = inicio - FOLGA_DIAS if inicio < atual_inicio and len(self._segundos) else inicio
+        fim = max(ultimo + 1 + FOLGA_DIAS, atual_fim)
+        novo = np.zeros((fim - inicio, self._segundos.shape[1], 24), dtype=np.int64)
+        novo[atual_inicio - inicio:atual_inicio - inicio + len(self._segundos)] = self._segundos
+        self._segundos, self._primeiro_dia = novo, inicio
+
+    def _vigentes(self, usuario: str, dias: np.ndarray) -> Iterator[Tuple[Dict[str, float], np.ndarray]]:
+        """(rateio, máscara dos ``dias`` em que ele vale) de cada vigência do usuário"""
+        vigencias = self._rateio.vigencias(usuario)
+        posicao = np.searchsorted(np.array([inicio for inicio, _ in vigencias], dtype=np.int64),
+                                  dias, side='right') - 1
+        for p in np.unique(posicao).tolist():
+            yield (vigencias[p][1] if p >= 0 else {}), posicao == p
+
+    def _somar(self, usuario: str, dias: np.ndarray, presenca: np.ndarray, sinal: int = 1,
+               contratos: Optional[Iterable[str]] = None):
+        """Soma a presença de ``dias`` do usuário na organização e nos contratos
+        vigentes em cada dia (ou em ``contratos``, para todos)"""
+        if contratos is not None:
+            partes = [(contratos, slice(None))]
+        else:
+            partes = self._vigentes(usuario, dias)
+        for contratos_dia, selecao in partes:
+            for linha in self._linhas_usuario(contratos_dia):
+                np.add.at(self._segundos[:, linha], dias[selecao] - self._primeiro_dia, sinal * presenca[selecao])
+
+    # -------------------- horários por (usuário, dia) --------------------
+
+    def _chave(self, usuario: str, dia: int) -> Optional[int]:
+        codigo = self._codigos.get(usuario)
+        return None if codigo is None else codigo * DIAS_CHAVE + dia
+
+    def _horarios_dia(self, usuario: str, dia: int) -> Horarios:
+        alterado = self._alterados.get((usuario, dia))
+        if alterado is not None:
+            return alterado
+        chave = self._chave(usuario, dia)
+        if chave is not None:
+            posicao = int(np.searchsorted(self._chaves, chave))
+            if posicao < len(self._chaves) and self._chaves[posicao] == chave:
+                return tuple(self._horarios[posicao].tolist())
+        return SEM_JORNADA
+
+    def _dias_usuario(self, usuario: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(dias, horários) atuais de todos os dias do usuário"""
+        codigo = self._codigos.get(usuario)
+        if codigo is None:
+            dias, horarios = np.empty(0, dtype=np.int64), np.empty((0, 4), dtype=np.int64)
+        else:
+            de, ate = np.searchsorted(self._chaves, [codigo * DIAS_CHAVE, (codigo + 1) * DIAS_CHAVE]).tolist()
+            dias = self._chaves[de:ate] % DIAS_CHAVE
+            horarios = self._horarios[de:ate].astype(np.int64)
+        alterados = {dia: h for (dono, dia), h in self._alterados.items() if dono == usuario}
+        if alterados:
+            manter = ~np.isin(dias, list(alterados))
+            dias = np.concatenate([dias[manter], np.array(list(alterados), dtype=np.int64)])
+            horarios = np.concatenate([horarios[manter], np.array(list(alterados.values()), dtype=np.int64)])
+        return dias, horarios
+
+    # -------------------- carga e atualizações --------------------
+
+    def carregar(self, partes: Iterable[ColunasBatidas]):
+        """Carga inicial a partir das colunas do log e das partições arquivadas"""
+        from ponto.relatorio_org import jornadas_dias
+
+        chaves_partes, horarios_partes = [], []
+        with self._lock:
+            for colunas in partes:
+                if not len(colunas.segundos):
+                    continue
+                codigos_jornada = {t: colunas.nomes_tipo.index(t) for t in TIPOS_JORNADA if t in colunas.nomes_tipo}
+                ordem = np.lexsort((colunas.segundos, colunas.usuarios))
+                chaves, _, horarios, _ = jornadas_dias(colunas.usuarios[ordem], colunas.tipos[ordem],
+                                                       colunas.segundos[ordem], codigos_jornada)
+                horarios = np.stack([horarios[tipo] for tipo in TIPOS_JORNADA], axis=1)
+                dias = chaves % DIAS_CHAVE
+                presenca = presenca_horas(*horarios.T)
+                self._garantir(int(dias.min()), int(dias.max()))
+
+                # Chaves da parte (códigos do log) -> códigos próprios, estáveis entre partes
+                usuarios = chaves // DIAS_CHAVE
+                inicio_usuario = np.flatnonzero(np.r_[True, usuarios[1:] != usuarios[:-1]])
+                fim_usuario = np.r_[inicio_usuario[1:], len(usuarios)]
+                proprios = np.empty(len(usuarios), dtype=np.int64)
+                for de, ate in zip(inicio_usuario.tolist(), fim_usuario.tolist()):
+                    nome = colunas.nomes_usuario[int(usuarios[de])]
+                    codigo = self._codigos.setdefault(nome, len(self._codigos))
+                    proprios[de:ate] = codigo
+                    self._somar(nome, dias[de:ate], presenca[de:ate])
+                chaves_partes.append(proprios * DIAS_CHAVE + dias)
+                horarios_partes.append(horarios.astype(np.int32))
+
+            if chaves_partes:
+                chaves = np.concatenate(chaves_partes)
+                ordem = np.argsort(chaves, kind='stable')
+                self._chaves, self._horarios = chaves[ordem], np.concatenate(horarios_partes)[ordem]
+
+    def atualizar_dia(self, usuario: str, dia: int, batidas_dia: BatidasDia):
+        """Recalcula o dia com as batidas atuais e soma a diferença"""
+        ultimas: Dict[str, int] = {}
+        for tipo, segundos in batidas_dia(usuario, dia):
+            ultimas[tipo] = segundos % SEGUNDOS_DIA
+        horarios = tuple(ultimas.get(tipo, -1) for tipo in TIPOS_JORNADA)
+        with self._lock:
+            antigos = self._horarios_dia(usuario, dia)
+            if antigos == horarios:
+                return
+            self._codigos.setdefault(usuario, len(self._codigos))
+            self._alterados[(usuario, dia)] = horarios
+            self._garantir(dia, dia)
+            linhas = self._linhas_usuario(self._rateio.vigente(usuario, data_dia(dia)))
+            self._segundos[dia - self._primeiro_dia, linhas] += _presenca(horarios) - _presenca(antigos)
+
+    def reatribuir_contratos(self, usuario: str, antigos: Dict[str, float], novos: Dict[str, float],
+                             inicio: int = 0, fim: Optional[int] = None):
+        """Move a presença do usuário dos contratos antigos para os novos nos
+        dias de ``[inicio, fim)`` (sem ``fim``, até o último dia)"""
+        if set(antigos) == set(novos):
+            return
+        with self._lock:
+            dias, horarios = self._dias_usuario(usuario)
+            no_intervalo = (dias >= inicio) & (dias < (DIAS_CHAVE if fim is None else fim))
+            dias, horarios = dias[no_intervalo], horarios[no_intervalo]
+            if len(dias):
+                presenca = presenca_horas(*horarios.T)
+                self._somar(usuario, dias, presenca, -1, antigos)
+                self._somar(usuario, dias, presenca, 1, novos)
+
+    # -------------------- consultas --------------------
+
+    def contratos(self) -> List[str]:
+        return sorted(self._linhas)
+
+    def semana(self, data_inicio: str, data_fim: str, contrato: Optional[str] = None) -> np.ndarray:
+        """Ocupação média (pessoas) por dia da semana (0 = segunda) e hora no período.
+
+        A média é sobre todos os dias de cada dia da semana no período,
+        inclusive os sem ninguém.
+        """
+        inicio, fim = dia_data(data_inicio), dia_data(data_fim)
+        dias_semana = (np.arange(inicio, fim + 1) + DIA_SEMANA_EPOCA) % 7
+        ocupacao = np.zeros((7, 24))
+        linha = 0 if contrato is None else self._linhas.get(contrato)
+        with self._lock:
+            de = max(inicio, self._primeiro_dia)
+            ate = min(fim + 1, self._primeiro_dia + len(self._segundos))
+            if linha is not None and de < ate:
+                fatia = self._segundos[de - self._primeiro_dia:ate - self._primeiro_dia, linha]
+                np.add.at(ocupacao, dias_semana[de - inicio:ate - inicio], fatia)
+        return ocupacao / SEGUNDOS_HORA / np.maximum(np.bincount(dias_semana, minlength=7), 1)[:, None]
@@ -0,0 +1,158 @@
+"""Rateio de contratos com vigência: uma tabela de intervalos por usuário.
+
+Cada usuário tem uma lista de vigências ``(dia, {'Contrato A': 70, ...})``
+em ordem; um rateio vale do seu dia até a vigência seguinte. Mudar o
+rateio no meio do mês não altera os dias anteriores, então relatórios de
+meses passados continuam iguais.
+
+Para somar horas por contrato, ``tabela`` compacta as vigências em arrays
+(chaves ``usuario * DIAS_CHAVE + dia`` ordenadas e as partes de cada
+rateio em formato CSR) e ``ratear`` liga cada dia trabalhado ao rateio
+vigente nele com um ``searchsorted``: qualquer período e qualquer número de
+usuários numa passada só, sem laço por dia.
+"""
+import threading
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from ponto.indice import ORDINAL_EPOCA, ordinal_dia
+
+# Espaço de dias por usuário na chave composta (cobre datas até o ano 9999)
+DIAS_CHAVE = 1 << 22
+# Vigência do rateio cadastrado antes de existirem datas: vale desde sempre
+DESDE_SEMPRE = 0
+
+
+def dia_epoca(data: str) -> int:
+    """Dias desde 1970-01-01 de uma data ``YYYY-MM-DD``"""
+    return ordinal_dia(data) - ORDINAL_EPOCA
+
+
+class TabelaRateio(NamedTuple):
+    """Vigências compactadas para ``ratear`` (serializável para outros processos)"""
+    chaves: np.ndarray        # usuario * DIAS_CHAVE + dia de início, em ordem
+    inicio_partes: np.ndarray  # partes da vigência i: inicio_partes[i]:inicio_partes[i + 1]
+    contratos: np.ndarray
+    porcentagens: np.ndarray
+    nomes_contrato: List[str]
+
+
+def ratear(tabela: TabelaRateio, usuarios: np.ndarray, dias: np.ndarray, segundos: np.ndarray,
+           grupos: Optional[np.ndarray] = None, quantidade_grupos: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """Segundos × porcentagem por (grupo, contrato), cada dia pelo rateio vigente nele.
+
+    ``usuarios`` são códigos da ``tabela``; ``grupos`` (mês, usuário...) vai
+    de 0 a ``quantidade_grupos - 1``. Devolve a soma e quantos dias caíram
+    em cada célula, ambos ``(quantidade_grupos, len(nomes_contrato))``.
+    Dias antes da primeira vigência do usuário não entram em contrato algum.
+    """
+    forma = (quantidade_grupos, len(tabela.nomes_contrato))
+    if not len(tabela.chaves) or not len(dias):
+        return np.zeros(forma), np.zeros(forma, dtype=np.int64)
+    usuarios = usuarios.astype(np.int64)
+    vigencia = np.searchsorted(tabela.chaves, usuarios * DIAS_CHAVE + dias, side='right') - 1
+    valido = (vigencia >= 0) & (tabela.chaves[np.maximum(vigencia, 0)] // DIAS_CHAVE == usuarios)
+    vigencia, segundos = vigencia[valido], segundos[valido]
+    grupos = np.zeros(len(vigencia), dtype=np.int64) if grupos is None else grupos[valido].astype(np.int64)
+
+    # Uma linha por (dia, parte do rateio vigente)
+    inicio = tabela.inicio_partes[vigencia]
+    quantas = tabela.inicio_partes[vigencia + 1] - inicio
+    dia = np.repeat(np.arange(len(vigencia)), quantas)
+    parte = inicio[dia] + np.arange(len(dia)) - np.repeat(np.cumsum(quantas) - quantas, quantas)
+
+    celula = grupos[dia] * forma[1] + tabela.contratos[parte]
+    total = np.bincount(celula, weights=segundos[dia] * tabela.porcentagens[parte], minlength=forma[0] * forma[1])
+    contagem = np.bincount(celula, minlength=forma[0] * forma[1])
+    return total.reshape(forma), contagem.reshape(forma)
+
+
+class RateioContratos:
+    """Vigências de rateio por usuário, seguras para acesso concorrente.
+
+    Como a tabela de usuários da ``CamadaDados``: o dicionário é substituído
+    por cópia a cada alteração, então leituras não pegam lock.
+    """
+
+    def __init__(self):
+        self._vigencias: Dict[str, List[Tuple[int, Dict[str, float]]]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def de_usuarios(cls, usuarios: Mapping[str, Dict]) -> 'RateioContratos':
+        """Rateio atual (``contratos``) de cada usuário, valendo desde sempre"""
+        return cls.de_vigencias({usuario: [(DESDE_SEMPRE, info['contratos'])]
+                                 for usuario, info in usuarios.items() if info.get('contratos')})
+
+    @classmethod
+    def de_vigencias(cls, vigencias: Mapping[str, Iterable[Tuple[int, Dict[str, float]]]]) -> 'RateioContratos':
+        """Vigências ``(dia de início, rateio)`` já conhecidas de cada usuário, de uma vez"""
+        rateio = cls()
+        rateio._vigencias = {usuario: sorted(((dia, dict(contratos)) for dia, contratos in lista),
+                                             key=lambda vigencia: vigencia[0])
+                             for usuario, lista in vigencias.items()}
+        return rateio
+
+    def definir(self, usuario: str, contratos: Dict[str, float],
+                vigencia: str) -> Tuple[Dict[str, float], int, Optional[int]]:
+        """Rateio do usuário a partir de ``vigencia`` (a primeira vale desde sempre).
+
+        Vale até a vigência seguinte já cadastrada; uma vigência no mesmo dia
+        é substituída. Devolve o rateio que valia nesses dias e o intervalo
+        ``[início, fim)`` em dias (``fim`` ``None``: sem vigência seguinte).
+        """
+        with self._lock:
+            lista = list(self._vigencias.get(usuario, []))
+            dia = dia_epoca(vigencia) if lista else DESDE_SEMPRE
+            posicao = bisect_right([inicio for inicio, _ in lista], dia)
+            antigos = lista[posicao - 1][1] if posicao else {}
+            if posicao and lista[posicao - 1][0] == dia:
+                lista[posicao - 1] = (dia, dict(contratos))
+            else:
+                lista.insert(posicao, (dia, dict(contratos)))
+                posicao += 1
+            fim = lista[posicao][0] if posicao < len(lista) else None
+            vigencias = dict(self._vigencias)
+            vigencias[usuario] = lista
+            self._vigencias = vigencias
+        return antigos, dia, fim
+
+    def vigente(self, usuario: str, data: str) -> Dict[str, float]:
+        """Rateio do usuário no dia ``YYYY-MM-DD``"""
+        lista = self._vigencias.get(usuario, [])
+        posicao = bisect_right([inicio for inicio, _ in lista], dia_epoca(data))
+        return lista[posicao - 1][1] if posicao else {}
+
+    def atual(self, usuario: str) -> Dict[str, float]:
+        """Rateio da vigência mais recente do usuário"""
+        lista = self._vigencias.get(usuario, [])
+        return lista[-1][1] if lista else {}
+
+    def vigencias(self, usuario: str) -> List[Tuple[int, Dict[str, float]]]:
+        """``(dia de início, rateio)`` do usuário, em ordem"""
+        return list(self._vigencias.get(usuario, []))
+
+    def tabela(self, usuarios: Iterable[str]) -> TabelaRateio:
+        """Vigências dos ``usuarios``, com o código de cada um igual à sua posição"""
+        vigencias = self._vigencias
+        chaves: List[int] = []
+        inicio_partes = [0]
+        contratos: List[int] = []
+        porcentagens: List[float] = []
+        nomes_contrato: List[str] = []
+        codigos_contrato: Dict[str, int] = {}
+        for codigo, usuario in enumerate(usuarios):
+            for dia, rateio in vigencias.get(usuario, []):
+                chaves.append(codigo * DIAS_CHAVE + dia)
+                for contrato, porcentagem in rateio.items():
+                    if contrato not in codigos_contrato:
+                        codigos_contrato[contrato] = len(nomes_contrato)
+                        nomes_contrato.append(contrato)
+                    contratos.append(codigos_contrato[contrato])
+                    porcentagens.append(porcentagem)
+                inicio_partes.append(len(contratos))
+        return TabelaRateio(np.array(chaves, dtype=np.int64), np.array(inicio_partes, dtype=np.int64),
+                            np.array(contratos, dtype=np.int64), np.array(porcentagens, dtype=np.float64),
+                            nomes_contrato)
@@ -0,0 +1,173 @@
+"""Relatório da organização inteira, dividido em fatias e agregado em paralelo.
+
+As batidas do período são repartidas por usuário (``codigo % fatias``), então
+cada fatia contém dias completos e as agregações parciais somam sem
+sobreposição. Cada fatia roda num processo do pool sobre as colunas
+compactas do ``LogBatidas``. A regra do dia é a mesma de
+``ponto.folha.horas_dia``: última batida de cada tipo, jornada menos almoço.
+As horas de cada dia vão para o rateio de contratos vigente nele
+(``ponto.rateio``). A etapa final apenas soma os parciais.
+"""
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ponto.colunar import EPOCA, ColunasBatidas
+from ponto.folha import TIPOS_JORNADA
+from ponto.rateio import DIAS_CHAVE, RateioContratos, TabelaRateio, ratear
+
+SEGUNDOS_DIA = 86400
+
+
+def _segundos_dia(data: date) -> int:
+    return (data - EPOCA.date()).days * SEGUNDOS_DIA
+
+
+def jornadas_dias(usuarios: np.ndarray, tipos: np.ndarray, segundos: np.ndarray,
+                  codigos_jornada: Dict[str, int]
+                  ) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray], np.ndarray]:
+    """Jornada de cada (usuário, dia) a partir de colunas ordenadas por usuário e instante.
+
+    Devolve as chaves ``usuario * DIAS_CHAVE + dia`` em ordem, a chave de
+    cada batida, o horário (segundos desde a meia-noite, ou -1) da última
+    batida de cada tipo da jornada e os segundos trabalhados no dia.
+    """
+    dias = segundos // SEGUNDOS_DIA
+    chaves, inverso = np.unique(usuarios.astype(np.int64) * DIAS_CHAVE + dias, return_inverse=True)
+    inverso = inverso.ravel()
+
+    # Horário (segundos desde a meia-noite) da última batida de cada tipo no dia
+    horarios = {}
+    for tipo in TIPOS_JORNADA:
+        coluna = np.full(len(chaves), -1, dtype=np.int64)
+        codigo = codigos_jornada.get(tipo)
+        if codigo is not None:
+            mascara = tipos == codigo
+            chave_tipo = inverso[mascara]
+            ultima = np.ones(len(chave_tipo), dtype=bool)
+            ultima[:-1] = chave_tipo[1:] != chave_tipo[:-1]
+            coluna[chave_tipo[ultima]] = segundos[mascara][ultima] % SEGUNDOS_DIA
+        horarios[tipo] = coluna
+
+    tem_jornada = (horarios['entrada'] >= 0) & (horarios['saida'] >= 0)
+    tem_almoco = tem_jornada & (horarios['almoco_saida'] >= 0) & (horarios['almoco_retorno'] >= 0)
+    trabalhado = (np.where(tem_jornada, horarios['saida'] - horarios['entrada'], 0)
+                  - np.where(tem_almoco, horarios['almoco_retorno'] - horarios['almoco_saida'], 0))
+    return chaves, inverso, horarios, trabalhado
+
+
+def _agregar_fatia(usuarios: np.ndarray, tipos: np.ndarray, segundos: np.ndarray,
+                   codigos_jornada: Dict[str, int], cargos: np.ndarray,
+                   tabela: TabelaRateio) -> Dict[str, pd.DataFrame]:
+    """Agregados parciais de uma fatia de usuários (executada no processo filho)"""
+    ordem = np.lexsort((segundos, usuarios))
+    chaves, _, _, trabalhado = jornadas_dias(usuarios[ordem], tipos[ordem], segundos[ordem], codigos_jornada)
+
+    dia_usuario = pd.DataFrame({
+        'usuario': (chaves // DIAS_CHAVE).astype(np.int32),
+        'dia': chaves % DIAS_CHAVE,
+        'segundos': trabalhado,
+    })
+    dia_usuario['mes'] = (dia_usuario['dia'].to_numpy().astype('datetime64[D]')
+                          .astype('datetime64[M]').astype(np.int64))
+
+    # Cada dia no rateio vigente nele, somado por (mês, contrato)
+    meses, mes_dia = np.unique(dia_usuario['mes'].to_numpy(), return_inverse=True)
+    segundos_pct, dias_contrato = ratear(tabela, dia_usuario['usuario'].to_numpy(), dia_usuario['dia'].to_numpy(),
+                                         trabalhado, mes_dia.ravel(), len(meses))
+    mes_contrato, contrato = np.nonzero(dias_contrato)
+    contratos = pd.DataFrame({
+        'mes': meses[mes_contrato],
+        'contrato': np.array(tabela.nomes_contrato, dtype=object)[contrato],
+        'segundos_pct': segundos_pct[mes_contrato, contrato],
+    })
+
+    mes_usuario = dia_usuario.groupby(['usuario', 'mes'], as_index=False)['segundos'].sum()
+    mes_usuario['cargo'] = cargos[mes_usuario['usuario'].to_numpy()]
+
+    return {
+        'contratos': contratos,
+        'cargos': mes_usuario.groupby(['mes', 'cargo'], as_index=False)['segundos'].sum(),
+        'presenca': dia_usuario.groupby('dia', as_index=False).size(),
+    }
+
+
+def _mes_texto(meses: pd.Series) -> pd.Series:
+    return pd.Series(meses.to_numpy().astype('datetime64[M]').astype(str), index=meses.index)
+
+
+def _juntar(parciais: List[Dict[str, pd.DataFrame]], nomes_cargo: List[str]) -> Dict[str, pd.DataFrame]:
+    """Etapa final: soma os agregados das fatias e traduz os códigos"""
+    contratos = (pd.concat([p['contratos'] for p in parciais])
+                 .groupby(['mes', 'contrato'], as_index=False)['segundos_pct'].sum())
+    contratos['horas'] = contratos.pop('segundos_pct') / 100 / 3600
+    contratos['mes'] = _mes_texto(contratos['mes'])
+
+    cargos = (pd.concat([p['cargos'] for p in parciais])
+              .groupby(['mes', 'cargo'], as_index=False)['segundos'].sum())
+    cargos['horas'] = cargos.pop('segundos') / 3600
+    cargos['mes'] = _mes_texto(cargos['mes'])
+    cargos['cargo'] = np.array(nomes_cargo, dtype=object)[cargos['cargo'].to_numpy()]
+
+    presenca = (pd.concat([p['presenca'] for p in parciais])
+                .groupby('dia', as_index=False)['size'].sum())
+    presenca = pd.DataFrame({
+        'data': presenca['dia'].to_numpy().astype('datetime64[D]').astype(str),
+        'pessoas': presenca['size'].to_numpy(),
+    })
+    return {'contratos': contratos, 'cargos': cargos, 'presenca': presenca}
+
+
+def relatorio_organizacao(colunas: ColunasBatidas, usuarios: Dict[str, Dict],
+                          data_inicio: date, data_fim: date,
+                          trabalhadores: int = 1, fatias: Optional[int] = None,
+                          executor: Optional[Executor] = None,
+                          rateio: Optional[RateioContratos] = None) -> Dict[str, pd.DataFrame]:
+    """Horas por contrato e por cargo em cada mês e pessoas presentes por dia.
+
+    ``usuarios`` é a tabela de usuários (``cargo`` e ``contratos``); sem
+    ``rateio``, os ``contratos`` atuais valem para todos os dias. Com
+    ``trabalhadores`` > 1 as fatias rodam num ``ProcessPoolExecutor`` (ou no
+    ``executor`` informado); com 1, tudo roda no processo atual.
+    """
+    fatias = fatias or trabalhadores * 4
+
+    # Tabelas pequenas, indexadas pelo código do usuário no log
+    nomes_cargo: List[str] = []
+    codigos_cargo: Dict[str, int] = {}
+    cargos = np.empty(len(colunas.nomes_usuario), dtype=np.int32)
+    for codigo, nome in enumerate(colunas.nomes_usuario):
+        cargo = usuarios.get(nome, {}).get('cargo', 'N/A')
+        if cargo not in codigos_cargo:
+            codigos_cargo[cargo] = len(nomes_cargo)
+            nomes_cargo.append(cargo)
+        cargos[codigo] = codigos_cargo[cargo]
+    tabela = (rateio or RateioContratos.de_usuarios(usuarios)).tabela(colunas.nomes_usuario)
+    codigos_jornada = {t: colunas.nomes_tipo.index(t) for t in TIPOS_JORNADA if t in colunas.nomes_tipo}
+
+    no_periodo = ((colunas.segundos >= _segundos_dia(data_inicio))
+                  & (colunas.segundos < _segundos_dia(data_fim) + SEGUNDOS_DIA))
+    usuarios_p = colunas.usuarios[no_periodo]
+    tipos_p = colunas.tipos[no_periodo]
+    segundos_p = colunas.segundos[no_periodo]
+    fatia_de = usuarios_p % fatias
+
+    argumentos = []
+    for fatia in range(fatias):
+        mascara = fatia_de == fatia
+        argumentos.append((usuarios_p[mascara], tipos_p[mascara], segundos_p[mascara],
+                           codigos_jornada, cargos, tabela))
+
+    if trabalhadores <= 1 and executor is None:
+        parciais = [_agregar_fatia(*args) for args in argumentos]
+    elif executor is not None:
+        parciais = list(executor.map(_agregar_fatia, *zip(*argumentos)))
+    else:
+        with ProcessPoolExecutor(max_workers=trabalhadores,
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            parciais = list(pool.map(_agregar_fatia, *zip(*argumentos)))
+    return _juntar(parciais, nomes_cargo)
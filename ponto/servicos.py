@@ -0,0 +1,135 @@
+"""Recursos compartilhados do app e managers usados pelas telas.
+
+Só importa o necessário para o login (sem pandas nem plotly): as telas que
+montam tabelas e gráficos ficam em ``ponto.telas`` e importam o que usam.
+"""
+import os
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import streamlit as st
+
+from ponto.dados import CamadaDados, criar_camada_dados, hash_senha
+from ponto.folha import calcular_folhas, horas_dia
+from ponto.metricas import instrumentar
+from ponto.tarefas import GerenciadorTarefas
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+@st.cache_resource
+def get_dados() -> CamadaDados:
+    """Camada de dados compartilhada por todas as sessões.
+
+    Com ``PONTO_API`` (``host:porta`` ou ``unix:/caminho``), o serviço de
+    ingestão de ``ponto.api`` sobe no mesmo processo, sobre esta camada:
+    batidas de relógios e integrações aparecem nas telas na hora.
+    """
+    dados = criar_camada_dados()
+    endereco = os.environ.get('PONTO_API')
+    if endereco:
+        from ponto.api import iniciar_em_thread
+        iniciar_em_thread(dados, endereco, os.environ.get('PONTO_API_TOKEN'))
+    return dados
+
+
+@st.cache_resource
+def get_tarefas() -> GerenciadorTarefas:
+    """Fila de exportações/relatórios compartilhada, com cache em disco"""
+    return GerenciadorTarefas(os.environ.get('PONTO_CACHE', '.cache_ponto'))
+
+
+class UsuarioManager:
+    """Gerenciamento de usuários e autenticação"""
+    
+    @staticmethod
+    @instrumentar()
+    def hash_password(password: str) -> str:
+        return hash_senha(password)
+    
+    @staticmethod
+    @instrumentar()
+    def init_usuarios():
+        """Garante a carga dos usuários compartilhados"""
+        get_dados()
+    
+    @staticmethod
+    @instrumentar()
+    def autenticar(usuario: str, senha: str) -> bool:
+        info = get_dados().get_usuario(usuario)
+        return bool(info) and info['senha'] == UsuarioManager.hash_password(senha)
+    
+    @staticmethod
+    @instrumentar()
+    def get_usuario_info(usuario: str) -> Dict:
+        return get_dados().get_usuario(usuario)
+    
+    @staticmethod
+    @instrumentar()
+    def is_admin(usuario: str) -> bool:
+        return UsuarioManager.get_usuario_info(usuario).get('cargo') == 'Admin'
+
+
+class PontoManager:
+    """Gerenciamento de batidas de ponto"""
+    
+    @staticmethod
+    @instrumentar()
+    def init_pontos():
+        get_dados()
+    
+    @staticmethod
+    @instrumentar()
+    def registrar_batida(usuario: str, tipo: str) -> Dict:
+        return get_dados().registrar_batida(usuario, tipo, datetime.now())
+    
+    @staticmethod
+    @instrumentar()
+    def listar_batidas(usuario: str,
+                       data_inicio: Optional[str] = None,
+                       data_fim: Optional[str] = None) -> List[Dict]:
+        return get_dados().batidas_usuario(usuario, data_inicio, data_fim)
+    
+    @staticmethod
+    @instrumentar()
+    def pagina_batidas(usuario: str, data_inicio: str, data_fim: str,
+                       pagina: int, tamanho: int) -> List[Dict]:
+        """Batidas de uma página (contada a partir de 1) do período"""
+        return get_dados().pagina_batidas(usuario, data_inicio, data_fim, (pagina - 1) * tamanho, tamanho)
+    
+    @staticmethod
+    @instrumentar()
+    def resumo_periodo(usuario: str, data_inicio: str, data_fim: str) -> Dict:
+        """Totais do período a partir dos contadores por dia do índice"""
+        total, dias, entradas = get_dados().resumo_periodo(usuario, data_inicio, data_fim)
+        return {'total': total, 'dias': dias, 'entradas': entradas}
+    
+    @staticmethod
+    @instrumentar()
+    def get_batidas_usuario(usuario: str, data_filtro: Optional[str] = None) -> List[Dict]:
+        return PontoManager.listar_batidas(usuario, data_filtro, data_filtro)
+    
+    @staticmethod
+    @instrumentar()
+    def calcular_horas_dia(usuario: str, data: str) -> Dict:
+        return horas_dia(PontoManager.get_batidas_usuario(usuario, data), data)
+    
+    @staticmethod
+    @instrumentar()
+    def calcular_folhas(usuario: str,
+                        data_inicio: Optional[str] = None,
+                        data_fim: Optional[str] = None) -> 'pd.DataFrame':
+        """Horas de todos os dias do período em uma passada (ver ponto.folha)"""
+        return calcular_folhas(get_dados().tabela_usuario(usuario, data_inicio, data_fim))
+
+
+class RelatorioManager:
+    """Geração de relatórios e estatísticas"""
+    
+    @staticmethod
+    @instrumentar()
+    def calcular_porcentagem_contratos(usuario: str, mes: int, ano: int) -> Dict:
+        # Mês fechado: do instantâneo; aberto: cada dia pelo rateio vigente
+        # nele (ver CamadaDados.porcentagem_contratos)
+        return get_dados().porcentagem_contratos(usuario, ano, mes)
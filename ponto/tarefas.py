@@ -0,0 +1,238 @@
+"""Tarefas em segundo plano (exportações e relatórios) com cache em disco.
+
+Exportações rodam num pool de threads e escrevem direto no arquivo final;
+agregações pesadas de CPU rodam num pool de processos e têm o resultado
+guardado em pickle. Cada artefato fica em ``pasta`` com um nome derivado de
+(tipo, usuários, período) e da versão dos dados, então é reaproveitado até
+que novas batidas mudem a versão.
+"""
+import glob
+import hashlib
+import itertools
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+PENDENTE = 'pendente'
+EXECUTANDO = 'executando'
+CONCLUIDA = 'concluida'
+CANCELADA = 'cancelada'
+ERRO = 'erro'
+
+
+class TarefaCancelada(Exception):
+    """Levantada dentro da tarefa quando o usuário pede o cancelamento"""
+
+
+class Tarefa:
+    """Estado de uma tarefa submetida ao ``GerenciadorTarefas``"""
+
+    def __init__(self, id_tarefa: int, nome: str, caminho: str):
+        self.id = id_tarefa
+        self.nome = nome
+        self.caminho = caminho
+        self.status = PENDENTE
+        self.progresso = 0.0
+        self.erro: Optional[str] = None
+        self.futuro: Optional[Future] = None
+        self._cancelar = threading.Event()
+
+    @property
+    def ativa(self) -> bool:
+        return self.status in (PENDENTE, EXECUTANDO)
+
+    def atualizar(self, progresso: float):
+        """Informa o progresso (0 a 1); interrompe a tarefa se foi cancelada"""
+        if self._cancelar.is_set():
+            raise TarefaCancelada()
+        self.progresso = min(1.0, progresso)
+
+    def cancelar(self):
+        self._cancelar.set()
+        if self.futuro is not None and self.futuro.cancel():
+            self.status = CANCELADA
+
+
+def acompanhar(itens: Iterable, total: int, tarefa: Tarefa, passo: int = 10_000) -> Iterator:
+    """Repassa ``itens`` informando o progresso à tarefa a cada ``passo``"""
+    for i, item in enumerate(itens, 1):
+        if i % passo == 0:
+            tarefa.atualizar(i / max(total, 1))
+        yield item
+
+
+def _gravar_resultado(caminho: str, funcao: Callable, args: Tuple):
+    # Executada no processo filho: calcula e grava o pickle temporário
+    resultado = funcao(*args)
+    with open(caminho, 'wb') as arquivo:
+        pickle.dump(resultado, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+class GerenciadorTarefas:
+    """Fila de tarefas com pools de threads/processos e cache por versão"""
+
+    def __init__(self, pasta: str, max_threads: int = 4, max_processos: Optional[int] = None):
+        self.pasta = pasta
+        os.makedirs(pasta, exist_ok=True)
+        self._threads = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='ponto-tarefa')
+        self._max_processos = max_processos
+        self._processos: Optional[ProcessPoolExecutor] = None
+        # Só tarefas em andamento ou com erro, por artefato (caminho sem a
+        # versão): concluídas viram o arquivo em cache e saem daqui, e uma
+        # versão nova do artefato substitui a antiga
+        self._em_andamento: Dict[str, Tarefa] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    # -------------------- cache --------------------
+
+    def _prefixo(self, nome: str, partes: Tuple) -> str:
+        resumo = hashlib.sha1(repr(partes).encode()).hexdigest()[:16]
+        return os.path.join(self.pasta, f"{nome}-{resumo}")
+
+    def _caminho(self, nome: str, partes: Tuple, versao: int, extensao: str) -> str:
+        return f"{self._prefixo(nome, partes)}-v{versao}.{extensao}"
+
+    def em_cache(self, nome: str, partes: Tuple, versao: int, extensao: str) -> Optional[str]:
+        """Caminho do artefato pronto para esta versão dos dados, se houver"""
+        caminho = self._caminho(nome, partes, versao, extensao)
+        return caminho if os.path.exists(caminho) else None
+
+    @staticmethod
+    def _artefato(caminho: str) -> str:
+        return caminho.rsplit('-v', 1)[0]
+
+    def _publicar(self, tarefa: Tarefa, temporario: str):
+        os.replace(temporario, tarefa.caminho)
+        # Versões anteriores do mesmo artefato deixam de ser úteis
+        prefixo = self._artefato(tarefa.caminho)
+        for antigo in glob.glob(glob.escape(prefixo) + '-v*'):
+            if antigo != tarefa.caminho and not antigo.endswith('.tmp'):
+                os.remove(antigo)
+
+    # -------------------- pools --------------------
+
+    @property
+    def processos(self) -> ProcessPoolExecutor:
+        """Pool de processos único, criado no primeiro uso; tarefas de thread
+        que agregam em paralelo (``relatorio_organizacao``) também o usam"""
+        with self._lock:
+            if self._processos is None:
+                # spawn: o processo do Streamlit tem threads, fork não é seguro
+                self._processos = ProcessPoolExecutor(
+                    max_workers=self._max_processos, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._processos
+
+    @property
+    def trabalhadores(self) -> int:
+        """Processos do pool"""
+        return self._max_processos or os.cpu_count() or 1
+
+    # -------------------- submissão --------------------
+
+    def _registrar(self, nome: str, caminho: str) -> Tuple[Tarefa, bool]:
+        """Devolve (tarefa, nova); reaproveita cache e tarefas iguais em andamento.
+
+        O artefato já em cache volta como tarefa concluída sem registro (as
+        telas chamam isto a cada reexecução). Uma tarefa que falhou continua
+        sendo devolvida (com o erro) até a versão dos dados mudar; uma
+        cancelada pode ser submetida de novo.
+        """
+        artefato = self._artefato(caminho)
+        with self._lock:
+            existente = self._em_andamento.get(artefato)
+            if (existente is not None and existente.caminho == caminho
+                    and (existente.ativa or existente.status == ERRO)):
+                return existente, False
+            if os.path.exists(caminho):
+                tarefa = Tarefa(0, nome, caminho)
+                tarefa.status, tarefa.progresso = CONCLUIDA, 1.0
+                return tarefa, False
+            # Uma versão anterior (ou cancelada) é substituída pela nova
+            tarefa = Tarefa(next(self._ids), nome, caminho)
+            self._em_andamento[artefato] = tarefa
+            return tarefa, True
+
+    def _finalizar(self, tarefa: Tarefa):
+        """Tira do registro a tarefa concluída ou cancelada (com erro, fica)"""
+        if tarefa.status == ERRO:
+            return
+        with self._lock:
+            artefato = self._artefato(tarefa.caminho)
+            if self._em_andamento.get(artefato) is tarefa:
+                del self._em_andamento[artefato]
+
+    def submeter_thread(self, nome: str, partes: Tuple, versao: int, extensao: str,
+                        funcao: Callable[[Tarefa, BinaryIO], object]) -> Tarefa:
+        """Executa ``funcao(tarefa, arquivo)`` numa thread; o arquivo vira o artefato"""
+        tarefa, nova = self._registrar(nome, self._caminho(nome, partes, versao, extensao))
+        if nova:
+            tarefa.futuro = self._threads.submit(self._executar_thread, tarefa, funcao)
+        return tarefa
+
+    def _executar_thread(self, tarefa: Tarefa, funcao: Callable):
+        temporario = f"{tarefa.caminho}.{tarefa.id}.tmp"
+        tarefa.status = EXECUTANDO
+        try:
+            with open(temporario, 'wb') as arquivo:
+                funcao(tarefa, arquivo)
+            self._publicar(tarefa, temporario)
+            tarefa.status, tarefa.progresso = CONCLUIDA, 1.0
+        except TarefaCancelada:
+            tarefa.status = CANCELADA
+        except Exception as erro:
+            tarefa.status, tarefa.erro = ERRO, str(erro)
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            self._finalizar(tarefa)
+
+    def submeter_processo(self, nome: str, partes: Tuple, versao: int, funcao: Callable, *args,
+                          argumentos: Optional[Callable[[], Tuple]] = None) -> Tarefa:
+        """Executa ``funcao(*args)`` no pool de processos e guarda o retorno em pickle.
+
+        ``funcao`` e ``args`` precisam ser serializáveis (função de módulo).
+        Argumentos caros de montar vêm de ``argumentos()``, chamado só quando
+        a tarefa é de fato submetida (não em cache nem em andamento).
+        """
+        tarefa, nova = self._registrar(nome, self._caminho(nome, partes, versao, 'pkl'))
+        if not nova:
+            return tarefa
+        if argumentos is not None:
+            try:
+                args += tuple(argumentos())
+            except Exception as erro:
+                tarefa.status, tarefa.erro = ERRO, str(erro)
+                return tarefa
+
+        temporario = f"{tarefa.caminho}.{tarefa.id}.tmp"
+        tarefa.status = EXECUTANDO
+        tarefa.futuro = self.processos.submit(_gravar_resultado, temporario, funcao, args)
+        tarefa.futuro.add_done_callback(lambda futuro: self._concluir_processo(tarefa, temporario))
+        return tarefa
+
+    def _concluir_processo(self, tarefa: Tarefa, temporario: str):
+        try:
+            if tarefa.futuro.cancelled() or tarefa._cancelar.is_set():
+                tarefa.status = CANCELADA
+            elif tarefa.futuro.exception() is not None:
+                tarefa.status, tarefa.erro = ERRO, str(tarefa.futuro.exception())
+            else:
+                self._publicar(tarefa, temporario)
+                tarefa.status, tarefa.progresso = CONCLUIDA, 1.0
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            self._finalizar(tarefa)
+
+    # -------------------- consulta --------------------
+
+    @staticmethod
+    def carregar_resultado(tarefa: Tarefa):
+        """Resultado de uma tarefa de processo concluída"""
+        with open(tarefa.caminho, 'rb') as arquivo:
+            return pickle.load(arquivo)
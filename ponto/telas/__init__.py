@@ -0,0 +1,6 @@
+"""Telas do app, uma por módulo.
+
+``ponto.telas.principal`` importa o módulo da tela escolhida no menu só
+quando ela é aberta; assim a partida e o login não carregam pandas, plotly
+nem o xlsxwriter.
+"""
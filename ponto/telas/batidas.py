@@ -0,0 +1,67 @@
+"""Registro de batidas de ponto"""
+from datetime import datetime
+
+import streamlit as st
+
+from ponto.metricas import instrumentar
+from ponto.servicos import PontoManager
+
+
+@instrumentar()
+def tela_batidas():
+    """Tela de registro de batidas"""
+    st.subheader("Registro de Batidas de Ponto")
+    painel_batidas(st.session_state.logged_user)
+
+
+# Botões de batida: (tipo, rótulo, mensagem)
+BOTOES_BATIDA = [
+    ('saida', "Registrar Saída", "Saída registrada!"),
+    ('almoco_saida', "Saída Almoço", "Saída para almoço registrada!"),
+    ('almoco_retorno', "Retorno Almoço", "Retorno do almoço registrado!"),
+    ('extra1', "Extra 1", "Batida extra 1 registrada!"),
+    ('extra2', "Extra 2", "Batida extra 2 registrada!"),
+]
+
+
+@st.fragment
+@instrumentar()
+def painel_batidas(usuario: str):
+    """Status do dia e botões; um clique reexecuta só este fragmento"""
+    if 'aviso_batida' in st.session_state:
+        st.toast(st.session_state.pop('aviso_batida'))
+    
+    hoje = datetime.now().strftime('%Y-%m-%d')
+    horas_hoje = PontoManager.calcular_horas_dia(usuario, hoje)
+    
+    # Status do dia
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        status_entrada = "✅" if horas_hoje['entrada'] else "❌"
+        st.metric("Entrada", horas_hoje['entrada'] or "Não registrada", delta=status_entrada)
+    
+    with col2:
+        status_saida = "✅" if horas_hoje['saida'] else "❌"
+        st.metric("Saída", horas_hoje['saida'] or "Não registrada", delta=status_saida)
+    
+    with col3:
+        st.metric("Almoço", 
+                 f"{horas_hoje['almoco_saida'] or '--'} / {horas_hoje['almoco_retorno'] or '--'}")
+    
+    with col4:
+        st.metric("Horas Trabalhadas", f"{horas_hoje['total_horas']:.2f}h")
+    
+    # Botões de batida: o registro roda no callback, antes do status acima
+    # ser redesenhado, então não é preciso um segundo rerun
+    st.markdown("---")
+    for coluna, (tipo, rotulo, mensagem) in zip(st.columns(len(BOTOES_BATIDA)), BOTOES_BATIDA):
+        with coluna:
+            st.button(rotulo, use_container_width=True,
+                      on_click=registrar_batida_botao, args=(usuario, tipo, mensagem))
+
+
+@instrumentar()
+def registrar_batida_botao(usuario: str, tipo: str, mensagem: str):
+    PontoManager.registrar_batida(usuario, tipo)
+    # Callbacks não devem desenhar elementos: o fragmento mostra o aviso
+    st.session_state.aviso_batida = mensagem
@@ -0,0 +1,30 @@
+"""Auxiliares compartilhados pelas telas"""
+import streamlit as st
+
+from ponto.servicos import get_dados
+from ponto.tarefas import CANCELADA, CONCLUIDA, ERRO, Tarefa
+
+
+def versao_usuario(usuario: str) -> int:
+    """Versão dos dados do usuário; muda a cada batida (ver ``CamadaDados.versao_dados``)"""
+    return get_dados().versao_dados([usuario])
+
+
+def mostrar_tarefa(tarefa: Tarefa, cancelavel: bool = True) -> bool:
+    """Mostra o andamento de uma tarefa; devolve True quando está concluída"""
+    if tarefa.status == CONCLUIDA:
+        return True
+    if tarefa.status == ERRO:
+        st.error(f"Falha ao gerar: {tarefa.erro}")
+    elif tarefa.status == CANCELADA:
+        st.warning("Geração cancelada.")
+    else:
+        st.progress(tarefa.progresso, text="Gerando em segundo plano...")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.button("Atualizar", key=f"atualizar_{tarefa.id}", use_container_width=True)
+        with col2:
+            if cancelavel and st.button("Cancelar", key=f"cancelar_{tarefa.id}", use_container_width=True):
+                tarefa.cancelar()
+                st.rerun()
+    return False
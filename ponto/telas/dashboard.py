@@ -0,0 +1,63 @@
+"""Dashboard com as métricas da semana"""
+from datetime import datetime, timedelta
+
+import plotly.express as px
+import streamlit as st
+
+from ponto.metricas import instrumentar
+from ponto.servicos import PontoManager
+from ponto.telas.comum import versao_usuario
+
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def dados_dashboard(usuario: str, inicio_semana: str, hoje: str, versao: int):
+    """Folhas da semana, horas de hoje e gráfico do dashboard"""
+    folhas_semana = PontoManager.calcular_folhas(usuario, inicio_semana)
+    horas_hoje = PontoManager.calcular_horas_dia(usuario, hoje)
+    
+    fig = None
+    if not folhas_semana.empty:
+        df_semana = folhas_semana[['data', 'total_horas']]
+        df_semana.columns = ['Data', 'Horas']
+        
+        fig = px.bar(df_semana, x='Data', y='Horas', 
+                    title="Horas Trabalhadas por Dia (Esta Semana)")
+        fig.update_layout(yaxis_title="Horas")
+    return folhas_semana, horas_hoje, fig
+
+
+@instrumentar()
+def tela_dashboard():
+    """Dashboard com métricas gerais"""
+    st.subheader("Dashboard Geral")
+    
+    usuario = st.session_state.logged_user
+    hoje = datetime.now().strftime('%Y-%m-%d')
+    
+    # Métricas da semana
+    inicio_semana = (datetime.now() - timedelta(days=datetime.now().weekday())).strftime('%Y-%m-%d')
+    
+    # Calcular horas da semana
+    folhas_semana, horas_hoje, fig = dados_dashboard(usuario, inicio_semana, hoje, versao_usuario(usuario))
+    total_semana = sum(folhas_semana['total_horas'].tolist())
+    
+    # Métricas
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Horas Hoje", f"{horas_hoje['total_horas']:.2f}h")
+    
+    with col2:
+        st.metric("Horas esta Semana", f"{total_semana:.2f}h")
+    
+    with col3:
+        meta_semanal = 40  # 40h por semana
+        progresso = (total_semana / meta_semanal) * 100
+        st.metric("Progresso Semanal", f"{progresso:.1f}%")
+    
+    with col4:
+        dias_trabalhados = len(folhas_semana)
+        st.metric("Dias Trabalhados", f"{dias_trabalhados}")
+    
+    # Gráfico de horas diárias da semana
+    if fig is not None:
+        st.plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,52 @@
+"""Métricas de desempenho do processo (somente administradores)"""
+from datetime import datetime
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from ponto.metricas import METRICAS, instrumentar
+
+
+@instrumentar()
+def tela_desempenho():
+    """Métricas de chamadas e latência do processo (somente administradores)"""
+    st.subheader("Desempenho")
+
+    METRICAS.ativo = st.checkbox("Coletar métricas", value=METRICAS.ativo)
+    resumo = pd.DataFrame(METRICAS.resumo())
+    if resumo.empty:
+        st.info("Nenhuma métrica coletada ainda.")
+        return
+
+    # Telas não se aninham entre si: somá-las não conta nada duas vezes
+    telas = resumo[resumo['operacao'].str.startswith('tela_')]
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Telas Renderizadas", f"{telas['chamadas'].sum():,}")
+    with col2:
+        st.metric("Tempo nas Telas", f"{telas['total_s'].sum():.2f}s")
+    with col3:
+        st.metric("Linhas Lidas pelas Telas", f"{telas['linhas_lidas'].sum():,}")
+
+    if not telas.empty:
+        fig = px.bar(telas, x='operacao', y=['p50_ms', 'p95_ms', 'p99_ms'], barmode='group',
+                     title="Latência das Telas (ms)")
+        fig.update_layout(xaxis_title="Tela", yaxis_title="ms", legend_title="Percentil")
+        st.plotly_chart(fig, use_container_width=True)
+
+    st.dataframe(resumo.round(3), use_container_width=True, hide_index=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            "Exportar (Prometheus)",
+            METRICAS.prometheus(),
+            file_name=f"ponto_metricas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prom",
+            mime="text/plain",
+            use_container_width=True
+        )
+    with col2:
+        if st.button("Zerar Métricas", use_container_width=True):
+            METRICAS.zerar()
+            st.rerun()
@@ -0,0 +1,75 @@
+"""Exceções de ponto: dias com batidas inconsistentes (somente administradores)"""
+import calendar
+from datetime import date
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from ponto.anomalias import ANOMALIAS, descrever
+from ponto.fechamento import chave_mes
+from ponto.metricas import instrumentar
+from ponto.servicos import get_dados
+
+
+@instrumentar()
+def tela_excecoes():
+    """Dias cujas batidas a folha calcularia errado, mantidos a cada batida"""
+    st.subheader("Exceções de Ponto")
+    st.caption("A folha usa a última batida de cada tipo do dia: duplicadas, saídas esquecidas e "
+               "almoços fora de ordem mudam as horas sem aviso. O dia de hoje ainda pode estar "
+               "em andamento.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        mes = st.selectbox("Mês", range(1, 13), index=date.today().month - 1)
+    with col2:
+        ano = st.selectbox("Ano", range(2023, 2026), index=1)  # 2024 como padrão
+    rotulos = st.multiselect("Anomalias", list(ANOMALIAS.values()), default=list(ANOMALIAS.values()))
+    bits = sum(bit for bit, rotulo in ANOMALIAS.items() if rotulo in rotulos)
+
+    dados = get_dados()
+    if dados.mes_arquivado(chave_mes(ano, mes)):
+        st.info(f"{chave_mes(ano, mes)} arquivado: as exceções cobrem apenas os meses vivos.")
+        return
+    data_inicio = date(ano, mes, 1).isoformat()
+    data_fim = date(ano, mes, calendar.monthrange(ano, mes)[1]).isoformat()
+    excecoes = [(usuario, data, mascara)
+                for usuario, data, mascara in dados.anomalias.excecoes(data_inicio, data_fim)
+                if mascara & bits]
+    if not excecoes:
+        st.success("Nenhuma exceção no período.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Dias com Exceção", f"{len(excecoes):,}")
+    with col2:
+        st.metric("Funcionários", f"{len({usuario for usuario, _, _ in excecoes}):,}")
+
+    contagem = pd.DataFrame([
+        {'anomalia': rotulo, 'dias': sum(1 for _, _, mascara in excecoes if mascara & bit)}
+        for bit, rotulo in ANOMALIAS.items() if bit & bits
+    ])
+    fig = px.bar(contagem, x='anomalia', y='dias', title="Dias por Anomalia")
+    fig.update_layout(xaxis_title="Anomalia", yaxis_title="Dias")
+    st.plotly_chart(fig, use_container_width=True)
+
+    tabela = pd.DataFrame([
+        {
+            'Data': data,
+            'Usuário': usuario,
+            'Nome': dados.get_usuario(usuario).get('nome', usuario),
+            'Anomalias': ', '.join(descrever(mascara & bits)),
+        }
+        for usuario, data, mascara in reversed(excecoes)
+    ])
+    st.dataframe(tabela, use_container_width=True, hide_index=True)
+
+    st.subheader("Batidas do Dia")
+    escolha = st.selectbox("Exceção", range(len(tabela)),
+                           format_func=lambda i: f"{tabela['Data'][i]} - {tabela['Nome'][i]}")
+    usuario, data = tabela['Usuário'][escolha], tabela['Data'][escolha]
+    batidas = dados.batidas_usuario(usuario, data, data)
+    st.dataframe(pd.DataFrame([{'Tipo': b['tipo'], 'Horário': b['horario']} for b in batidas]),
+                 use_container_width=True, hide_index=True)
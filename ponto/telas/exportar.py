@@ -0,0 +1,86 @@
+"""Exportação de dados (CSV e XLSX) em segundo plano"""
+from datetime import date, datetime
+
+import streamlit as st
+
+from ponto.exportacao import exportar_csv, exportar_xlsx
+from ponto.fechamento import fechamentos_periodo, versao_fechamentos
+from ponto.metricas import instrumentar
+from ponto.servicos import UsuarioManager, get_dados, get_tarefas
+from ponto.tarefas import Tarefa, acompanhar
+from ponto.telas.comum import mostrar_tarefa
+
+
+@instrumentar()
+def tela_exportar():
+    """Exportação de dados"""
+    st.subheader("Exportar Dados")
+    
+    usuario = st.session_state.logged_user
+    dados = get_dados()
+    
+    # Administradores podem exportar a organização inteira em um período
+    todos = UsuarioManager.is_admin(usuario) and st.checkbox("Exportar todos os funcionários")
+    fechamentos = None
+    if todos:
+        col1, col2 = st.columns(2)
+        with col1:
+            inicio = st.date_input("Data Início", value=date.today().replace(day=1))
+        with col2:
+            fim = st.date_input("Data Fim", value=date.today())
+        data_inicio, data_fim = inicio.strftime('%Y-%m-%d'), fim.strftime('%Y-%m-%d')
+        usuarios = dados.usuarios_com_batidas()
+        sufixo = f"todos_{data_inicio.replace('-', '')}_{data_fim.replace('-', '')}"
+        # Período só de meses fechados: linhas dos instantâneos, e o arquivo
+        # gerado vale até algum deles ser refechado
+        fechamentos = fechamentos_periodo(dados, inicio, fim) if inicio <= fim else None
+    else:
+        data_inicio = data_fim = None
+        usuarios = [usuario]
+        sufixo = f"{usuario}_{datetime.now().strftime('%Y%m%d')}"
+    
+    if not any(dados.resumo_periodo(u, data_inicio, data_fim)[0] for u in usuarios):
+        st.info("Nenhum dado para exportar.")
+        return
+    
+    # Arquivos gerados em segundo plano e reaproveitados até novas batidas
+    tarefas = get_tarefas()
+    partes = (tuple(usuarios), data_inicio, data_fim)
+    versao = versao_fechamentos(fechamentos) if fechamentos else dados.versao_dados(usuarios)
+    
+    def exportacao(exportar):
+        def executar(tarefa: Tarefa, destino):
+            if fechamentos:
+                total = sum(f.total_batidas for f in fechamentos)
+                linhas = (linha for u in usuarios for f in fechamentos
+                          for linha in f.linhas([u], data_inicio, data_fim))
+            else:
+                total = dados.contar_batidas(usuarios, data_inicio, data_fim)
+                linhas = dados.iterar_linhas(usuarios, data_inicio, data_fim)
+            exportar(acompanhar(linhas, total, tarefa), destino, com_usuario=todos)
+        return executar
+    
+    formatos = [
+        ("Excel", 'xlsx', exportar_xlsx,
+         "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+        ("CSV", 'csv', exportar_csv, "text/csv"),
+    ]
+    for coluna, (rotulo, extensao, exportar, mime) in zip(st.columns(2), formatos):
+        with coluna:
+            st.subheader(f"Exportar {rotulo}")
+            chave_sessao = f"tarefa_{extensao}"
+            tarefa = st.session_state.get(chave_sessao)
+            pronto = tarefas.em_cache(extensao, partes, versao, extensao)
+            
+            if not pronto and st.button(f"Gerar {rotulo}", use_container_width=True):
+                tarefa = tarefas.submeter_thread(extensao, partes, versao, extensao, exportacao(exportar))
+                st.session_state[chave_sessao] = tarefa
+            
+            if pronto or (tarefa and mostrar_tarefa(tarefa)):
+                with open(pronto or tarefa.caminho, 'rb') as arquivo:
+                    st.download_button(
+                        f"Baixar {rotulo}",
+                        arquivo,
+                        file_name=f"ponto_{sufixo}.{extensao}",
+                        mime=mime
+                    )
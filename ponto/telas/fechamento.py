@@ -0,0 +1,82 @@
+"""Fechamento mensal da folha (somente administradores)"""
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+from ponto.fechamento import MesFechado, chave_mes
+from ponto.metricas import instrumentar
+from ponto.servicos import get_dados
+
+
+@instrumentar()
+def tela_fechamento():
+    """Fecha e reabre meses; meses fechados não aceitam batidas novas"""
+    st.subheader("Fechamento Mensal")
+    st.caption("O mês fechado é congelado num arquivo imutável: relatórios e exportações passam a "
+               "ler dele, e batidas novas no mês são recusadas até que ele seja reaberto. "
+               "Arquivar move as batidas do mês fechado para o arquivo frio; o mês não pode "
+               "mais ser reaberto.")
+
+    dados = get_dados()
+    if dados.fechamentos is None:
+        st.info("Fechamento mensal não configurado.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        mes = st.selectbox("Mês", range(1, 13), index=date.today().month - 1)
+    with col2:
+        ano = st.selectbox("Ano", range(2023, 2026), index=1)  # 2024 como padrão
+    chave = chave_mes(ano, mes)
+
+    fechamento = dados.fechamento(ano, mes)
+    if fechamento is not None:
+        st.success(f"{chave} fechado em {fechamento.fechado_em} (versão {fechamento.versao}): "
+                   f"{fechamento.total_batidas} batidas, {fechamento.horas_total():.2f}h.")
+        if dados.mes_arquivado(chave):
+            st.info(f"{chave} arquivado.")
+        elif dados.arquivo is not None:
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("Reabrir mês", use_container_width=True):
+                    dados.reabrir_mes(ano, mes)
+                    st.rerun()
+            with col2:
+                if st.button("Arquivar mês", use_container_width=True):
+                    try:
+                        with st.spinner("Arquivando..."):
+                            dados.arquivar_mes(ano, mes)
+                    except ValueError:
+                        pass  # arquivado por outra sessão enquanto isso
+                    st.rerun()
+        elif st.button("Reabrir mês", use_container_width=True):
+            dados.reabrir_mes(ano, mes)
+            st.rerun()
+    elif chave >= date.today().strftime('%Y-%m'):
+        st.info(f"{chave} ainda não terminou.")
+    else:
+        st.info(f"{chave} aberto.")
+        if st.button("Fechar mês", use_container_width=True):
+            try:
+                with st.spinner("Fechando..."):
+                    dados.fechar_mes(ano, mes)
+            except MesFechado:
+                pass  # fechado por outra sessão enquanto isso
+            st.rerun()
+
+    fechados = [dados.fechamentos.obter(m) for m in dados.fechamentos.meses()]
+    if fechados:
+        st.subheader("Meses Fechados")
+        st.dataframe(pd.DataFrame([
+            {
+                'Mês': f.mes,
+                'Versão': f.versao,
+                'Fechado em': f.fechado_em,
+                'Batidas': f.total_batidas,
+                'Funcionários': len(f.usuarios),
+                'Horas': round(f.horas_total(), 2),
+                'Arquivado': dados.mes_arquivado(f.mes),
+            }
+            for f in reversed(fechados)
+        ]), use_container_width=True, hide_index=True)
@@ -0,0 +1,84 @@
+"""Histórico de batidas paginado, com estatísticas do período"""
+from datetime import datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from ponto.metricas import instrumentar
+from ponto.servicos import PontoManager, get_dados
+from ponto.telas.comum import versao_usuario
+
+
+TIPOS_TEXTO = {
+    'entrada': 'Entrada',
+    'saida': 'Saída',
+    'almoco_saida': 'Saída Almoço',
+    'almoco_retorno': 'Retorno Almoço',
+    'extra1': 'Extra 1',
+    'extra2': 'Extra 2'
+}
+
+
+TAMANHOS_PAGINA = [50, 100, 200, 500]
+
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def pagina_historico(usuario: str, data_inicio: str, data_fim: str,
+                     pagina: int, tamanho: int, versao: int) -> pd.DataFrame:
+    """Tabela de uma página do histórico, montada só com as batidas dela"""
+    batidas = PontoManager.pagina_batidas(usuario, data_inicio, data_fim, pagina, tamanho)
+    
+    return pd.DataFrame(
+        [(b['data'], TIPOS_TEXTO.get(b['tipo']), b['horario']) for b in batidas],
+        columns=['Data', 'Tipo', 'Horário']
+    )
+
+
+@instrumentar()
+def tela_historico():
+    """Histórico completo de batidas, paginado"""
+    st.subheader("Histórico de Batidas")
+    
+    usuario = st.session_state.logged_user
+    versao = versao_usuario(usuario)
+    
+    # Total de batidas do usuário pelos contadores do índice (e do arquivo);
+    # a versão não serve: também muda quando o rateio dele é alterado
+    if get_dados().resumo_periodo(usuario)[0]:
+        # Filtros
+        col1, col2 = st.columns(2)
+        with col1:
+            data_inicio = st.date_input("Data Início", 
+                                      value=datetime.now() - timedelta(days=30))
+        with col2:
+            data_fim = st.date_input("Data Fim", value=datetime.now())
+        inicio, fim = data_inicio.strftime('%Y-%m-%d'), data_fim.strftime('%Y-%m-%d')
+        
+        # Totais vêm dos contadores por dia: não dependem do tamanho do período
+        estatisticas = PontoManager.resumo_periodo(usuario, inicio, fim)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            tamanho = st.selectbox("Batidas por página", TAMANHOS_PAGINA)
+        paginas = max(1, -(-estatisticas['total'] // tamanho))
+        with col2:
+            pagina = st.number_input("Página", min_value=1, max_value=paginas, value=1, step=1)
+        
+        df = pagina_historico(usuario, inicio, fim, int(pagina), tamanho, versao)
+        st.dataframe(df, use_container_width=True)
+        st.caption(f"Página {int(pagina)} de {paginas} · {estatisticas['total']} batidas no período")
+        
+        # Estatísticas do período
+        st.subheader("Estatísticas do Período")
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric("Total de Batidas", estatisticas['total'])
+        
+        with col2:
+            st.metric("Dias com Batidas", estatisticas['dias'])
+        
+        with col3:
+            st.metric("Total de Entradas", estatisticas['entradas'])
+    else:
+        st.info("Nenhuma batida registrada ainda.")
@@ -0,0 +1,72 @@
+"""Importação de arquivos de relógio de ponto (somente administradores)"""
+import hashlib
+import io
+
+import streamlit as st
+
+from ponto.importacao import abrir_texto, importar_arquivo
+from ponto.metricas import instrumentar
+from ponto.servicos import get_dados, get_tarefas
+from ponto.tarefas import Tarefa
+from ponto.telas.comum import mostrar_tarefa
+
+
+FORMATOS = {"Detectar pelo conteúdo": None, "AFD (REP)": 'afd', "CSV": 'csv'}
+
+
+@instrumentar()
+def tela_importacao():
+    """Importação em massa de AFD/CSV com relatório de rejeitados"""
+    st.subheader("Importar Batidas")
+    st.caption("Marcações associadas aos funcionários pelo PIS/CPF cadastrado; "
+               "batidas já registradas são ignoradas.")
+
+    envio = st.file_uploader("Arquivo AFD ou CSV", type=['txt', 'afd', 'csv'])
+    formato = FORMATOS[st.selectbox("Formato", list(FORMATOS))]
+
+    tarefas = get_tarefas()
+    # A própria tarefa fica na sessão: concluída, ela sai do registro do gerenciador
+    tarefa = st.session_state.get('tarefa_importacao')
+    if envio is not None and st.button("Importar", use_container_width=True):
+        conteudo = envio.getvalue()
+        dados = get_dados()
+        resultado = st.session_state.resultado_importacao = {}
+
+        # Em segundo plano; o artefato é o relatório de rejeitados (CSV)
+        def executar(tarefa: Tarefa, destino):
+            binario = io.BytesIO(conteudo)
+            relatorio = io.TextIOWrapper(destino, encoding='utf-8', newline='')
+            importado = importar_arquivo(
+                dados, abrir_texto(binario), formato, relatorio,
+                progresso=lambda: tarefa.atualizar(binario.tell() / max(1, len(conteudo)))
+            )
+            relatorio.flush()
+            relatorio.detach()
+            resultado.update(importado.como_dict())
+
+        # O mesmo arquivo sem batidas novas desde então só reaproveita o relatório
+        partes = (hashlib.sha1(conteudo).hexdigest(), formato)
+        versao = dados.versao_dados(dados.listar_usuarios())
+        tarefa = tarefas.submeter_thread('importacao', partes, versao, 'csv', executar)
+        st.session_state.tarefa_importacao = tarefa
+
+    if tarefa is None or not mostrar_tarefa(tarefa):
+        return
+
+    resultado = st.session_state.get('resultado_importacao')
+    if resultado:
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Registros Lidos", resultado['lidas'])
+        with col2:
+            st.metric("Importadas", resultado['importadas'])
+        with col3:
+            st.metric("Duplicadas", resultado['duplicadas'])
+        with col4:
+            st.metric("Rejeitadas", resultado['rejeitadas'])
+    else:
+        st.info("Arquivo já importado anteriormente.")
+
+    with open(tarefa.caminho, 'rb') as arquivo:
+        st.download_button("Baixar relatório de rejeitados", arquivo,
+                           file_name="importacao_rejeitados.csv", mime="text/csv")
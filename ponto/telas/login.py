@@ -0,0 +1,41 @@
+"""Tela de login"""
+from datetime import datetime
+
+import streamlit as st
+
+from ponto.metricas import instrumentar
+from ponto.servicos import PontoManager, UsuarioManager
+
+
+@instrumentar()
+def tela_login():
+    """Tela de login"""
+    col1, col2, col3 = st.columns([1, 2, 1])
+    
+    with col2:
+        st.subheader("Login")
+        
+        with st.form("login_form"):
+            usuario = st.text_input("Usuário")
+            senha = st.text_input("Senha", type="password")
+            submit = st.form_submit_button("Entrar", use_container_width=True)
+            
+            if submit:
+                if UsuarioManager.autenticar(usuario, senha):
+                    st.session_state.logged_user = usuario
+                    # Registrar entrada automática
+                    if usuario not in st.session_state.entrada_automatica:
+                        PontoManager.registrar_batida(usuario, 'entrada')
+                        st.session_state.entrada_automatica[usuario] = datetime.now().strftime('%Y-%m-%d')
+                        st.success("Login realizado! Entrada registrada automaticamente.")
+                    st.rerun()
+                else:
+                    st.error("Usuário ou senha incorretos!")
+        
+        # Informações de teste
+        st.info("""
+        **Usuários de teste:**
+        - maria / 123
+        - joao / 456  
+        - admin / admin
+        """)
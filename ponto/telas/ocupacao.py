@@ -0,0 +1,64 @@
+"""Ocupação do escritório por hora, dia da semana e contrato (somente administradores)"""
+import calendar
+from datetime import date
+
+import numpy as np
+import plotly.express as px
+import streamlit as st
+
+from ponto.metricas import instrumentar
+from ponto.servicos import get_dados
+
+DIAS_SEMANA = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
+HORAS = [f"{h:02d}h" for h in range(24)]
+ORGANIZACAO = "Organização inteira"
+
+
+@instrumentar()
+def tela_ocupacao():
+    """Pessoas presentes em média por hora, lidas dos contadores pré-calculados"""
+    st.subheader("Ocupação do Escritório")
+    st.caption("Média de pessoas presentes em cada hora (entrada à saída, fora o almoço). "
+               "Uma pessoa conta em cada contrato do seu rateio.")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        ano = st.selectbox("Ano", range(2023, 2026), index=1)
+    with col2:
+        mes_inicio = st.selectbox("Mês inicial", range(1, 13), index=0)
+    with col3:
+        mes_fim = st.selectbox("Mês final", range(1, 13), index=11)
+    if mes_fim < mes_inicio:
+        st.error("O mês final deve ser posterior ao inicial.")
+        return
+    data_inicio = date(ano, mes_inicio, 1).isoformat()
+    data_fim = date(ano, mes_fim, calendar.monthrange(ano, mes_fim)[1]).isoformat()
+
+    ocupacao = get_dados().ocupacao
+    contratos = ocupacao.contratos()
+    escolha = st.selectbox("Contrato", [ORGANIZACAO] + contratos)
+    semana = ocupacao.semana(data_inicio, data_fim, None if escolha == ORGANIZACAO else escolha)
+    if not semana.any():
+        st.info("Nenhuma presença registrada para este período.")
+        return
+
+    dia, hora = np.unravel_index(int(semana.argmax()), semana.shape)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Pico de Ocupação", f"{semana.max():.1f} pessoas")
+    with col2:
+        st.metric("Quando", f"{DIAS_SEMANA[dia]}, {HORAS[hora]}")
+
+    fig = px.imshow(semana.round(1), x=HORAS, y=DIAS_SEMANA, aspect='auto', color_continuous_scale='Blues',
+                    labels={'x': "Hora", 'y': "Dia", 'color': "Pessoas"},
+                    title=f"Ocupação Média por Hora - {escolha}")
+    st.plotly_chart(fig, use_container_width=True)
+
+    if contratos:
+        # Média dos dias úteis de cada contrato
+        uteis = np.array([ocupacao.semana(data_inicio, data_fim, contrato)[:5].mean(axis=0)
+                          for contrato in contratos])
+        fig = px.imshow(uteis.round(1), x=HORAS, y=contratos, aspect='auto', color_continuous_scale='Blues',
+                        labels={'x': "Hora", 'y': "Contrato", 'color': "Pessoas"},
+                        title="Ocupação Média nos Dias Úteis por Contrato")
+        st.plotly_chart(fig, use_container_width=True)
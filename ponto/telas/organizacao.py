@@ -0,0 +1,81 @@
+"""Relatório da organização inteira (somente administradores)"""
+import calendar
+import pickle
+from datetime import date
+
+import plotly.express as px
+import streamlit as st
+
+from ponto.fechamento import fechamentos_periodo, relatorio_periodo, versao_fechamentos
+from ponto.metricas import instrumentar
+from ponto.servicos import get_dados, get_tarefas
+from ponto.tarefas import Tarefa
+from ponto.telas.comum import mostrar_tarefa
+
+
+@instrumentar()
+def tela_relatorio_org():
+    """Relatório de todos os funcionários (somente administradores)"""
+    st.subheader("Relatório da Organização")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        ano = st.selectbox("Ano", range(2023, 2026), index=1)
+    with col2:
+        mes_inicio = st.selectbox("Mês inicial", range(1, 13), index=0)
+    with col3:
+        mes_fim = st.selectbox("Mês final", range(1, 13), index=11)
+    if mes_fim < mes_inicio:
+        st.error("O mês final deve ser posterior ao inicial.")
+        return
+    
+    dados = get_dados()
+    data_inicio = date(ano, mes_inicio, 1)
+    data_fim = date(ano, mes_fim, calendar.monthrange(ano, mes_fim)[1])
+    usuarios = dados.usuarios_com_batidas()
+    
+    # Meses fechados vêm dos instantâneos; os abertos são agregados em fatias
+    # no pool de processos das tarefas (ver ponto.relatorio_org)
+    tarefas = get_tarefas()
+    
+    def executar(tarefa: Tarefa, destino):
+        resultado = relatorio_periodo(dados, data_inicio, data_fim, trabalhadores=tarefas.trabalhadores,
+                                      executor=tarefas.processos)
+        pickle.dump(resultado, destino)
+    
+    fechamentos = fechamentos_periodo(dados, data_inicio, data_fim)
+    versao = versao_fechamentos(fechamentos) if fechamentos else dados.versao_dados(usuarios)
+    partes = (ano, mes_inicio, mes_fim)
+    pronto = tarefas.em_cache('relatorio_org', partes, versao, 'pkl')
+    # A tarefa da sessão só vale para o período e a versão em que foi gerada
+    gerada, tarefa = st.session_state.get('tarefa_relatorio_org', (None, None))
+    if gerada != (partes, versao):
+        tarefa = None
+    
+    if not pronto and st.button("Gerar relatório", use_container_width=True):
+        tarefa = tarefas.submeter_thread('relatorio_org', partes, versao, 'pkl', executar)
+        st.session_state.tarefa_relatorio_org = ((partes, versao), tarefa)
+    
+    if not (pronto or (tarefa and mostrar_tarefa(tarefa, cancelavel=False))):
+        return
+    
+    with open(pronto or tarefa.caminho, 'rb') as arquivo:
+        resultado = pickle.load(arquivo)
+    if resultado['contratos'].empty:
+        st.info("Nenhuma hora registrada para este período.")
+        return
+    
+    st.metric("Total de Horas", f"{resultado['cargos']['horas'].sum():.2f}h")
+    
+    fig = px.bar(resultado['contratos'], x='mes', y='horas', color='contrato',
+                 title="Horas por Contrato por Mês")
+    fig.update_layout(xaxis_title="Mês", yaxis_title="Horas")
+    st.plotly_chart(fig, use_container_width=True)
+    
+    st.subheader("Horas por Cargo")
+    df_cargos = resultado['cargos'].pivot(index='mes', columns='cargo', values='horas').fillna(0)
+    st.dataframe(df_cargos.round(2), use_container_width=True)
+    
+    fig = px.line(resultado['presenca'], x='data', y='pessoas', title="Pessoas com Batida por Dia")
+    fig.update_layout(xaxis_title="Data", yaxis_title="Pessoas")
+    st.plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,50 @@
+"""Dashboard principal: barra lateral e menu das telas"""
+import importlib
+
+import streamlit as st
+
+from ponto.metricas import instrumentar
+from ponto.servicos import UsuarioManager
+
+
+# Opção do menu -> (módulo, função); o módulo só é importado ao abrir a tela
+TELAS = {
+    "Batidas de Ponto": ('ponto.telas.batidas', 'tela_batidas'),
+    "Relatórios": ('ponto.telas.relatorios', 'tela_relatorios'),
+    "Dashboard": ('ponto.telas.dashboard', 'tela_dashboard'),
+    "Histórico": ('ponto.telas.historico', 'tela_historico'),
+    "Exportar Dados": ('ponto.telas.exportar', 'tela_exportar'),
+    "Relatório da Organização": ('ponto.telas.organizacao', 'tela_relatorio_org'),
+    "Importar Batidas": ('ponto.telas.importacao', 'tela_importacao'),
+    "Fechamento Mensal": ('ponto.telas.fechamento', 'tela_fechamento'),
+    "Exceções de Ponto": ('ponto.telas.excecoes', 'tela_excecoes'),
+    "Ocupação do Escritório": ('ponto.telas.ocupacao', 'tela_ocupacao'),
+    "Desempenho": ('ponto.telas.desempenho', 'tela_desempenho'),
+}
+
+
+@instrumentar()
+def dashboard_principal():
+    """Dashboard principal após login"""
+    usuario = st.session_state.logged_user
+    usuario_info = UsuarioManager.get_usuario_info(usuario)
+    
+    # Sidebar
+    with st.sidebar:
+        st.image("https://via.placeholder.com/200x80/003366/FFFFFF?text=FGV", caption="Fundação Getulio Vargas")
+        st.write(f"**Usuário:** {usuario_info.get('nome', usuario)}")
+        st.write(f"**Cargo:** {usuario_info.get('cargo', 'N/A')}")
+        
+        if st.button("Logout", use_container_width=True):
+            st.session_state.logged_user = None
+            st.rerun()
+    
+    # Menu principal
+    opcoes = ["Batidas de Ponto", "Relatórios", "Dashboard", "Histórico", "Exportar Dados"]
+    if UsuarioManager.is_admin(usuario):
+        opcoes += ["Relatório da Organização", "Importar Batidas", "Fechamento Mensal", "Exceções de Ponto",
+                   "Ocupação do Escritório", "Desempenho"]
+    menu = st.selectbox("Selecione uma opção:", opcoes)
+    
+    modulo, funcao = TELAS[menu]
+    getattr(importlib.import_module(modulo), funcao)()
@@ -0,0 +1,91 @@
+"""Relatórios por contrato e folha diária do mês"""
+import calendar
+from datetime import datetime
+from typing import Union
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from ponto.folha import calcular_folhas
+from ponto.metricas import instrumentar
+from ponto.servicos import RelatorioManager, get_dados, get_tarefas
+from ponto.tarefas import GerenciadorTarefas
+from ponto.telas.comum import mostrar_tarefa, versao_usuario
+
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def dados_relatorio(usuario: str, mes: int, ano: int, versao: Union[int, str]):
+    """Horas por contrato no mês, com gráfico e tabela"""
+    contratos_info, total_horas = RelatorioManager.calcular_porcentagem_contratos(usuario, mes, ano)
+    
+    labels = list(contratos_info.keys())
+    values = [info['horas'] for info in contratos_info.values()]
+    
+    fig = px.pie(values=values, names=labels, 
+                title=f"Distribuição de Horas por Contrato - {mes:02d}/{ano}")
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    
+    df_contratos = pd.DataFrame([
+        {
+            'Contrato': contrato,
+            'Porcentagem (%)': info['porcentagem'],
+            'Horas': info['horas']
+        }
+        for contrato, info in contratos_info.items()
+    ])
+    return total_horas, fig, df_contratos
+
+
+@instrumentar()
+def tela_relatorios():
+    """Tela de relatórios"""
+    st.subheader("Relatórios por Contrato")
+    
+    usuario = st.session_state.logged_user
+    
+    # Filtros
+    col1, col2 = st.columns(2)
+    with col1:
+        mes = st.selectbox("Mês", range(1, 13), index=datetime.now().month-1)
+    with col2:
+        ano = st.selectbox("Ano", range(2023, 2026), index=1)  # 2024 como padrão
+    
+    # Calcular relatório; mês fechado não muda mais, então a versão é a do fechamento
+    fechamento = get_dados().fechamento(ano, mes)
+    versao = f"fechamento-v{fechamento.versao}" if fechamento else versao_usuario(usuario)
+    total_horas, fig, df_contratos = dados_relatorio(usuario, mes, ano, versao)
+    
+    if total_horas > 0:
+        st.metric("Total de Horas no Mês", f"{total_horas:.2f}h")
+        
+        # Gráfico de pizza
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Tabela detalhada
+        st.subheader("Detalhamento por Contrato")
+        st.dataframe(df_contratos, use_container_width=True)
+        
+        # Folha diária do fechamento ou calculada no pool de processos e
+        # reaproveitada do cache
+        st.subheader("Folha Diária do Mês")
+        if fechamento is not None:
+            st.caption(f"Mês fechado em {fechamento.fechado_em} (versão {fechamento.versao}).")
+            folhas = fechamento.folhas(usuario)
+        else:
+            inicio_mes = f"{ano:04d}-{mes:02d}-01"
+            fim_mes = f"{ano:04d}-{mes:02d}-{calendar.monthrange(ano, mes)[1]:02d}"
+            # A tabela do mês só é montada quando a folha não está em cache
+            tarefa = get_tarefas().submeter_processo(
+                'folha_mes', (usuario, ano, mes), versao, calcular_folhas,
+                argumentos=lambda: (get_dados().tabela_usuario(usuario, inicio_mes, fim_mes),)
+            )
+            folhas = None
+            if mostrar_tarefa(tarefa, cancelavel=False):
+                folhas = GerenciadorTarefas.carregar_resultado(tarefa)
+        if folhas is not None:
+            df_folha = folhas[['data', 'entrada', 'almoco_saida', 'almoco_retorno', 'saida', 'total_horas']]
+            df_folha.columns = ['Data', 'Entrada', 'Saída Almoço', 'Retorno Almoço', 'Saída', 'Horas']
+            st.dataframe(df_folha, use_container_width=True)
+    else:
+        st.info("Nenhuma hora registrada para este período.")
@@ -0,0 +1,97 @@
+"""``AnomaliasPonto``: regras por dia e atualização incremental igual à carga.
+
+    python -m unittest tests.test_anomalias
+"""
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from datetime import date
+
+from benchmarks.sintetico import gerar_batidas, gerar_usuarios
+from ponto.anomalias import (ALMOCO_INVERTIDO, ALMOCO_SEM_RETORNO, DUPLICADA, FORA_DE_SEQUENCIA, JORNADA_LONGA,
+                             SEM_ENTRADA, SEM_SAIDA, AnomaliasPonto, data_dia)
+from ponto.armazenamento import MemoriaStore
+from ponto.arquivo import ArquivoBatidas
+from ponto.colunar import para_segundos
+from ponto.dados import CamadaDados
+from ponto.fechamento import FechamentosMes
+
+H = 3600
+JORNADA = [('entrada', 8 * H), ('almoco_saida', 12 * H), ('almoco_retorno', 13 * H), ('saida', 17 * H)]
+DIA = 19800  # 2024-03-18
+
+
+def mascara(batidas) -> int:
+    anomalias = AnomaliasPonto()
+    anomalias.registrar([('ana', tipo, DIA * 86400 + segundos) for tipo, segundos in batidas],
+                        lambda usuario, dia: None)
+    return anomalias.mascara('ana', data_dia(DIA))
+
+
+class TestRegras(unittest.TestCase):
+
+    def test_mascaras(self):
+        casos = [
+            (JORNADA, 0),
+            (JORNADA + [('extra1', 18 * H)], 0),
+            ([('entrada', 8 * H), ('entrada', 8 * H + 30)] + JORNADA[1:], DUPLICADA),
+            (JORNADA[:3], SEM_SAIDA),
+            (JORNADA[:2], SEM_SAIDA | ALMOCO_SEM_RETORNO),
+            ([('saida', 17 * H)], SEM_ENTRADA),
+            ([('entrada', 7 * H), ('saida', 18 * H)], JORNADA_LONGA),
+            ([('entrada', 8 * H), ('saida', 12 * H), ('entrada', 13 * H), ('saida', 17 * H)], FORA_DE_SEQUENCIA),
+            ([('entrada', 8 * H), ('almoco_retorno', 12 * H), ('almoco_saida', 13 * H), ('saida', 17 * H)],
+             ALMOCO_INVERTIDO | ALMOCO_SEM_RETORNO),
+        ]
+        for batidas, esperada in casos:
+            self.assertEqual(mascara(batidas), esperada, batidas)
+
+
+class TestIncremental(unittest.TestCase):
+
+    def setUp(self):
+        self.usuarios = gerar_usuarios(30)
+        self.batidas = list(gerar_batidas(list(self.usuarios), 60, inicio=date(2024, 1, 1),
+                                          faltas=0.05, duplicadas=0.05, extras=0.1))
+
+    def carga(self, dados: CamadaDados) -> AnomaliasPonto:
+        anomalias = AnomaliasPonto()
+        anomalias.carregar(dados.log.colunas())
+        return anomalias
+
+    def test_batidas_fora_de_ordem_igual_a_carga(self):
+        dados = CamadaDados(MemoriaStore(), self.usuarios)
+        dados.anomalias  # carregado vazio: tudo incremental
+        metade = len(self.batidas) // 2
+        for batida in self.batidas[:metade]:
+            dados.registrar_batida(*batida)
+        resto = self.batidas[metade:]
+        random.Random(1).shuffle(resto)
+        for i in range(0, len(resto), 37):
+            dados.registrar_lote(resto[i:i + 37])
+        self.assertTrue(dados.anomalias.excecoes())
+        self.assertEqual(dados.anomalias.excecoes(), self.carga(dados).excecoes())
+
+        # Batidas já lidas entregues de novo não mudam nada
+        antes = dados.anomalias.excecoes()
+        dados.anomalias.registrar([(u, t, para_segundos(ts)) for u, t, ts in self.batidas[-200:]],
+                                  dados._batidas_dia)
+        self.assertEqual(dados.anomalias.excecoes(), antes)
+
+    def test_arquivamento_descarta_os_meses(self):
+        pasta = tempfile.mkdtemp(prefix='test_anomalias_')
+        self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+        dados = CamadaDados(MemoriaStore(), self.usuarios, FechamentosMes(os.path.join(pasta, 'fechamentos')),
+                            ArquivoBatidas(os.path.join(pasta, 'arquivo')))
+        dados.registrar_lote(self.batidas)
+        self.assertTrue(dados.anomalias.excecoes(data_fim='2024-01-31'))
+        dados.fechar_mes(2024, 1)
+        dados.arquivar_mes(2024, 1)
+        self.assertFalse(dados.anomalias.excecoes(data_fim='2024-01-31'))
+        self.assertEqual(dados.anomalias.excecoes(), self.carga(dados).excecoes())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""Rotas do ``ServidorBatidas``: idempotência, lotes e erros por item.
+
+    python -m unittest tests.test_api
+"""
+import asyncio
+import json
+import unittest
+
+from ponto.api import ServidorBatidas
+from ponto.armazenamento import MemoriaStore
+from ponto.dados import CamadaDados, usuarios_padrao
+
+
+class TestServidorBatidas(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.dados = CamadaDados(MemoriaStore(), usuarios_padrao())
+        self.servidor = ServidorBatidas(self.dados)
+
+    async def pedido(self, rota: str, corpo, cabecalhos=None):
+        return await self.servidor.despachar('POST', rota, cabecalhos or {}, json.dumps(corpo).encode())
+
+    async def test_chave_repetida_nao_grava_de_novo(self):
+        batida = {'usuario': 'maria', 'tipo': 'entrada', 'timestamp': '2024-03-04T08:00:00'}
+        status, primeira, extras = await self.pedido('/batidas', batida, {'idempotency-key': 'k1'})
+        self.assertEqual((status, extras), (201, {}))
+        status, repetida, extras = await self.pedido('/batidas', batida, {'idempotency-key': 'k1'})
+        self.assertEqual((status, repetida, extras), (201, primeira, {'Idempotent-Replayed': 'true'}))
+        self.assertEqual(len(self.dados.log), 1)
+
+    async def test_pedidos_simultaneos_com_a_mesma_chave(self):
+        batida = {'usuario': 'maria', 'tipo': 'entrada', 'timestamp': '2024-03-04T08:00:00'}
+        respostas = await asyncio.gather(*[self.pedido('/batidas', batida, {'idempotency-key': 'k'})
+                                           for _ in range(20)])
+        self.assertEqual(len({json.dumps(resposta[1]) for resposta in respostas}), 1)
+        self.assertEqual(len(self.dados.log), 1)
+
+    async def test_lote_com_chaves_por_item(self):
+        lote = {'batidas': [
+            {'usuario': 'joao', 'tipo': 'entrada', 'timestamp': '2024-03-04T08:00:00', 'chave': 'a'},
+            {'usuario': 'joao', 'tipo': 'saida', 'timestamp': '2024-03-04T17:00:00', 'chave': 'b'},
+            {'usuario': 'ninguem', 'tipo': 'saida'},
+        ]}
+        _, resposta, _ = await self.pedido('/batidas/lote', lote)
+        self.assertEqual([r['status'] for r in resposta['resultados']], [201, 201, 422])
+        _, resposta, _ = await self.pedido('/batidas/lote', lote)
+        self.assertEqual([r.get('repetida') for r in resposta['resultados']], [True, True, None])
+        self.assertEqual(len(self.dados.log), 2)
+
+    async def test_chave_que_nao_e_texto_recusada_por_item(self):
+        lote = {'batidas': [
+            {'usuario': 'joao', 'tipo': 'entrada', 'timestamp': '2024-03-04T08:00:00', 'chave': 'k1'},
+            {'usuario': 'joao', 'tipo': 'saida', 'timestamp': '2024-03-04T17:00:00', 'chave': ['x']},
+            {'usuario': 'joao', 'tipo': 'saida', 'timestamp': '2024-03-04T18:00:00', 'chave': 7},
+        ]}
+        status, resposta, _ = await self.pedido('/batidas/lote', lote)
+        self.assertEqual(status, 200)
+        self.assertEqual([r['status'] for r in resposta['resultados']], [201, 400, 400])
+        # A chave reservada no mesmo lote foi concluída: a nova tentativa não fica esperando
+        batida = {'usuario': 'joao', 'tipo': 'entrada', 'timestamp': '2024-03-04T08:00:00'}
+        status, _, extras = await asyncio.wait_for(self.pedido('/batidas', batida, {'idempotency-key': 'k1'}), 5)
+        self.assertEqual((status, extras), (201, {'Idempotent-Replayed': 'true'}))
+
+    async def test_falha_no_lote_libera_as_chaves(self):
+        def falhar(_):
+            raise RuntimeError("disco cheio")
+        self.dados.registrar_lote = falhar
+        lote = {'batidas': [{'usuario': 'joao', 'tipo': 'entrada', 'timestamp': '2024-03-04T08:00:00',
+                             'chave': 'k1'}]}
+        with self.assertRaises(RuntimeError):
+            await self.pedido('/batidas/lote', lote)
+        del self.dados.registrar_lote
+        _, resposta, _ = await asyncio.wait_for(self.pedido('/batidas/lote', lote), 5)
+        self.assertEqual(resposta['resultados'][0]['status'], 201)
+        self.assertNotIn('repetida', resposta['resultados'][0])
+
+
+class TestConexaoHTTP(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.dados = CamadaDados(MemoriaStore(), usuarios_padrao())
+        self.servidor = await ServidorBatidas(self.dados).iniciar('127.0.0.1:0')
+        self.porta = self.servidor.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.servidor.close()
+        await self.servidor.wait_closed()
+
+    async def enviar(self, cabecalhos: str, corpo: bytes = b'') -> str:
+        leitor, escritor = await asyncio.open_connection('127.0.0.1', self.porta)
+        escritor.write(f"POST /batidas HTTP/1.1\r\n{cabecalhos}\r\n".encode() + corpo)
+        resposta = (await leitor.read()).decode()
+        escritor.close()
+        return resposta
+
+    async def test_content_length_invalido(self):
+        resposta = await self.enviar("Content-Length: abc\r\n")
+        self.assertTrue(resposta.startswith('HTTP/1.1 400'), resposta)
+        self.assertIn('Content-Length', resposta)
+
+    async def test_value_error_do_registro_nao_vira_content_length(self):
+        def falhar(*_):
+            raise ValueError("valor fora do esperado")
+        self.dados.registrar_batida = falhar
+        corpo = json.dumps({'usuario': 'maria', 'tipo': 'entrada'}).encode()
+        resposta = await self.enviar(f"Content-Length: {len(corpo)}\r\nConnection: close\r\n", corpo)
+        self.assertTrue(resposta.startswith('HTTP/1.1 500'), resposta)
+        self.assertNotIn('Content-Length inv', resposta)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""Arquivamento de meses fechados: consultas e relatórios iguais aos de antes.
+
+    python -m unittest tests.test_arquivo
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date, datetime
+
+import pandas as pd
+
+from benchmarks.sintetico import gerar_batidas, gerar_usuarios
+from ponto.armazenamento import SQLiteStore
+from ponto.arquivo import ArquivoBatidas
+from ponto.dados import CamadaDados
+from ponto.fechamento import FechamentosMes, relatorio_periodo
+
+PERIODOS = [(None, None), ('2023-01-15', '2023-05-10'), ('2023-03-01', '2023-03-31'), ('2023-03-10', '2023-03-10'),
+            ('2023-02-27', '2023-02-27'), (None, '2023-03-05'), ('2023-04-20', None)]
+RELATORIOS = [(date(2023, 2, 10), date(2023, 4, 20)), (date(2023, 3, 5), date(2023, 3, 25)),
+              (date(2023, 1, 15), date(2023, 3, 31))]
+
+
+class TestArquivo(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp(prefix='test_arquivo_')
+        self.addCleanup(shutil.rmtree, self.pasta, ignore_errors=True)
+        self.usuarios = gerar_usuarios(12)
+        self.batidas = list(gerar_batidas(list(self.usuarios), 150, inicio=date(2023, 1, 1),
+                                          faltas=0.05, duplicadas=0.02, extras=0.1))
+
+    def abrir(self, formato: str) -> CamadaDados:
+        os.makedirs(os.path.join(self.pasta, formato), exist_ok=True)
+        store = SQLiteStore(os.path.join(self.pasta, formato, 'ponto.db'))
+        self.addCleanup(store.fechar)
+        return CamadaDados(store, self.usuarios, FechamentosMes(os.path.join(self.pasta, formato, 'fechamentos')),
+                           ArquivoBatidas(os.path.join(self.pasta, formato, 'arquivo'), formato))
+
+    def coletar(self, dados: CamadaDados):
+        usuarios = sorted(self.usuarios)
+        resultado = {}
+        for usuario in usuarios[:3]:
+            for inicio, fim in PERIODOS:
+                resultado['batidas', usuario, inicio, fim] = [dict(b) for b in dados.batidas_usuario(usuario, inicio, fim)]
+                resultado['resumo', usuario, inicio, fim] = tuple(dados.resumo_periodo(usuario, inicio, fim))
+                resultado['tabela', usuario, inicio, fim] = dados.tabela_usuario(usuario, inicio, fim)
+                for pagina in [(0, 50), (37, 100), (150, 7)]:
+                    resultado['pagina', usuario, inicio, fim, pagina] = [
+                        dict(b) for b in dados.pagina_batidas(usuario, inicio, fim, *pagina)]
+        for inicio, fim in PERIODOS:
+            resultado['linhas', inicio, fim] = list(dados.iterar_linhas(usuarios, inicio, fim, bloco=500))
+            resultado['contagem', inicio, fim] = dados.contar_batidas(usuarios, inicio, fim)
+        for inicio, fim in RELATORIOS:
+            for nome, tabela in relatorio_periodo(dados, inicio, fim).items():
+                resultado['relatorio', nome, inicio, fim] = tabela
+        return resultado
+
+    def assertColetasIguais(self, antes, depois):
+        self.assertEqual(antes.keys(), depois.keys())
+        for chave, esperado in antes.items():
+            if isinstance(esperado, pd.DataFrame):
+                # Colunas de texto vêm como str do log e object do arquivo
+                pd.testing.assert_frame_equal(depois[chave].reset_index(drop=True), esperado.reset_index(drop=True),
+                                              check_dtype=False, check_exact=False, obj=str(chave))
+            else:
+                self.assertEqual(depois[chave], esperado, chave)
+
+    def test_consultas_iguais_antes_e_depois(self):
+        for formato in ['arrow', 'parquet']:
+            with self.subTest(formato=formato):
+                dados = self.abrir(formato)
+                dados.registrar_lote(self.batidas)
+                antes = self.coletar(dados)
+                for mes in (2, 3, 5):
+                    dados.fechar_mes(2023, mes)
+                    self.assertGreater(dados.arquivar_mes(2023, mes), 0)
+                self.assertColetasIguais(antes, self.coletar(dados))
+
+    def test_regras_e_reabertura(self):
+        dados = self.abrir('arrow')
+        dados.registrar_lote(self.batidas)
+        with self.assertRaises(ValueError):
+            dados.arquivar_mes(2023, 4)  # aberto
+        dados.fechar_mes(2023, 3)
+        dados.arquivar_mes(2023, 3)
+        with self.assertRaises(ValueError):
+            dados.reabrir_mes(2023, 3)  # arquivado
+
+        # Meses vivos continuam recebendo batidas; o arquivo volta numa camada nova
+        usuario = sorted(self.usuarios)[0]
+        dados.registrar_batida(usuario, 'entrada', datetime(2023, 7, 25, 8))
+        depois = self.coletar(dados)
+        self.assertColetasIguais(depois, self.coletar(self.abrir('arrow')))
+
+
+if __name__ == '__main__':
+    unittest.main()
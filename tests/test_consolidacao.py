@@ -0,0 +1,67 @@
+"""``ConsolidadoHoras`` incremental igual ao recálculo de ``verificar_consolidado``.
+
+    python -m unittest tests.test_consolidacao
+"""
+import random
+import unittest
+from datetime import date, datetime
+
+from benchmarks.sintetico import gerar_batidas, gerar_usuarios
+from ponto.armazenamento import MemoriaStore
+from ponto.consolidacao import verificar_consolidado
+from ponto.dados import CamadaDados
+
+
+class TestConsolidacao(unittest.TestCase):
+
+    def setUp(self):
+        self.usuarios = gerar_usuarios(12)
+        self.batidas = list(gerar_batidas(list(self.usuarios), 90, inicio=date(2024, 1, 1),
+                                          faltas=0.05, duplicadas=0.02, extras=0.1))
+        self.store = MemoriaStore()
+        self.dados = CamadaDados(self.store, self.usuarios)
+
+    def gravadas(self):
+        # O MemoriaStore lista na ordem de gravação; a folha quer a cronológica
+        return sorted(self.store.listar(), key=lambda b: b['timestamp'])
+
+    def assertIgualRecalculo(self):
+        self.assertEqual(verificar_consolidado(self.dados.consolidado, self.gravadas(),
+                                               self.dados.contratos_usuario), [])
+
+    def test_batidas_e_lotes_fora_de_ordem(self):
+        self.dados.consolidado  # carregado vazio: tudo incremental
+        resto = self.batidas[len(self.batidas) // 2:]
+        random.Random(1).shuffle(resto)
+        for i in range(0, len(resto), 53):
+            self.dados.registrar_lote(resto[i:i + 53])
+        for batida in self.batidas[:len(self.batidas) // 2:7]:
+            self.dados.registrar_batida(*batida)
+        self.assertIgualRecalculo()
+
+    def test_troca_de_rateio_com_vigencia(self):
+        self.dados.registrar_lote(self.batidas)
+        usuario = next(iter(self.usuarios))
+        self.dados.consolidado
+        self.dados.salvar_usuario(usuario, dict(self.usuarios[usuario], contratos={'Contrato Z': 100}),
+                                  vigencia='2024-02-10')
+        self.dados.salvar_usuario(usuario, dict(self.usuarios[usuario], contratos={'Contrato Y': 100}),
+                                  vigencia='2024-01-20')
+        self.dados.registrar_batida(usuario, 'extra1', datetime(2024, 1, 25, 19))
+        self.assertIgualRecalculo()
+        janeiro = self.dados.horas_contratos_mes(usuario, 2024, 1)
+        self.assertEqual(janeiro.keys() - self.usuarios[usuario]['contratos'].keys(), {'Contrato Y'})
+
+    def test_divergencia_apontada(self):
+        self.dados.registrar_lote(self.batidas[:500])
+        # Batida gravada por fora da camada: o materializado fica para trás
+        usuario, tipo, instante = self.batidas[0]
+        self.store.registrar(usuario, 'saida', instante.replace(hour=23))
+        divergencias = verificar_consolidado(self.dados.consolidado, self.gravadas(),
+                                             self.dados.contratos_usuario)
+        self.assertTrue(any(d.startswith(f"dias ('{usuario}', '{instante.date()}')") for d in divergencias),
+                        divergencias)
+
+
+if __name__ == '__main__':
+    unittest.main()
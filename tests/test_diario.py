@@ -0,0 +1,145 @@
+"""Recuperação do ``DiarioStore`` depois de quedas.
+
+    python -m unittest tests.test_diario
+"""
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from datetime import date, datetime, timedelta
+
+from ponto.armazenamento import StoreEmUso
+from ponto.diario import DiarioStore
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Grava lotes sem parar e escreve cada id confirmado, até ser morto
+FILHO = """
+import random, sys
+from datetime import datetime, timedelta
+from ponto.diario import DiarioStore
+store = DiarioStore(sys.argv[1], intervalo=2000)
+aleatorio = random.Random(int(sys.argv[2]))
+inicio = datetime(2024, 1, 1)
+while True:
+    lote = [(f"func{aleatorio.randrange(50):02d}", 'entrada',
+             inicio + timedelta(seconds=aleatorio.randrange(86400 * 60)))
+            for _ in range(aleatorio.randrange(1, 300))]
+    ids = store.registrar_lote(lote)
+    sys.stdout.write(''.join(f"{i}\\n" for i in ids))
+    sys.stdout.flush()
+"""
+
+
+def diario_atual(pasta: str) -> str:
+    numero = max(int(nome.split('.')[1]) for nome in os.listdir(pasta) if nome.endswith('.log'))
+    return os.path.join(pasta, f"diario.{numero}.log")
+
+
+def gerar(aleatorio: random.Random, quantidade: int):
+    inicio = datetime(2024, 1, 1)
+    return [(f"func{aleatorio.randrange(20):02d}", aleatorio.choice(['entrada', 'saida']),
+             inicio + timedelta(seconds=aleatorio.randrange(86400 * 90))) for _ in range(quantidade)]
+
+
+class TestRecuperacaoDiario(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp(prefix='test_diario_')
+        self.addCleanup(shutil.rmtree, self.pasta, ignore_errors=True)
+        self.abertos = []
+
+    def abrir(self, **opcoes) -> DiarioStore:
+        store = DiarioStore(self.pasta, **opcoes)
+        self.abertos.append(store)
+        return store
+
+    def tearDown(self):
+        for store in self.abertos:
+            if store._escritora.is_alive():
+                store.fechar(instantaneo=False)
+
+    @unittest.skipUnless(hasattr(signal, 'SIGKILL'), "precisa de SIGKILL")
+    def test_sigkill_no_meio_da_escrita(self):
+        aleatorio = random.Random(1)
+        confirmados = set()
+        ambiente = dict(os.environ, PYTHONPATH=RAIZ)
+        for vez in range(5):
+            processo = subprocess.Popen([sys.executable, '-c', FILHO, self.pasta, str(vez)],
+                                        stdout=subprocess.PIPE, cwd=RAIZ, env=ambiente)
+            time.sleep(aleatorio.uniform(0.5, 1.5))
+            processo.send_signal(signal.SIGKILL)
+            saida, _ = processo.communicate()
+            # A última linha pode ter sido cortada pelo SIGKILL
+            confirmados.update(int(linha) for linha in saida.split(b'\n')[:-1] if linha)
+
+            store = self.abrir(intervalo=2000)
+            ids, _ = store.colunas()
+            gravados = ids.tolist()
+            store.fechar(instantaneo=False)
+            self.assertEqual(len(gravados), len(set(gravados)), "id repetido após reabertura")
+            self.assertFalse(confirmados - set(gravados), "batida confirmada perdida")
+        self.assertTrue(confirmados)
+
+    def test_final_cortado_descartado(self):
+        store = self.abrir(intervalo=float('inf'))
+        store.registrar_lote(gerar(random.Random(2), 500))
+        antes = store.listar()
+        caminho = diario_atual(self.pasta)
+        valido = os.path.getsize(caminho)
+        store.registrar('func00', 'entrada', datetime(2024, 6, 1, 8))
+        store.fechar(instantaneo=False)
+
+        # Última batida cortada ao meio e seguida de lixo, como numa queda durante o write
+        with open(caminho, 'r+b') as arquivo:
+            arquivo.truncate(os.path.getsize(caminho) - 5)
+        with open(caminho, 'ab') as arquivo:
+            arquivo.write(os.urandom(37))
+
+        store = self.abrir(intervalo=float('inf'))
+        self.assertEqual(store.listar(), antes)
+        self.assertEqual(os.path.getsize(caminho), valido)
+        nova = store.registrar('func00', 'saida', datetime(2024, 6, 1, 17))
+        store.fechar(instantaneo=False)
+        store = self.abrir(intervalo=float('inf'))
+        self.assertEqual(store.listar(), sorted(antes + [nova], key=lambda b: b['timestamp']))
+
+    def test_instantaneo_mais_diario_igual_ao_gravado(self):
+        aleatorio = random.Random(3)
+        esperado = []
+        store = self.abrir(intervalo=700)
+        for lote in range(12):
+            batidas = gerar(aleatorio, aleatorio.randrange(50, 250))
+            ids = store.registrar_lote(batidas)
+            esperado.extend((id_batida,) + batida for id_batida, batida in zip(ids, batidas))
+            if lote == 6:
+                store.remover_periodo('2024-02-01', '2024-02-10')
+                esperado = [b for b in esperado if not date(2024, 2, 1) <= b[3].date() <= date(2024, 2, 10)]
+        esperado.sort()
+        store.fechar(instantaneo=False)
+        self.assertTrue(any(nome.startswith('instantaneo.') for nome in os.listdir(self.pasta)))
+
+        # Instantâneo da última troca + diário desde então
+        store = self.abrir(intervalo=700)
+        obtido = sorted((b['id'], b['usuario'], b['tipo'], b['timestamp']) for b in store.listar())
+        self.assertEqual(obtido, esperado)
+        store.fechar()
+
+        # E só do instantâneo final
+        store = self.abrir(intervalo=700)
+        obtido = sorted((b['id'], b['usuario'], b['tipo'], b['timestamp']) for b in store.listar())
+        self.assertEqual(obtido, esperado)
+
+    def test_pasta_de_um_processo_so(self):
+        self.abrir()
+        with self.assertRaises(StoreEmUso):
+            DiarioStore(self.pasta)
+
+
+if __name__ == '__main__':
+    unittest.main()
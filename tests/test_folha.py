@@ -0,0 +1,61 @@
+"""``calcular_folhas`` vetorizado igual a ``horas_dia`` dia a dia.
+
+    python -m unittest tests.test_folha
+"""
+import unittest
+from datetime import date, datetime
+from itertools import groupby
+
+from benchmarks.sintetico import gerar_batidas, gerar_usuarios
+from ponto.armazenamento import MemoriaStore
+from ponto.folha import COLUNAS_FOLHA, calcular_folhas, horas_dia, tabela_batidas
+
+
+class TestFolha(unittest.TestCase):
+
+    def assertIgualDiaADia(self, batidas):
+        folhas = calcular_folhas(tabela_batidas(batidas)).set_index(['usuario', 'data'])
+        por_dia = {chave: list(grupo) for chave, grupo in
+                   groupby(sorted(batidas, key=lambda b: (b['usuario'], b['data'])),
+                           key=lambda b: (b['usuario'], b['data']))}
+        self.assertEqual(sorted(folhas.index), sorted(por_dia))
+        for (usuario, data), dia in por_dia.items():
+            esperado = horas_dia(dia, data)
+            obtido = folhas.loc[(usuario, data)]
+            for campo in ['entrada', 'saida', 'almoco_saida', 'almoco_retorno', 'extras']:
+                self.assertEqual(obtido[campo], esperado[campo], (usuario, data, campo))
+            self.assertAlmostEqual(obtido['total_horas'], esperado['total_horas'], places=9)
+            self.assertAlmostEqual(obtido['horas_almoco'], esperado['horas_almoco'], places=9)
+
+    def test_base_sintetica(self):
+        store = MemoriaStore()
+        store.registrar_lote(list(gerar_batidas(list(gerar_usuarios(15)), 60, inicio=date(2024, 1, 1),
+                                                faltas=0.1, duplicadas=0.05, extras=0.2)))
+        self.assertIgualDiaADia(sorted(store.listar(), key=lambda b: b['timestamp']))
+
+    def test_dias_incompletos_e_tipos_repetidos(self):
+        store = MemoriaStore()
+        store.registrar_lote([
+            # Só entrada; só almoço; saída antes da entrada
+            ('ana', 'entrada', datetime(2024, 3, 4, 8)),
+            ('ana', 'almoco_saida', datetime(2024, 3, 5, 12)),
+            ('ana', 'almoco_retorno', datetime(2024, 3, 5, 13)),
+            ('ana', 'saida', datetime(2024, 3, 6, 7)),
+            ('ana', 'entrada', datetime(2024, 3, 6, 9)),
+            # Entrada repetida (vale a última) e almoço sem retorno
+            ('bia', 'entrada', datetime(2024, 3, 4, 8)),
+            ('bia', 'entrada', datetime(2024, 3, 4, 8, 30)),
+            ('bia', 'almoco_saida', datetime(2024, 3, 4, 12)),
+            ('bia', 'extra1', datetime(2024, 3, 4, 18)),
+            ('bia', 'saida', datetime(2024, 3, 4, 17, 45, 30)),
+        ])
+        self.assertIgualDiaADia(sorted(store.listar(), key=lambda b: b['timestamp']))
+
+    def test_sem_batidas(self):
+        folhas = calcular_folhas(tabela_batidas([]))
+        self.assertTrue(folhas.empty)
+        self.assertEqual(list(folhas.columns), COLUNAS_FOLHA)
+
+
+if __name__ == '__main__':
+    unittest.main()
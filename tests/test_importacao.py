@@ -0,0 +1,78 @@
+"""Importação de AFD e CSV: tipos da jornada, duplicadas e reimportação.
+
+    python -m unittest tests.test_importacao
+"""
+import io
+import unittest
+
+from ponto.armazenamento import MemoriaStore
+from ponto.dados import CamadaDados
+from ponto.importacao import MOTIVO_DUPLICADA, MOTIVO_JORNADA, abrir_texto, importar_arquivo
+
+PIS = '12345678901'
+USUARIOS = {'ana': {'senha': '', 'nome': 'Ana', 'cargo': 'Analista', 'pis': PIS,
+                    'contratos': {'Contrato A': 100}}}
+
+
+def afd(*horarios: str, data: str = '04032024') -> str:
+    """AFD da Portaria 1510 com as marcações da Ana no dia ``data`` (ddmmaaaa)"""
+    return ''.join(f"{nsr:09d}3{data}{horario.replace(':', '')}{PIS:0>12}\r\n"
+                   for nsr, horario in enumerate(horarios, 1))
+
+
+class TestImportacao(unittest.TestCase):
+
+    def setUp(self):
+        self.dados = CamadaDados(MemoriaStore(), USUARIOS)
+
+    def importar(self, conteudo: str, formato: str = 'afd'):
+        relatorio = io.StringIO()
+        resultado = importar_arquivo(self.dados, io.StringIO(conteudo), formato, relatorio)
+        return resultado, relatorio.getvalue()
+
+    def tipos(self):
+        return [(b['horario'], b['tipo']) for b in self.dados.batidas_usuario('ana')]
+
+    def test_tipos_pela_ordem_do_dia(self):
+        resultado, _ = self.importar(afd('08:00', '12:00', '13:00', '17:00'))
+        self.assertEqual(resultado.importadas, 4)
+        self.assertEqual(self.tipos(), [('08:00:00', 'entrada'), ('12:00:00', 'almoco_saida'),
+                                        ('13:00:00', 'almoco_retorno'), ('17:00:00', 'saida')])
+        self.assertEqual(self.dados.consolidado.horas_dia('ana', '2024-03-04'), 8.0)
+
+    def test_reimportacao_so_descarta_duplicadas(self):
+        self.importar(afd('08:00', '12:00', '13:00', '17:00'))
+        resultado, relatorio = self.importar(afd('08:00', '12:00', '13:00', '17:00'))
+        self.assertEqual((resultado.importadas, resultado.duplicadas), (0, 4))
+        self.assertIn(MOTIVO_DUPLICADA, relatorio)
+
+    def test_afd_cumulativo_que_completa_a_jornada(self):
+        # Exportado depois do almoço e de novo no fim do dia
+        self.importar(afd('08:00', '12:00', '13:00'))
+        resultado, _ = self.importar(afd('08:00', '12:00', '13:00', '17:00'))
+        self.assertEqual((resultado.importadas, resultado.duplicadas), (1, 3))
+        self.assertEqual(self.tipos()[-1], ('17:00:00', 'saida'))
+        self.assertEqual(self.dados.consolidado.horas_dia('ana', '2024-03-04'), 8.0)
+
+    def test_afd_cumulativo_que_mudaria_tipos_gravados(self):
+        # Exportado ao meio-dia: 08:00 e 12:00 viram entrada e saída
+        self.importar(afd('08:00', '12:00'))
+        self.assertEqual(self.dados.consolidado.horas_dia('ana', '2024-03-04'), 4.0)
+        # No fim do dia a jornada inteira pediria almoco_saida às 12:00, que já
+        # está gravada como saida: as novas vão para o relatório, sem zerar o dia
+        resultado, relatorio = self.importar(afd('08:00', '12:00', '13:00', '17:00'))
+        self.assertEqual((resultado.importadas, resultado.duplicadas, resultado.rejeitadas), (0, 2, 2))
+        self.assertEqual(relatorio.count(MOTIVO_JORNADA), 2)
+        self.assertEqual(self.tipos(), [('08:00:00', 'entrada'), ('12:00:00', 'saida')])
+        self.assertEqual(self.dados.consolidado.horas_dia('ana', '2024-03-04'), 4.0)
+
+    def test_csv_com_bom(self):
+        conteudo = f"﻿pis;data;hora\r\n{PIS};04/03/2024;08:00\r\n{PIS};04/03/2024;17:00\r\n"
+        arquivo = abrir_texto(io.BytesIO(conteudo.encode('utf-8')))
+        resultado = importar_arquivo(self.dados, arquivo, 'csv', io.StringIO())
+        self.assertEqual((resultado.importadas, resultado.rejeitadas), (2, 0))
+        self.assertEqual(self.tipos(), [('08:00:00', 'entrada'), ('17:00:00', 'saida')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Log colunar e ``IndiceBatidas``: consultas, resumos e páginas iguais à varredura do store.
+
+    python -m unittest tests.test_indice
+"""
+import random
+import unittest
+from datetime import date, datetime, timedelta
+
+from benchmarks.sintetico import gerar_batidas, gerar_usuarios
+from ponto.armazenamento import MemoriaStore
+from ponto.dados import CamadaDados
+
+
+def campos(batidas):
+    return [(b['id'], b['usuario'], b['tipo'], b['data'], b['horario']) for b in batidas]
+
+
+class TestIndice(unittest.TestCase):
+
+    def setUp(self):
+        self.usuarios = gerar_usuarios(15)
+        self.store = MemoriaStore()
+        self.dados = CamadaDados(self.store, self.usuarios)
+        self.dados.registrar_lote(list(gerar_batidas(list(self.usuarios), 60, inicio=date(2024, 1, 1),
+                                                     faltas=0.05, duplicadas=0.02, extras=0.1)))
+        # Inserções fora de ordem, uma a uma e em lote, depois da carga do índice
+        self.aleatorio = random.Random(3)
+        self.dados.indice
+        avulsas = [(self.aleatorio.choice(list(self.usuarios)), self.aleatorio.choice(['entrada', 'saida']),
+                    datetime(2024, 1, 1) + timedelta(minutes=self.aleatorio.randrange(60 * 24 * 90)))
+                   for _ in range(400)]
+        for batida in avulsas[:200]:
+            self.dados.registrar_batida(*batida)
+        self.dados.registrar_lote(avulsas[200:])
+
+    def periodos(self, quantidade: int):
+        yield None, None
+        for _ in range(quantidade):
+            datas = sorted((date(2023, 12, 20) + timedelta(days=self.aleatorio.randrange(110))).isoformat()
+                           for _ in range(2))
+            yield self.aleatorio.choice([datas[0], None]), datas[1]
+
+    def varredura(self, usuario, data_inicio, data_fim):
+        return sorted(self.store.listar(usuario, data_inicio, data_fim), key=lambda b: (b['timestamp'], b['id']))
+
+    def test_log_igual_ao_store(self):
+        self.assertEqual(len(self.dados.log), len(self.store.listar()))
+        self.assertEqual(sorted(campos(self.dados.log.linha(i) for i in range(len(self.dados.log)))),
+                         sorted(campos(self.store.listar())))
+
+    def test_periodos_iguais_a_varredura(self):
+        for usuario in list(self.usuarios)[:5]:
+            for data_inicio, data_fim in self.periodos(40):
+                esperadas = self.varredura(usuario, data_inicio, data_fim)
+                obtidas = self.dados.batidas_usuario(usuario, data_inicio, data_fim)
+                self.assertEqual(campos(obtidas), campos(esperadas), (usuario, data_inicio, data_fim))
+                self.assertEqual(self.dados.resumo_periodo(usuario, data_inicio, data_fim),
+                                 (len(esperadas), len({b['data'] for b in esperadas}),
+                                  sum(b['tipo'] == 'entrada' for b in esperadas)))
+
+    def test_paginas_iguais_as_fatias(self):
+        for usuario in list(self.usuarios)[:5]:
+            for data_inicio, data_fim in self.periodos(20):
+                todas = campos(self.varredura(usuario, data_inicio, data_fim))
+                for limite in [1, 7, 50]:
+                    for deslocamento in [0, 3, len(todas) - 2, len(todas) + 5]:
+                        deslocamento = max(0, deslocamento)
+                        pagina = self.dados.pagina_batidas(usuario, data_inicio, data_fim, deslocamento, limite)
+                        self.assertEqual(campos(pagina), todas[deslocamento:deslocamento + limite])
+
+    def test_dia(self):
+        usuario, data = next(iter(self.usuarios)), '2024-02-14'
+        self.assertEqual(campos(self.dados.batidas_usuario(usuario, data, data)),
+                         campos(self.varredura(usuario, data, data)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""``OcupacaoPonto``: atualização incremental igual à carga completa.
+
+    python -m unittest tests.test_ocupacao
+"""
+import unittest
+from datetime import date, datetime
+
+import numpy as np
+
+from benchmarks.sintetico import gerar_batidas, gerar_usuarios
+from ponto.armazenamento import MemoriaStore
+from ponto.dados import CamadaDados
+from ponto.ocupacao import OcupacaoPonto
+
+PERIODO = ('2024-01-01', '2024-04-30')
+
+
+class TestOcupacao(unittest.TestCase):
+
+    def setUp(self):
+        self.usuarios = gerar_usuarios(12)
+        self.batidas = list(gerar_batidas(list(self.usuarios), 120, inicio=date(2024, 1, 1),
+                                           faltas=0.05, duplicadas=0.02, extras=0.1))
+        self.dados = CamadaDados(MemoriaStore(), self.usuarios)
+
+    def recarregada(self) -> OcupacaoPonto:
+        ocupacao = OcupacaoPonto(self.dados.rateio)
+        ocupacao.carregar([self.dados.log.colunas()])
+        return ocupacao
+
+    def assertIgualCarga(self):
+        carga = self.recarregada()
+        # Contrato que ficou sem ninguém continua com linha (zerada) só no incremental
+        for contrato in [None] + sorted(set(carga.contratos()) | set(self.dados.ocupacao.contratos())):
+            np.testing.assert_allclose(self.dados.ocupacao.semana(*PERIODO, contrato),
+                                       carga.semana(*PERIODO, contrato), err_msg=str(contrato))
+
+    def test_lotes_fora_de_ordem_igual_a_carga(self):
+        metade = len(self.batidas) // 2
+        self.dados.registrar_lote(self.batidas[metade:])
+        self.dados.ocupacao
+        for i in range(0, metade, 97):
+            self.dados.registrar_lote(self.batidas[i:i + 97])
+        self.assertIgualCarga()
+
+    def test_rateio_com_vigencia_so_move_os_dias_dela(self):
+        self.dados.registrar_lote(self.batidas)
+        usuario = next(iter(self.usuarios))
+        antes = {contrato: self.dados.ocupacao.semana('2024-03-01', '2024-03-31', contrato)
+                 for contrato in self.dados.ocupacao.contratos()}
+
+        # Vigência futura: março continua nos contratos de antes
+        self.dados.salvar_usuario(usuario, dict(self.usuarios[usuario], contratos={'Contrato Z': 100}),
+                                  vigencia='2026-10-01')
+        for contrato, semana in antes.items():
+            np.testing.assert_allclose(self.dados.ocupacao.semana('2024-03-01', '2024-03-31', contrato), semana)
+        self.assertFalse(self.dados.ocupacao.semana('2024-03-01', '2024-03-31', 'Contrato Z').any())
+        self.assertIgualCarga()
+
+        # Vigência retroativa no meio de março, anterior à de 2026
+        self.dados.salvar_usuario(usuario, dict(self.usuarios[usuario], contratos={'Contrato Y': 100}),
+                                  vigencia='2024-03-15')
+        self.assertFalse(self.dados.ocupacao.semana('2024-03-01', '2024-03-14', 'Contrato Y').any())
+        self.assertTrue(self.dados.ocupacao.semana('2024-03-15', '2024-03-31', 'Contrato Y').any())
+        self.assertIgualCarga()
+
+        # Batidas novas nos dias de cada vigência
+        self.dados.registrar_lote([(usuario, 'entrada', datetime(2024, 4, 27, 8)),
+                                   (usuario, 'saida', datetime(2024, 4, 27, 12)),
+                                   (usuario, 'entrada', datetime(2024, 3, 2, 9)),
+                                   (usuario, 'saida', datetime(2024, 3, 2, 11))])
+        self.assertIgualCarga()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""``ratear`` vetorizado igual ao laço com ``RateioContratos.vigente`` dia a dia.
+
+    python -m unittest tests.test_rateio
+"""
+import random
+import unittest
+
+import numpy as np
+
+from benchmarks.bench_rateio import gerar_vigencias
+from benchmarks.sintetico import nome_usuario
+from ponto.anomalias import data_dia
+from ponto.rateio import DESDE_SEMPRE, RateioContratos, dia_epoca, ratear
+
+INICIO = dia_epoca('2024-01-01')
+
+
+class TestRatear(unittest.TestCase):
+
+    def setUp(self):
+        self.usuarios = [nome_usuario(f) for f in range(40)]
+        vigencias = gerar_vigencias(self.usuarios, 8, INICIO, 120, semente=3)
+        # Um usuário sem vigência desde sempre e outro sem rateio algum
+        vigencias[self.usuarios[0]] = [(INICIO + 30, {'Contrato 00': 100.0})]
+        del vigencias[self.usuarios[1]]
+        self.rateio = RateioContratos.de_vigencias(vigencias)
+
+        aleatorio = random.Random(4)
+        linhas = [(codigo, INICIO + aleatorio.randrange(120), aleatorio.randrange(8 * 3600))
+                  for codigo in range(len(self.usuarios)) for _ in range(60)]
+        self.codigos, self.dias, self.segundos = (np.array(coluna, dtype=np.int64) for coluna in zip(*linhas))
+
+    def laco(self, grupos):
+        esperado = {}
+        for codigo, dia, segundos, grupo in zip(self.codigos.tolist(), self.dias.tolist(),
+                                                 self.segundos.tolist(), grupos.tolist()):
+            for contrato, porcentagem in self.rateio.vigente(self.usuarios[codigo], data_dia(dia)).items():
+                chave = (grupo, contrato)
+                esperado[chave] = esperado.get(chave, 0.0) + segundos * porcentagem
+        return esperado
+
+    def assertIgualLaco(self, grupos, quantidade):
+        tabela = self.rateio.tabela(self.usuarios)
+        total, _ = ratear(tabela, self.codigos, self.dias, self.segundos, grupos, quantidade)
+        obtido = {(grupo, contrato): total[grupo, posicao]
+                  for grupo in range(quantidade) for posicao, contrato in enumerate(tabela.nomes_contrato)
+                  if total[grupo, posicao]}
+        esperado = self.laco(grupos)
+        self.assertEqual(obtido.keys(), esperado.keys())
+        for chave, valor in esperado.items():
+            self.assertAlmostEqual(obtido[chave], valor, delta=1e-6 * valor, msg=chave)
+
+    def test_por_usuario(self):
+        self.assertIgualLaco(self.codigos, len(self.usuarios))
+
+    def test_por_mes(self):
+        meses = self.dias.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+        self.assertIgualLaco(meses - meses.min(), int(meses.max() - meses.min()) + 1)
+
+    def test_sem_dias(self):
+        total, contagem = ratear(self.rateio.tabela(self.usuarios), *(np.array([], dtype=np.int64),) * 3)
+        self.assertFalse(total.any() or contagem.any())
+
+
+class TestRateioContratos(unittest.TestCase):
+
+    def test_definir_devolve_o_intervalo_substituido(self):
+        rateio = RateioContratos()
+        self.assertEqual(rateio.definir('ana', {'A': 100}, '2024-03-01'), ({}, DESDE_SEMPRE, None))
+        self.assertEqual(rateio.definir('ana', {'B': 100}, '2024-06-01'),
+                         ({'A': 100}, dia_epoca('2024-06-01'), None))
+        # Retroativa entre as duas: vale até a de junho
+        self.assertEqual(rateio.definir('ana', {'C': 100}, '2024-04-01'),
+                         ({'A': 100}, dia_epoca('2024-04-01'), dia_epoca('2024-06-01')))
+        self.assertEqual([rateio.vigente('ana', data) for data in ['2023-01-01', '2024-04-15', '2024-07-01']],
+                         [{'A': 100}, {'C': 100}, {'B': 100}])
+        self.assertEqual(rateio.atual('ana'), {'B': 100})
+
+
+if __name__ == '__main__':
+    unittest.main()